@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia: ``aprocess_message`` vs ``process_message`` en hilos.
+
+Simula un proveedor con latencia fija (clientes falsos, sin red) y mide cuánto
+tardan ``conversaciones`` turnos simultáneos:
+  - async: todas las conversaciones en un solo hilo con ``asyncio.gather``;
+  - hilos: ``process_message`` en un pool de ``hilos`` workers, como un
+    servidor Flask con ese número de hilos.
+
+Uso:
+    python benchmarks/bench_async.py [conversaciones] [latencia_ms] [hilos]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin caché de respuestas ni de FAQ, ni límites de RPM/TPM: se mide la espera del proveedor en cada conversación
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RATE_LIMIT_RPM"] = os.environ["RATE_LIMIT_TPM"] = "0"
+
+from core import llm_clients
+from core.agent import SalesAgent
+from benchmarks.bench_interpreter import load_corpus
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def fake_clients(latency):
+    """Clientes sync y async estilo chat.completions que tardan ``latency`` segundos."""
+    def create(**request):
+        time.sleep(latency)
+        return completion("Respuesta simulada")
+
+    async def acreate(**request):
+        await asyncio.sleep(latency)
+        return completion("Respuesta simulada")
+
+    sync_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=acreate)))
+    return sync_client, async_client
+
+
+def build_agents(count, sync_client):
+    agents = []
+    for _ in range(count):
+        agent = SalesAgent(api_provider="groq", api_key="bench")
+        agent.conversation.summary_trigger_turns = None  # Sin compactación de fondo durante la medición
+        agent.client = sync_client
+        agents.append(agent)
+    return agents
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 500) / 1000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    corpus = load_corpus()
+    sync_client, async_client = fake_clients(latency)
+    llm_clients.create_async_client = lambda provider, key: async_client
+
+    agents = build_agents(count, sync_client)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda pair: pair[1].process_message(corpus[pair[0] % len(corpus)]), enumerate(agents)))
+    threaded = time.perf_counter() - start
+
+    agents = build_agents(count, sync_client)
+
+    async def run_all():
+        return await asyncio.gather(*(
+            agent.aprocess_message(corpus[i % len(corpus)]) for i, agent in enumerate(agents)
+        ))
+
+    start = time.perf_counter()
+    replies = asyncio.run(run_all())
+    concurrent = time.perf_counter() - start
+    assert all(reply == "Respuesta simulada" for reply in replies)
+
+    print(f"\n{count} conversaciones, latencia del proveedor {latency * 1000:.0f} ms")
+    print(f"  process_message, {threads} hilos   {threaded:8.2f} s")
+    print(f"  aprocess_message, 1 hilo   {concurrent:8.2f} s")
+    print()
+
+
+if __name__ == "__main__":
+    main()
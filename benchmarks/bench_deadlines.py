@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los plazos por petición.
+
+Corre las conversaciones guionadas de ``bench_rule_router`` contra un
+proveedor simulado donde ``cola`` de las llamadas queda colgada
+``colgada_ms`` (un proveedor que no responde), primero sin plazo y después con
+``plazo_ms``, y muestra la latencia por turno (p50, p95 y máxima), cuántas
+llamadas se cortaron y cuántas respuestas salieron del motor de reglas.
+
+Después lanza conversaciones async y cancela la mitad de las tareas a los
+50 ms (visitantes que cierran la pestaña): las llamadas en curso se cancelan
+y cuentan como desconexión.
+
+Uso:
+    python benchmarks/bench_deadlines.py [repeticiones] [plazo_ms] [colgada_ms] [cola]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin caché de respuestas ni de FAQ, ni límites de RPM/TPM, y sin motor de reglas: cada turno es una llamada
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RULE_ROUTER_MAX_WORDS"] = "0"
+os.environ["RATE_LIMIT_RPM"] = os.environ["RATE_LIMIT_TPM"] = "0"
+
+from core import deadline, llm_clients
+from core.agent import SalesAgent
+from core.deadline import DeadlinePolicy
+from benchmarks.bench_rule_router import SCRIPTS
+from benchmarks.fake_provider import FakeProvider
+
+
+def quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(label, policy, provider, repetitions):
+    deadline._policy = policy
+    provider.requests = provider.timeouts = 0
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for script in SCRIPTS:
+            agent = SalesAgent(api_provider="groq", api_key="bench")
+            agent.conversation.summary_trigger_turns = None
+            for message in script:
+                turn_start = time.perf_counter()
+                agent.process_message(message)
+                latencies.append(time.perf_counter() - turn_start)
+    elapsed = time.perf_counter() - start
+
+    stats = policy.stats()
+    print(f"  {label:<14} {elapsed:7.2f} s  por turno p50 {quantile(latencies, 0.5) * 1000:6.0f} ms"
+          f"  p95 {quantile(latencies, 0.95) * 1000:6.0f} ms  máx {max(latencies) * 1000:6.0f} ms")
+    print(f"  {'':<14} llamadas {stats['calls']}, a tiempo {stats['outcomes']['completed']},"
+          f" cortadas {stats['cut_short']}, respuestas del motor de reglas {stats['local_fallbacks']}")
+
+
+def run_disconnects(policy, conversations):
+    deadline._policy = policy
+
+    async def visitor(index):
+        agent = SalesAgent(api_provider="groq", api_key="bench")
+        agent.conversation.summary_trigger_turns = None
+        return await agent.aprocess_message(SCRIPTS[index % len(SCRIPTS)][0])
+
+    async def main():
+        tasks = [asyncio.ensure_future(visitor(index)) for index in range(conversations)]
+        await asyncio.sleep(0.05)
+        for task in tasks[::2]:
+            task.cancel()  # Cierra la pestaña
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    answered = sum(1 for result in results if isinstance(result, str))
+    stats = policy.stats()
+    print(f"  {conversations} visitantes async, la mitad se va a los 50 ms: {elapsed:.2f} s,"
+          f" respondidos {answered}, llamadas canceladas por desconexión {stats['outcomes']['disconnected']}")
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    limit = (float(sys.argv[2]) if len(sys.argv) > 2 else 1000) / 1000
+    hung = (float(sys.argv[3]) if len(sys.argv) > 3 else 4000) / 1000
+    tail = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+
+    provider = FakeProvider("groq", latency=0.1, tail_latency=hung, tail_ratio=tail)
+    llm_clients.create_client = lambda name, key, model=None: provider.client
+    llm_clients.create_async_client = lambda name, key: provider.async_client
+
+    print(f"\n{repetitions * len(SCRIPTS)} conversaciones guionadas, latencia 100 ms,"
+          f" {tail * 100:.0f}% de llamadas colgadas {hung * 1000:.0f} ms\n")
+    run("sin plazo", DeadlinePolicy(seconds=0), provider, repetitions)
+    run(f"plazo {limit * 1000:.0f} ms", DeadlinePolicy(seconds=limit, fallback_seconds=limit / 5), provider, repetitions)
+    print()
+    run_disconnects(DeadlinePolicy(seconds=limit, fallback_seconds=limit / 5), 20)
+    print()
+
+
+if __name__ == "__main__":
+    main()
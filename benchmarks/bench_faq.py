@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la caché semántica de preguntas frecuentes.
+
+Compara el índice de ``SemanticFAQCache`` (una multiplicación matriz-vector
+NumPy contra todas las preguntas de ejemplo) con la búsqueda por fuerza
+bruta (coseno en Python puro contra cada vector disperso), con las
+preguntas reales de ``config/faq.py`` y con índices sintéticos más grandes.
+También muestra cuántas paráfrasis acierta con el umbral configurado y
+cuántos mensajes que no son FAQ deja pasar al modelo.
+
+Uso:
+    python benchmarks/bench_faq.py [consultas] [tamaños_sintéticos...]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.faq import build_faq_entries
+from config.settings import get_settings
+from core.faq_cache import FAQEntry, SemanticFAQCache
+
+# Paráfrasis que no están entre las preguntas de ejemplo -> respuesta esperada
+PARAPHRASES = [
+    ("cuanto cuesta", "precio"),
+    ("y cuánto cuestan los agentes?", "precio"),
+    ("precio del agente", "precio"),
+    ("cuanto me sale", "precio"),
+    ("Precio?", "precio"),
+    ("en cuanto tiempo lo tienen listo", "tiempo_implementacion"),
+    ("cuánto se demoran", "tiempo_implementacion"),
+    ("¿Y cuánto tiempo tarda la implementación?", "tiempo_implementacion"),
+    ("se puede usar con whatsapp", "whatsapp"),
+    ("que ofrecen", "catalogo"),
+    ("puede agendar mis citas", "citas"),
+    ("¿atiende en la noche?", "horario"),
+]
+
+# Mensajes que deben ir al modelo
+NOT_FAQ = [
+    "hola",
+    "Hola, buenas tardes, quisiera información",
+    "tengo una tienda de ropa",
+    "Tengo una clínica dental",
+    "Necesitamos automatizar las reservas de citas",
+    "Perdemos muchas ventas porque no respondemos rápido los mensajes",
+    "me interesa",
+    "Es muy caro para nosotros",
+    "No estoy seguro de que funcione",
+    "Por la tarde",
+    "funciona con wsp?",
+    "no funciona con whatsapp",
+    "no me interesa el precio",
+    "cuanto cuesta un empleado",
+    "ya tengo whatsapp business",
+]
+
+
+def cosine(a, b):
+    """Producto punto de dos vectores dispersos de norma 1."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+class BruteForceFAQ:
+    """Misma búsqueda que SemanticFAQCache.search, pero en Python contra cada pregunta."""
+
+    def __init__(self, cache):
+        self.vectorizer = cache.vectorizer
+        self.rows = [(entry.name, self.vectorizer.features(question)) for entry, question in cache._rows]
+
+    def search(self, message):
+        query = self.vectorizer.features(message)
+        if not query:
+            return None
+        return max(((name, cosine(query, vector)) for name, vector in self.rows), key=lambda item: item[1])
+
+
+def synthetic_entries(size, rng):
+    """Respuestas sintéticas armadas con las palabras de las preguntas reales, hasta ``size`` preguntas."""
+    words = sorted({word for entry in build_faq_entries() for q in entry.questions for word in q.strip("¿?").split()})
+    entries, total = [], 0
+    while total < size:
+        questions = tuple(" ".join(rng.sample(words, rng.randint(3, 7))) for _ in range(8))
+        entries.append(FAQEntry(f"sintetica_{len(entries)}", "-", questions))
+        total += len(questions)
+    return entries
+
+
+def timed(search, queries):
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def compare(label, cache, queries):
+    brute = BruteForceFAQ(cache)
+    index_time, index_results = timed(cache.search, queries)
+    brute_time, brute_results = timed(brute.search, queries)
+    agree = sum(
+        (a is None and b is None) or (a is not None and b is not None and a.name == b[0])
+        for a, b in zip(index_results, brute_results)
+    )
+    print(f"  {label:<22} {cache._size:>6} preguntas  índice {index_time * 1e6:8.1f} µs"
+          f"  fuerza bruta {brute_time * 1e6:9.1f} µs  ({brute_time / index_time:5.1f}x)"
+          f"  coinciden {agree}/{len(queries)}")
+
+
+def main():
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sizes = [int(arg) for arg in sys.argv[2:]] or [1000, 10000]
+    rng = random.Random(42)
+    threshold = get_settings().faq_similarity_threshold or 0.65
+
+    cache = SemanticFAQCache(build_faq_entries(), threshold=threshold)
+    hits = sum(1 for message, name in PARAPHRASES if (match := cache.lookup(message)) and match.name == name)
+    passed = sum(1 for message in NOT_FAQ if cache.lookup(message) is None)
+    print(f"\nUmbral {threshold}: paráfrasis acertadas {hits}/{len(PARAPHRASES)},"
+          f" mensajes que no son FAQ enviados al modelo {passed}/{len(NOT_FAQ)}\n")
+
+    messages = [message for message, _ in PARAPHRASES] + NOT_FAQ
+    queries = [rng.choice(messages) for _ in range(n_queries)]
+    compare("catálogo real", cache, queries)
+    for size in sizes:
+        synthetic = SemanticFAQCache(build_faq_entries(), threshold=threshold)
+        start = time.perf_counter()
+        for entry in synthetic_entries(size, rng):
+            synthetic.add(entry)
+        print(f"  {'':<22} inserción incremental de {size} preguntas en {time.perf_counter() - start:.2f} s")
+        compare(f"sintético {size}", synthetic, queries)
+    print()
+
+
+if __name__ == "__main__":
+    main()
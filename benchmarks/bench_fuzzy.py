@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark de búsqueda tolerante a errores de tipeo.
+
+Compara FuzzyIndex (índice de borrados precalculado) contra la búsqueda por
+fuerza bruta (distancia de edición contra cada término del vocabulario), con el
+vocabulario real (intenciones + perfilador) y con vocabularios sintéticos.
+
+Uso:
+    python benchmarks/bench_fuzzy.py [repeticiones] [consultas]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.lexicon import get_lexicon
+from core.message_interpreter import INTENT_ENGINE, normalize_text
+from utils.fuzzy_index import FuzzyIndex, edit_distance
+from benchmarks.bench_interpreter import load_corpus
+
+
+def real_vocabulary():
+    """Palabras del motor de intenciones y del léxico del perfilador."""
+    words = list(INTENT_ENGINE.fuzzy.vocabulary)
+    words += list(get_lexicon("profiler").fuzzy.vocabulary)
+    return list(dict.fromkeys(words))
+
+
+def add_typo(word, rng):
+    """Aplica un error de tipeo al azar: borrar, cambiar, insertar o transponer."""
+    i = rng.randrange(len(word))
+    kind = rng.choice("dsit")
+    if kind == "d":
+        return word[:i] + word[i + 1:]
+    if kind == "s":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    if kind == "i":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word
+
+
+def brute_force(index, word):
+    """Misma regla que FuzzyIndex.lookup, pero comparando contra todo el vocabulario."""
+    if word in index.known:
+        return word
+    distance = index.allowed_distance(word)
+    if not distance:
+        return None
+    best, best_key = None, None
+    for term, priority in index.vocabulary.items():
+        if len(term) < 6:
+            continue
+        term_distance = edit_distance(word, term, distance)
+        if term_distance <= distance and (best_key is None or (term_distance, priority) < best_key):
+            best, best_key = term, (term_distance, priority)
+    return best
+
+
+def bench(label, func, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for word in queries:
+            func(word)
+    per_query = (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+    print(f"  {label:<24} {per_query:9.1f} us/palabra")
+    return per_query
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    rng = random.Random(7)
+
+    vocabulary = real_vocabulary()
+    corpus_words = [w for m in load_corpus() for w in normalize_text(m).split()]
+    typos = [add_typo(w, rng) for w in vocabulary if len(w) >= 6 for _ in range(3)]
+    corpus_words = rng.sample(corpus_words, min(sample, len(corpus_words)))
+    typos = rng.sample(typos, min(sample, len(typos)))
+    queries = corpus_words + typos
+
+    print(f"\nConsultas: {len(corpus_words)} palabras del corpus + {len(typos)} con errores x {repeat} repeticiones")
+
+    for extra in (0, 1000, 10000):
+        words = vocabulary + [
+            "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 11)))
+            for _ in range(extra)
+        ]
+        start = time.perf_counter()
+        index = FuzzyIndex(words)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        mismatches = sum(1 for w in queries if index.lookup(w) != brute_force(index, w))
+        print(f"\nVocabulario: {len(index.vocabulary)} términos ({len(index)} variantes, {build_ms:.0f} ms al construir)")
+        naive = bench("fuerza bruta", lambda w: brute_force(index, w), queries, repeat)
+        fast = bench("índice de borrados", index.lookup, queries, repeat)
+        print(f"  Relación: {naive / fast:.1f}x  (diferencias: {mismatches})")
+    print()
+
+
+if __name__ == "__main__":
+    main()
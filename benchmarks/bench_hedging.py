@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark del router de proveedores: latencia de cola y caída de un proveedor.
+
+Usa dos proveedores falsos (benchmarks/fake_provider.py, sin red) y atiende
+``peticiones`` turnos nuevos con ``hilos`` workers, primero solo con Groq
+(como antes) y después con ``ProviderRouter`` entre Groq y OpenAI:
+  - cola: Groq con ``cola_pct``% de respuestas de 2 s; el hedge al p95 manda
+    esas peticiones también a OpenAI y gana la primera;
+  - caída: Groq falla siempre; sin router cada turno es el mensaje de error,
+    con router el circuito se abre y el tráfico pasa a OpenAI.
+
+Uso:
+    python benchmarks/bench_hedging.py [peticiones] [hilos] [cola_pct]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin caché de respuestas ni de FAQ, ni límites de RPM/TPM, y con key para el proveedor secundario del router
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RATE_LIMIT_RPM"] = os.environ["RATE_LIMIT_TPM"] = "0"
+os.environ["OPENAI_API_KEY"] = "bench"
+
+from core import llm_clients
+from core.agent import SalesAgent
+from core.provider_router import ProviderRouter
+from benchmarks.bench_interpreter import load_corpus
+from benchmarks.fake_provider import FakeProvider
+
+ERROR_REPLY = "problema técnico"
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(label, providers, router, corpus, count, threads):
+    """Atiende ``count`` turnos y muestra percentiles de latencia y respuestas de error."""
+    llm_clients.get_client_pool().clear()
+    llm_clients.create_client = lambda provider, key, model=None: providers[provider].client
+
+    def turn(i):
+        agent = SalesAgent(api_provider="groq", api_key="bench", router=router)
+        agent.conversation.summary_trigger_turns = None
+        start = time.perf_counter()
+        reply = agent.process_message(corpus[i % len(corpus)])
+        return time.perf_counter() - start, ERROR_REPLY in reply
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(turn, range(count)))
+
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, failed in results if failed)
+    sent = ", ".join(f"{name} {provider.requests}" for name, provider in providers.items())
+    print(f"  {label:<14} p50 {percentile(latencies, 0.50) * 1000:6.0f} ms"
+          f"  p95 {percentile(latencies, 0.95) * 1000:6.0f} ms"
+          f"  p99 {percentile(latencies, 0.99) * 1000:6.0f} ms"
+          f"  errores {errors:4d}  peticiones: {sent}")
+    if router is not None:
+        for name, state in router.stats()["providers"].items():
+            print(f"  {'':<14} {name}: circuito {state['circuit']}, hedges {state['hedges']},"
+                  f" gana como hedge {state['hedge_wins']}, failovers {state['failovers']},"
+                  f" aperturas {state['circuit_opens']}")
+
+
+def scenario(groq_options, corpus, count, threads):
+    def providers():
+        return {
+            "groq": FakeProvider("groq", latency=0.1, seed=1, **groq_options),
+            "openai": FakeProvider("openai", latency=0.15, tail_ratio=0.01, seed=2),
+        }
+
+    run("solo groq", providers(), None, corpus, count, threads)
+    router = ProviderRouter(["groq", "openai"], default_hedge_delay=0.3, hedge_min_samples=20)
+    run("router", providers(), router, corpus, count, threads)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    tail = (float(sys.argv[3]) if len(sys.argv) > 3 else 4) / 100
+
+    corpus = load_corpus()
+
+    print(f"\n{count} turnos, {threads} hilos")
+    print(f"\nCola lenta: {tail * 100:.0f}% de las respuestas de Groq tardan 2 s")
+    scenario({"tail_ratio": tail, "tail_latency": 2.0}, corpus, count, threads)
+    print("\nCaída: Groq falla todas las peticiones")
+    scenario({"error_rate": 1.0}, corpus, count, threads)
+    print()
+
+
+if __name__ == "__main__":
+    main()
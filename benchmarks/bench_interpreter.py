@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark del interpretador de mensajes.
+
+Compara el costo por mensaje del enfoque anterior (normalizar y ejecutar
+``re.search`` patrón por patrón en cada helper) contra el motor compilado,
+usando los mensajes guardados en qorax_leads.json.
+
+Uso:
+    python benchmarks/bench_interpreter.py [repeticiones]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.message_interpreter import (
+    INTENT_ENGINE, CHAR_MAP, OPTION_PATTERNS, AFFIRMATIVE_PATTERNS, NEGATIVE_PATTERNS,
+    PRICE_PATTERNS, TIME_PATTERNS, DOUBT_PATTERNS, PROBLEM_PATTERNS, AUTOMATION_PATTERNS,
+    MessageInterpreter
+)
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "qorax_leads.json")
+
+
+def load_corpus():
+    """Carga todos los mensajes (usuario y asistente) del archivo de leads."""
+    with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [msg["content"] for conv in data.get("conversations", {}).values() for msg in conv]
+
+
+def legacy_normalize(text):
+    """Normalización anterior: varias pasadas de replace y re.sub."""
+    if not text:
+        return ""
+    text = text.lower().strip()
+    for accented, normal in CHAR_MAP.items():
+        text = text.replace(accented, normal)
+    text = re.sub(r'[¿¡!?.,;:]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_matches_any(text, patterns):
+    normalized = legacy_normalize(text)
+    for pattern in patterns:
+        if re.search(pattern, normalized, re.IGNORECASE):
+            return True
+    return False
+
+
+def legacy_turn(message):
+    """Reproduce las llamadas típicas de un turno con el enfoque anterior."""
+    # detect_intent (vía is_affirmative / is_negative)
+    for _ in range(2):
+        if legacy_matches_any(message, NEGATIVE_PATTERNS) and not legacy_matches_any(message, AFFIRMATIVE_PATTERNS):
+            continue
+        if legacy_matches_any(message, AFFIRMATIVE_PATTERNS):
+            continue
+        if any(legacy_matches_any(message, p) for p in OPTION_PATTERNS.values()):
+            continue
+        for patterns in (PRICE_PATTERNS, TIME_PATTERNS, DOUBT_PATTERNS, PROBLEM_PATTERNS, AUTOMATION_PATTERNS):
+            if legacy_matches_any(message, patterns):
+                break
+    # Helpers individuales
+    for patterns in (PRICE_PATTERNS, TIME_PATTERNS, DOUBT_PATTERNS, PROBLEM_PATTERNS, AUTOMATION_PATTERNS):
+        legacy_matches_any(message, patterns)
+
+
+def compiled_turn(interpreter, message):
+    """Las mismas llamadas usando el motor compilado."""
+    interpreter.is_affirmative(message)
+    interpreter.is_negative(message)
+    interpreter.detect_selected_option(message)
+    interpreter.is_price_inquiry(message)
+    interpreter.is_time_inquiry(message)
+    interpreter.has_doubt(message)
+    interpreter.mentions_problem(message)
+    interpreter.mentions_automation(message)
+
+
+def bench(label, func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in corpus:
+            func(message)
+    elapsed = time.perf_counter() - start
+    per_message = elapsed / (repeat * len(corpus)) * 1e6
+    print(f"  {label:<32} {per_message:9.1f} us/mensaje")
+    return per_message
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    corpus = load_corpus()
+    interpreter = MessageInterpreter()
+
+    print(f"\nCorpus: {len(corpus)} mensajes x {repeat} repeticiones\n")
+
+    legacy = bench("anterior (re.search por patron)", legacy_turn, corpus, repeat)
+    scan = bench("motor compilado (sin cache)", INTENT_ENGINE._analyze, corpus, repeat)
+
+    def cached_turn(message):
+        compiled_turn(interpreter, message)
+    INTENT_ENGINE.analyze.cache_clear()
+    cached = bench("turno completo (con cache)", cached_turn, corpus, repeat)
+
+    print(f"\n  Aceleración escaneo único: {legacy / scan:.1f}x")
+    print(f"  Aceleración turno completo: {legacy / cached:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
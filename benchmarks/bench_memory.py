@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria de las conversaciones.
+
+Mide con tracemalloc:
+  - bytes por mensaje del historial (sin contar el texto, que se crea antes de
+    medir), incluyendo la caché de payloads de la API;
+  - bytes por sesión inactiva, creando ``sesiones`` SalesAgent en un dict igual
+    que ``web_app.py`` (solo el prompt del sistema, sin mensajes).
+
+Uso:
+    python benchmarks/bench_memory.py [sesiones] [mensajes]
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agent import SalesAgent
+from core.conversation import ConversationManager
+from benchmarks.bench_interpreter import load_corpus
+
+
+def measure(build):
+    """Bytes asignados (y aún vivos) por ``build``; devuelve (bytes, resultado)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def bench_messages(count):
+    """Historial de ``count`` mensajes (usuario/asistente alternados) en una conversación."""
+    corpus = load_corpus()
+    texts = [corpus[i % len(corpus)] + f" #{i}" for i in range(count)]
+    conversation = ConversationManager("FUTURE", "IAgentic Solutions")
+
+    def build():
+        for i, text in enumerate(texts):
+            if i % 2 == 0:
+                conversation.add_user_message(text)
+            else:
+                conversation.add_assistant_message(text)
+        return conversation
+
+    plain, _ = measure(build)
+    cached, _ = measure(lambda: conversation.get_api_payload("chat"))
+    print(f"\nMensajes: {count}")
+    print(f"  Historial                {plain / count:8.1f} bytes/mensaje")
+    print(f"  + caché de payloads      {(plain + cached) / count:8.1f} bytes/mensaje")
+
+
+def bench_sessions(count):
+    """``count`` sesiones inactivas, como el dict ``agents`` de web_app.py."""
+    def build():
+        agents = {}
+        for i in range(count):
+            agents[f"session-{i}"] = SalesAgent(api_provider="demo")
+        return agents
+
+    size, agents = measure(build)
+    agent = next(iter(agents.values()))
+    prompt = len(agent.conversation.messages[0].content.encode("utf-8"))
+    print(f"\nSesiones inactivas: {count}")
+    print(f"  Total                    {size / 1024 / 1024:8.1f} MB")
+    print(f"  Por sesión               {size / count:8.0f} bytes (prompt del sistema compartido: ~{prompt} bytes)")
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    messages = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    bench_messages(messages)
+    bench_sessions(sessions)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los niveles de modelo por fase.
+
+Corre las conversaciones guionadas de ``bench_rule_router`` contra un
+proveedor simulado donde el modelo chico de Groq responde en ``chico_ms`` y
+el grande en ``grande_ms``, primero con todo al modelo grande y después con
+``TierPolicy``, y muestra por nivel las peticiones, la latencia y los tokens
+de salida, y el tiempo total de cada variante.
+
+Uso:
+    python benchmarks/bench_model_tiers.py [repeticiones] [chico_ms] [grande_ms]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin caché de respuestas ni de FAQ, ni límites de RPM/TPM, y sin motor de reglas: cada turno es una llamada
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RULE_ROUTER_MAX_WORDS"] = "0"
+os.environ["RATE_LIMIT_RPM"] = os.environ["RATE_LIMIT_TPM"] = "0"
+
+from config.settings import get_settings
+from core import llm_clients, model_tiers
+from core.agent import SalesAgent
+from core.model_tiers import TIER_LARGE, TIER_SMALL, TierPolicy
+from benchmarks.bench_rule_router import SCRIPTS
+from benchmarks.fake_provider import FakeProvider
+
+
+def run(label, policy, repetitions):
+    model_tiers._policy = policy
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for script in SCRIPTS:
+            agent = SalesAgent(api_provider="groq", api_key="bench")
+            agent.conversation.summary_trigger_turns = None
+            for message in script:
+                agent.process_message(message)
+    elapsed = time.perf_counter() - start
+
+    print(f"  {label:<16} {elapsed:7.2f} s")
+    for name, tier in policy.stats()["tiers"].items():
+        print(f"  {'':<16} {name:<12} {tier['model']:<26} peticiones {tier['requests']:3d}"
+              f"  media {tier['avg_ms']:6.1f} ms  p95 {tier['p95_ms']:6.1f} ms"
+              f"  tokens de salida {tier['completion_tokens']}")
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    small = (float(sys.argv[2]) if len(sys.argv) > 2 else 80) / 1000
+    large = (float(sys.argv[3]) if len(sys.argv) > 3 else 300) / 1000
+
+    settings = get_settings()
+    small_model, _ = settings.model_for("groq", TIER_SMALL)
+    large_model, _ = settings.model_for("groq", TIER_LARGE)
+    provider = FakeProvider("groq", latency=large, model_latency={small_model: small, large_model: large},
+                            reply_tokens=400)
+    llm_clients.create_client = lambda name, key, model=None: provider.client
+
+    print(f"\n{repetitions * len(SCRIPTS)} conversaciones guionadas, {small_model} {small * 1000:.0f} ms,"
+          f" {large_model} {large * 1000:.0f} ms\n")
+    run("todo al grande", TierPolicy(settings, small_max_words=0), repetitions)
+    run("por nivel", TierPolicy(settings), repetitions)
+    print()
+
+
+if __name__ == "__main__":
+    main()
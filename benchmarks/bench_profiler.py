@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark de detección de palabras clave del perfilador.
+
+Compara los escaneos anidados ``any(kw in message for kw in ...)`` contra el
+autómata Aho-Corasick del léxico "profiler" (config/lexicon.json), con el vocabulario actual
+y con vocabularios sintéticos más grandes (simulando listas por vertical).
+
+Uso:
+    python benchmarks/bench_profiler.py [repeticiones]
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.lexicon import get_lexicon
+from utils.keyword_automaton import KeywordAutomaton
+from benchmarks.bench_interpreter import load_corpus
+
+
+def profiler_groups():
+    """Todas las listas del léxico del perfilador como ``{(categoría, grupo): palabras}``."""
+    lexicon = get_lexicon("profiler")
+    return {
+        (category, group): list(words)
+        for category, groups in lexicon.categories.items()
+        for group, words in groups.items()
+    }
+
+
+def synthetic_groups(extra_words, seed=7):
+    """Agrega palabras aleatorias al vocabulario real (nuevas verticales)."""
+    rng = random.Random(seed)
+    groups = {label: list(words) for label, words in profiler_groups().items()}
+    labels = list(groups)
+    for _ in range(extra_words):
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+        groups[rng.choice(labels)].append(word)
+    return groups
+
+
+def naive_scan(groups, message):
+    return {label for label, words in groups.items() if any(kw in message for kw in words)}
+
+
+def bench(label, func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in corpus:
+            func(message)
+    per_message = (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+    print(f"  {label:<28} {per_message:9.1f} us/mensaje")
+    return per_message
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    corpus = [m.lower() for m in load_corpus()]
+
+    print(f"\nCorpus: {len(corpus)} mensajes x {repeat} repeticiones")
+
+    for extra in (0, 500, 5000):
+        groups = synthetic_groups(extra)
+        automaton = KeywordAutomaton.from_groups(groups)
+        total = sum(len(words) for words in groups.values())
+        print(f"\nVocabulario: {total} palabras clave ({len(automaton)} estados)")
+        naive = bench("any(kw in message)", lambda m: naive_scan(groups, m), corpus, repeat)
+        fast = bench("Aho-Corasick", automaton.labels, corpus, repeat)
+        print(f"  Relación: {naive / fast:.1f}x")
+    print()
+
+
+if __name__ == "__main__":
+    main()
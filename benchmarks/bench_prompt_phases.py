@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark del prompt del sistema armado por fase.
+
+Corre las conversaciones guionadas de ``bench_rule_router`` contra un
+proveedor simulado que cobra ``prefill_ms`` por cada 1000 tokens de entrada
+(el tiempo de procesar el prompt antes del primer token), primero con el
+prompt completo en cada turno y después con las secciones de la fase, y
+muestra los tokens del prompt de cada fase, los tokens de entrada enviados y
+el tiempo total de cada variante.
+
+Uso:
+    python benchmarks/bench_prompt_phases.py [repeticiones] [latencia_ms] [prefill_ms]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin caché de respuestas ni de FAQ, ni límites de RPM/TPM, y sin motor de reglas: cada turno es una llamada
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RULE_ROUTER_MAX_WORDS"] = "0"
+os.environ["RATE_LIMIT_RPM"] = os.environ["RATE_LIMIT_TPM"] = "0"
+
+from config.prompts import render_prompt
+from core import llm_clients
+from core.agent import SalesAgent
+from core.conversation import ConversationManager, Message, MessageRole, phase_prompt_stats
+from utils.helpers import MESSAGE_TOKEN_OVERHEAD
+from benchmarks.bench_rule_router import SCRIPTS
+from benchmarks.fake_provider import FakeProvider
+
+by_phase = ConversationManager.system_prompt_message
+
+
+def full_prompt(self, phase=None):
+    """Prompt completo en todas las fases (como antes de armarlo por secciones)."""
+    prompt = render_prompt("sales_agent", agent_name=self.agent_name, company_name=self.company_name)
+    message = Message(role=MessageRole.SYSTEM, content=prompt.text)
+    message._tokens = prompt.tokens + MESSAGE_TOKEN_OVERHEAD
+    return message
+
+
+def run(label, system_prompt, provider, repetitions):
+    ConversationManager.system_prompt_message = system_prompt
+    provider.requests = provider.input_tokens = 0
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for script in SCRIPTS:
+            agent = SalesAgent(api_provider="groq", api_key="bench")
+            agent.conversation.summary_trigger_turns = None
+            for message in script:
+                agent.process_message(message)
+    elapsed = time.perf_counter() - start
+
+    print(f"  {label:<16} {elapsed:7.2f} s  llamadas {provider.requests},"
+          f" tokens de entrada {provider.input_tokens} ({provider.input_tokens // provider.requests} por llamada)")
+    return provider.input_tokens
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    prefill = (float(sys.argv[3]) if len(sys.argv) > 3 else 100) / 1000
+
+    stats = phase_prompt_stats("FUTURE", "IAgentic Solutions")
+    print(f"\nPrompt completo: {stats['full_tokens']} tokens")
+    for phase, tokens in stats["phase_tokens"].items():
+        print(f"  {phase:<16} {tokens:5d} tokens  (-{stats['saved_ratio'][phase] * 100:.0f}%)")
+
+    print(f"\n{repetitions * len(SCRIPTS)} conversaciones guionadas, latencia {latency * 1000:.0f} ms"
+          f" + {prefill * 1000:.0f} ms por 1000 tokens de entrada\n")
+    provider = FakeProvider("groq", latency=latency, jitter=0.0, prefill_per_1k=prefill)
+    llm_clients.create_client = lambda name, key, model=None: provider.client
+    full = run("prompt completo", full_prompt, provider, repetitions)
+    phased = run("prompt por fase", by_phase, provider, repetitions)
+    print(f"\n  tokens de entrada: -{(1 - phased / full) * 100:.0f}%\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la cola de peticiones por límites del proveedor (RPM).
+
+Un proveedor falso (benchmarks/fake_provider.py) responde 429 al pasar
+``rpm`` peticiones por minuto. Llega una ráfaga de ``peticiones`` turnos con
+``hilos`` workers, la mitad de conversaciones con datos de contacto
+(prioridad alta) y la mitad en descubrimiento (prioridad baja):
+  - sin cola: cada 429 es el mensaje de error para el visitante;
+  - con cola: ``RequestScheduler`` los encola y atiende primero a los de
+    prioridad alta.
+
+Uso:
+    python benchmarks/bench_rate_limit.py [peticiones] [hilos] [rpm]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+rpm = int(sys.argv[3]) if len(sys.argv) > 3 else 600
+
+# Sin caché de respuestas ni de FAQ; la cola con el mismo RPM que el proveedor y sin límite de tokens
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RATE_LIMIT_RPM"] = str(rpm)
+os.environ["RATE_LIMIT_TPM"] = "0"
+os.environ["RATE_LIMIT_MAX_WAIT_SECONDS"] = "120"
+
+from core import llm_clients
+from core.agent import SalesAgent
+from core.rate_limiter import RequestScheduler, get_request_scheduler
+from benchmarks.bench_interpreter import load_corpus
+from benchmarks.fake_provider import FakeProvider
+
+ERROR_REPLY = "problema técnico"
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run(label, api_key, queued, corpus):
+    provider = FakeProvider("groq", latency=0.1, rpm_limit=rpm)
+    llm_clients.get_client_pool().clear()
+    llm_clients.create_client = lambda name, key, model=None: provider.client
+    unlimited = RequestScheduler(max_retries=0)  # Como antes: la petición va directo al proveedor
+
+    def turn(i):
+        agent = SalesAgent(api_provider="groq", api_key=api_key)
+        agent.conversation.summary_trigger_turns = None
+        high = i % 2 == 0
+        if high:
+            agent.profiler.get_profile().email = "cliente@empresa.com"
+        if not queued:
+            agent._scheduler_for = lambda name: unlimited
+        start = time.perf_counter()
+        reply = agent.process_message(corpus[i % len(corpus)])
+        return high, time.perf_counter() - start, ERROR_REPLY in reply
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(turn, range(count)))
+    total = time.perf_counter() - start
+
+    print(f"  {label}: {total:.1f} s, 429 del proveedor {provider.rate_limited}")
+    for high, name in ((True, "alta"), (False, "baja")):
+        latencies = [latency for is_high, latency, _ in results if is_high == high]
+        errors = sum(1 for is_high, _, failed in results if is_high == high and failed)
+        print(f"    prioridad {name:<5} errores {errors:4d}"
+              f"  p50 {percentile(latencies, 0.50) * 1000:7.0f} ms"
+              f"  p95 {percentile(latencies, 0.95) * 1000:7.0f} ms")
+    if queued:
+        stats = get_request_scheduler("groq", api_key).stats()
+        print(f"    cola: profundidad máxima {stats['max_queue_depth']}, espera media {stats['wait_avg_ms']} ms,"
+              f" p95 {stats['wait_p95_ms']} ms, reintentos tras 429 {stats['retries']}")
+
+
+def main():
+    corpus = load_corpus()
+    print(f"\n{count} turnos en ráfaga, {threads} hilos, límite del proveedor {rpm} RPM\n")
+    run("sin cola", "bench-directo", False, corpus)
+    run("con cola", "bench-cola", True, corpus)
+    print()
+
+
+if __name__ == "__main__":
+    main()
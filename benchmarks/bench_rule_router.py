@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark del ruteo híbrido reglas/modelo.
+
+Corre conversaciones de venta guionadas (descubrimiento, precio, tiempos,
+dudas, cierre) contra un proveedor simulado con ``latencia_ms`` por llamada,
+primero con todo al modelo y después con ``RuleRouter``, y muestra cuántos
+turnos respondió el motor de reglas y el tiempo total de cada variante.
+
+Uso:
+    python benchmarks/bench_rule_router.py [repeticiones] [latencia_ms]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin caché de respuestas ni de FAQ, ni límites de RPM/TPM: cada turno al modelo es una llamada
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+os.environ["FAQ_SIMILARITY_THRESHOLD"] = "0"
+os.environ["RATE_LIMIT_RPM"] = os.environ["RATE_LIMIT_TPM"] = "0"
+
+from core import llm_clients, rule_router
+from core.agent import SalesAgent
+from core.rule_router import RuleRouter
+from benchmarks.fake_provider import FakeProvider
+
+SCRIPTS = [
+    [
+        "Hola, tengo una tienda de ropa online",
+        "Perdemos muchas ventas porque no respondemos rápido los mensajes",
+        "Somos 5 personas en el equipo y yo decido",
+        "¿Cuánto cuesta?",
+        "Es muy caro para nosotros",
+        "¿Y cuánto tiempo tarda la implementación?",
+        "No estoy seguro de que funcione",
+        "Sí, me interesa",
+        "Mi correo es ana@tienda.com",
+    ],
+    [
+        "Buenas, tengo un restaurante y quiero automatizar los pedidos por WhatsApp",
+        "Recibimos unos 80 pedidos al día y se nos pierden varios",
+        "¿Qué precio tiene?",
+        "¿Cuánto demoran en tenerlo listo?",
+        "Me gustaría ver una demo, ¿se integra con mi sistema de caja actual y con el delivery?",
+        "Sí",
+        "Por la tarde",
+    ],
+    [
+        "Hola",
+        "Tengo una clínica dental",
+        "Necesitamos automatizar las reservas de citas",
+        "Precio?",
+        "No, gracias",
+    ],
+]
+
+
+def run(label, router, repetitions):
+    rule_router._router = router
+    start = time.perf_counter()
+    turns = 0
+    for _ in range(repetitions):
+        for script in SCRIPTS:
+            agent = SalesAgent(api_provider="groq", api_key="bench")
+            agent.conversation.summary_trigger_turns = None
+            for message in script:
+                agent.process_message(message)
+                turns += 1
+    elapsed = time.perf_counter() - start
+
+    stats = router.stats()
+    print(f"  {label:<16} {elapsed:7.2f} s  turnos {turns}, al modelo {stats['llm']}, locales {stats['local']}"
+          f" ({stats['local_ratio'] * 100:.0f}%)")
+    if stats["local"]:
+        rules = ", ".join(f"{name} {count}" for name, count in stats["rules"].items() if count)
+        print(f"  {'':<16} respuesta local media {stats['local_avg_us']} µs, llamada media {stats['llm_avg_ms']} ms,"
+              f" ahorro estimado {stats['latency_saved_s']} s ({rules})")
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+
+    provider = FakeProvider("groq", latency=latency)
+    llm_clients.create_client = lambda name, key, model=None: provider.client
+
+    print(f"\n{repetitions * len(SCRIPTS)} conversaciones guionadas, latencia del proveedor {latency * 1000:.0f} ms\n")
+    run("todo al modelo", RuleRouter(max_words=0), repetitions)
+    run("ruteo híbrido", RuleRouter(), repetitions)
+    print()
+
+
+if __name__ == "__main__":
+    main()
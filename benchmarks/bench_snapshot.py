@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark de snapshot/restauración de sesiones de SalesAgent.
+
+Compara el codec binario (core/session_codec.py) contra ``json.dumps`` de un
+``to_dict()`` equivalente (mensajes con fecha ISO, perfil, fases), midiendo
+tamaño y tiempo de ida y vuelta para conversaciones de distinto largo.
+
+Uso:
+    python benchmarks/bench_snapshot.py [repeticiones]
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agent import SalesAgent
+from core.conversation import ConversationPhase, Message, MessageRole
+from core.customer_profile import BudgetLevel, BuyingStage, CustomerProfile, CustomerType, Urgency
+from core.session_codec import dump_agent, load_agent
+from benchmarks.bench_interpreter import load_corpus
+
+
+def build_agent(turns):
+    """Agente en modo demo con ``turns`` mensajes del corpus ya procesados."""
+    corpus = load_corpus()
+    agent = SalesAgent(api_provider="demo")
+    agent.conversation.summary_trigger_turns = None  # Sin compactación de fondo durante la medición
+    agent.get_greeting()
+    for i in range(turns):
+        agent.process_message(corpus[i % len(corpus)])
+    return agent
+
+
+def to_dict(agent):
+    """Estado completo de la sesión como dict serializable con json."""
+    conversation = agent.conversation
+    profile = agent.get_profile()
+    return {
+        "agent_name": agent.agent_name,
+        "company_name": agent.company_name,
+        "api_provider": agent.api_provider,
+        "token_budget": agent.token_budget,
+        "max_turns": agent.max_turns,
+        "demo_mode": agent.demo_mode,
+        "is_active": agent.is_active,
+        "current_phase": conversation.current_phase.value,
+        "phase_history": [phase.value for phase in conversation.phase_history],
+        "turn_count": conversation.turn_count,
+        "messages": [
+            {
+                "role": msg.role.value,
+                "content": msg.content,
+                "timestamp": msg.timestamp.isoformat(),
+                "metadata": msg.metadata
+            }
+            for msg in conversation.messages
+        ],
+        "profile": dict(
+            profile.to_dict(),
+            questions_asked=profile.questions_asked,
+            topics_discussed=profile.topics_discussed
+        ),
+    }
+
+
+def from_dict(data):
+    """Reconstruye el agente desde ``to_dict``."""
+    agent = SalesAgent(
+        agent_name=data["agent_name"],
+        company_name=data["company_name"],
+        api_provider=data["api_provider"],
+        token_budget=data["token_budget"],
+        max_turns=data["max_turns"]
+    )
+    agent.demo_mode = data["demo_mode"]
+    agent.is_active = data["is_active"]
+    conversation = agent.conversation
+    conversation.current_phase = ConversationPhase(data["current_phase"])
+    conversation.phase_history = [ConversationPhase(value) for value in data["phase_history"]]
+    conversation.turn_count = data["turn_count"]
+    conversation.messages = [
+        Message(
+            role=MessageRole(msg["role"]),
+            content=msg["content"],
+            timestamp=datetime.fromisoformat(msg["timestamp"]),
+            metadata=msg["metadata"]
+        )
+        for msg in data["messages"]
+    ]
+    profile = dict(data["profile"])
+    profile["customer_type"] = CustomerType(profile["customer_type"])
+    profile["buying_stage"] = BuyingStage(profile["buying_stage"])
+    profile["budget_level"] = BudgetLevel(profile["budget_level"])
+    profile["urgency"] = Urgency(profile["urgency"])
+    agent.profiler.profile = CustomerProfile(**profile)
+    return agent
+
+
+def bench(label, dump, load, agent, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        data = dump(agent)
+    dump_us = (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        restored = load(data)
+    load_us = (time.perf_counter() - start) / repeat * 1e6
+
+    assert [(m.role, m.content, m.metadata) for m in restored.conversation.messages] == \
+        [(m.role, m.content, m.metadata) for m in agent.conversation.messages]
+    assert restored.get_profile() == agent.get_profile()
+    print(f"  {label:<22} {len(data):8d} bytes  {dump_us:8.1f} us guardar  {load_us:8.1f} us restaurar")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    for turns in (5, 20, 100):
+        agent = build_agent(turns)
+        print(f"\nConversación de {turns} turnos ({len(agent.conversation.messages)} mensajes):")
+        bench(
+            "json.dumps(to_dict())",
+            lambda a: json.dumps(to_dict(a), ensure_ascii=False).encode("utf-8"),
+            lambda d: from_dict(json.loads(d)),
+            agent, repeat
+        )
+        bench("binario", dump_agent, load_agent, agent, repeat)
+        bench("binario sin zlib", lambda a: dump_agent(a, compress=False), load_agent, agent, repeat)
+    print()
+
+
+if __name__ == "__main__":
+    main()
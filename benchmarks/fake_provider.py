@@ -0,0 +1,136 @@
+"""
+Proveedor de IA falso para medir latencias sin red.
+
+``FakeProvider`` imita un cliente estilo ``chat.completions`` (OpenAI y Groq)
+con latencia base (±``jitter``), una cola lenta (``tail_ratio`` de las
+peticiones tarda ``tail_latency``), una tasa de error y un límite de
+peticiones por minuto (``rpm_limit``, responde 429 al pasarlo) configurables.
+``prefill_per_1k`` suma segundos por cada 1000 tokens de entrada (el costo de
+procesar el prompt antes del primer token) y ``model_latency`` fija la
+latencia base de cada modelo (p. ej. uno chico más rápido). Las respuestas
+informan el uso de tokens (entrada y ``reply_tokens`` de salida, recortados a
+``max_tokens``). Como los SDK, respeta el ``timeout`` de la petición: si la
+respuesta tardaría más, falla con ``FakeTimeoutError`` al cumplirse. Expone el
+cliente síncrono (``client``) y el async
+(``async_client``), y cuenta las peticiones y los tokens de entrada que recibe. Las esperas salen de un ``random.Random`` con semilla, así dos
+corridas ven la misma secuencia de latencias.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from core.rate_limiter import TokenBucket, request_tokens
+
+
+class FakeProviderError(RuntimeError):
+    """Error simulado del proveedor (como un 500 o un timeout)."""
+
+
+class FakeTimeoutError(FakeProviderError):
+    """La respuesta no llegó dentro del ``timeout`` de la petición (como ``APITimeoutError``)."""
+
+
+class FakeRateLimitError(RuntimeError):
+    """429 simulado, con la forma de los errores de los SDK (status_code y retry-after)."""
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+class FakeProvider:
+    """Proveedor simulado con latencia, cola lenta y errores."""
+
+    def __init__(
+        self,
+        name: str,
+        latency: float = 0.1,
+        jitter: float = 0.2,
+        tail_latency: float = 2.0,
+        tail_ratio: float = 0.0,
+        error_rate: float = 0.0,
+        rpm_limit: int = 0,
+        prefill_per_1k: float = 0.0,
+        model_latency: Optional[Dict[str, float]] = None,
+        reply_tokens: int = 150,
+        seed: int = 0
+    ):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_latency = tail_latency
+        self.tail_ratio = tail_ratio
+        self.error_rate = error_rate
+        self.prefill_per_1k = prefill_per_1k
+        self.model_latency = model_latency or {}
+        self.reply_tokens = reply_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._limit = TokenBucket(rpm_limit, time.monotonic()) if rpm_limit else None
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.input_tokens = 0
+        self.timeouts = 0
+
+        self.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self._create)))
+        self.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self._acreate)))
+
+    def _draw(self, request):
+        """(espera, si falla, tokens de entrada) de la próxima petición."""
+        tokens = request_tokens(request) - request.get("max_tokens", 0)
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += tokens
+            if self._limit is not None:
+                now = time.monotonic()
+                wait = self._limit.wait_time(1, now)
+                if wait > 0:
+                    self.rate_limited += 1
+                    raise FakeRateLimitError(f"{self.name}: 429 límite de peticiones", retry_after=wait)
+                self._limit.consume(1, now)
+            fails = self._random.random() < self.error_rate
+            slow = self._random.random() < self.tail_ratio
+            latency = self.model_latency.get(request.get("model"), self.latency)
+            base = latency * (1 + self.jitter * (2 * self._random.random() - 1))
+            if fails:
+                self.errors += 1
+        return (self.tail_latency if slow else base) + tokens / 1000 * self.prefill_per_1k, fails, tokens
+
+    def _completion(self, request, fails: bool, tokens: int):
+        if fails:
+            raise FakeProviderError(f"{self.name}: error simulado")
+        text = f"Respuesta de {self.name}"
+        usage = SimpleNamespace(
+            prompt_tokens=tokens,
+            completion_tokens=min(self.reply_tokens, request.get("max_tokens") or self.reply_tokens)
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+    def _timed_out(self, delay: float, timeout: Optional[float]) -> bool:
+        if timeout is None or delay <= timeout:
+            return False
+        with self._lock:
+            self.timeouts += 1
+        return True
+
+    def _create(self, timeout: Optional[float] = None, **request):
+        delay, fails, tokens = self._draw(request)
+        if self._timed_out(delay, timeout):
+            time.sleep(timeout)
+            raise FakeTimeoutError(f"{self.name}: sin respuesta en {timeout:.2f} s")
+        time.sleep(delay)
+        return self._completion(request, fails, tokens)
+
+    async def _acreate(self, timeout: Optional[float] = None, **request):
+        delay, fails, tokens = self._draw(request)
+        if self._timed_out(delay, timeout):
+            await asyncio.sleep(timeout)
+            raise FakeTimeoutError(f"{self.name}: sin respuesta en {timeout:.2f} s")
+        await asyncio.sleep(delay)
+        return self._completion(request, fails, tokens)
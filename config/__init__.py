@@ -1,3 +1,8 @@
 from .settings import Settings, get_settings
+from .lexicon import Lexicon, LexiconRegistry, get_lexicon, get_lexicon_registry
+from .prompts import PromptRegistry, get_prompt_registry, register_prompt, render_prompt
 
-__all__ = ["Settings", "get_settings"]
+__all__ = [
+    "Settings", "get_settings", "Lexicon", "LexiconRegistry", "get_lexicon", "get_lexicon_registry",
+    "PromptRegistry", "get_prompt_registry", "register_prompt", "render_prompt",
+]
@@ -0,0 +1,106 @@
+"""
+Respuestas verificadas a las preguntas frecuentes, armadas desde el catálogo.
+
+Cada respuesta sale de ``config/products.py`` (precios, tiempos, beneficios),
+así un cambio de precio en el catálogo cambia la respuesta sin tocar este
+archivo. Las preguntas de ejemplo son las formas habituales de preguntarlo;
+la caché semántica (``core/faq_cache.py``) acierta también con paráfrasis
+cercanas, así que no hace falta listar todas las variantes.
+"""
+
+from typing import List
+
+from config.products import EMPRESA, PRODUCT_CATALOG
+from core.faq_cache import FAQEntry
+
+
+def _product_lines(field: str) -> str:
+    return "\n".join(f"• {product['nombre']}: {product[field]}" for product in PRODUCT_CATALOG.values())
+
+
+def build_faq_entries() -> List[FAQEntry]:
+    """Respuestas de precio, tiempos, WhatsApp, catálogo, citas, ventas, integraciones y horario."""
+    whatsapp = PRODUCT_CATALOG["agente_whatsapp"]
+    citas = PRODUCT_CATALOG["agente_citas"]
+    ventas = PRODUCT_CATALOG["agente_ventas"]
+    personalizado = PRODUCT_CATALOG["agente_personalizado"]
+
+    return [
+        FAQEntry(
+            "precio",
+            f"Nuestros planes tienen un pago único de configuración y una mensualidad:\n{_product_lines('precio_base')}\n\n"
+            "¿Me cuentas a qué se dedica tu negocio? Así te digo cuál te conviene.",
+            (
+                "¿cuánto cuesta?", "¿qué precio tiene?", "¿cuánto vale?", "¿cuánto cobran?",
+                "¿cuáles son las tarifas?", "precios", "¿cuánto sale el servicio?", "¿cuánto cuesta un agente?",
+                "¿cuánto es la mensualidad?", "valor del servicio",
+            )
+        ),
+        FAQEntry(
+            "tiempo_implementacion",
+            f"Lo dejamos funcionando rápido:\n{_product_lines('tiempo_implementacion')}\n\n"
+            "Tú no tienes que hacer nada técnico, nosotros nos encargamos de todo.",
+            (
+                "¿en cuánto tiempo está listo?", "¿cuánto demora la implementación?", "¿cuánto tardan?",
+                "¿cuándo estaría funcionando?", "¿cuántos días toma?", "¿qué tan rápido lo tienen listo?",
+                "tiempo de implementación", "¿cuánto se demoran en instalarlo?", "¿cuánto demoran en tenerlo listo?",
+            )
+        ),
+        FAQEntry(
+            "whatsapp",
+            f"¡Sí! El {whatsapp['nombre']} responde tu WhatsApp automáticamente: "
+            f"{', '.join(b.lower() for b in whatsapp['beneficios'][:3])}. "
+            f"Cuesta {whatsapp['precio_base']} y queda listo en {whatsapp['tiempo_implementacion']}.",
+            (
+                "¿funciona con WhatsApp?", "¿se puede conectar a WhatsApp?", "¿atiende por WhatsApp?",
+                "¿responde mensajes de WhatsApp?", "¿sirve para WhatsApp Business?", "agente de whatsapp",
+                "¿lo puedo usar en mi whatsapp?",
+            )
+        ),
+        FAQEntry(
+            "catalogo",
+            f"En {EMPRESA['nombre']} creamos agentes de IA que atienden tu negocio 24/7:\n"
+            + "\n".join(f"• {product['nombre']}: {product['descripcion']}" for product in PRODUCT_CATALOG.values()),
+            (
+                "¿qué servicios ofrecen?", "¿qué agentes tienen?", "¿qué hacen ustedes?", "¿qué venden?",
+                "¿qué productos tienen?", "¿en qué me pueden ayudar?", "¿qué tipo de agentes manejan?",
+            )
+        ),
+        FAQEntry(
+            "citas",
+            f"Sí, el {citas['nombre']} {citas['descripcion'][0].lower() + citas['descripcion'][1:]}: "
+            f"{', '.join(b.lower() for b in citas['beneficios'][:3])}. Cuesta {citas['precio_base']}.",
+            (
+                "¿puede agendar citas?", "¿maneja reservas?", "¿sirve para agendar pacientes?",
+                "¿puede programar turnos?", "¿envía recordatorios de citas?", "agendamiento de citas",
+            )
+        ),
+        FAQEntry(
+            "ventas",
+            f"Sí, el {ventas['nombre']} se encarga de eso: "
+            f"{', '.join(b.lower() for b in ventas['beneficios'][:4])}. Cuesta {ventas['precio_base']}.",
+            (
+                "¿puede vender por mí?", "¿califica clientes?", "¿hace seguimiento a los clientes?",
+                "¿sirve para cerrar ventas?", "¿envía cotizaciones?", "agente de ventas",
+            )
+        ),
+        FAQEntry(
+            "integraciones",
+            f"Sí. Para integraciones con tus sistemas tenemos el {personalizado['nombre']}, "
+            f"{personalizado['descripcion'][0].lower() + personalizado['descripcion'][1:]}: "
+            f"{personalizado['precio_setup'].lower()} de configuración y {personalizado['precio_mensual'].lower()}, "
+            f"listo en {personalizado['tiempo_implementacion']}.",
+            (
+                "¿se integra con mi sistema?", "¿se conecta con mi CRM?", "¿hacen desarrollos a medida?",
+                "¿lo pueden personalizar?", "¿tienen integraciones?", "¿se puede conectar con mi software?",
+            )
+        ),
+        FAQEntry(
+            "horario",
+            "El agente atiende 24/7, incluidos noches, fines de semana y festivos: tu negocio nunca duerme.",
+            (
+                "¿atiende de noche?", "¿funciona los fines de semana?", "¿qué horario tiene el agente?",
+                "¿responde a cualquier hora?", "¿trabaja 24 horas?", "¿atiende festivos?",
+            )
+        ),
+    ]
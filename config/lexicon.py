@@ -0,0 +1,236 @@
+"""
+Registro de léxicos (palabras clave) cargados desde ``config/lexicon.json``.
+
+Cada léxico se compila una sola vez en un autómata Aho-Corasick al cargar el
+archivo. Las recargas construyen un snapshot nuevo completo y lo publican con
+un único cambio de referencia: las peticiones en curso siguen usando el
+snapshot anterior y nunca compilan nada.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from utils.helpers import fold_accents
+from utils.fuzzy_index import FUZZY_INFLECTIONS, FuzzyIndex
+from utils.keyword_automaton import KeywordAutomaton
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon.json")
+
+MATCH_MODES = ("word", "substring")
+
+# Etiqueta de coincidencia: (categoría, grupo), p. ej. ("industry", "legal")
+Hit = Tuple[str, str]
+
+
+class LexiconError(ValueError):
+    """El archivo de léxicos no tiene el formato esperado."""
+
+
+class Lexicon:
+    """
+    Conjunto de categorías -> grupos -> palabras clave, compilado en un autómata.
+
+    El orden de los grupos dentro de una categoría es su prioridad (``first``).
+    En modo ``"word"`` se respetan límites de palabra; en ``"substring"`` se
+    busca igual que ``kw in texto``. Texto y palabras clave se comparan sin tildes.
+    Con ``fuzzy`` se corrigen además los errores de tipeo ("abogao") contra las
+    palabras del léxico antes de volver a buscar; otras formas de una palabra
+    ("personas" / "personal") no son errores de tipeo y no se corrigen.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        categories: Mapping[str, Mapping[str, Iterable[str]]],
+        match: str = "word",
+        fuzzy: bool = False,
+        fuzzy_known: Iterable[str] = ()
+    ):
+        if match not in MATCH_MODES:
+            raise LexiconError(f"Léxico '{name}': modo de búsqueda desconocido '{match}'")
+        self.name = name
+        self.match = match
+        self.categories: Dict[str, Dict[str, Tuple[str, ...]]] = {
+            category: {group: tuple(words) for group, words in groups.items()}
+            for category, groups in categories.items()
+        }
+        self.automaton = KeywordAutomaton.from_groups(
+            {
+                (category, group): [fold_accents(word) for word in words]
+                for category, groups in self.categories.items()
+                for group, words in groups.items()
+            },
+            word_boundaries=(match == "word")
+        )
+        self.fuzzy: Optional[FuzzyIndex] = None
+        if fuzzy:
+            self.fuzzy = FuzzyIndex(
+                (
+                    fold_accents(token)
+                    for groups in self.categories.values()
+                    for words in groups.values()
+                    for word in words
+                    for token in word.split()
+                ),
+                known=(fold_accents(word) for word in fuzzy_known),
+                inflections=FUZZY_INFLECTIONS
+            )
+
+    def scan(self, text: str) -> Set[Hit]:
+        """Recorre el texto una vez y devuelve todos los ``(categoría, grupo)`` activados."""
+        folded = fold_accents(text or "")
+        hits = self.automaton.labels(folded)
+        if self.fuzzy:
+            corrected = self.fuzzy.correct(folded)
+            if corrected != folded:
+                hits |= self.automaton.labels(corrected)
+        return hits
+
+    def first(self, hits: Set[Hit], category: str) -> Optional[str]:
+        """Primer grupo (en orden de prioridad) de la categoría presente en ``hits``."""
+        for group in self.categories.get(category, ()):
+            if (category, group) in hits:
+                return group
+        return None
+
+    def all(self, hits: Set[Hit], category: str) -> List[str]:
+        """Todos los grupos de la categoría presentes en ``hits``, en orden."""
+        return [group for group in self.categories.get(category, ()) if (category, group) in hits]
+
+    def groups(self, category: str) -> Dict[str, Tuple[str, ...]]:
+        """Grupos y palabras clave de una categoría."""
+        return self.categories.get(category, {})
+
+
+@dataclass(frozen=True)
+class LexiconSnapshot:
+    """Versión inmutable de todos los léxicos compilados."""
+    version: int
+    lexicons: Mapping[str, Lexicon] = field(default_factory=dict)
+    mtime: float = 0.0
+
+
+def build_snapshot(data: Mapping, mtime: float = 0.0) -> LexiconSnapshot:
+    """Valida el contenido del archivo y compila todos sus léxicos."""
+    if not isinstance(data, Mapping) or not isinstance(data.get("lexicons"), Mapping):
+        raise LexiconError("Se esperaba un objeto con 'version' y 'lexicons'")
+    try:
+        version = int(data.get("version", 0))
+    except (TypeError, ValueError):
+        raise LexiconError("'version' debe ser un entero")
+
+    # Palabras correctas que no deben "corregirse" hacia un término parecido ("consultas" / "consultor")
+    fuzzy_known = data.get("fuzzy_known", [])
+
+    lexicons = {}
+    for name, spec in data["lexicons"].items():
+        if not isinstance(spec, Mapping) or not isinstance(spec.get("categories"), Mapping):
+            raise LexiconError(f"Léxico '{name}': falta 'categories'")
+        lexicons[name] = Lexicon(
+            name,
+            spec["categories"],
+            spec.get("match", "word"),
+            bool(spec.get("fuzzy", False)),
+            fuzzy_known
+        )
+    return LexiconSnapshot(version=version, lexicons=lexicons, mtime=mtime)
+
+
+class LexiconRegistry:
+    """
+    Punto de acceso a los léxicos con recarga en caliente.
+
+    ``get`` solo lee la referencia al snapshot actual; ``reload`` compila fuera
+    de la ruta de las peticiones y publica el snapshot nuevo de forma atómica.
+    Si el archivo nuevo es inválido se conserva el snapshot anterior.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEXICON_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_error: Optional[str] = None
+        self._snapshot = self._load()
+
+    def _load(self) -> LexiconSnapshot:
+        """Lee y compila el archivo de léxicos."""
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return build_snapshot(data, mtime)
+
+    @property
+    def snapshot(self) -> LexiconSnapshot:
+        """Snapshot vigente (inmutable)."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Versión del archivo de léxicos cargado."""
+        return self._snapshot.version
+
+    def get(self, name: str) -> Lexicon:
+        """Obtiene un léxico compilado del snapshot vigente."""
+        return self._snapshot.lexicons[name]
+
+    def reload(self) -> bool:
+        """Recarga el archivo; devuelve False (y conserva el snapshot) si es inválido."""
+        with self._lock:
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                return False
+            self._snapshot = snapshot
+            self.last_error = None
+            return True
+
+    def reload_if_changed(self) -> bool:
+        """Recarga solo si el archivo cambió desde la última carga."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._snapshot.mtime:
+            return False
+        return self.reload()
+
+    def start_auto_reload(self, interval: float = 30.0) -> None:
+        """Revisa el archivo cada ``interval`` segundos en un hilo de fondo."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=watch, name="lexicon-reload", daemon=True)
+        self._watcher.start()
+
+    def stop_auto_reload(self) -> None:
+        """Detiene el hilo de recarga automática."""
+        self._stop.set()
+
+
+_registry: Optional[LexiconRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_lexicon_registry() -> LexiconRegistry:
+    """Registro global de léxicos (se carga la primera vez que se usa)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LexiconRegistry(os.getenv("LEXICON_PATH", DEFAULT_LEXICON_PATH))
+    return _registry
+
+
+def get_lexicon(name: str) -> Lexicon:
+    """Atajo para ``get_lexicon_registry().get(name)``."""
+    return get_lexicon_registry().get(name)
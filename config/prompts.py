@@ -0,0 +1,133 @@
+"""
+Registro de plantillas de prompts del sistema.
+
+Cada plantilla es una función que arma el texto a partir de sus parámetros
+(nombre del agente, configuración de la empresa, ...). El registro la
+renderiza una sola vez por combinación de parámetros y comparte el mismo
+string inmutable entre todas las sesiones, junto con su conteo de tokens.
+
+La "versión" de la configuración es su propio contenido: si cambia
+``DATABASE["config"]`` o los datos del agente, la clave cambia y se renderiza
+de nuevo; mientras no cambie, no se vuelve a construir nada.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+from utils.helpers import estimate_tokens
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    """Prompt ya renderizado (inmutable y compartido)."""
+    name: str
+    text: str
+    tokens: int
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convierte dicts y listas en tuplas para usarlos como parte de la clave."""
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class PromptRegistry:
+    """
+    Plantillas registradas por nombre y sus renderizados en caché.
+
+    La caché es LRU y acotada (``max_entries``) para que configuraciones
+    viejas no se acumulen; ``invalidate`` descarta los renderizados de una
+    plantilla (p. ej. al guardar una configuración nueva).
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._templates: Dict[str, Callable[..., str]] = {}
+        self._rendered: "OrderedDict[Tuple[str, Hashable], RenderedPrompt]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, builder: Callable[..., str]) -> Callable[..., str]:
+        """Registra (o reemplaza) la plantilla ``name``; devuelve ``builder``."""
+        with self._lock:
+            self._templates[name] = builder
+            self._drop(name)
+        return builder
+
+    def render(self, name: str, **params: Any) -> RenderedPrompt:
+        """Prompt ``name`` con ``params``; solo se construye la primera vez."""
+        key = (name, _freeze(params))
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                self.hits += 1
+                return rendered
+            builder = self._templates[name]
+
+        # Se construye fuera del lock: en una carrera ambos hilos obtienen el mismo texto
+        text = builder(**params)
+        rendered = RenderedPrompt(name=name, text=text, tokens=estimate_tokens(text))
+
+        with self._lock:
+            self.misses += 1
+            rendered = self._rendered.setdefault(key, rendered)
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    def text(self, name: str, **params: Any) -> str:
+        """Atajo para ``render(name, **params).text``."""
+        return self.render(name, **params).text
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Descarta los renderizados de ``name`` (o de todas las plantillas)."""
+        with self._lock:
+            self._drop(name)
+
+    def _drop(self, name: Optional[str]) -> None:
+        if name is None:
+            self._rendered.clear()
+            return
+        for key in [key for key in self._rendered if key[0] == name]:
+            del self._rendered[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, renderizados y tokens de cada prompt en caché."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached": len(self._rendered),
+                "prompts": [
+                    {"name": rendered.name, "tokens": rendered.tokens}
+                    for rendered in self._rendered.values()
+                ],
+            }
+
+
+# Registro compartido por todos los agentes y aplicaciones del proceso
+_registry = PromptRegistry()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Registro global de prompts."""
+    return _registry
+
+
+def register_prompt(name: str) -> Callable[[Callable[..., str]], Callable[..., str]]:
+    """Decorador que registra una función como plantilla ``name``."""
+    def decorator(builder: Callable[..., str]) -> Callable[..., str]:
+        return _registry.register(name, builder)
+    return decorator
+
+
+def render_prompt(name: str, **params: Any) -> RenderedPrompt:
+    """Atajo para ``get_prompt_registry().render(name, **params)``."""
+    return _registry.render(name, **params)
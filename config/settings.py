@@ -1,11 +1,48 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+# Presupuesto de tokens del prompt (historial + sistema + contexto) por proveedor
+PROVIDER_TOKEN_BUDGETS: Dict[str, int] = {
+    "openai": 12000,
+    "anthropic": 12000,
+    "gemini": 12000,
+    "groq": 6000,
+}
+DEFAULT_TOKEN_BUDGET = 8000
+
+# Límites por API key de cada proveedor: (peticiones por minuto, tokens por minuto).
+# Valores del plan gratuito / nivel inicial de cada uno; ajustar al plan contratado.
+PROVIDER_RATE_LIMITS: Dict[str, Tuple[int, int]] = {
+    "groq": (30, 12000),
+    "openai": (500, 200000),
+    "anthropic": (50, 50000),
+    "gemini": (15, 1000000),
+}
+
+# Orden de preferencia de los proveedores (el router lo usa hasta tener mediciones)
+PROVIDER_PRIORITY = ["groq", "gemini", "anthropic", "openai"]
+
+# Modelo y max_tokens de cada nivel por proveedor (ver core/model_tiers.py).
+# "small": turnos cortos de saludo y descubrimiento; "large": el resto de la venta.
+# OpenAI y Anthropic ya usan su modelo más chico (el de siempre del agente) en los dos
+# niveles: ahí el nivel solo cambia max_tokens. Para un grande de verdad, p. ej.
+# "gpt-4o" o "claude-3-5-sonnet-latest" en "large" (más latencia y costo por turno).
+PROVIDER_MODEL_TIERS: Dict[str, Dict[str, Tuple[str, int]]] = {
+    "openai": {"small": ("gpt-4o-mini", 300), "large": ("gpt-4o-mini", 1000)},
+    "anthropic": {"small": ("claude-3-haiku-20240307", 300), "large": ("claude-3-haiku-20240307", 1000)},
+    "gemini": {"small": ("gemini-2.0-flash-lite", 300), "large": ("gemini-2.0-flash", 1000)},
+    "groq": {"small": ("llama-3.1-8b-instant", 300), "large": ("llama-3.3-70b-versatile", 1000)},
+}
+
+# Fases cuyos turnos cortos van al modelo chico
+SMALL_MODEL_PHASES = ["saludo", "descubrimiento"]
+
+
 class Settings(BaseModel):
     """Configuración del agente vendedor."""
 
@@ -24,9 +61,85 @@ class Settings(BaseModel):
     max_conversation_turns: int = 50
     enable_analytics: bool = True
 
+    # Ventana de contexto enviada a las APIs
+    context_token_budget: Optional[int] = None  # None = presupuesto del proveedor
+    provider_token_budgets: Dict[str, int] = dict(PROVIDER_TOKEN_BUDGETS)
+
+    # Resumen en segundo plano de los turnos antiguos (0 = desactivado)
+    summary_trigger_turns: int = 20
+    summary_keep_turns: int = 8
+
+    # Almacén de sesiones de las apps web (ver core/session_store.py)
+    session_backend: str = "memory"          # memory | spill | shared
+    session_max_sessions: int = 1000         # Sesiones en memoria como máximo
+    session_ttl_seconds: int = 1800          # Inactividad antes de sacarla de memoria
+    session_max_mb: Optional[int] = None     # Techo de memoria estimada de las sesiones
+    session_db_path: str = "sessions.db"     # SQLite para spill / compartido
+    session_db_ttl_seconds: int = 7 * 24 * 3600  # Vida de las sesiones guardadas en SQLite
+
+    # Caché de respuestas de los primeros turnos (ver core/response_cache.py)
+    response_cache_max_entries: int = 1024   # 0 = desactivada
+    response_cache_ttl_seconds: int = 3600
+    response_cache_max_turns: int = 2        # Turnos del cliente que se pueden cachear
+
+    # Router de proveedores (ver core/provider_router.py)
+    provider_priority: List[str] = list(PROVIDER_PRIORITY)
+    hedge_delay_seconds: float = 4.0         # Espera antes del hedge sin p95 medido (0 = sin hedge)
+    circuit_failure_threshold: int = 3       # Fallos seguidos que abren el circuito
+    circuit_open_seconds: float = 30.0       # Tiempo con el circuito abierto
+
+    # Cola de peticiones por límites RPM/TPM (ver core/rate_limiter.py)
+    rate_limit_rpm: Optional[int] = None     # None = límite del proveedor
+    rate_limit_tpm: Optional[int] = None
+    provider_rate_limits: Dict[str, Tuple[int, int]] = dict(PROVIDER_RATE_LIMITS)
+    rate_limit_max_wait_seconds: float = 30.0  # Espera máxima en la cola
+
+    # Respuestas del motor de reglas para intenciones rutinarias (ver core/rule_router.py)
+    rule_router_min_confidence: float = 0.8  # Confianza mínima de la intención
+    rule_router_max_words: int = 12          # Largo máximo del mensaje (0 = todo al modelo)
+
+    # Respuestas verificadas para preguntas frecuentes parafraseadas (ver core/faq_cache.py)
+    faq_similarity_threshold: float = 0.65  # Similitud coseno mínima (0 = desactivada)
+
+    # Modelo por nivel según fase y largo del turno (ver core/model_tiers.py)
+    model_tiers: Dict[str, Dict[str, Tuple[str, int]]] = dict(PROVIDER_MODEL_TIERS)
+    small_model_phases: List[str] = list(SMALL_MODEL_PHASES)
+    small_model_max_words: int = 25          # Turnos más largos van al modelo grande (0 = siempre el grande)
+
+    # Plazo por petición para las llamadas al proveedor (ver core/deadline.py)
+    request_deadline_seconds: float = 20.0   # Cola + respuesta del modelo (0 = sin plazo)
+    deadline_fallback_seconds: float = 2.0   # Con menos plazo no se llama: responde el respaldo local
+
+    # Token de los endpoints de administración (estadísticas); sin token no se exponen
+    admin_token: Optional[str] = None
+
     class Config:
         env_file = ".env"
 
+    def api_key_for(self, provider: str) -> Optional[str]:
+        """API key configurada para un proveedor."""
+        return getattr(self, f"{provider}_api_key", None)
+
+    def token_budget_for(self, provider: str) -> int:
+        """Presupuesto de tokens del prompt para un proveedor."""
+        if self.context_token_budget:
+            return self.context_token_budget
+        return self.provider_token_budgets.get(provider, DEFAULT_TOKEN_BUDGET)
+
+    def model_for(self, provider: str, tier: str) -> Tuple[str, int]:
+        """(modelo, max_tokens) del nivel ``tier`` del proveedor (el grande si no está declarado)."""
+        tiers = self.model_tiers.get(provider) or PROVIDER_MODEL_TIERS[provider]
+        return tiers.get(tier) or tiers["large"]
+
+    def rate_limits_for(self, provider: str) -> Tuple[int, int]:
+        """(RPM, TPM) de una API key del proveedor; 0 = sin límite."""
+        rpm, tpm = self.provider_rate_limits.get(provider, (0, 0))
+        if self.rate_limit_rpm is not None:
+            rpm = self.rate_limit_rpm
+        if self.rate_limit_tpm is not None:
+            tpm = self.rate_limit_tpm
+        return rpm, tpm
+
 
 def get_settings() -> Settings:
     """Obtiene la configuración desde variables de entorno."""
@@ -38,4 +151,40 @@ def get_settings() -> Settings:
         agent_name=os.getenv("AGENT_NAME", "FUTURE"),
         company_name=os.getenv("COMPANY_NAME", "IAgentic Solutions"),
         agent_language=os.getenv("AGENT_LANGUAGE", "es"),
+        max_conversation_turns=int(os.getenv("MAX_CONVERSATION_TURNS", "50")),
+        context_token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "0")) or None,
+        summary_trigger_turns=int(os.getenv("SUMMARY_TRIGGER_TURNS", "20")),
+        summary_keep_turns=int(os.getenv("SUMMARY_KEEP_TURNS", "8")),
+        session_backend=os.getenv("SESSION_BACKEND", "memory"),
+        session_max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "1000")),
+        session_ttl_seconds=int(os.getenv("SESSION_TTL_SECONDS", "1800")),
+        session_max_mb=int(os.getenv("SESSION_MAX_MB", "0")) or None,
+        session_db_path=os.getenv("SESSION_DB_PATH", "sessions.db"),
+        session_db_ttl_seconds=int(os.getenv("SESSION_DB_TTL_SECONDS", str(7 * 24 * 3600))),
+        response_cache_max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+        response_cache_ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+        response_cache_max_turns=int(os.getenv("RESPONSE_CACHE_MAX_TURNS", "2")),
+        provider_priority=[
+            provider.strip().lower()
+            for provider in os.getenv("PROVIDER_PRIORITY", ",".join(PROVIDER_PRIORITY)).split(",")
+            if provider.strip()
+        ],
+        hedge_delay_seconds=float(os.getenv("HEDGE_DELAY_SECONDS", "4")),
+        circuit_failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3")),
+        circuit_open_seconds=float(os.getenv("CIRCUIT_OPEN_SECONDS", "30")),
+        rate_limit_rpm=int(os.environ["RATE_LIMIT_RPM"]) if os.getenv("RATE_LIMIT_RPM") else None,
+        rate_limit_tpm=int(os.environ["RATE_LIMIT_TPM"]) if os.getenv("RATE_LIMIT_TPM") else None,
+        rate_limit_max_wait_seconds=float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30")),
+        rule_router_min_confidence=float(os.getenv("RULE_ROUTER_MIN_CONFIDENCE", "0.8")),
+        rule_router_max_words=int(os.getenv("RULE_ROUTER_MAX_WORDS", "12")),
+        faq_similarity_threshold=float(os.getenv("FAQ_SIMILARITY_THRESHOLD", "0.65")),
+        small_model_phases=[
+            phase.strip().lower()
+            for phase in os.getenv("SMALL_MODEL_PHASES", ",".join(SMALL_MODEL_PHASES)).split(",")
+            if phase.strip()
+        ],
+        small_model_max_words=int(os.getenv("SMALL_MODEL_MAX_WORDS", "25")),
+        request_deadline_seconds=float(os.getenv("REQUEST_DEADLINE_SECONDS", "20")),
+        deadline_fallback_seconds=float(os.getenv("DEADLINE_FALLBACK_SECONDS", "2")),
+        admin_token=os.getenv("ADMIN_TOKEN") or None,
     )
@@ -2,5 +2,6 @@ from .agent import SalesAgent
 from .conversation import ConversationManager
 from .customer_profile import CustomerProfile, CustomerProfiler
 from .message_interpreter import MessageInterpreter, UserIntent
+from .turn_analysis import TurnAnalysis, analyze_turn
 
-__all__ = ["SalesAgent", "ConversationManager", "CustomerProfile", "CustomerProfiler", "MessageInterpreter", "UserIntent"]
+__all__ = ["SalesAgent", "ConversationManager", "CustomerProfile", "CustomerProfiler", "MessageInterpreter", "UserIntent", "TurnAnalysis", "analyze_turn"]
@@ -1,11 +1,31 @@
 """Agente de ventas principal."""
 
+import asyncio
 import os
-from typing import Optional, Dict, Any, Generator
-from .conversation import ConversationManager, ConversationPhase
+import time
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Generator, Hashable, Iterator, List, Tuple
+from .conversation import ConversationManager, ConversationPhase, Message, MessageRole
 from .customer_profile import CustomerProfiler, CustomerProfile
-from .message_interpreter import MessageInterpreter, UserIntent
+from .message_interpreter import MessageInterpreter, UserIntent, normalize_text
+from .turn_analysis import TurnAnalysis, analyze_turn
+from .summarizer import ExtractiveSummarizer, LLMSummarizer, summary_worker
+from .session_codec import dump_agent, load_agent
+from .response_cache import CoalescedError, get_response_cache
+from .faq_cache import get_faq_cache
+from .model_tiers import TIER_LARGE, ModelTier, get_tier_policy
+from .deadline import Deadline, DeadlineExceeded, get_deadline_policy
+from .rule_router import get_rule_router
+from .llm_clients import (
+    ANTHROPIC_CACHE_CONTROL, TokenUsage, close_stream, get_client_pool, get_usage_stats, read_usage, timeout_kwargs
+)
+from .provider_router import ProviderRouter
+from .rate_limiter import (
+    PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, RequestScheduler, get_request_scheduler, request_tokens
+)
 from config.products import get_all_products, get_products_for_industry, PRODUCT_CATALOG
+from config.settings import get_settings
+from utils.helpers import estimate_tokens
 
 
 class SalesAgent:
@@ -16,15 +36,31 @@ class SalesAgent:
         agent_name: str = "FUTURE",
         company_name: str = "IAgentic Solutions",
         api_provider: str = "openai",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        token_budget: Optional[int] = None,
+        max_turns: Optional[int] = None,
+        router: Optional[ProviderRouter] = None
     ):
         self.agent_name = agent_name
         self.company_name = company_name
         self.api_provider = api_provider
         self.api_key = api_key or self._get_api_key()
 
+        # Ventana de contexto: presupuesto de tokens según el proveedor
+        settings = get_settings()
+        self.token_budget = token_budget or settings.token_budget_for(api_provider)
+        self.max_turns = max_turns if max_turns is not None else settings.max_conversation_turns
+        self.response_cache_turns = settings.response_cache_max_turns
+
         # Inicializar componentes
-        self.conversation = ConversationManager(agent_name, company_name)
+        self.conversation = ConversationManager(
+            agent_name,
+            company_name,
+            max_turns=self.max_turns,
+            token_budget=self.token_budget,
+            summary_trigger_turns=settings.summary_trigger_turns or None,
+            summary_keep_turns=settings.summary_keep_turns
+        )
         self.profiler = CustomerProfiler()
         self.products = get_all_products()
         self.interpreter = MessageInterpreter()
@@ -33,8 +69,20 @@ class SalesAgent:
         self.is_active = True
         self.demo_mode = not bool(self.api_key)
 
-        # Cliente de API
+        # Cliente de API (compartido por el proceso, ver core/llm_clients.py)
         self.client = None
+        # Router entre proveedores (opcional, ver core/provider_router.py); sin él se usa solo api_provider
+        self.router = router
+        # Uso de tokens de la última respuesta, se guarda en su mensaje
+        self._last_usage: Optional[TokenUsage] = None
+        # Nivel de modelo del turno en curso (ver core/model_tiers.py)
+        self._tier = TIER_LARGE
+        # Plazo del turno en curso para las llamadas al proveedor (ver core/deadline.py)
+        self._deadline = Deadline()
+        # Compactación encolada en el worker de resúmenes (ver pending_summary)
+        self._summary_future: Optional[Future] = None
+        # Si el turno en curso llamó al proveedor o lo respondió la caché de respuestas
+        self._called_provider = False
         if not self.demo_mode:
             self._initialize_client()
 
@@ -47,21 +95,11 @@ class SalesAgent:
         return None
 
     def _initialize_client(self):
-        """Inicializa el cliente de API."""
+        """Toma el cliente de API del pool del proceso (compartido entre sesiones)."""
         try:
-            if self.api_provider == "openai":
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.api_key)
-            elif self.api_provider == "anthropic":
-                import anthropic
-                self.client = anthropic.Anthropic(api_key=self.api_key)
-            elif self.api_provider == "gemini":
-                import google.generativeai as genai
-                genai.configure(api_key=self.api_key)
-                self.client = genai.GenerativeModel('gemini-2.0-flash')
-            elif self.api_provider == "groq":
-                from groq import Groq
-                self.client = Groq(api_key=self.api_key)
+            # En Gemini el modelo va en el cliente: el del agente es el del nivel grande
+            model = self._large_model() if self.api_provider == "gemini" else None
+            self.client = get_client_pool().get(self.api_provider, self.api_key, model)
         except ImportError as e:
             print(f"Error importando cliente: {e}")
             self.demo_mode = True
@@ -84,142 +122,692 @@ Estoy aquí para ayudarte a descubrir cómo la Inteligencia Artificial puede tra
 
     def process_message(self, user_message: str) -> str:
         """Procesa un mensaje del usuario y genera una respuesta."""
+        turn = self._begin_turn(user_message)
+
+        # Generar respuesta (con API, las intenciones rutinarias las responde el motor de reglas)
+        if self.demo_mode:
+            response = self._generate_demo_response(turn)
+        else:
+            response = self._local_response(turn) or self._generate_ai_response(turn)
+
+        self._finish_turn(response)
+        return response
+
+    def process_message_stream(self, user_message: str) -> Generator[str, None, None]:
+        """
+        Igual que ``process_message`` pero entrega la respuesta en fragmentos.
+
+        La respuesta se agrega al historial recién cuando el stream termina; si
+        quien consume abandona el generador (p. ej. el navegador se desconecta)
+        o el stream falla a mitad, se deshace el turno: no queda en el historial
+        un mensaje del cliente sin respuesta ni una respuesta a medias.
+        """
+        conversation = self.conversation
+        phase, phase_history = conversation.current_phase, list(conversation.phase_history)
+        turn = self._begin_turn(user_message)
+        message = conversation.messages[-1]
+
+        completed = False
+        try:
+            yield from self._stream_turn(turn)
+            completed = True
+        finally:
+            if not completed:
+                conversation.rollback_turn(message, phase, phase_history)
+
+    def _stream_turn(self, turn: TurnAnalysis) -> Generator[str, None, None]:
+        """Fragmentos de la respuesta de un turno ya registrado; al terminar la agrega al historial."""
+        local = self._generate_demo_response(turn) if self.demo_mode else self._local_response(turn)
+        if local is not None:
+            yield local
+            self._finish_turn(local)
+            return
+
+        # Un acierto de la caché de respuestas se entrega de una vez
+        cache_key = self._response_cache_key(turn)
+        if cache_key is not None:
+            start = time.perf_counter()
+            cached = get_response_cache().get(cache_key)
+            if cached is not None:
+                get_rule_router().record_local("cache", time.perf_counter() - start)
+                yield cached
+                self._finish_turn(cached)
+                return
+
+        parts: List[str] = []
+        try:
+            for delta in self._stream_ai_response():
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            if parts:
+                raise
+            if self._cut_short(e):
+                local = self._deadline_fallback(turn)
+                yield local
+                self._finish_turn(local)
+                return
+            fallback = f"Disculpa, tuve un problema técnico. ¿Podrías repetir tu mensaje? (Error: {str(e)})"
+            yield fallback
+            self._finish_turn(fallback)
+            return
+
+        response = "".join(parts)
+        if cache_key is not None:
+            get_response_cache().put(cache_key, response)
+        self._finish_turn(response)
+
+    async def aprocess_message(self, user_message: str) -> str:
+        """
+        Versión asíncrona de ``process_message`` con los clientes async de los SDK.
+
+        El análisis del turno (perfil y fase) es local y se hace sin ceder el
+        loop; solo la llamada al proveedor espera con ``await``, así un proceso
+        atiende muchas conversaciones mientras esperan la red. Si la tarea se
+        cancela (el visitante se fue) se deshace el turno, como en
+        ``process_message_stream``.
+        """
+        conversation = self.conversation
+        phase, phase_history = conversation.current_phase, list(conversation.phase_history)
+        turn = self._begin_turn(user_message)
+        message = conversation.messages[-1]
+
+        try:
+            if self.demo_mode:
+                response = self._generate_demo_response(turn)
+            else:
+                response = self._local_response(turn) or await self._agenerate_ai_response(turn)
+        except BaseException:
+            conversation.rollback_turn(message, phase, phase_history)
+            raise
+
+        self._finish_turn(response)
+        return response
+
+    def _begin_turn(self, user_message: str) -> TurnAnalysis:
+        """Registra el mensaje del usuario y actualiza perfil y fase."""
+        # Analizar el mensaje una sola vez para todo el turno
+        turn = analyze_turn(user_message, self.interpreter)
+
         # Agregar mensaje al historial
         self.conversation.add_user_message(user_message)
 
-        # Analizar mensaje para actualizar perfil
-        self.profiler.analyze_message(user_message)
+        # Actualizar perfil
+        self.profiler.analyze_message(user_message, turn)
 
         # Verificar si debe avanzar de fase
         new_phase = self.conversation.should_advance_phase()
         if new_phase:
             self.conversation.transition_phase(new_phase)
 
-        # Generar respuesta
-        if self.demo_mode:
-            response = self._generate_demo_response(user_message)
-        else:
-            response = self._generate_ai_response()
+        # Modelo chico para turnos cortos de saludo y descubrimiento, grande para el resto
+        self._tier = get_tier_policy().choose(turn, self.conversation.current_phase)
+
+        # El plazo para responder corre desde que llega el mensaje
+        self._deadline = get_deadline_policy().start()
+
+        return turn
+
+    def _finish_turn(self, response: str):
+        """Agrega la respuesta al historial y encola la compactación."""
+        message = self.conversation.add_assistant_message(response)
+        if self._last_usage is not None:
+            message.metadata["usage"] = self._last_usage.to_dict()
+            self._last_usage = None
+
+        # Compactar turnos antiguos en segundo plano (solo encola, no bloquea)
+        future = summary_worker.schedule(self.conversation, self._get_summarizer())
+        if future is not None:
+            self._summary_future = future
+            future.add_done_callback(self._summary_done)
+
+    def _summary_done(self, future: Future) -> None:
+        if self._summary_future is future:
+            self._summary_future = None
+
+    def pending_summary(self) -> Optional[Future]:
+        """
+        Compactación encolada que todavía no terminó (None si no hay).
+
+        El worker compacta este objeto en memoria: si el agente ya se guardó
+        como snapshot (backend compartido o spill), el almacén vuelve a
+        guardarlo cuando termina (ver ``SqliteSessionStore.put``).
+        """
+        return self._summary_future
+
+    def _local_response(self, turn: TurnAnalysis) -> Optional[str]:
+        """
+        Respuesta sin llamar al modelo: el motor de reglas si el turno es una
+        intención rutinaria (ver core/rule_router.py), o la respuesta verificada
+        de una pregunta frecuente (ver core/faq_cache.py).
+        """
+        router = get_rule_router()
+        start = time.perf_counter()
+        rule = router.match(turn, self.conversation.current_phase)
+        if rule is None:
+            # "no funciona con WhatsApp" no pregunta si funciona
+            if turn.has_contact_data or turn.question_count > 1 or turn.has_intent(UserIntent.NEGATIVE):
+                return None
+            match = get_faq_cache().lookup(turn.raw)
+            if match is None:
+                return None
+            router.record_local("faq", time.perf_counter() - start)
+            return match.answer
+        response = self._generate_demo_response(turn)
+        router.record_local(rule.name, time.perf_counter() - start)
+        return response
 
-        # Agregar respuesta al historial
-        self.conversation.add_assistant_message(response)
+    def _record_cache_answer(self, start: float) -> None:
+        """Cuenta como turno local la respuesta de la caché (o de otra sesión) si este turno no llamó al proveedor."""
+        if not self._called_provider:
+            get_rule_router().record_local("cache", time.perf_counter() - start)
+
+    def _cut_short(self, error: Exception) -> bool:
+        """
+        True si la llamada al modelo se cortó por el plazo del turno (vencido,
+        cancelado o casi vencido), o si el turno esperaba la misma respuesta de
+        otra sesión (caché de respuestas) y esa llamada falló: el error no es
+        de este turno, que responde con el motor de reglas en vez del mensaje
+        de error.
+        """
+        return isinstance(error, (DeadlineExceeded, CoalescedError)) or self._deadline.expired
+
+    def _deadline_fallback(self, turn: TurnAnalysis) -> str:
+        """Respuesta del motor de reglas cuando el modelo no alcanza a responder dentro del plazo."""
+        get_deadline_policy().record_fallback("agent")
+        return self._generate_demo_response(turn)
+
+    def _request_timeout(self, provider: str) -> Dict[str, Any]:
+        """Timeout de la petición a ``provider`` con lo que queda del plazo del turno (ver core/deadline.py)."""
+        return get_deadline_policy().request_kwargs(provider, self._deadline)
+
+    def _get_summarizer(self):
+        """Resumidor de turnos antiguos: con el modelo del agente o extractivo en modo demo."""
+        if self.demo_mode or not self.client:
+            return ExtractiveSummarizer(self.agent_name)
+        return LLMSummarizer(self._complete_text, self.agent_name)
+
+    def _complete_text(self, prompt: str, max_tokens: int = 400) -> str:
+        """
+        Completa un prompt suelto con el modelo grande del proveedor configurado (usado por el resumidor).
+
+        Corre en segundo plano, fuera del plazo de un turno, pero con el mismo
+        timeout para que un proveedor colgado no frene al resumidor.
+        """
+        model = self._large_model()
+        timeout = timeout_kwargs(self.api_provider, get_deadline_policy().seconds or None)
+        if self.api_provider == "anthropic":
+            response = self.client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+                **timeout
+            )
+            return response.content[0].text
+        if self.api_provider == "gemini":
+            return self.client.generate_content(prompt, **timeout).text
 
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.3,
+            **timeout
+        )
+        return response.choices[0].message.content
+
+    def _generate_ai_response(self, turn: Optional[TurnAnalysis] = None) -> str:
+        """
+        Genera respuesta usando la API de IA (o la caché de respuestas, ver _response_cache_key).
+
+        Si el modelo no alcanza a responder dentro del plazo del turno, responde
+        el motor de reglas.
+        """
+        try:
+            cache_key = self._response_cache_key(turn) if turn is not None else None
+            if cache_key is None:
+                return self._request_ai_response()
+            start = time.perf_counter()
+            self._called_provider = False
+            response = get_response_cache().get_or_compute(cache_key, self._request_ai_response)
+            self._record_cache_answer(start)
+            return response
+        except Exception as e:
+            if turn is not None and self._cut_short(e):
+                return self._deadline_fallback(turn)
+            return f"Disculpa, tuve un problema técnico. ¿Podrías repetir tu mensaje? (Error: {str(e)})"
+
+    def _request_ai_response(self) -> str:
+        """
+        Pide la respuesta al proveedor configurado (los errores se propagan).
+
+        Con router, la petición va al proveedor más rápido y sano, con hedge y
+        failover a los demás; el uso de tokens que queda en el mensaje es el
+        de la respuesta ganadora. Toda la llamada (cola, hedge y failover
+        incluidos) va dentro del plazo del turno.
+        """
+        start = time.perf_counter()
+        self._called_provider = True
+        get_rule_router().record_escalation()
+        with get_deadline_policy().guard(self._deadline, "agent"):
+            if self.router is None:
+                response, usage = self._call_provider(self.api_provider)
+            else:
+                _, (response, usage) = self.router.call(self._call_provider, self._deadline)
+        get_rule_router().record_llm(time.perf_counter() - start)
+        self._last_usage = usage
         return response
 
-    def _generate_ai_response(self) -> str:
-        """Genera respuesta usando la API de IA."""
+    def _call_provider(self, provider: str) -> Tuple[str, Optional[TokenUsage]]:
+        """Una petición completa a ``provider``, con turno en su cola de RPM/TPM: (texto, uso de tokens)."""
+        start = time.perf_counter()
+        client = self._client_for(provider)
+        scheduler = self._scheduler_for(provider)
+        priority = self._request_priority()
+        deadline = self._deadline
+        # El timeout se calcula al enviar: la espera en la cola ya consumió parte del plazo
+        if provider == "anthropic":
+            request = self._anthropic_request()
+            tokens = request_tokens(request)
+            response = scheduler.run(
+                lambda: client.messages.create(**request, **self._request_timeout(provider)), tokens, priority, deadline
+            )
+            text = response.content[0].text
+        elif provider == "gemini":
+            prompt = self._gemini_prompt()
+            config = self._gemini_config()
+            tokens = request_tokens(prompt)
+            response = scheduler.run(
+                lambda: client.generate_content(prompt, generation_config=config, **self._request_timeout(provider)),
+                tokens, priority, deadline
+            )
+            text = response.text
+        elif provider in ("openai", "groq"):
+            request = self._openai_request() if provider == "openai" else self._groq_request()
+            tokens = request_tokens(request)
+            response = scheduler.run(
+                lambda: client.chat.completions.create(**request, **self._request_timeout(provider)),
+                tokens, priority, deadline
+            )
+            text = response.choices[0].message.content
+        else:
+            raise ValueError(f"Proveedor desconocido: {provider}")
+        usage = self._record_usage(response, provider)
+        scheduler.settle(tokens, usage)
+        get_tier_policy().record(provider, self._tier, time.perf_counter() - start, usage)
+        return text, usage
+
+    def _scheduler_for(self, provider: str) -> RequestScheduler:
+        """Cola de peticiones compartida por todas las sesiones con la misma API key."""
+        return get_request_scheduler(provider, self._api_key_for(provider))
+
+    def _request_priority(self) -> int:
+        """
+        Prioridad en la cola de peticiones: primero las conversaciones cerca
+        de la venta (cierre, objeciones o con datos de contacto), al final
+        saludo y descubrimiento.
+        """
+        phase = self.conversation.current_phase
+        profile = self.profiler.get_profile()
+        if phase in (ConversationPhase.CLOSING, ConversationPhase.OBJECTION_HANDLING) or profile.email or profile.phone:
+            return PRIORITY_HIGH
+        if phase in (ConversationPhase.GREETING, ConversationPhase.DISCOVERY):
+            return PRIORITY_LOW
+        return PRIORITY_NORMAL
+
+    def _client_for(self, provider: str) -> Any:
+        """
+        Cliente del pool para ``provider`` (el del agente si es su proveedor).
+
+        En Gemini el modelo va en el cliente: el del agente es el del nivel
+        grande y para el chico se pide otro al pool.
+        """
+        if provider == self.api_provider and self.client is not None and (
+            provider != "gemini" or self._tier == TIER_LARGE
+        ):
+            return self.client
+        model = self._model_tier(provider).model if provider == "gemini" else None
+        return get_client_pool().get(provider, self._api_key_for(provider), model)
+
+    def _large_model(self) -> str:
+        """Modelo del nivel grande del proveedor del agente."""
+        return get_tier_policy().model_for(self.api_provider, TIER_LARGE).model
+
+    def _model_tier(self, provider: str) -> ModelTier:
+        """Modelo y ``max_tokens`` de ``provider`` para el nivel del turno en curso."""
+        return get_tier_policy().model_for(provider, self._tier)
+
+    def _api_key_for(self, provider: str) -> Optional[str]:
+        """API key del agente para su proveedor; la de la configuración para los demás."""
+        return self.api_key if provider == self.api_provider else get_settings().api_key_for(provider)
+
+    async def _agenerate_ai_response(self, turn: Optional[TurnAnalysis] = None) -> str:
+        """Igual que ``_generate_ai_response`` pero con el cliente async del proveedor."""
         try:
-            if self.api_provider == "openai":
-                return self._generate_openai_response()
-            elif self.api_provider == "anthropic":
-                return self._generate_anthropic_response()
-            elif self.api_provider == "gemini":
-                return self._generate_gemini_response()
-            elif self.api_provider == "groq":
-                return self._generate_groq_response()
+            cache_key = self._response_cache_key(turn) if turn is not None else None
+            if cache_key is None:
+                return await self._arequest_ai_response()
+            start = time.perf_counter()
+            self._called_provider = False
+            response = await get_response_cache().aget_or_compute(cache_key, self._arequest_ai_response)
+            self._record_cache_answer(start)
+            return response
         except Exception as e:
+            if turn is not None and self._cut_short(e):
+                return self._deadline_fallback(turn)
             return f"Disculpa, tuve un problema técnico. ¿Podrías repetir tu mensaje? (Error: {str(e)})"
 
-    def _generate_openai_response(self) -> str:
-        """Genera respuesta usando OpenAI."""
-        messages = self.conversation.get_messages_for_api()
+    async def _arequest_ai_response(self) -> str:
+        """
+        Igual que ``_request_ai_response`` con el cliente async (el hedge cancela la petición perdedora).
+
+        Al vencer el plazo la corrutina se cancela; si se cancela la tarea de
+        quien llama (el cliente se fue), la llamada cuenta como desconexión.
+        """
+        start = time.perf_counter()
+        self._called_provider = True
+        get_rule_router().record_escalation()
+        deadline = self._deadline
+        with get_deadline_policy().guard(deadline, "agent"):
+            timeout = deadline.timeout()
+            if self.router is None:
+                response, usage = await asyncio.wait_for(self._acall_provider(self.api_provider), timeout)
+            else:
+                call = self.router.acall(self._acall_provider, deadline)
+                _, (response, usage) = await asyncio.wait_for(call, timeout)
+        get_rule_router().record_llm(time.perf_counter() - start)
+        self._last_usage = usage
+        return response
+
+    async def _acall_provider(self, provider: str) -> Tuple[str, Optional[TokenUsage]]:
+        """Igual que ``_call_provider`` con el cliente async."""
+        start = time.perf_counter()
+        scheduler = self._scheduler_for(provider)
+        priority = self._request_priority()
+        deadline = self._deadline
+        if provider == "anthropic":
+            client = self._get_async_client(provider)
+            request = self._anthropic_request()
+            tokens = request_tokens(request)
+            response = await scheduler.arun(
+                lambda: client.messages.create(**request, **self._request_timeout(provider)), tokens, priority, deadline
+            )
+            text = response.content[0].text
+        elif provider == "gemini":
+            client = self._client_for(provider)
+            prompt = self._gemini_prompt()
+            config = self._gemini_config()
+            tokens = request_tokens(prompt)
+            response = await scheduler.arun(
+                lambda: client.generate_content_async(
+                    prompt, generation_config=config, **self._request_timeout(provider)
+                ),
+                tokens, priority, deadline
+            )
+            text = response.text
+        elif provider in ("openai", "groq"):
+            client = self._get_async_client(provider)
+            request = self._openai_request() if provider == "openai" else self._groq_request()
+            tokens = request_tokens(request)
+            response = await scheduler.arun(
+                lambda: client.chat.completions.create(**request, **self._request_timeout(provider)),
+                tokens, priority, deadline
+            )
+            text = response.choices[0].message.content
+        else:
+            raise ValueError(f"Proveedor desconocido: {provider}")
+        usage = self._record_usage(response, provider)
+        scheduler.settle(tokens, usage)
+        get_tier_policy().record(provider, self._tier, time.perf_counter() - start, usage)
+        return text, usage
+
+    def _response_cache_key(self, turn: TurnAnalysis) -> Optional[Hashable]:
+        """
+        Clave de la caché de respuestas para este turno, o None si no se cachea.
+
+        Solo se cachean los primeros ``response_cache_turns`` turnos del cliente
+        y nunca si hay datos de contacto (en el mensaje o ya en el perfil). La
+        clave es todo lo que ve el modelo: proveedor, mensajes de sistema
+        (versión del prompt), fase, contexto de perfil e historial normalizado.
+        """
+        cache = get_response_cache()
+        if not cache.enabled:
+            return None
+        profile = self.profiler.get_profile()
+        if turn.has_contact_data or profile.email or profile.phone:
+            cache.record_bypass()
+            return None
+
+        with self.conversation._lock:
+            messages = list(self.conversation.messages)
+        history = [msg for msg in messages if msg.role != MessageRole.SYSTEM]
+        if sum(1 for msg in history if msg.role == MessageRole.USER) > self.response_cache_turns:
+            return None
+
+        return (
+            self.api_provider,
+            tuple(msg.content for msg in messages if msg.role == MessageRole.SYSTEM),
+            self.conversation.current_phase.value,
+            self._build_context(),
+            tuple((msg.role.value, normalize_text(msg.content)) for msg in history)
+        )
 
+    def _get_async_client(self, provider: Optional[str] = None) -> Any:
+        """Cliente async del proveedor (por defecto el del agente) para el event loop actual."""
+        provider = provider or self.api_provider
+        return get_client_pool().get_async(provider, self._api_key_for(provider))
+
+    def _record_usage(self, source: Any, provider: Optional[str] = None) -> Optional[TokenUsage]:
+        """
+        Registra el uso de tokens que informa el proveedor (incluidos los de la caché de prompt).
+
+        Sin ``provider`` es una respuesta de ``api_provider`` y el uso queda para
+        el mensaje; con él (peticiones del router, que pueden perder) solo se
+        devuelve.
+        """
+        usage = read_usage(provider or self.api_provider, source)
+        if usage is not None:
+            get_usage_stats().record(provider or self.api_provider, usage)
+            if provider is None:
+                self._last_usage = usage
+        return usage
+
+    def _stream_ai_response(self) -> Iterator[str]:
+        """
+        Fragmentos de la respuesta del proveedor configurado (el stream se abre con turno en la cola).
+
+        El plazo del turno cubre la cola y la apertura del stream; después cada
+        fragmento tiene como timeout lo que quedaba al abrirlo. Si quien
+        consume abandona el generador (el navegador se desconectó), se cierra
+        el stream del proveedor y la llamada cuenta como desconexión.
+        """
+        if self.api_provider == "openai":
+            # OpenAI solo informa el uso en streaming si se pide (chunk final sin choices)
+            request = dict(self._openai_request(), stream_options={"include_usage": True})
+            stream = self._stream_chat_completion(request)
+        elif self.api_provider == "anthropic":
+            request = self._anthropic_request()
+            stream = self._stream_anthropic_response(request)
+        elif self.api_provider == "gemini":
+            request = self._gemini_prompt()
+            stream = self._stream_gemini_response(request)
+        elif self.api_provider == "groq":
+            request = self._groq_request()
+            stream = self._stream_chat_completion(request)
+        else:
+            return
+
+        scheduler = self._scheduler_for(self.api_provider)
+        tokens = request_tokens(request)
+        start = time.perf_counter()
+        get_rule_router().record_escalation()
+        with get_deadline_policy().guard(self._deadline, "agent"):
+            scheduler.acquire(tokens, self._request_priority(), self._deadline)
+            yield from stream
+        scheduler.settle(tokens, self._last_usage)
+        elapsed = time.perf_counter() - start
+        get_tier_policy().record(self.api_provider, self._tier, elapsed, self._last_usage)
+        get_rule_router().record_llm(elapsed)
+
+    def _openai_request(self) -> Dict[str, Any]:
+        """
+        Parámetros de la petición a OpenAI.
+
+        El orden aprovecha la caché automática de prefijos: prompt del sistema
+        (estable), historial (solo crece) y al final el contexto de fase y
+        perfil, lo único que cambia entre turnos.
+        """
         # Agregar contexto de fase y perfil
         context = self._build_context()
+        system_messages, history = self._get_api_payload("chat", context)
+        messages = [msg.to_dict() for msg in system_messages] + history
         messages.append({"role": "system", "content": context})
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            max_tokens=1000,
-            temperature=0.7
-        )
-
-        return response.choices[0].message.content
+        tier = self._model_tier("openai")
+        return {
+            "model": tier.model,
+            "messages": messages,
+            "max_tokens": tier.max_tokens,
+            "temperature": 0.7
+        }
 
-    def _generate_anthropic_response(self) -> str:
-        """Genera respuesta usando Anthropic."""
-        messages = self.conversation.get_messages_for_api()
+    def _anthropic_request(self) -> Dict[str, Any]:
+        """
+        Parámetros de la petición a Anthropic, ordenados para su caché de prompt.
+
+        Prefijo estable: el prompt del sistema (igual en todas las sesiones) y
+        el historial, con la marca ``cache_control`` en el último mensaje del
+        cliente. El prompt de una fase solo no llega al mínimo cacheable de
+        Anthropic (1024 tokens), así que no lleva marca propia: la del
+        historial cubre todo el prefijo en cuanto suma lo suficiente. Lo
+        volátil va al final: el contexto de fase y perfil cambia en cada turno,
+        así que viaja como un bloque aparte del último mensaje del cliente en
+        vez de en el sistema, donde invalidaría la caché de todo el historial.
+        """
+        context = self._build_context()
+        system_messages, chat_messages = self._get_api_payload("chat", context)
+        messages = list(chat_messages)
+        tier = self._model_tier("anthropic")
+
+        if not system_messages or not messages or messages[-1]["role"] != "user":
+            return {
+                "model": tier.model,
+                "max_tokens": tier.max_tokens,
+                "system": self._join_system(system_messages, context),
+                "messages": messages
+            }
 
-        # Separar system message
-        system_content = ""
-        chat_messages = []
-        for msg in messages:
-            if msg["role"] == "system":
-                system_content += msg["content"] + "\n"
-            else:
-                chat_messages.append(msg)
+        # Prompt del sistema y, aparte, resumen y nota de turnos omitidos (cambian al deslizar la ventana)
+        system = [{"type": "text", "text": system_messages[0].content}]
+        window_notes = "".join(msg.content + "\n" for msg in system_messages[1:])
+        if window_notes:
+            system.append({"type": "text", "text": window_notes})
 
-        # Agregar contexto
-        system_content += "\n" + self._build_context()
+        # Las entradas del historial son compartidas con la caché: el último mensaje se reemplaza, no se modifica
+        last = messages[-1]
+        messages[-1] = {"role": "user", "content": [
+            {"type": "text", "text": last["content"], "cache_control": ANTHROPIC_CACHE_CONTROL},
+            {"type": "text", "text": f"[Contexto adicional]: {context}"}
+        ]}
 
-        response = self.client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=1000,
-            system=system_content,
-            messages=chat_messages
-        )
+        return {
+            "model": tier.model,
+            "max_tokens": tier.max_tokens,
+            "system": system,
+            "messages": messages
+        }
 
-        return response.content[0].text
+    def _stream_anthropic_response(self, request: Dict[str, Any]) -> Iterator[str]:
+        """Fragmentos de texto de Anthropic."""
+        with self.client.messages.stream(**request, **self._request_timeout("anthropic")) as stream:
+            yield from stream.text_stream
+            self._record_usage(stream.get_final_message())
 
-    def _generate_gemini_response(self) -> str:
-        """Genera respuesta usando Gemini."""
-        messages = self.conversation.get_messages_for_api()
+    def _gemini_prompt(self) -> str:
+        """Prompt de texto único para Gemini: sistema, historial y al final el contexto (lo que cambia cada turno)."""
         context = self._build_context()
+        system_messages, transcript = self._get_api_payload("transcript", context)
 
         # Construir el prompt para Gemini
-        prompt_parts = []
-
-        # Agregar mensajes del sistema
-        for msg in messages:
-            if msg["role"] == "system":
-                prompt_parts.append(f"[Instrucciones del sistema]: {msg['content']}")
-
-        prompt_parts.append(f"[Contexto adicional]: {context}")
+        prompt_parts = [f"[Instrucciones del sistema]: {msg.content}" for msg in system_messages]
         prompt_parts.append("\n[Conversación]:")
 
-        # Agregar historial de conversación
-        for msg in messages:
-            if msg["role"] == "user":
-                prompt_parts.append(f"Cliente: {msg['content']}")
-            elif msg["role"] == "assistant":
-                prompt_parts.append(f"{self.agent_name}: {msg['content']}")
+        # Agregar historial de conversación (líneas ya formateadas en caché)
+        prompt_parts.extend(transcript)
+        prompt_parts.append(f"\n[Contexto adicional]: {context}")
 
         prompt_parts.append(f"\n{self.agent_name}:")
 
-        full_prompt = "\n".join(prompt_parts)
-
-        response = self.client.generate_content(full_prompt)
-        return response.text
-
-    def _generate_groq_response(self) -> str:
-        """Genera respuesta usando Groq (Llama 3)."""
-        messages = self.conversation.get_messages_for_api()
+        return "\n".join(prompt_parts)
+
+    def _gemini_config(self) -> Dict[str, Any]:
+        """``generation_config`` de Gemini con el límite de respuesta del nivel del turno."""
+        return {"max_output_tokens": self._model_tier("gemini").max_tokens}
+
+    def _stream_gemini_response(self, prompt: str) -> Iterator[str]:
+        """Fragmentos de texto de Gemini."""
+        chunk = None
+        client = self._client_for("gemini")
+        timeout = self._request_timeout("gemini")
+        for chunk in client.generate_content(prompt, generation_config=self._gemini_config(), stream=True, **timeout):
+            yield chunk.text
+        # El último chunk trae el uso de toda la respuesta
+        self._record_usage(chunk)
+
+    def _groq_request(self) -> Dict[str, Any]:
+        """
+        Parámetros de la petición a Groq (Llama 3).
+
+        Mismo orden que en OpenAI para la caché de prefijos: mensaje de sistema
+        único al inicio, el historial y al final el contexto de fase y perfil.
+        """
         context = self._build_context()
+        system_messages, history = self._get_api_payload("chat", context)
 
-        # Agregar contexto al sistema
-        groq_messages = []
-        system_content = ""
-
-        for msg in messages:
-            if msg["role"] == "system":
-                system_content += msg["content"] + "\n"
-            else:
-                groq_messages.append(msg)
+        groq_messages = [{"role": "system", "content": "\n".join(msg.content for msg in system_messages)}] if system_messages else []
+        groq_messages.extend(history)
+        groq_messages.append({"role": "system", "content": context})
 
-        system_content += "\n" + context
-
-        # Insertar mensaje de sistema al inicio
-        groq_messages.insert(0, {"role": "system", "content": system_content})
+        tier = self._model_tier("groq")
+        return {
+            "model": tier.model,
+            "messages": groq_messages,
+            "max_tokens": tier.max_tokens,
+            "temperature": 0.7
+        }
 
-        response = self.client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=groq_messages,
-            max_tokens=1000,
-            temperature=0.7
+    def _stream_chat_completion(self, request: Dict[str, Any]) -> Iterator[str]:
+        """Fragmentos de una API estilo chat.completions (OpenAI y Groq)."""
+        stream = self.client.chat.completions.create(stream=True, **request, **self._request_timeout(self.api_provider))
+        try:
+            for chunk in stream:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+                # El uso llega en el último chunk (OpenAI: usage; Groq: x_groq.usage)
+                self._record_usage(chunk)
+        finally:
+            # Si se abandona a medias (desconexión) se corta también la respuesta del proveedor
+            close_stream(stream)
+
+    def _get_api_payload(self, payload_format: str, context: str) -> Tuple[List[Message], List[Any]]:
+        """
+        Ventana de contexto en el formato del proveedor, reservando espacio para el contexto.
+
+        Las entradas del historial vienen de la caché de la conversación y se
+        comparten entre turnos: se copian a la petición pero no se modifican.
+        """
+        return self.conversation.get_api_payload(
+            payload_format,
+            reserve_tokens=estimate_tokens(context)
         )
 
-        return response.choices[0].message.content
+    @staticmethod
+    def _join_system(system_messages: List[Message], context: str) -> str:
+        """Une los mensajes de sistema y el contexto en un solo texto."""
+        return "".join(msg.content + "\n" for msg in system_messages) + "\n" + context
 
     def _build_context(self) -> str:
         """Construye contexto adicional para la respuesta."""
@@ -241,34 +829,33 @@ Estoy aquí para ayudarte a descubrir cómo la Inteligencia Artificial puede tra
 
         return "\n".join(context_parts)
 
-    def _generate_demo_response(self, user_message: str) -> str:
+    def _generate_demo_response(self, turn: TurnAnalysis) -> str:
         """Genera respuestas en modo demo (sin API)."""
         profile = self.profiler.get_profile()
         phase = self.conversation.current_phase
-        message_lower = user_message.lower()
 
         # Respuestas según la fase y contenido del mensaje
         if phase == ConversationPhase.GREETING or phase == ConversationPhase.DISCOVERY:
-            return self._demo_discovery_response(message_lower, profile)
+            return self._demo_discovery_response(turn, profile)
 
         elif phase == ConversationPhase.QUALIFICATION:
-            return self._demo_qualification_response(message_lower, profile)
+            return self._demo_qualification_response(turn, profile)
 
         elif phase == ConversationPhase.PRESENTATION:
-            return self._demo_presentation_response(message_lower, profile)
+            return self._demo_presentation_response(turn, profile)
 
         elif phase == ConversationPhase.OBJECTION_HANDLING:
-            return self._demo_objection_response(message_lower, profile)
+            return self._demo_objection_response(turn, profile)
 
         elif phase == ConversationPhase.CLOSING:
-            return self._demo_closing_response(message_lower, profile)
+            return self._demo_closing_response(turn, profile)
 
-        return self._demo_generic_response(message_lower)
+        return self._demo_generic_response(turn)
 
-    def _demo_discovery_response(self, message: str, profile: CustomerProfile) -> str:
+    def _demo_discovery_response(self, turn: TurnAnalysis, profile: CustomerProfile) -> str:
         """Respuestas para fase de descubrimiento."""
         # Contar turnos para variar respuestas
-        turn = self.conversation.turn_count
+        turn_number = self.conversation.turn_count
 
         # Detectar industria mencionada
         if profile.industry:
@@ -287,7 +874,7 @@ Estoy aquí para ayudarte a descubrir cómo la Inteligencia Artificial puede tra
                 return industry_responses[profile.industry]
 
         # Detectar si menciona tareas específicas a automatizar
-        normalized = self.interpreter.normalize(message)
+        normalized = turn.normalized
         specific_tasks = {
             "caja": "¡La automatización de caja es muy útil! Podemos ayudarte con sistemas que procesan pagos y generan reportes automáticamente. ¿Actualmente usan algún sistema de punto de venta o todo es manual?",
             "pedidos": "Los pedidos automatizados son una de nuestras especialidades. Un agente puede recibir pedidos por WhatsApp 24/7, confirmarlos y hasta cobrar. ¿Cuántos pedidos reciben aproximadamente por día?",
@@ -301,17 +888,17 @@ Estoy aquí para ayudarte a descubrir cómo la Inteligencia Artificial puede tra
         for keyword, response in specific_tasks.items():
             if keyword in normalized:
                 # Avanzar a calificación si ya dieron detalles específicos
-                if turn >= 2:
+                if turn_number >= 2:
                     self.conversation.transition_phase(ConversationPhase.QUALIFICATION)
                 return response
 
         # Usar interpretador inteligente
-        if self.interpreter.mentions_problem(message):
+        if turn.has_intent(UserIntent.PROBLEM):
             return "Entiendo perfectamente. Ese tipo de desafíos son más comunes de lo que imaginas. ¿Me podrías contar un poco más sobre cómo afecta esto a tu día a día? ¿Cuánto tiempo o recursos estimas que pierden por esta situación?"
 
-        if self.interpreter.mentions_automation(message):
+        if turn.has_intent(UserIntent.AUTOMATION):
             # Variar la respuesta según el turno
-            if turn <= 1:
+            if turn_number <= 1:
                 return "¡Genial que estés explorando la IA! Hay muchas posibilidades según tu caso específico. Para recomendarte la mejor solución, ¿me cuentas cuál es la tarea o proceso que más te gustaría automatizar?"
             else:
                 # Ya mencionó automatización antes, profundizar
@@ -320,9 +907,9 @@ Estoy aquí para ayudarte a descubrir cómo la Inteligencia Artificial puede tra
 
         return "Gracias por compartir eso. Para poder recomendarte la solución ideal, me gustaría entender un poco mejor tu situación. ¿Cuál dirías que es el principal desafío o 'dolor de cabeza' que enfrentas en tu negocio actualmente?"
 
-    def _demo_qualification_response(self, message: str, profile: CustomerProfile) -> str:
+    def _demo_qualification_response(self, turn: TurnAnalysis, profile: CustomerProfile) -> str:
         """Respuestas para fase de calificación."""
-        if self.interpreter.is_price_inquiry(message):
+        if turn.has_intent(UserIntent.PRICE_INQUIRY):
             self.conversation.transition_phase(ConversationPhase.OBJECTION_HANDLING)
             return """¡Buena pregunta! Nuestras soluciones van desde $299/mes para un agente de atención al cliente hasta soluciones personalizadas para necesidades más complejas.
 
@@ -330,16 +917,15 @@ Lo interesante es que el retorno de inversión suele verse en el primer mes. Por
 
 ¿Tienes un presupuesto específico en mente? Así puedo recomendarte la opción que mejor se ajuste."""
 
-        normalized = self.interpreter.normalize(message)
-        if any(word in normalized for word in ["empleados", "equipo", "personas", "trabajadores", "gente", "colaboradores"]):
+        if turn.contains("empleados", "equipo", "personas", "trabajadores", "gente", "colaboradores"):
             return "Perfecto, eso me ayuda a entender mejor la escala. ¿Y en cuanto a la decisión de implementar una solución como esta, eres tú quien toma la decisión final o necesitarías consultarlo con alguien más?"
 
         return "Gracias por esa información. ¿Me podrías contar si ya han considerado alguna solución antes, o es la primera vez que exploran opciones de IA para su negocio?"
 
-    def _demo_presentation_response(self, message: str, profile: CustomerProfile) -> str:
+    def _demo_presentation_response(self, turn: TurnAnalysis, profile: CustomerProfile) -> str:
         """Respuestas para fase de presentación."""
         # Detectar si el usuario seleccionó una opción
-        selected_option = self.interpreter.detect_selected_option(message)
+        selected_option = turn.selected_option
 
         if selected_option:
             # El usuario eligió una opción específica
@@ -388,13 +974,12 @@ El siguiente paso sería agendar una demo de 20 minutos donde te muestro exactam
 
 ¿Cuál de estas te llama más la atención? O si prefieres, cuéntame más sobre tu necesidad principal y te recomiendo la más adecuada."""
 
-    def _demo_objection_response(self, message: str, profile: CustomerProfile) -> str:
+    def _demo_objection_response(self, turn: TurnAnalysis, profile: CustomerProfile) -> str:
         """Respuestas para manejo de objeciones."""
-        normalized = self.interpreter.normalize(message)
 
         # Objeción de precio
         price_objections = ["caro", "costoso", "mucho dinero", "barato", "economico", "muy caro", "no tengo presupuesto", "fuera de mi presupuesto"]
-        if any(word in normalized for word in price_objections) or self.interpreter.is_price_inquiry(message):
+        if turn.contains(*price_objections) or turn.has_intent(UserIntent.PRICE_INQUIRY):
             return """Entiendo la preocupación por la inversión. Déjame ponerlo en perspectiva:
 
 Un empleado de atención al cliente cuesta aproximadamente $1,000-$2,000/mes (salario + prestaciones). Nuestro agente de IA por $299/mes trabaja 24/7, nunca se enferma, y puede atender múltiples conversaciones simultáneamente.
@@ -407,7 +992,7 @@ Además, ofrecemos:
 ¿Te gustaría probar sin compromiso para ver los resultados?"""
 
         # Objeción de tiempo
-        if self.interpreter.is_time_inquiry(message):
+        if turn.has_intent(UserIntent.TIME_INQUIRY):
             return """¡La implementación es más rápida de lo que imaginas!
 
 Nuestros agentes pre-configurados están listos en **1-2 semanas**. El proceso es:
@@ -421,7 +1006,7 @@ Y lo mejor: tú no necesitas hacer nada técnico. Nosotros nos encargamos de tod
 ¿Tienes alguna fecha límite en mente para tener esto funcionando?"""
 
         # Objeción de confianza/dudas
-        if self.interpreter.has_doubt(message):
+        if turn.has_intent(UserIntent.DOUBT):
             return """¡Es una pregunta muy válida! Tenemos:
 
 • **Casos de éxito comprobados**: Clientes que han reducido 70% sus tiempos de respuesta
@@ -433,10 +1018,10 @@ Y lo mejor: tú no necesitas hacer nada técnico. Nosotros nos encargamos de tod
 
         return "Entiendo tu preocupación. ¿Me podrías contar un poco más sobre qué es específicamente lo que te genera dudas? Quiero asegurarme de darte la información correcta."
 
-    def _demo_closing_response(self, message: str, profile: CustomerProfile) -> str:
+    def _demo_closing_response(self, turn: TurnAnalysis, profile: CustomerProfile) -> str:
         """Respuestas para fase de cierre."""
         # Usar interpretador inteligente para detectar intención
-        if self.interpreter.is_affirmative(message):
+        if turn.is_affirmative():
             return f"""¡Excelente decisión! Me alegra mucho poder ayudarte.
 
 Para dar el siguiente paso, necesitaría:
@@ -451,7 +1036,7 @@ Con esos datos, nuestro equipo te contactará en las próximas 24 horas para:
 
 ¿Me compartes tus datos?"""
 
-        if self.interpreter.is_negative(message):
+        if turn.is_negative():
             return """¡Por supuesto! Entiendo que es una decisión importante.
 
 ¿Te parece si te envío información por correo para que puedas revisarla con calma? Incluiría:
@@ -462,7 +1047,7 @@ Con esos datos, nuestro equipo te contactará en las próximas 24 horas para:
 Solo necesitaría tu correo electrónico. ¿Me lo compartes?"""
 
         # Detectar si seleccionó una opción (mañana/tarde, demo/prueba, etc.)
-        normalized = self.interpreter.normalize(message)
+        normalized = turn.normalized
         if any(word in normalized for word in ["manana", "mañana", "am", "temprano"]):
             return """¡Perfecto! Tenemos disponibilidad por las mañanas.
 
@@ -509,7 +1094,7 @@ El siguiente paso sería agendar una demo de 20 minutos donde te muestro exactam
 
 ¿Qué horario te vendría mejor: mañanas o tardes?"""
 
-    def _demo_generic_response(self, message: str) -> str:
+    def _demo_generic_response(self, turn: TurnAnalysis) -> str:
         """Respuesta genérica de fallback."""
         return "Gracias por tu mensaje. ¿Podrías contarme un poco más sobre lo que estás buscando? Así puedo orientarte hacia la solución más adecuada para tu caso."
 
@@ -531,6 +1116,15 @@ El siguiente paso sería agendar una demo de 20 minutos donde te muestro exactam
             return get_products_for_industry(profile.industry)
         return list(PRODUCT_CATALOG.values())[:3]
 
+    def snapshot(self) -> bytes:
+        """Estado de la sesión en binario (ver core/session_codec.py)."""
+        return dump_agent(self)
+
+    @classmethod
+    def restore(cls, data: bytes, api_key: Optional[str] = None) -> "SalesAgent":
+        """Reconstruye una sesión desde ``snapshot``."""
+        return load_agent(data, api_key)
+
     def reset(self):
         """Reinicia la conversación."""
         self.conversation.clear_history()
@@ -1,10 +1,15 @@
 """Sistema de gestión de conversaciones."""
 
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
 from datetime import datetime
 from enum import Enum
-
+from config.prompts import register_prompt, render_prompt
+from utils.helpers import estimate_tokens, MESSAGE_TOKEN_OVERHEAD
 
 class MessageRole(Enum):
     """Roles en la conversación."""
@@ -24,13 +29,66 @@ class ConversationPhase(Enum):
     FOLLOW_UP = "seguimiento"              # Programar seguimiento
 
 
-@dataclass
 class Message:
-    """Representa un mensaje en la conversación."""
-    role: MessageRole
-    content: str
-    timestamp: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    """
+    Representa un mensaje en la conversación.
+
+    Registro compacto (``__slots__``): el rol es el miembro compartido de
+    ``MessageRole``, la fecha se guarda como float y ``metadata`` se crea
+    recién al usarla. ``timestamp`` y ``metadata`` se exponen igual que antes.
+    """
+
+    __slots__ = ("role", "_content", "_created", "_metadata", "_tokens")
+
+    def __init__(
+        self,
+        role: MessageRole,
+        content: str,
+        timestamp: Optional[datetime] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.role = role
+        self._content = content
+        self._created = timestamp.timestamp() if timestamp else time.time()
+        self._metadata = metadata or None
+        self._tokens = -1
+
+    @property
+    def content(self) -> str:
+        """Texto del mensaje (al cambiarlo se recalculan sus tokens)."""
+        return self._content
+
+    @content.setter
+    def content(self, value: str):
+        self._content = value
+        self._tokens = -1
+
+    @property
+    def timestamp(self) -> datetime:
+        """Fecha de creación del mensaje."""
+        return datetime.fromtimestamp(self._created)
+
+    @timestamp.setter
+    def timestamp(self, value: datetime):
+        self._created = value.timestamp()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Metadatos del mensaje (el dict se crea la primera vez que se pide)."""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]):
+        self._metadata = value
+
+    @property
+    def token_count(self) -> int:
+        """Tokens estimados del mensaje (se calcula una vez por contenido)."""
+        if self._tokens < 0:
+            self._tokens = estimate_tokens(self._content) + MESSAGE_TOKEN_OVERHEAD
+        return self._tokens
 
     def to_dict(self) -> Dict[str, Any]:
         """Convierte el mensaje a diccionario para API."""
@@ -39,24 +97,70 @@ class Message:
             "content": self.content
         }
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Message):
+            return NotImplemented
+        return (
+            self.role == other.role
+            and self._content == other._content
+            and self._created == other._created
+            and (self._metadata or {}) == (other._metadata or {})
+        )
 
-class ConversationManager:
-    """Gestiona el flujo de la conversación de ventas."""
+    __hash__ = None  # Mutable, como el dataclass que reemplaza
 
-    def __init__(self, agent_name: str, company_name: str):
-        self.agent_name = agent_name
-        self.company_name = company_name
-        self.messages: List[Message] = []
-        self.current_phase = ConversationPhase.GREETING
-        self.phase_history: List[ConversationPhase] = []
-        self.turn_count = 0
+    def __repr__(self) -> str:
+        return (
+            f"Message(role={self.role!r}, content={self._content!r}, "
+            f"timestamp={self.timestamp!r}, metadata={self.metadata if self._metadata else {}!r})"
+        )
 
-        # Inicializar con el prompt del sistema
-        self._initialize_system_prompt()
 
-    def _initialize_system_prompt(self):
-        """Crea el prompt del sistema para el agente vendedor."""
-        system_prompt = f"""Eres {self.agent_name}, una asesora comercial experta de {self.company_name}, especializada en soluciones de Inteligencia Artificial para empresas.
+def _transcript_line(msg: Message, agent_name: str) -> str:
+    """Línea de transcripción (para proveedores que reciben un solo texto, como Gemini)."""
+    speaker = "Cliente" if msg.role == MessageRole.USER else agent_name
+    return f"{speaker}: {msg.content}"
+
+
+# Conversión de un mensaje del historial al formato de cada proveedor
+PAYLOAD_FORMATS = {
+    "chat": lambda msg, agent_name: msg.to_dict(),   # OpenAI, Groq, Anthropic
+    "transcript": _transcript_line,                  # Gemini
+}
+
+# Encabezado del mensaje de sistema con el resumen de los turnos compactados
+SUMMARY_HEADER = "[Resumen de la conversación anterior]"
+
+# Nota que reemplaza a los turnos que no entran en la ventana de contexto
+OMITTED_TURNS_NOTE = "[Se omitieron {count} mensajes anteriores de la conversación para respetar el límite de contexto.]"
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """Sección del prompt del vendedor y las fases en las que se envía (vacío = todas)."""
+    tag: str
+    text: str
+    phases: FrozenSet[ConversationPhase] = frozenset()
+    heading: Optional[str] = None  # Encabezado compartido con las secciones vecinas (p. ej. SPIN)
+
+    def applies_to(self, phase: Optional[ConversationPhase]) -> bool:
+        return phase is None or not self.phases or phase in self.phases
+
+
+def _phases(*phases: ConversationPhase) -> FrozenSet[ConversationPhase]:
+    return frozenset(phases)
+
+
+_SPIN_HEADING = "## METODOLOGÍA DE VENTAS (SPIN)\n\n"
+
+# Secciones del prompt del vendedor, en el orden en que se arman. Cada fase
+# recibe solo las suyas: las etapas SPIN de su momento de la venta, las
+# objeciones desde la presentación y el guion de cierre cuando ya hay interés.
+# Con la API la conversación no pasa por OBJECTION_HANDLING salvo en modo demo
+# (ver ``should_advance_phase``), por eso objeciones y cierre también van en
+# PRESENTATION.
+SALES_PROMPT_SECTIONS: Tuple[PromptSection, ...] = (
+    PromptSection("identidad", """Eres {agent_name}, una asesora comercial experta de {company_name}, especializada en soluciones de Inteligencia Artificial para empresas.
 
 ## TU PERSONALIDAD
 - Eres amable, profesional y empática
@@ -69,7 +173,8 @@ class ConversationManager:
 ## TU OBJETIVO
 Ayudar a los clientes a encontrar la solución de IA perfecta para sus necesidades, guiándolos desde el descubrimiento hasta la decisión de compra.
 
-## PRODUCTOS QUE OFRECES
+"""),
+    PromptSection("productos", """## PRODUCTOS QUE OFRECES
 1. **Agente de Atención al Cliente 24/7** ($299/mes): Soporte automatizado multiidioma
 2. **Agente de Ventas Inteligente** ($499/mes): Calificación de leads y cierre de ventas
 3. **Agente de Recursos Humanos** ($399/mes): Automatización de procesos de RRHH
@@ -78,29 +183,32 @@ Ayudar a los clientes a encontrar la solución de IA perfecta para sus necesidad
 6. **Asistente Médico IA** ($699/mes): Triaje y gestión de pacientes
 7. **Agente Personalizado** (Cotización): Desarrollo a medida
 
-## METODOLOGÍA DE VENTAS (SPIN)
-
-### 1. SITUACIÓN (Conocer al cliente)
+"""),
+    PromptSection("spin_situacion", """### 1. SITUACIÓN (Conocer al cliente)
 - Pregunta sobre su negocio, industria y rol
 - Entiende su contexto actual
 - Ejemplos: "¿A qué se dedica tu empresa?", "¿Cuántos empleados tienen?"
 
-### 2. PROBLEMA (Identificar dolor)
+""", _phases(ConversationPhase.GREETING, ConversationPhase.DISCOVERY), _SPIN_HEADING),
+    PromptSection("spin_problema", """### 2. PROBLEMA (Identificar dolor)
 - Descubre sus desafíos actuales
 - Profundiza en el impacto de esos problemas
 - Ejemplos: "¿Cuáles son los principales retos que enfrentan?", "¿Cómo afecta eso a tu equipo?"
 
-### 3. IMPLICACIÓN (Mostrar consecuencias)
+""", _phases(ConversationPhase.DISCOVERY, ConversationPhase.QUALIFICATION), _SPIN_HEADING),
+    PromptSection("spin_implicacion", """### 3. IMPLICACIÓN (Mostrar consecuencias)
 - Ayuda a ver el costo de no actuar
 - Cuantifica el impacto cuando sea posible
 - Ejemplos: "¿Cuánto tiempo/dinero pierden por eso?", "¿Qué pasa si no lo resuelven?"
 
-### 4. NECESIDAD-BENEFICIO (Presentar solución)
+""", _phases(ConversationPhase.QUALIFICATION, ConversationPhase.PRESENTATION), _SPIN_HEADING),
+    PromptSection("spin_necesidad", """### 4. NECESIDAD-BENEFICIO (Presentar solución)
 - Conecta sus necesidades con tus soluciones
 - Muestra beneficios específicos para su caso
 - Ejemplos: "¿Cómo cambiaría tu día a día si pudieras automatizar eso?"
 
-## MANEJO DE OBJECIONES
+""", _phases(ConversationPhase.PRESENTATION, ConversationPhase.OBJECTION_HANDLING), _SPIN_HEADING),
+    PromptSection("objeciones", """## MANEJO DE OBJECIONES
 
 ### Precio
 - Enfoca en el ROI y el ahorro a largo plazo
@@ -122,7 +230,8 @@ Ayudar a los clientes a encontrar la solución de IA perfecta para sus necesidad
 - Menciona el soporte y capacitación incluidos
 - Destaca las integraciones disponibles
 
-## REGLAS DE CONVERSACIÓN
+""", _phases(ConversationPhase.PRESENTATION, ConversationPhase.OBJECTION_HANDLING)),
+    PromptSection("reglas", """## REGLAS DE CONVERSACIÓN
 
 1. **Siempre empieza** con un saludo cálido y una pregunta abierta
 2. **Escucha primero** antes de presentar productos
@@ -135,48 +244,389 @@ Ayudar a los clientes a encontrar la solución de IA perfecta para sus necesidad
 9. **Nunca** inventes información o prometas cosas que no puedes cumplir
 10. **Siempre** ofrece ayuda adicional al final
 
-## FORMATO DE RESPUESTAS
+"""),
+    PromptSection("formato", """## FORMATO DE RESPUESTAS
 - Mantén respuestas concisas pero completas
 - Usa viñetas para listas cuando sea apropiado
 - Incluye preguntas para mantener el diálogo
 - Usa emojis con moderación para ser amigable pero profesional
 
-## CIERRE DE CONVERSACIÓN
+"""),
+    PromptSection("cierre", """## CIERRE DE CONVERSACIÓN
 Cuando el cliente muestre interés real:
 1. Resume los beneficios relevantes para su caso
 2. Propón un siguiente paso concreto (demo, llamada, prueba)
 3. Solicita datos de contacto de forma natural
 4. Confirma la acción y agradece
 
-Recuerda: Tu éxito se mide por ayudar genuinamente al cliente, no solo por cerrar ventas."""
+""", _phases(
+        ConversationPhase.PRESENTATION,
+        ConversationPhase.OBJECTION_HANDLING,
+        ConversationPhase.CLOSING,
+        ConversationPhase.FOLLOW_UP,
+    )),
+    PromptSection("recuerda", "Recuerda: Tu éxito se mide por ayudar genuinamente al cliente, no solo por cerrar ventas."),
+)
+
+
+@register_prompt("sales_agent")
+def build_sales_agent_prompt(agent_name: str, company_name: str, phase: Optional[str] = None) -> str:
+    """
+    Prompt del sistema para el agente vendedor.
+
+    Con ``phase`` (valor de ``ConversationPhase``) solo lleva las secciones de
+    esa fase; sin ella, el prompt completo.
+    """
+    current = ConversationPhase(phase) if phase else None
+    parts: List[str] = []
+    heading = None
+    for section in SALES_PROMPT_SECTIONS:
+        if not section.applies_to(current):
+            continue
+        if section.heading and section.heading != heading:
+            parts.append(section.heading)
+        heading = section.heading
+        parts.append(section.text)
+    return "".join(parts).format(agent_name=agent_name, company_name=company_name).rstrip("\n")
+
+
+def phase_prompt_stats(agent_name: str, company_name: str) -> Dict[str, Any]:
+    """Tokens del prompt de cada fase (se renderizan todos, una sola vez) frente al prompt completo."""
+    full = render_prompt("sales_agent", agent_name=agent_name, company_name=company_name).tokens
+    phases = {
+        phase.value: render_prompt(
+            "sales_agent", agent_name=agent_name, company_name=company_name, phase=phase.value
+        ).tokens
+        for phase in ConversationPhase
+    }
+    return {
+        "full_tokens": full,
+        "phase_tokens": phases,
+        "saved_ratio": {phase: round(1 - tokens / full, 4) for phase, tokens in phases.items()},
+        "sections": {
+            section.tag: sorted(p.value for p in section.phases) or "todas"
+            for section in SALES_PROMPT_SECTIONS
+        },
+    }
+
+
+class ConversationManager:
+    """Gestiona el flujo de la conversación de ventas."""
+
+    def __init__(
+        self,
+        agent_name: str,
+        company_name: str,
+        max_turns: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        summary_trigger_turns: Optional[int] = None,
+        summary_keep_turns: int = 8
+    ):
+        self.agent_name = agent_name
+        self.company_name = company_name
+        self.messages: List[Message] = []
+        self.current_phase = ConversationPhase.GREETING
+        self.phase_history: List[ConversationPhase] = []
+        self.turn_count = 0
+
+        # Ventana de contexto: None = sin límite (historial completo)
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+
+        # Resumen incremental: al superar summary_trigger_turns se compactan los
+        # turnos antiguos dejando summary_keep_turns sin resumir (None = nunca)
+        self.summary_trigger_turns = summary_trigger_turns
+        self.summary_keep_turns = summary_keep_turns
+        self._lock = threading.RLock()
+        self._compaction_pending = False
+        self._generation = 0  # Cambia al limpiar el historial: invalida compactaciones en curso
+
+        # Índices y caché de payloads (append-only, ver _sync_index)
+        self._indexed_messages: Optional[List[Message]] = None
+        self._history_offset = 0
+        self._indexed_count = 0
+        self._token_total = 0
+        self._turn_starts = array("q")  # Índice del primer mensaje de cada turno
+        self._turn_tokens = array("q")  # Tokens del historial antes de cada turno
+        self._payloads: Dict[str, List[Any]] = {}
+        self._phase_prompt: Optional[Message] = None  # Prompt de plantilla vigente (se cambia con la fase)
 
-        self.messages.append(Message(
-            role=MessageRole.SYSTEM,
-            content=system_prompt
-        ))
+        # Inicializar con el prompt del sistema
+        self._initialize_system_prompt()
+
+    def _initialize_system_prompt(self):
+        """Agrega el prompt del sistema de la fase actual (compartido entre sesiones, ver config/prompts.py)."""
+        self._phase_prompt = self.system_prompt_message()
+        self.messages.append(self._phase_prompt)
+
+    def system_prompt_message(self, phase: Optional[ConversationPhase] = None) -> Message:
+        """Mensaje de sistema con las secciones del prompt de ``phase`` (por defecto la fase actual)."""
+        prompt = render_prompt(
+            "sales_agent",
+            agent_name=self.agent_name,
+            company_name=self.company_name,
+            phase=(phase or self.current_phase).value
+        )
+        message = Message(role=MessageRole.SYSTEM, content=prompt.text)
+        message._tokens = prompt.tokens + MESSAGE_TOKEN_OVERHEAD  # Conteo ya calculado por el registro
+        return message
+
+    def _sync_system_prompt(self):
+        """
+        Cambia el prompt del sistema por el de la fase actual.
+
+        Se reemplaza el mensaje (no se modifica su texto) para que una petición
+        que ya tomó la ventana siga viendo el prompt con el que empezó. Un
+        prompt que no es el de la plantilla (p. ej. restaurado de un snapshot
+        con otro texto) no se toca.
+        """
+        with self._lock:
+            first = self.messages[0] if self.messages else None
+            if first is None or first is not self._phase_prompt:
+                return
+            message = self.system_prompt_message()
+            message._created = first._created
+            self.messages[0] = self._phase_prompt = message
 
     def add_user_message(self, content: str) -> Message:
         """Agrega un mensaje del usuario."""
         message = Message(role=MessageRole.USER, content=content)
-        self.messages.append(message)
-        self.turn_count += 1
+        with self._lock:
+            self.messages.append(message)
+            self.turn_count += 1
         return message
 
     def add_assistant_message(self, content: str) -> Message:
         """Agrega un mensaje del asistente."""
         message = Message(role=MessageRole.ASSISTANT, content=content)
-        self.messages.append(message)
+        with self._lock:
+            self.messages.append(message)
         return message
 
-    def get_messages_for_api(self) -> List[Dict[str, str]]:
-        """Obtiene los mensajes en formato para API."""
-        return [msg.to_dict() for msg in self.messages]
+    def get_messages_for_api(
+        self,
+        token_budget: Optional[int] = None,
+        reserve_tokens: int = 0
+    ) -> List[Dict[str, str]]:
+        """
+        Obtiene los mensajes en formato para API.
+
+        Sin presupuesto ni ``max_turns`` devuelve el historial completo. Si no,
+        conserva los mensajes de sistema y los turnos más recientes que entran en
+        ``token_budget - reserve_tokens``; los anteriores se reemplazan por una
+        nota fija con la cantidad omitida. El turno actual siempre se incluye.
+
+        Los diccionarios del historial salen de la caché: no deben modificarse.
+        """
+        system_messages, history = self.get_api_payload("chat", token_budget, reserve_tokens)
+        return [msg.to_dict() for msg in system_messages] + history
+
+    def get_window(self, token_budget: Optional[int] = None, reserve_tokens: int = 0) -> List[Message]:
+        """Mensajes que entran en la ventana de contexto (ver ``get_messages_for_api``)."""
+        with self._lock:
+            system_messages, first = self._window(token_budget, reserve_tokens)
+            return system_messages + self.messages[first:]
+
+    def get_api_payload(
+        self,
+        payload_format: str,
+        token_budget: Optional[int] = None,
+        reserve_tokens: int = 0
+    ) -> Tuple[List[Message], List[Any]]:
+        """
+        Ventana de contexto lista para un proveedor.
+
+        Devuelve los mensajes de sistema (prompt, resumen y nota de omitidos) y
+        el historial ya convertido a ``payload_format`` (ver ``PAYLOAD_FORMATS``).
+        Cada mensaje se convierte una sola vez: un turno nuevo solo agrega sus
+        entradas a la caché y la ventana es un corte de ella.
+        """
+        with self._lock:
+            system_messages, first = self._window(token_budget, reserve_tokens)
+            entries = self._payload_entries(payload_format)
+            return system_messages, entries[first - self._history_offset:]
+
+    def _window(self, token_budget: Optional[int], reserve_tokens: int) -> Tuple[List[Message], int]:
+        """Mensajes de sistema de la ventana e índice del primer mensaje del historial incluido."""
+        self._sync_index()
+        offset = self._history_offset
+        system_messages = self.messages[:offset]
+        first_turn = 0
+
+        budget = token_budget if token_budget is not None else self.token_budget
+        if self.max_turns is not None:
+            first_turn = max(0, len(self._turn_starts) - max(self.max_turns, 1))
+        if budget is not None and self._turn_starts:
+            available = budget - reserve_tokens - sum(msg.token_count for msg in system_messages)
+            # Se reserva espacio para la nota de mensajes omitidos
+            available -= estimate_tokens(OMITTED_TURNS_NOTE) + MESSAGE_TOKEN_OVERHEAD
+            # Primer turno desde el cual el resto del historial entra en el presupuesto
+            fitting = bisect_left(self._turn_tokens, self._token_total - available, lo=first_turn)
+            first_turn = min(fitting, len(self._turn_starts) - 1)
+
+        first = self._turn_starts[first_turn] if first_turn < len(self._turn_starts) else len(self.messages)
+        omitted = first - offset
+        if omitted:
+            note = Message(role=MessageRole.SYSTEM, content=OMITTED_TURNS_NOTE.format(count=omitted))
+            return system_messages + [note], first
+        return system_messages, first
+
+    def _sync_index(self):
+        """
+        Extiende los índices append-only con los mensajes nuevos.
+
+        Se guardan el total de tokens del historial, el inicio de cada turno y los
+        tokens acumulados antes de cada turno; así elegir la ventana es una
+        búsqueda binaria. Si la lista cambió (compactación o limpieza) se reinicia.
+        """
+        if self._indexed_messages is not self.messages:
+            self._indexed_messages = self.messages
+            self._history_offset = self._history_start(self.messages)
+            self._indexed_count = self._history_offset
+            self._token_total = 0
+            self._turn_starts = array("q")
+            self._turn_tokens = array("q")
+            self._payloads = {}
+
+        messages = self.messages
+        for position in range(self._indexed_count, len(messages)):
+            msg = messages[position]
+            if msg.role == MessageRole.USER or position == self._history_offset:
+                self._turn_starts.append(position)
+                self._turn_tokens.append(self._token_total)
+            self._token_total += msg.token_count
+        self._indexed_count = len(messages)
+
+    def _payload_entries(self, payload_format: str) -> List[Any]:
+        """Entradas del historial en el formato dado; solo convierte los mensajes nuevos."""
+        convert = PAYLOAD_FORMATS[payload_format]
+        entries = self._payloads.setdefault(payload_format, [])
+        for msg in self.messages[self._history_offset + len(entries):]:
+            entries.append(convert(msg, self.agent_name))
+        return entries
+
+    @staticmethod
+    def _history_start(messages: List[Message]) -> int:
+        """Índice del primer mensaje después del prompt del sistema (y del resumen)."""
+        start = 0
+        while start < len(messages) and messages[start].role == MessageRole.SYSTEM:
+            start += 1
+        return start
+
+    @staticmethod
+    def _group_turns(messages: List[Message]) -> List[List[Message]]:
+        """Agrupa los mensajes en turnos: cada mensaje del usuario con las respuestas que le siguen."""
+        turns: List[List[Message]] = []
+        for msg in messages:
+            if msg.role == MessageRole.USER or not turns:
+                turns.append([msg])
+            else:
+                turns[-1].append(msg)
+        return turns
+
+    @property
+    def summary_message(self) -> Optional[Message]:
+        """Mensaje de sistema con el resumen de los turnos compactados (si existe)."""
+        with self._lock:
+            for msg in self.messages[:self._history_start(self.messages)]:
+                if msg.metadata.get("summary"):
+                    return msg
+        return None
+
+    def needs_compaction(self) -> bool:
+        """Indica si hay más turnos sin resumir que ``summary_trigger_turns``."""
+        if not self.summary_trigger_turns:
+            return False
+        with self._lock:
+            self._sync_index()
+            return len(self._turn_starts) > self.summary_trigger_turns
+
+    def begin_compaction(self) -> bool:
+        """Marca una compactación como pendiente; False si no hace falta o ya hay una."""
+        with self._lock:
+            if self._compaction_pending or not self.needs_compaction():
+                return False
+            self._compaction_pending = True
+            return True
+
+    def end_compaction(self):
+        """Libera la marca de compactación pendiente."""
+        with self._lock:
+            self._compaction_pending = False
+
+    def compact(self, summarizer) -> bool:
+        """
+        Resume los turnos que salieron de la ventana reciente.
+
+        Solo se envían al resumidor los mensajes nuevos desde la última
+        compactación junto con el resumen anterior. El resumen se genera sin
+        tomar el lock; al aplicarlo se verifica que el historial no haya
+        cambiado (p. ej. ``clear_history``) y si cambió se descarta.
+        """
+        with self._lock:
+            generation = self._generation
+            start = self._history_start(self.messages)
+            turns = self._group_turns(self.messages[start:])
+            if len(turns) <= self.summary_keep_turns:
+                return False
+            aged = [msg for turn in turns[:len(turns) - self.summary_keep_turns] for msg in turn]
+            previous = self.summary_message
+
+        text = summarizer.summarize(previous.metadata["summary_text"] if previous else None, aged)
+
+        with self._lock:
+            start = self._history_start(self.messages)
+            current = self.messages[start:start + len(aged)]
+            if self._generation != generation or len(current) != len(aged) or any(
+                a is not b for a, b in zip(current, aged)
+            ):
+                return False
+
+            counts = previous.metadata if previous else {}
+            summary = Message(
+                role=MessageRole.SYSTEM,
+                content=f"{SUMMARY_HEADER}\n{text}",
+                metadata={
+                    "summary": True,
+                    "summary_text": text,
+                    "user_messages": counts.get("user_messages", 0) + sum(
+                        1 for msg in aged if msg.role == MessageRole.USER
+                    ),
+                    "assistant_messages": counts.get("assistant_messages", 0) + sum(
+                        1 for msg in aged if msg.role == MessageRole.ASSISTANT
+                    ),
+                }
+            )
+            head = [msg for msg in self.messages[:start] if msg is not previous]
+            self.messages = head + [summary] + self.messages[start + len(aged):]
+        return True
 
     def transition_phase(self, new_phase: ConversationPhase):
         """Cambia a una nueva fase de conversación."""
         if self.current_phase != new_phase:
             self.phase_history.append(self.current_phase)
             self.current_phase = new_phase
+            self._sync_system_prompt()
+
+    def rollback_turn(
+        self, message: Message, phase: ConversationPhase, phase_history: List[ConversationPhase]
+    ) -> bool:
+        """
+        Deshace un turno que no llegó a responderse (p. ej. el cliente se fue a mitad del stream).
+
+        Quita ``message`` si sigue siendo el último mensaje, descuenta el turno
+        y vuelve a la fase previa. La lista se reemplaza (no se modifica) para
+        que los índices y la caché de payloads se reconstruyan.
+        """
+        with self._lock:
+            if not self.messages or self.messages[-1] is not message:
+                return False
+            self.messages = self.messages[:-1]
+            self.turn_count -= 1
+            self.current_phase = phase
+            self.phase_history = phase_history
+            self._sync_system_prompt()
+        return True
 
     def get_phase_context(self) -> str:
         """Obtiene contexto sobre la fase actual para el prompt."""
@@ -209,13 +659,16 @@ Recuerda: Tu éxito se mide por ayudar genuinamente al cliente, no solo por cerr
         """Obtiene un resumen de la conversación."""
         user_messages = [m for m in self.messages if m.role == MessageRole.USER]
         assistant_messages = [m for m in self.messages if m.role == MessageRole.ASSISTANT]
+        summary = self.summary_message
+        summarized = summary.metadata if summary else {}
 
         return {
             "total_turns": self.turn_count,
             "current_phase": self.current_phase.value,
             "phases_visited": [p.value for p in self.phase_history],
-            "user_messages_count": len(user_messages),
-            "assistant_messages_count": len(assistant_messages),
+            "user_messages_count": len(user_messages) + summarized.get("user_messages", 0),
+            "assistant_messages_count": len(assistant_messages) + summarized.get("assistant_messages", 0),
+            "summarized_messages_count": summarized.get("user_messages", 0) + summarized.get("assistant_messages", 0),
             "duration": (datetime.now() - self.messages[0].timestamp).seconds if self.messages else 0
         }
 
@@ -225,10 +678,13 @@ Recuerda: Tu éxito se mide por ayudar genuinamente al cliente, no solo por cerr
 
     def clear_history(self):
         """Limpia el historial manteniendo el prompt del sistema."""
-        system_message = self.messages[0] if self.messages else None
-        self.messages = []
-        if system_message:
-            self.messages.append(system_message)
+        with self._lock:
+            system_message = self.messages[0] if self.messages else None
+            self.messages = []
+            if system_message:
+                self.messages.append(system_message)
+            self._generation += 1
         self.current_phase = ConversationPhase.GREETING
         self.phase_history = []
         self.turn_count = 0
+        self._sync_system_prompt()
@@ -1,8 +1,12 @@
 """Sistema de perfilamiento de clientes."""
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 from enum import Enum
+from config.lexicon import Lexicon, get_lexicon
+
+if TYPE_CHECKING:
+    from .turn_analysis import TurnAnalysis
 
 
 class CustomerType(Enum):
@@ -41,6 +45,11 @@ class Urgency(Enum):
     CRITICAL = "critica"   # Necesita solución inmediata
 
 
+# Grupos del léxico -> enums (el léxico usa los valores de los enums como nombre de grupo)
+_CUSTOMER_TYPES = {customer_type.value: customer_type for customer_type in CustomerType}
+_URGENCIES = {urgency.value: urgency for urgency in Urgency}
+
+
 @dataclass
 class CustomerProfile:
     """Perfil del cliente durante la conversación."""
@@ -131,108 +140,109 @@ class CustomerProfile:
 class CustomerProfiler:
     """Analiza y actualiza el perfil del cliente basado en la conversación."""
 
-    # Palabras clave para detectar tipo de cliente
-    STARTUP_KEYWORDS = ["startup", "emprendimiento", "nueva empresa", "recién iniciando", "lanzamiento"]
-    PYME_KEYWORDS = ["pyme", "pequeña empresa", "mediana empresa", "negocio familiar", "local"]
-    ENTERPRISE_KEYWORDS = ["corporativo", "multinacional", "enterprise", "gran empresa", "corporación"]
-    FREELANCER_KEYWORDS = ["freelance", "independiente", "consultor", "autónomo", "por cuenta propia"]
-
-    # Palabras clave para detectar industria
-    INDUSTRY_KEYWORDS = {
-        "retail": ["tienda", "comercio", "retail", "ventas", "ecommerce", "e-commerce"],
-        "salud": ["médico", "clínica", "hospital", "salud", "pacientes", "consultorio"],
-        "educacion": ["educación", "escuela", "universidad", "cursos", "estudiantes", "academia"],
-        "legal": ["abogado", "legal", "jurídico", "notaría", "despacho"],
-        "tecnologia": ["software", "tecnología", "tech", "desarrollo", "app", "saas"],
-        "finanzas": ["banco", "finanzas", "financiero", "crédito", "inversión"],
-        "inmobiliaria": ["inmobiliaria", "bienes raíces", "propiedades", "rentas"],
-        "recursos_humanos": ["rrhh", "recursos humanos", "empleados", "personal", "talento"],
-        "gastronomia": ["restaurante", "comida", "cocina", "chef", "menú", "gastronomía", "food"],
-        "cafeteria": ["cafetería", "cafeteria", "café", "cafe", "coffee", "panadería", "pastelería"]
-    }
-
-    # Palabras clave para detectar urgencia
-    URGENCY_HIGH_KEYWORDS = ["urgente", "inmediato", "ahora", "lo antes posible", "cuanto antes", "rápido"]
-    URGENCY_MEDIUM_KEYWORDS = ["pronto", "próximamente", "este mes", "en breve"]
-    URGENCY_LOW_KEYWORDS = ["explorando", "investigando", "más adelante", "no hay prisa", "futuro"]
-
-    # Palabras clave para detectar objeciones
-    OBJECTION_KEYWORDS = {
-        "precio": ["caro", "costoso", "presupuesto", "económico", "precio", "dinero", "inversión"],
-        "tiempo": ["tiempo", "implementación", "demora", "rápido", "cuánto tarda"],
-        "confianza": ["seguro", "garantía", "funciona", "resultados", "prueba"],
-        "tecnico": ["técnico", "integración", "compatible", "complicado", "difícil"],
-        "competencia": ["competencia", "otros", "alternativas", "diferencia"]
-    }
+    # Las palabras clave viven en config/lexicon.json (léxico "profiler"), ver config/lexicon.py
+    LEXICON_NAME = "profiler"
 
     def __init__(self):
         self.profile = CustomerProfile()
 
-    def analyze_message(self, message: str) -> CustomerProfile:
-        """Analiza un mensaje y actualiza el perfil."""
-        message_lower = message.lower()
+    def analyze_message(self, message: str, turn: Optional["TurnAnalysis"] = None) -> CustomerProfile:
+        """Analiza un mensaje y actualiza el perfil.
+
+        Si se recibe el ``TurnAnalysis`` del turno se reutiliza; si no, se calcula aquí.
+        """
+        if turn is None:
+            from .turn_analysis import analyze_turn  # Import diferido: turn_analysis depende de este módulo
+            turn = analyze_turn(message)
 
         # Detectar tipo de cliente
-        self._detect_customer_type(message_lower)
+        self._detect_customer_type(turn)
 
         # Detectar industria
-        self._detect_industry(message_lower)
+        self._detect_industry(turn)
 
         # Detectar urgencia
-        self._detect_urgency(message_lower)
+        self._detect_urgency(turn)
 
         # Detectar objeciones
-        self._detect_objections(message_lower)
+        self._detect_objections(turn)
 
         # Actualizar engagement
-        self._update_engagement(message)
+        self._update_engagement(turn)
 
         # Actualizar qualification score
         self._update_qualification()
 
         return self.profile
 
-    def _detect_customer_type(self, message: str):
-        """Detecta el tipo de cliente."""
-        if any(kw in message for kw in self.STARTUP_KEYWORDS):
-            self.profile.customer_type = CustomerType.STARTUP
-        elif any(kw in message for kw in self.ENTERPRISE_KEYWORDS):
-            self.profile.customer_type = CustomerType.ENTERPRISE
-        elif any(kw in message for kw in self.PYME_KEYWORDS):
-            self.profile.customer_type = CustomerType.PYME
-        elif any(kw in message for kw in self.FREELANCER_KEYWORDS):
-            self.profile.customer_type = CustomerType.FREELANCER
-
-    def _detect_industry(self, message: str):
-        """Detecta la industria del cliente."""
-        for industry, keywords in self.INDUSTRY_KEYWORDS.items():
-            if any(kw in message for kw in keywords):
-                self.profile.industry = industry
-                break
-
-    def _detect_urgency(self, message: str):
-        """Detecta el nivel de urgencia."""
-        if any(kw in message for kw in self.URGENCY_HIGH_KEYWORDS):
-            self.profile.urgency = Urgency.HIGH
-        elif any(kw in message for kw in self.URGENCY_MEDIUM_KEYWORDS):
-            self.profile.urgency = Urgency.MEDIUM
-        elif any(kw in message for kw in self.URGENCY_LOW_KEYWORDS):
-            self.profile.urgency = Urgency.LOW
-
-    def _detect_objections(self, message: str):
-        """Detecta objeciones del cliente."""
-        for objection_type, keywords in self.OBJECTION_KEYWORDS.items():
-            if any(kw in message for kw in keywords):
-                if objection_type not in self.profile.objections:
-                    self.profile.objections.append(objection_type)
-
-    def _update_engagement(self, message: str):
+    @classmethod
+    def lexicon(cls) -> Lexicon:
+        """Léxico vigente del perfilador (se actualiza con las recargas del registro)."""
+        return get_lexicon(cls.LEXICON_NAME)
+
+    @classmethod
+    def match_keywords(cls, message: str) -> Set[Tuple[str, str]]:
+        """Recorre el mensaje una vez y devuelve todas las categorías activadas."""
+        return cls.lexicon().scan(message)
+
+    @classmethod
+    def detect_customer_type(cls, message: str, hits: Optional[Set[Tuple[str, str]]] = None) -> Optional[CustomerType]:
+        """Detecta el tipo de cliente (los grupos del léxico son valores de CustomerType)."""
+        hits = cls.match_keywords(message) if hits is None else hits
+        for group in cls.lexicon().all(hits, "customer_type"):
+            if group in _CUSTOMER_TYPES:
+                return _CUSTOMER_TYPES[group]
+        return None
+
+    @classmethod
+    def detect_industry(cls, message: str, hits: Optional[Set[Tuple[str, str]]] = None) -> Optional[str]:
+        """Detecta la industria mencionada en el mensaje."""
+        hits = cls.match_keywords(message) if hits is None else hits
+        return cls.lexicon().first(hits, "industry")
+
+    @classmethod
+    def detect_urgency(cls, message: str, hits: Optional[Set[Tuple[str, str]]] = None) -> Optional[Urgency]:
+        """Detecta el nivel de urgencia (los grupos del léxico son valores de Urgency)."""
+        hits = cls.match_keywords(message) if hits is None else hits
+        for group in cls.lexicon().all(hits, "urgency"):
+            if group in _URGENCIES:
+                return _URGENCIES[group]
+        return None
+
+    @classmethod
+    def detect_objections(cls, message: str, hits: Optional[Set[Tuple[str, str]]] = None) -> List[str]:
+        """Detecta los tipos de objeción presentes en el mensaje."""
+        hits = cls.match_keywords(message) if hits is None else hits
+        return cls.lexicon().all(hits, "objection")
+
+    def _detect_customer_type(self, turn: "TurnAnalysis"):
+        """Aplica el tipo de cliente detectado en el turno."""
+        if turn.customer_type:
+            self.profile.customer_type = turn.customer_type
+
+    def _detect_industry(self, turn: "TurnAnalysis"):
+        """Aplica la industria detectada en el turno."""
+        if turn.industry:
+            self.profile.industry = turn.industry
+
+    def _detect_urgency(self, turn: "TurnAnalysis"):
+        """Aplica el nivel de urgencia detectado en el turno."""
+        if turn.urgency:
+            self.profile.urgency = turn.urgency
+
+    def _detect_objections(self, turn: "TurnAnalysis"):
+        """Registra las objeciones detectadas en el turno."""
+        for objection_type in turn.objections:
+            if objection_type not in self.profile.objections:
+                self.profile.objections.append(objection_type)
+
+    def _update_engagement(self, turn: "TurnAnalysis"):
         """Actualiza el score de engagement."""
         # Más palabras = más engagement
-        word_count = len(message.split())
+        word_count = turn.word_count
 
         # Preguntas = más engagement
-        question_count = message.count("?")
+        question_count = turn.question_count
 
         # Calcular incremento
         increment = min(word_count * 0.5 + question_count * 5, 10)
@@ -0,0 +1,199 @@
+"""
+Plazos por petición para las llamadas a los proveedores de IA.
+
+Ninguna llamada a los SDK llevaba timeout: si el proveedor se colgaba o el
+visitante cerraba la pestaña, el hilo de la petición seguía esperando al
+modelo. Cada turno que va al modelo abre un ``Deadline`` de
+``request_deadline_seconds`` que baja por todo el camino de la llamada:
+
+- la espera en la cola de RPM/TPM (``RequestScheduler.acquire``) y el hedge
+  y failover del router no pasan del plazo;
+- cada petición al SDK lleva como ``timeout`` lo que queda del plazo
+  (``request_kwargs``, con el formato de cada SDK de ``timeout_kwargs``);
+- en streaming, si el cliente se desconecta se cierra el stream del
+  proveedor; en async, la corrutina se cancela al vencer el plazo.
+
+Si al momento de enviar queda menos de ``fallback_seconds`` (o el plazo vence
+sin respuesta), la app contesta con su respaldo local (en ``SalesAgent`` y el
+copiloto, el motor de reglas). ``guard`` clasifica cada llamada (a tiempo,
+con error, vencida, cortada por desconexión o no enviada por falta de plazo)
+y ``stats`` cuenta cuántas se cortaron.
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from config.settings import get_settings
+from .llm_clients import timeout_kwargs
+
+OUTCOME_COMPLETED = "completed"        # El proveedor respondió dentro del plazo
+OUTCOME_FAILED = "failed"              # Error del proveedor sin relación con el plazo
+OUTCOME_EXPIRED = "expired"            # Venció el plazo esperando al proveedor
+OUTCOME_DISCONNECTED = "disconnected"  # El cliente se fue y se cortó la llamada
+OUTCOME_SKIPPED = "skipped"            # Quedaba muy poco plazo: no se envió
+OUTCOMES = (OUTCOME_COMPLETED, OUTCOME_FAILED, OUTCOME_EXPIRED, OUTCOME_DISCONNECTED, OUTCOME_SKIPPED)
+CUT_SHORT = (OUTCOME_EXPIRED, OUTCOME_DISCONNECTED, OUTCOME_SKIPPED)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Venció (o se canceló) el plazo de la petición antes de la respuesta del proveedor."""
+
+
+class Deadline:
+    """Plazo absoluto de una petición; ``seconds`` None o 0 = sin plazo."""
+    __slots__ = ("seconds", "expires_at", "cancelled", "_clock")
+
+    def __init__(self, seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self.seconds = seconds or None
+        self.expires_at = clock() + seconds if seconds else None
+        self.cancelled = False
+
+    def remaining(self) -> Optional[float]:
+        """Segundos que quedan (0 si venció o se canceló), o None sin plazo."""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def near(self, margin: float) -> bool:
+        """True si quedan menos de ``margin`` segundos."""
+        remaining = self.remaining()
+        return remaining is not None and remaining < margin
+
+    def cancel(self) -> None:
+        """Corta la petición (el cliente se desconectó): las esperas siguientes fallan."""
+        self.cancelled = True
+
+    def check(self) -> None:
+        """Lanza ``DeadlineExceeded`` si el plazo venció o se canceló."""
+        if self.cancelled:
+            raise DeadlineExceeded("Petición cancelada: el cliente se desconectó")
+        if self.expired:
+            raise DeadlineExceeded(f"Venció el plazo de {self.seconds:g} s de la petición")
+
+    def timeout(self) -> Optional[float]:
+        """Timeout de la próxima espera: lo que queda del plazo (None sin plazo)."""
+        self.check()
+        return self.remaining()
+
+
+class DeadlinePolicy:
+    """Abre los plazos de las peticiones y cuenta cómo termina cada llamada."""
+
+    def __init__(self, seconds: float = 20.0, fallback_seconds: float = 2.0):
+        self.seconds = seconds
+        self.fallback_seconds = fallback_seconds
+        self._lock = threading.Lock()
+        self._outcomes: Counter = Counter()
+        self._fallbacks: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.seconds > 0
+
+    def start(self) -> Deadline:
+        """Plazo de una petición nueva (sin plazo si la política está desactivada)."""
+        return Deadline(self.seconds if self.enabled else None)
+
+    def request_kwargs(self, provider: str, deadline: Deadline) -> Dict[str, Any]:
+        """
+        Timeout de la petición a ``provider`` en el formato de su SDK.
+
+        Se llama justo antes de enviar (después de la cola): si queda menos
+        de ``fallback_seconds`` no vale la pena llamar y lanza
+        ``DeadlineExceeded`` para que la app responda con su respaldo local.
+        """
+        deadline.check()
+        if deadline.near(self.fallback_seconds):
+            raise DeadlineExceeded(f"Quedan menos de {self.fallback_seconds:g} s del plazo de la petición")
+        return timeout_kwargs(provider, deadline.remaining())
+
+    @contextmanager
+    def guard(self, deadline: Deadline, source: str) -> Iterator[Deadline]:
+        """
+        Registra cómo termina la llamada al proveedor hecha dentro del bloque.
+
+        Si el bloque abandona un generador (``GeneratorExit``) o se cancela
+        su tarea, el cliente se fue: se cancela el plazo y cuenta como
+        desconexión.
+        """
+        try:
+            yield deadline
+        except (GeneratorExit, asyncio.CancelledError):
+            deadline.cancel()
+            self.record(source, OUTCOME_DISCONNECTED)
+            raise
+        except BaseException as e:
+            if deadline.cancelled:
+                self.record(source, OUTCOME_DISCONNECTED)
+            elif deadline.expired:
+                self.record(source, OUTCOME_EXPIRED)
+            elif isinstance(e, DeadlineExceeded):
+                self.record(source, OUTCOME_SKIPPED)
+            else:
+                self.record(source, OUTCOME_FAILED)
+            raise
+        self.record(source, OUTCOME_COMPLETED)
+
+    def record(self, source: str, outcome: str) -> None:
+        with self._lock:
+            self._outcomes[(source, outcome)] += 1
+
+    def record_fallback(self, source: str) -> None:
+        """Cuenta una respuesta de respaldo local entregada por falta de plazo."""
+        with self._lock:
+            self._fallbacks[source] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Plazo configurado y, en total y por origen, cómo terminaron las llamadas."""
+        with self._lock:
+            outcomes = dict(self._outcomes)
+            fallbacks = dict(self._fallbacks)
+        sources = sorted({source for source, _ in outcomes} | set(fallbacks))
+        by_source = {
+            source: dict(
+                {outcome: outcomes.get((source, outcome), 0) for outcome in OUTCOMES},
+                local_fallbacks=fallbacks.get(source, 0)
+            )
+            for source in sources
+        }
+        totals = {outcome: sum(counts[outcome] for counts in by_source.values()) for outcome in OUTCOMES}
+        return {
+            "enabled": self.enabled,
+            "deadline_seconds": self.seconds,
+            "fallback_seconds": self.fallback_seconds,
+            "calls": sum(totals.values()),
+            "cut_short": sum(totals[outcome] for outcome in CUT_SHORT),
+            "local_fallbacks": sum(fallbacks.values()),
+            "outcomes": totals,
+            "sources": by_source,
+        }
+
+
+_policy: Optional[DeadlinePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_deadline_policy() -> DeadlinePolicy:
+    """Política de plazos del proceso, creada con la configuración al primer uso."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                settings = get_settings()
+                _policy = DeadlinePolicy(
+                    seconds=settings.request_deadline_seconds,
+                    fallback_seconds=settings.deadline_fallback_seconds
+                )
+    return _policy
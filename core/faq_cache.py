@@ -0,0 +1,267 @@
+"""
+Caché semántica de preguntas frecuentes, solo CPU.
+
+Muchas preguntas de los visitantes son la misma docena dicha de otra forma
+("¿cuánto cuesta?", "qué precio tiene", "cuánto cobran"). La caché de
+respuestas (``core/response_cache.py``) solo acierta con el mismo texto;
+``SemanticFAQCache`` acierta con paráfrasis:
+
+- ``HashingVectorizer`` convierte el mensaje normalizado (sin tildes ni
+  stopwords) en un vector de n-gramas de caracteres y palabras, con hashing
+  estable (crc32) a ``n_features`` dimensiones y norma 1. No necesita
+  vocabulario ni entrenamiento.
+- Las preguntas de ejemplo de cada respuesta verificada (``config/faq.py``,
+  armadas desde ``config/products.py``) son filas de una matriz NumPy; una
+  consulta es un producto matriz-vector (similitud coseno contra todas) y
+  se responde con la más parecida si supera ``threshold``.
+- Además el mensaje tiene que tener forma de pregunta (``looks_like_question``)
+  y no traer palabras que la respuesta no cubre (``covers``): "ya tengo
+  WhatsApp Business" o "¿cuánto cuesta un empleado?" se parecen a una
+  pregunta frecuente pero no la hacen, y van al modelo.
+- ``add`` inserta respuestas nuevas sin reconstruir nada: la matriz crece
+  por duplicación y las filas nuevas se copian al final.
+"""
+
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import get_settings
+from .message_interpreter import STOPWORDS, normalize_text
+
+_WORD_RE = re.compile(r"\w+")
+
+# Negaciones: son stopwords para el intérprete, pero "no funciona con WhatsApp" no es "¿funciona con WhatsApp?"
+NEGATIONS = frozenset({'no', 'ni', 'nunca', 'tampoco', 'sin'})
+
+# Pregunta sin signos: interrogativo en las dos primeras palabras ("y cuánto sale") o verbo de
+# pregunta al inicio ("se puede usar con WhatsApp", "puede agendar citas")
+QUESTION_WORDS = frozenset({
+    'que', 'cual', 'cuales', 'cuanto', 'cuanta', 'cuantos', 'cuantas',
+    'como', 'cuando', 'donde', 'quien', 'quienes'
+})
+QUESTION_OPENERS = frozenset({
+    'puede', 'pueden', 'puedo', 'se', 'hay', 'tienen', 'funciona', 'sirve',
+    'atiende', 'maneja', 'manejan', 'hacen', 'hace'
+})
+TOPIC_MAX_WORDS = 3  # "precios", "agente de whatsapp": consulta por tema
+
+# Largo mínimo de las palabras que deben estar cubiertas y prefijo con el que se comparan
+COVERAGE_MIN_LENGTH = 4
+COVERAGE_STEM = 4
+
+
+def looks_like_question(text: str) -> bool:
+    """True si el mensaje pregunta algo o es una consulta corta por tema (no una afirmación)."""
+    if "?" in text or "¿" in text:
+        return True
+    words = _WORD_RE.findall(normalize_text(text))
+    if not words:
+        return False
+    if len(words) <= TOPIC_MAX_WORDS and words[0] not in NEGATIONS:
+        return True
+    return bool(QUESTION_WORDS.intersection(words[:2])) or words[0] in QUESTION_OPENERS
+
+
+def _stem(word: str) -> str:
+    return word[:COVERAGE_STEM]
+
+
+class HashingVectorizer:
+    """
+    Vectores de n-gramas de caracteres (por palabra) y palabras completas.
+
+    Los n-gramas de caracteres toleran errores de tipeo y variantes
+    ("cuesta" / "cuestan"); las palabras completas pesan el tema.
+    """
+
+    def __init__(self, n_features: int = 2048, ngram_range: Tuple[int, int] = (3, 5), word_weight: float = 2.0):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.word_weight = word_weight
+
+    def _index(self, feature: str) -> int:
+        return zlib.crc32(feature.encode("utf-8")) % self.n_features
+
+    def features(self, text: str) -> Dict[int, float]:
+        """Vector disperso {dimensión: peso} con norma 1 (vacío si no hay palabras útiles)."""
+        counts: Counter = Counter()
+        low, high = self.ngram_range
+        for word in _WORD_RE.findall(normalize_text(text)):
+            if word in STOPWORDS and word not in NEGATIONS:
+                continue
+            counts[self._index("w:" + word)] += self.word_weight
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                for start in range(len(padded) - n + 1):
+                    counts[self._index(padded[start:start + n])] += 1.0
+        norm = sum(value * value for value in counts.values()) ** 0.5
+        return {index: value / norm for index, value in counts.items()} if norm else {}
+
+    def transform(self, text: str) -> np.ndarray:
+        """Vector denso float32 de ``n_features`` dimensiones."""
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for index, value in self.features(text).items():
+            vector[index] = value
+        return vector
+
+
+@dataclass(frozen=True)
+class FAQEntry:
+    """Respuesta verificada con las preguntas de ejemplo que la disparan."""
+    name: str
+    answer: str
+    questions: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class FAQMatch:
+    """Respuesta elegida para un mensaje."""
+    name: str
+    answer: str
+    question: str  # Pregunta de ejemplo más parecida
+    score: float
+
+
+class SemanticFAQCache:
+    """
+    Índice de vecino más cercano sobre las preguntas de ejemplo.
+
+    Las consultas leen una foto (matriz, filas usadas) tomada bajo el lock y
+    calculan sin él; ``add`` nunca modifica filas ya publicadas, así las
+    consultas en curso no ven datos a medio escribir.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[FAQEntry] = (),
+        threshold: float = 0.65,
+        vectorizer: Optional[HashingVectorizer] = None,
+        initial_capacity: int = 64
+    ):
+        self.threshold = threshold
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self._matrix = np.zeros((initial_capacity, self.vectorizer.n_features), dtype=np.float32)
+        self._size = 0
+        self._rows: List[Tuple[FAQEntry, str]] = []  # Fila -> (respuesta, pregunta de ejemplo)
+        self._entries: Dict[str, FAQEntry] = {}
+        self._stems: Dict[str, frozenset] = {}  # Respuesta -> prefijos de las palabras de sus preguntas
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.by_entry: Counter = Counter()
+        self.lookup_seconds = 0.0
+
+        for entry in entries:
+            self.add(entry)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: FAQEntry) -> None:
+        """Agrega una respuesta verificada (o más preguntas de ejemplo, si el nombre ya existe)."""
+        vectors = [self.vectorizer.transform(question) for question in entry.questions]
+        with self._lock:
+            needed = self._size + len(vectors)
+            if needed > len(self._matrix):
+                grown = np.zeros((max(needed, 2 * len(self._matrix)), self.vectorizer.n_features), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            for offset, vector in enumerate(vectors):
+                self._matrix[self._size + offset] = vector
+            self._rows.extend((entry, question) for question in entry.questions)
+            self._entries[entry.name] = entry
+            self._stems[entry.name] = self._stems.get(entry.name, frozenset()) | frozenset(
+                _stem(word) for question in entry.questions for word in _WORD_RE.findall(normalize_text(question))
+            )
+            self._size = needed
+
+    def search(self, message: str) -> Optional[FAQMatch]:
+        """Pregunta de ejemplo más parecida al mensaje, sin aplicar el umbral (None si no hay)."""
+        with self._lock:
+            matrix, size, rows = self._matrix, self._size, self._rows
+        if not size:
+            return None
+        query = self.vectorizer.transform(message)
+        if not query.any():
+            return None
+        scores = matrix[:size] @ query
+        best = int(np.argmax(scores))
+        entry, question = rows[best]
+        return FAQMatch(entry.name, entry.answer, question, float(scores[best]))
+
+    def covers(self, name: str, message: str) -> bool:
+        """
+        True si las preguntas de ejemplo de la respuesta ``name`` usan todas las
+        palabras del mensaje (comparadas por prefijo, así "cuestan" cubre
+        "cuesta"); una palabra nueva ("empleado") cambia la pregunta.
+        """
+        stems = self._stems.get(name, frozenset())
+        return all(
+            _stem(word) in stems
+            for word in _WORD_RE.findall(normalize_text(message))
+            if len(word) >= COVERAGE_MIN_LENGTH and word not in STOPWORDS
+        )
+
+    def lookup(self, message: str) -> Optional[FAQMatch]:
+        """
+        Respuesta verificada si el mensaje es una pregunta, la pregunta más
+        parecida supera el umbral y la respuesta cubre todo lo que pregunta
+        (cuenta acierto o fallo).
+        """
+        start = time.perf_counter()
+        match = self.search(message) if self.enabled and looks_like_question(message) else None
+        if match is not None and (match.score < self.threshold or not self.covers(match.name, message)):
+            match = None
+        with self._lock:
+            self.lookup_seconds += time.perf_counter() - start
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.by_entry[match.name] += 1
+        return match
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "answers": len(self._entries),
+                "questions": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "lookup_avg_us": round(self.lookup_seconds / lookups * 1e6, 1) if lookups else 0.0,
+                "answers_served": dict(self.by_entry),
+            }
+
+
+_cache: Optional[SemanticFAQCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_faq_cache() -> SemanticFAQCache:
+    """Caché de FAQ del proceso con las respuestas de ``config/faq.py``, creada al primer uso."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from config.faq import build_faq_entries
+                _cache = SemanticFAQCache(
+                    build_faq_entries(),
+                    threshold=get_settings().faq_similarity_threshold
+                )
+    return _cache
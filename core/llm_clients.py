@@ -0,0 +1,278 @@
+"""
+Clientes de los SDK de los proveedores de IA, compartidos por todo el proceso.
+
+Cada cliente de OpenAI, Anthropic o Groq tiene su propio pool de conexiones
+HTTP (keep-alive); crear uno por sesión obliga a cada visitante a pagar el
+handshake TLS en su primer mensaje. ``ClientPool`` importa cada SDK una sola
+vez y entrega el mismo cliente a todos los agentes con el mismo
+(proveedor, API key). Los clientes síncronos de los SDK son thread-safe.
+
+Los clientes async (``AsyncOpenAI``, ``AsyncAnthropic``, ``AsyncGroq``) usan
+un pool ligado al event loop donde se usan, así que se comparten por
+(loop, proveedor, API key) y se descartan junto con el loop. Gemini no tiene
+cliente async aparte: el ``GenerativeModel`` expone ``generate_content_async``.
+Su API key es global del SDK (``genai.configure``): con varias keys de Gemini
+en el mismo proceso gana la última configurada.
+
+``read_usage`` y ``UsageStats`` registran los tokens que informa cada
+proveedor, incluidos los que salieron de su caché de prefijos del prompt.
+``timeout_kwargs`` y ``close_stream`` dan el timeout de una petición y el
+cierre de un stream con la forma de cada SDK (ver core/deadline.py).
+"""
+
+import asyncio
+import threading
+import weakref
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+
+# Marca de caché de Anthropic: el prefijo hasta este bloque se reutiliza entre peticiones
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def create_client(api_provider: str, api_key: Optional[str], model: Optional[str] = None) -> Any:
+    """
+    Cliente síncrono del SDK de ``api_provider`` (None si el proveedor no existe).
+
+    ``model`` solo aplica a Gemini, cuyo ``GenerativeModel`` lleva el modelo;
+    los demás lo reciben en cada petición.
+    """
+    if api_provider == "openai":
+        from openai import OpenAI
+        return OpenAI(api_key=api_key)
+    if api_provider == "anthropic":
+        import anthropic
+        return anthropic.Anthropic(api_key=api_key)
+    if api_provider == "gemini":
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model or 'gemini-2.0-flash')
+    if api_provider == "groq":
+        from groq import Groq
+        return Groq(api_key=api_key)
+    return None
+
+
+def create_async_client(api_provider: str, api_key: Optional[str]) -> Any:
+    """Cliente async del SDK de ``api_provider`` (None para Gemini y proveedores desconocidos)."""
+    if api_provider == "openai":
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key)
+    if api_provider == "anthropic":
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=api_key)
+    if api_provider == "groq":
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_key)
+    return None
+
+
+def timeout_kwargs(api_provider: str, seconds: Optional[float]) -> Dict[str, Any]:
+    """
+    Argumentos de la petición con un timeout de ``seconds`` ({} sin timeout).
+
+    Gemini lo recibe en ``request_options``; OpenAI, Anthropic y Groq como
+    ``timeout``. Sin timeout no se pasa nada: en esos SDK ``timeout=None``
+    desactiva el timeout por defecto del cliente.
+    """
+    if seconds is None:
+        return {}
+    if api_provider == "gemini":
+        return {"request_options": {"timeout": seconds}}
+    return {"timeout": seconds}
+
+
+def close_stream(stream: Any) -> None:
+    """Cierra la respuesta HTTP de un stream del SDK (si quien lo consume lo abandona a medias)."""
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+
+
+class ClientPool:
+    """
+    Registro de clientes por (proveedor, API key), creados al primer uso
+    (y por modelo en Gemini, ver ``create_client``).
+
+    ``get`` y ``get_async`` nunca crean dos clientes para la misma clave; los
+    errores de import o de configuración del SDK se propagan a quien pide el
+    cliente (el agente pasa a modo demo) y no quedan en caché.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str]], Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    def get(self, api_provider: str, api_key: Optional[str], model: Optional[str] = None) -> Any:
+        """Cliente síncrono compartido para ``api_provider`` y ``api_key`` (y ``model``, solo Gemini)."""
+        key = (api_provider, api_key, model)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits[api_provider] += 1
+                return client
+            # Se crea dentro del lock: construir el cliente no abre conexiones y
+            # así dos sesiones nuevas a la vez no crean dos pools distintos
+            client = create_client(api_provider, api_key, model)
+            if client is not None:
+                self._clients[key] = client
+                self.misses[api_provider] += 1
+            return client
+
+    def get_async(self, api_provider: str, api_key: Optional[str]) -> Any:
+        """Cliente async compartido en el event loop actual; debe llamarse desde una corrutina."""
+        loop = asyncio.get_running_loop()
+        key = (api_provider, api_key)
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is not None:
+                self.hits[f"{api_provider}_async"] += 1
+                return client
+            client = create_async_client(api_provider, api_key)
+            if client is not None:
+                clients[key] = client
+                self.misses[f"{api_provider}_async"] += 1
+            return client
+
+    def clear(self) -> None:
+        """Olvida todos los clientes (los que están en uso siguen funcionando)."""
+        with self._lock:
+            self._clients.clear()
+            self._async_clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Clientes vivos y reutilizaciones por proveedor (sin exponer las API keys)."""
+        with self._lock:
+            clients = Counter(provider for provider, _, _ in self._clients)
+            for loop_clients in self._async_clients.values():
+                clients.update(f"{provider}_async" for provider, _ in loop_clients)
+            providers = sorted(set(clients) | set(self.hits) | set(self.misses))
+            hits = sum(self.hits.values())
+            requests = hits + sum(self.misses.values())
+            return {
+                "clients": sum(clients.values()),
+                "event_loops": len(self._async_clients),
+                "hits": hits,
+                "misses": requests - hits,
+                "hit_rate": round(hits / requests, 4) if requests else 0.0,
+                "providers": {
+                    provider: {
+                        "clients": clients[provider],
+                        "hits": self.hits[provider],
+                        "misses": self.misses[provider],
+                    }
+                    for provider in providers
+                },
+            }
+
+
+# Pool compartido por todos los agentes y copilotos del proceso
+_pool = ClientPool()
+
+
+def get_client_pool() -> ClientPool:
+    """Pool global de clientes de proveedores."""
+    return _pool
+
+
+@dataclass(frozen=True)
+class TokenUsage:
+    """Tokens de una petición según el proveedor."""
+    prompt_tokens: int = 0
+    cached_tokens: int = 0  # Del prompt, leídos de la caché de prefijos
+    cache_write_tokens: int = 0  # Del prompt, escritos en la caché (Anthropic)
+    completion_tokens: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _tokens(source: Any, name: str) -> int:
+    return getattr(source, name, None) or 0
+
+
+def read_usage(api_provider: str, source: Any) -> Optional[TokenUsage]:
+    """
+    Uso de tokens de una respuesta (o del chunk final de un stream).
+
+    Devuelve None si ``source`` no trae uso, como los chunks intermedios.
+    """
+    if api_provider == "anthropic":
+        usage = getattr(source, "usage", None)
+        if usage is None:
+            return None
+        # input_tokens no incluye los tokens leídos ni escritos en la caché
+        cached = _tokens(usage, "cache_read_input_tokens")
+        written = _tokens(usage, "cache_creation_input_tokens")
+        return TokenUsage(
+            prompt_tokens=_tokens(usage, "input_tokens") + cached + written,
+            cached_tokens=cached,
+            cache_write_tokens=written,
+            completion_tokens=_tokens(usage, "output_tokens")
+        )
+
+    if api_provider == "gemini":
+        usage = getattr(source, "usage_metadata", None)
+        if usage is None:
+            return None
+        return TokenUsage(
+            prompt_tokens=_tokens(usage, "prompt_token_count"),
+            cached_tokens=_tokens(usage, "cached_content_token_count"),
+            completion_tokens=_tokens(usage, "candidates_token_count")
+        )
+
+    # OpenAI y Groq (en streaming Groq lo informa en x_groq.usage)
+    usage = getattr(source, "usage", None) or getattr(getattr(source, "x_groq", None), "usage", None)
+    if usage is None:
+        return None
+    return TokenUsage(
+        prompt_tokens=_tokens(usage, "prompt_tokens"),
+        cached_tokens=_tokens(getattr(usage, "prompt_tokens_details", None), "cached_tokens"),
+        completion_tokens=_tokens(usage, "completion_tokens")
+    )
+
+
+class UsageStats:
+    """Totales de tokens por proveedor, para ver cuánto del prompt sale de la caché."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Counter] = {}
+
+    def record(self, api_provider: str, usage: TokenUsage) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(api_provider, Counter())
+            totals["requests"] += 1
+            totals.update(usage.to_dict())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Peticiones, tokens y fracción del prompt servida desde la caché, por proveedor."""
+        with self._lock:
+            return {
+                provider: dict(
+                    totals,
+                    cached_ratio=round(totals["cached_tokens"] / totals["prompt_tokens"], 4)
+                    if totals["prompt_tokens"] else 0.0
+                )
+                for provider, totals in self._totals.items()
+            }
+
+
+_usage = UsageStats()
+
+
+def get_usage_stats() -> UsageStats:
+    """Totales globales de uso de tokens."""
+    return _usage
@@ -0,0 +1,152 @@
+"""
+Niveles de modelo por fase y complejidad del turno.
+
+Todos los turnos iban al mismo modelo con ``max_tokens=1000``, fuera un
+"hola, tengo una tienda" o una objeción en plena negociación. ``TierPolicy``
+elige el nivel de cada turno:
+
+- ``small``: turnos cortos (hasta ``small_max_words`` palabras y a lo sumo
+  una pregunta) en las fases de ``small_phases`` (saludo y descubrimiento):
+  modelo rápido y ``max_tokens`` corto.
+- ``large``: el resto (presentación, objeciones, cierre o mensajes largos).
+
+El modelo y ``max_tokens`` de cada nivel se declaran por proveedor en
+``PROVIDER_MODEL_TIERS`` (config/settings.py). Cada petición registra su
+latencia (incluida la espera en la cola de RPM/TPM) y sus tokens por
+proveedor y nivel, para ajustar la política con datos (``stats``).
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from config.settings import Settings, get_settings
+from .conversation import ConversationPhase
+from .llm_clients import TokenUsage
+from .turn_analysis import TurnAnalysis
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """Modelo y límite de respuesta de un nivel para un proveedor."""
+    name: str
+    model: str
+    max_tokens: int
+
+
+class _TierStats:
+    """Peticiones, latencias recientes y tokens de un (proveedor, nivel)."""
+    __slots__ = ("requests", "seconds", "latencies", "prompt_tokens", "cached_tokens", "completion_tokens")
+
+    def __init__(self, window: int):
+        self.requests = 0
+        self.seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def quantile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TierPolicy:
+    """Elige el nivel de modelo de cada turno y mide cada nivel."""
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        small_phases: Iterable[ConversationPhase] = (ConversationPhase.GREETING, ConversationPhase.DISCOVERY),
+        small_max_words: int = 25,
+        window: int = 200
+    ):
+        self.settings = settings or get_settings()
+        self.small_phases: FrozenSet[ConversationPhase] = frozenset(small_phases)
+        self.small_max_words = small_max_words
+        self.window = window
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _TierStats] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.small_max_words > 0
+
+    def choose(self, turn: TurnAnalysis, phase: ConversationPhase) -> str:
+        """Nivel del turno: ``small`` si es corto y de una fase de ``small_phases``."""
+        if (
+            self.enabled
+            and phase in self.small_phases
+            and turn.word_count <= self.small_max_words
+            and turn.question_count <= 1
+        ):
+            return TIER_SMALL
+        return TIER_LARGE
+
+    def model_for(self, provider: str, tier: str) -> ModelTier:
+        """Modelo y ``max_tokens`` declarados para el nivel del proveedor."""
+        model, max_tokens = self.settings.model_for(provider, tier)
+        return ModelTier(tier, model, max_tokens)
+
+    def record(self, provider: str, tier: str, seconds: float, usage: Optional[TokenUsage]) -> None:
+        """Registra una petición respondida por ``provider`` con el nivel ``tier``."""
+        with self._lock:
+            stats = self._stats.get((provider, tier))
+            if stats is None:
+                stats = self._stats[(provider, tier)] = _TierStats(self.window)
+            stats.requests += 1
+            stats.seconds += seconds
+            stats.latencies.append(seconds)
+            if usage is not None:
+                stats.prompt_tokens += usage.prompt_tokens
+                stats.cached_tokens += usage.cached_tokens
+                stats.completion_tokens += usage.completion_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Política vigente y, por proveedor y nivel, modelo, latencias y tokens."""
+        with self._lock:
+            tiers = {}
+            for (provider, tier), stats in sorted(self._stats.items()):
+                requests = stats.requests
+                tiers[f"{provider}/{tier}"] = {
+                    "model": self.model_for(provider, tier).model,
+                    "requests": requests,
+                    "avg_ms": round(stats.seconds / requests * 1000, 1),
+                    "p50_ms": round(stats.quantile(0.5) * 1000, 1),
+                    "p95_ms": round(stats.quantile(0.95) * 1000, 1),
+                    "prompt_tokens": stats.prompt_tokens,
+                    "cached_tokens": stats.cached_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "avg_completion_tokens": round(stats.completion_tokens / requests, 1),
+                }
+            return {
+                "enabled": self.enabled,
+                "small_phases": sorted(phase.value for phase in self.small_phases),
+                "small_max_words": self.small_max_words,
+                "tiers": tiers,
+            }
+
+
+_policy: Optional[TierPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_tier_policy() -> TierPolicy:
+    """Política de niveles del proceso, creada con la configuración al primer uso."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                settings = get_settings()
+                _policy = TierPolicy(
+                    settings,
+                    small_phases=[ConversationPhase(phase) for phase in settings.small_model_phases],
+                    small_max_words=settings.small_model_max_words
+                )
+    return _policy
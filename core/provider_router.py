@@ -0,0 +1,438 @@
+"""
+Router de proveedores de IA con latencia EWMA, circuit breaker y pedidos de cobertura.
+
+Cada proveedor configurado lleva su latencia y su tasa de error como promedios
+móviles exponenciales (EWMA), más una ventana de latencias recientes para el
+p95. En cada turno:
+
+1. Se ordenan los proveedores disponibles (circuito cerrado o a prueba) por
+   latencia esperada, penalizada por la tasa de error; los que aún no tienen
+   mediciones conservan el orden de prioridad configurado.
+2. Se envía la petición al primero. Si pasa su p95 sin responder, se envía
+   un pedido de cobertura (hedge) al segundo y gana el que responda antes.
+3. Si una petición falla y no queda otra en curso, se pasa al siguiente
+   proveedor (failover).
+
+Tras ``failure_threshold`` fallos seguidos el circuito del proveedor se abre
+por ``open_seconds``: no recibe tráfico y después admite un solo intento de
+prueba a la vez (si falla, vuelve a abrirse; mientras está en curso las demás
+peticiones van a otro proveedor). Las peticiones perdedoras siguen su curso en
+segundo plano (un cliente HTTP síncrono no se puede interrumpir) y su
+latencia también se registra; en asyncio se cancelan. Con un ``Deadline``
+(core/deadline.py) la espera, el hedge y el failover no pasan del plazo de la
+petición.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from config.settings import Settings, get_settings
+from .deadline import Deadline, DeadlineExceeded
+
+T = TypeVar("T")
+
+# Penalización de la latencia esperada por tasa de error (1.0 = un 50% de errores pesa como 1.5x)
+ERROR_PENALTY = 1.0
+
+
+class NoProviderAvailable(RuntimeError):
+    """Todos los circuitos están abiertos."""
+
+
+class _ProviderState:
+    """Mediciones y circuito de un proveedor."""
+    __slots__ = (
+        "name", "priority", "ewma_latency", "ewma_error", "latencies",
+        "consecutive_failures", "opened_until", "probing", "requests", "errors",
+        "circuit_opens", "hedges", "hedge_wins", "failovers"
+    )
+
+    def __init__(self, name: str, priority: int, window: int):
+        self.name = name
+        self.priority = priority
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_until = 0.0  # 0 = circuito cerrado
+        self.probing = False     # Hay un intento de prueba (half-open) en curso
+        self.requests = 0
+        self.errors = 0
+        self.circuit_opens = 0
+        self.hedges = 0       # Pedidos de cobertura lanzados por lentitud de este proveedor
+        self.hedge_wins = 0   # Veces que este proveedor ganó como cobertura
+        self.failovers = 0    # Veces que recibió una petición porque otro falló
+
+    def circuit(self, now: float) -> str:
+        if not self.opened_until:
+            return "closed"
+        return "open" if now < self.opened_until else "half_open"
+
+    def score(self) -> float:
+        """Latencia esperada (0 sin mediciones, para que se pruebe)."""
+        if self.ewma_latency is None:
+            return 0.0
+        return self.ewma_latency * (1 + ERROR_PENALTY * self.ewma_error)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class ProviderRouter:
+    """
+    Elige proveedor por latencia y salud, con hedge por p95 y failover.
+
+    ``call(send)`` y ``acall(send)`` reciben una función que hace la petición
+    a un proveedor dado (``send(provider)``) y devuelven ``(proveedor, resultado)``
+    del primero que responde bien; si todos fallan, propagan el último error.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[str],
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        open_seconds: float = 30.0,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        default_hedge_delay: Optional[float] = 4.0,
+        window: int = 200,
+        max_workers: int = 32,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self._clock = clock
+        self._states: Dict[str, _ProviderState] = {
+            name: _ProviderState(name, priority, window) for priority, name in enumerate(providers)
+        }
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self.calls = 0
+        self.unavailable = 0
+
+    @property
+    def providers(self) -> List[str]:
+        return list(self._states)
+
+    def ranked(self) -> List[str]:
+        """Proveedores que pueden recibir tráfico, del preferido al último."""
+        now = self._clock()
+        with self._lock:
+            states = [state for state in self._states.values() if self._available(state, now)]
+            states.sort(key=lambda state: (state.score(), state.priority))
+            return [state.name for state in states]
+
+    @staticmethod
+    def _available(state: _ProviderState, now: float) -> bool:
+        circuit = state.circuit(now)
+        return circuit == "closed" or (circuit == "half_open" and not state.probing)
+
+    def _admit(self, provider: str) -> Optional[bool]:
+        """
+        Reserva el envío a ``provider``: None si no puede recibirlo, True si
+        es el intento de prueba de un circuito half-open, False si no.
+        """
+        now = self._clock()
+        with self._lock:
+            state = self._states[provider]
+            if not self._available(state, now):
+                return None
+            if state.circuit(now) == "half_open":
+                state.probing = True
+                return True
+            return False
+
+    def _release_probe(self, provider: str) -> None:
+        """Libera la prueba que terminó sin veredicto (sin plazo o cancelada)."""
+        with self._lock:
+            self._states[provider].probing = False
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Espera antes del pedido de cobertura: p95 del proveedor (o el valor por defecto sin datos)."""
+        if self.default_hedge_delay is None:
+            return None
+        with self._lock:
+            state = self._states[provider]
+            if len(state.latencies) < self.hedge_min_samples:
+                return self.default_hedge_delay
+            return state.quantile(self.hedge_quantile)
+
+    def record(self, provider: str, latency: float, ok: bool, probe: bool = False) -> None:
+        """Registra el resultado de una petición y actualiza el circuito (``probe``: era el intento de prueba)."""
+        now = self._clock()
+        with self._lock:
+            state = self._states[provider]
+            if probe:
+                state.probing = False
+            state.requests += 1
+            error = 0.0 if ok else 1.0
+            state.ewma_error += self.alpha * (error - state.ewma_error)
+            if ok:
+                state.latencies.append(latency)
+                if state.ewma_latency is None:
+                    state.ewma_latency = latency
+                else:
+                    state.ewma_latency += self.alpha * (latency - state.ewma_latency)
+                state.consecutive_failures = 0
+                state.opened_until = 0.0
+                return
+
+            state.errors += 1
+            state.consecutive_failures += 1
+            circuit = state.circuit(now)
+            if circuit == "open":
+                return  # Petición lanzada antes de abrir el circuito
+            # En prueba (half-open) un solo fallo vuelve a abrir el circuito
+            if circuit == "half_open" or state.consecutive_failures >= self.failure_threshold:
+                state.opened_until = now + self.open_seconds
+                state.circuit_opens += 1
+
+    def _next(self, candidates: List[str]) -> Optional[Tuple[str, bool]]:
+        """Saca de ``candidates`` el primer proveedor admitido: ``(proveedor, es_prueba)``, o None."""
+        while candidates:
+            provider = candidates.pop(0)
+            probe = self._admit(provider)
+            if probe is not None:
+                return provider, probe
+        return None
+
+    def _plan(self) -> Tuple[str, bool, List[str]]:
+        """Proveedor primario (ya admitido), si es una prueba, y los de respaldo en orden."""
+        backups = self.ranked()
+        primary = self._next(backups)
+        with self._lock:
+            self.calls += 1
+            if primary is None:
+                self.unavailable += 1
+        if primary is None:
+            raise NoProviderAvailable("Ningún proveedor de IA disponible (circuitos abiertos)")
+        return primary[0], primary[1], backups
+
+    def _on_cancel(self, future: "Future[Any]", provider: str, probe: bool) -> None:
+        """Si la petición de prueba se cancela antes de correr, libera la prueba."""
+        if probe:
+            future.add_done_callback(lambda done: done.cancelled() and self._release_probe(provider))
+
+    def _count(self, provider: str, field: str) -> None:
+        with self._lock:
+            state = self._states[provider]
+            setattr(state, field, getattr(state, field) + 1)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="provider")
+            return self._executor
+
+    @staticmethod
+    def _wait_timeout(hedge_timeout: Optional[float], deadline: Optional[Deadline]) -> Optional[float]:
+        """Espera hasta el hedge o hasta el fin del plazo, lo que llegue antes (None = sin límite)."""
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is None:
+            return hedge_timeout
+        return remaining if hedge_timeout is None else min(hedge_timeout, remaining)
+
+    def call(self, send: Callable[[str], T], deadline: Optional[Deadline] = None) -> Tuple[str, T]:
+        """Hace la petición con hedge y failover usando hilos, dentro del plazo ``deadline``."""
+        primary, probe, backups = self._plan()
+        executor = self._get_executor()
+        pending: Dict[Future, str] = {}
+
+        def submit(provider: str, probe: bool) -> None:
+            started = self._clock()
+
+            def timed() -> T:
+                try:
+                    result = send(provider)
+                except DeadlineExceeded:
+                    # Sin plazo para la petición: no es culpa del proveedor
+                    if probe:
+                        self._release_probe(provider)
+                    raise
+                except BaseException:
+                    self.record(provider, self._clock() - started, ok=False, probe=probe)
+                    raise
+                self.record(provider, self._clock() - started, ok=True, probe=probe)
+                return result
+
+            future = executor.submit(timed)
+            self._on_cancel(future, provider, probe)
+            pending[future] = provider
+
+        submit(primary, probe)
+        hedge_at = self.hedge_delay(primary) if backups else None
+        hedged: Optional[str] = None
+        start = self._clock()
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            timeout = None
+            if hedge_at is not None:
+                timeout = max(0.0, hedge_at - (self._clock() - start))
+            done, _ = wait(list(pending), timeout=self._wait_timeout(timeout, deadline), return_when=FIRST_COMPLETED)
+
+            if not done:
+                if deadline is not None and deadline.expired:
+                    for other in pending:
+                        other.cancel()
+                    deadline.check()
+                if hedge_at is None:
+                    continue
+                # Pasó el p95 del primario: pedido de cobertura al siguiente
+                hedge_at = None
+                chosen = self._next(backups)
+                if chosen is None:
+                    continue
+                hedged = chosen[0]
+                self._count(primary, "hedges")
+                submit(*chosen)
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if provider == hedged:
+                    self._count(provider, "hedge_wins")
+                for other in pending:
+                    other.cancel()  # Solo cancela si no empezó; si no, termina en segundo plano
+                return provider, result
+
+            if not pending and backups and not (deadline is not None and deadline.expired):
+                # Falló todo lo que estaba en curso: failover al siguiente
+                chosen = self._next(backups)
+                if chosen is not None:
+                    self._count(chosen[0], "failovers")
+                    hedge_at = None
+                    submit(*chosen)
+
+        raise last_error
+
+    async def acall(self, send: Callable[[str], Awaitable[T]], deadline: Optional[Deadline] = None) -> Tuple[str, T]:
+        """Igual que ``call`` con corrutinas; las peticiones perdedoras (o vencidas) se cancelan."""
+        primary, probe, backups = self._plan()
+        pending: Dict["asyncio.Task[T]", str] = {}
+
+        async def timed(provider: str, probe: bool) -> T:
+            started = self._clock()
+            try:
+                result = await send(provider)
+            except (asyncio.CancelledError, DeadlineExceeded):
+                if probe:
+                    self._release_probe(provider)
+                raise
+            except BaseException:
+                self.record(provider, self._clock() - started, ok=False, probe=probe)
+                raise
+            self.record(provider, self._clock() - started, ok=True, probe=probe)
+            return result
+
+        def submit(provider: str, probe: bool) -> None:
+            task = asyncio.ensure_future(timed(provider, probe))
+            self._on_cancel(task, provider, probe)
+            pending[task] = provider
+
+        submit(primary, probe)
+        hedge_at = self.hedge_delay(primary) if backups else None
+        hedged: Optional[str] = None
+        start = self._clock()
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                timeout = None
+                if hedge_at is not None:
+                    timeout = max(0.0, hedge_at - (self._clock() - start))
+                done, _ = await asyncio.wait(
+                    list(pending), timeout=self._wait_timeout(timeout, deadline), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    if deadline is not None and deadline.expired:
+                        deadline.check()  # Las peticiones en curso se cancelan en el finally
+                    if hedge_at is None:
+                        continue
+                    hedge_at = None
+                    chosen = self._next(backups)
+                    if chosen is None:
+                        continue
+                    hedged = chosen[0]
+                    self._count(primary, "hedges")
+                    submit(*chosen)
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if provider == hedged:
+                        self._count(provider, "hedge_wins")
+                    return provider, result
+
+                if not pending and backups and not (deadline is not None and deadline.expired):
+                    chosen = self._next(backups)
+                    if chosen is not None:
+                        self._count(chosen[0], "failovers")
+                        hedge_at = None
+                        submit(*chosen)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado del circuito, latencias y contadores por proveedor."""
+        now = self._clock()
+        with self._lock:
+            providers = {}
+            for state in self._states.values():
+                p95 = state.quantile(0.95)
+                providers[state.name] = {
+                    "circuit": state.circuit(now),
+                    "probing": state.probing,
+                    "ewma_latency_ms": round(state.ewma_latency * 1000, 1) if state.ewma_latency is not None else None,
+                    "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                    "error_rate": round(state.ewma_error, 4),
+                    "requests": state.requests,
+                    "errors": state.errors,
+                    "circuit_opens": state.circuit_opens,
+                    "hedges": state.hedges,
+                    "hedge_wins": state.hedge_wins,
+                    "failovers": state.failovers,
+                }
+            return {"calls": self.calls, "unavailable": self.unavailable, "providers": providers}
+
+
+def create_provider_router(settings: Optional[Settings] = None) -> Optional[ProviderRouter]:
+    """Router con los proveedores que tienen API key, en el orden de prioridad configurado."""
+    settings = settings or get_settings()
+    providers = [provider for provider in settings.provider_priority if settings.api_key_for(provider)]
+    if not providers:
+        return None
+    return ProviderRouter(
+        providers,
+        failure_threshold=settings.circuit_failure_threshold,
+        open_seconds=settings.circuit_open_seconds,
+        default_hedge_delay=settings.hedge_delay_seconds or None
+    )
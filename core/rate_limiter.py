@@ -0,0 +1,424 @@
+"""
+Cola de peticiones a los proveedores con límites de peticiones y tokens por minuto.
+
+Cada proveedor limita cada API key por peticiones por minuto (RPM) y tokens
+por minuto (TPM); al pasarse responde 429 y el visitante recibía el mensaje
+de error. ``RequestScheduler`` lleva un token bucket de cada tipo por
+(proveedor, API key) y, en vez de fallar, encola la petición hasta que los
+dos tengan saldo:
+
+- La cola es por prioridad: conversaciones en cierre, manejando objeciones o
+  con datos de contacto (``PRIORITY_HIGH``) pasan antes que los turnos de
+  saludo y descubrimiento (``PRIORITY_LOW``); a igual prioridad, por orden de
+  llegada.
+- Los tokens se reservan con una estimación (prompt + ``max_tokens``) y se
+  ajustan con el uso real que informa el proveedor (``settle``).
+- Si aun así llega un 429, se pausa la cola lo que indique ``retry-after`` y
+  la petición se reintenta.
+- Una petición que espera más de ``max_wait`` segundos falla con
+  ``RateLimitTimeout`` (la app responde su mensaje de respaldo); con un
+  ``Deadline`` (core/deadline.py) la espera tampoco pasa del plazo de la
+  petición y falla con ``DeadlineExceeded``.
+
+``stats`` informa profundidad de la cola, esperas y 429 recibidos.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from config.settings import get_settings
+from utils.helpers import estimate_tokens
+from .deadline import Deadline, DeadlineExceeded
+from .llm_clients import TokenUsage
+
+T = TypeVar("T")
+
+PRIORITY_HIGH = 0    # Cierre, objeciones o datos de contacto
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2     # Saludo y descubrimiento
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+# Espera tras un 429 sin cabecera retry-after
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class RateLimitTimeout(RuntimeError):
+    """La petición esperó en la cola más de lo permitido."""
+
+
+class TokenBucket:
+    """Saldo que se recarga de forma continua hasta ``capacity`` (``per_minute`` por minuto)."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos hasta tener ``amount`` (recortado a la capacidad) disponibles."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def consume(self, amount: float, now: float) -> None:
+        """Descuenta ``amount``; el saldo puede quedar negativo si el uso real superó lo reservado."""
+        self._refill(now)
+        self.tokens -= amount
+
+    def drain(self, now: float) -> None:
+        """Vacía el saldo (el proveedor respondió 429)."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+def request_tokens(request: Any) -> int:
+    """Tokens estimados de una petición: prompt (mensajes, sistema o texto) más ``max_tokens``."""
+    if isinstance(request, str):
+        return estimate_tokens(request)
+
+    def text_of(content: Any) -> str:
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return ""
+
+    prompt = text_of(request.get("system", ""))
+    prompt += "".join(text_of(msg.get("content", "")) for msg in request.get("messages", []))
+    return estimate_tokens(prompt) + request.get("max_tokens", 0)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True si el error del SDK es un 429 (OpenAI, Anthropic, Groq o Gemini)."""
+    return getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429
+
+
+def retry_after(error: BaseException) -> float:
+    """Segundos que pide esperar el proveedor en un 429."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", DEFAULT_RETRY_AFTER))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Ticket:
+    """
+    Petición en la cola.
+
+    Las esperas async no ocupan un hilo: cada una duerme en su propio
+    ``wakeup`` (un future de su loop) que se resuelve cuando cambia la cola.
+    """
+    __slots__ = ("priority", "seq", "tokens", "enqueued", "loop", "wakeup")
+
+    def __init__(
+        self,
+        priority: int,
+        seq: int,
+        tokens: int,
+        enqueued: float,
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued = enqueued
+        self.loop = loop
+        self.wakeup: Optional[asyncio.Future] = None
+
+    def wake(self) -> None:
+        """Despierta la espera async del ticket (desde cualquier hilo)."""
+        if self.wakeup is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.wakeup)
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RequestScheduler:
+    """
+    Cola por prioridad con token buckets de RPM y TPM para una API key.
+
+    ``rpm`` o ``tpm`` en 0 desactivan ese límite. Solo la primera petición de
+    la cola consume saldo, así una petición prioritaria nunca queda detrás de
+    una de descubrimiento que llegó antes.
+    """
+
+    def __init__(
+        self,
+        rpm: int = 0,
+        tpm: int = 0,
+        max_wait: float = 30.0,
+        max_retries: int = 2,
+        window: int = 500
+    ):
+        now = time.monotonic()
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self._requests = TokenBucket(rpm, now) if rpm else None
+        self._tokens = TokenBucket(tpm, now) if tpm else None
+        self._paused_until = 0.0
+        self._queue: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+        self.granted: Dict[int, int] = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.wait_totals: Dict[int, float] = dict.fromkeys(PRIORITY_NAMES, 0.0)
+        self._waits: Deque[float] = deque(maxlen=window)
+        self.max_queue_depth = 0
+        self.timeouts = 0
+        self.deadline_exceeded = 0  # Peticiones cuyo plazo venció en la cola
+        self.rate_limited = 0  # 429 recibidos pese a la cola
+        self.retries = 0
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = self._paused_until - now
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1, now))
+        if self._tokens is not None:
+            wait = max(wait, self._tokens.wait_time(tokens, now))
+        return max(wait, 0.0)
+
+    def _enqueue(
+        self,
+        tokens: int,
+        priority: int,
+        deadline: Optional[Deadline],
+        loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> Tuple[_Ticket, float, bool]:
+        """Encola un ticket; devuelve el ticket, el límite de su espera y si lo fija el plazo (con el lock)."""
+        now = time.monotonic()
+        ticket = _Ticket(priority, next(self._seq), tokens, now, loop)
+        heapq.heappush(self._queue, ticket)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        budget = deadline.remaining() if deadline is not None else None
+        by_deadline = budget is not None and budget < self.max_wait
+        return ticket, now + (budget if by_deadline else self.max_wait), by_deadline
+
+    def _try_grant(self, ticket: _Ticket, limit: float, by_deadline: bool) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Un paso de la espera de ``ticket`` (con el lock).
+
+        Devuelve ``(esperado, None)`` si obtuvo turno y saldo, o ``(None,
+        segundos)`` con lo que conviene dormir antes de volver a intentar.
+        Al pasar el límite saca el ticket y lanza el error de la espera.
+        """
+        now = time.monotonic()
+        wait = None
+        if self._queue[0] is ticket:
+            wait = self._wait_time(ticket.tokens, now)
+            if wait <= 0:
+                heapq.heappop(self._queue)
+                if self._requests is not None:
+                    self._requests.consume(1, now)
+                if self._tokens is not None:
+                    self._tokens.consume(ticket.tokens, now)
+                waited = now - ticket.enqueued
+                self.granted[ticket.priority] += 1
+                self.wait_totals[ticket.priority] += waited
+                self._waits.append(waited)
+                self._notify()  # La siguiente de la cola pasa a ser la primera
+                return waited, None
+
+        remaining = limit - now
+        if remaining <= 0:
+            self._discard(ticket)
+            if by_deadline:
+                self.deadline_exceeded += 1
+                raise DeadlineExceeded("Venció el plazo de la petición esperando turno en la cola")
+            self.timeouts += 1
+            raise RateLimitTimeout(
+                f"Petición en cola más de {self.max_wait:g} s por límite de peticiones del proveedor"
+            )
+        # La primera espera su saldo; las demás, a que cambie la cola
+        return None, min(wait, remaining) if wait is not None else remaining
+
+    def _discard(self, ticket: _Ticket) -> None:
+        """Saca de la cola un ticket que no va a pasar (con el lock)."""
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._notify()
+
+    def _notify(self) -> None:
+        """Avisa a las esperas, de hilos y async, que cambió la cola (con el lock)."""
+        self._cond.notify_all()
+        for ticket in self._queue:
+            ticket.wake()
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_NORMAL, deadline: Optional[Deadline] = None) -> float:
+        """
+        Espera turno y saldo para una petición de ``tokens``; devuelve los segundos de espera.
+
+        Con ``deadline`` la espera termina también al vencer el plazo de la petición.
+        """
+        if deadline is not None:
+            deadline.check()
+        with self._cond:
+            ticket, limit, by_deadline = self._enqueue(tokens, priority, deadline)
+            while True:
+                waited, sleep = self._try_grant(ticket, limit, by_deadline)
+                if waited is not None:
+                    return waited
+                self._cond.wait(sleep)
+
+    def settle(self, reserved: int, usage: Optional[TokenUsage]) -> None:
+        """Ajusta el saldo de tokens con el uso real informado por el proveedor."""
+        if self._tokens is None or usage is None:
+            return
+        used = usage.prompt_tokens + usage.completion_tokens
+        if not used:
+            return
+        with self._cond:
+            self._tokens.consume(used - reserved, time.monotonic())
+
+    def backoff(self, seconds: float) -> None:
+        """Pausa la cola tras un 429 y vacía los buckets."""
+        with self._cond:
+            now = time.monotonic()
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, now + seconds)
+            for bucket in (self._requests, self._tokens):
+                if bucket is not None:
+                    bucket.drain(now)
+
+    def run(
+        self, send: Callable[[], T], tokens: int, priority: int = PRIORITY_NORMAL, deadline: Optional[Deadline] = None
+    ) -> T:
+        """Hace ``send()`` con turno en la cola; ante un 429 espera y reintenta (dentro del plazo)."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens, priority, deadline)
+            try:
+                return send()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.backoff(retry_after(e))
+                with self._cond:
+                    self.retries += 1
+
+    async def aacquire(
+        self, tokens: int, priority: int = PRIORITY_NORMAL, deadline: Optional[Deadline] = None
+    ) -> float:
+        """
+        ``acquire`` desde una corrutina, sin ocupar un hilo mientras espera.
+
+        Si la tarea se cancela (el visitante se fue), el ticket sale de la cola
+        y no consume saldo.
+        """
+        if deadline is not None:
+            deadline.check()
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            ticket, limit, by_deadline = self._enqueue(tokens, priority, deadline, loop)
+        try:
+            while True:
+                with self._cond:
+                    waited, sleep = self._try_grant(ticket, limit, by_deadline)
+                    if waited is not None:
+                        return waited
+                    ticket.wakeup = loop.create_future()
+                await asyncio.wait((ticket.wakeup,), timeout=sleep)
+        except BaseException:
+            with self._cond:
+                self._discard(ticket)
+            raise
+
+    async def arun(
+        self,
+        send: Callable[[], Awaitable[T]],
+        tokens: int,
+        priority: int = PRIORITY_NORMAL,
+        deadline: Optional[Deadline] = None
+    ) -> T:
+        """Igual que ``run`` con una corrutina."""
+        for attempt in range(self.max_retries + 1):
+            await self.aacquire(tokens, priority, deadline)
+            try:
+                return await send()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self.backoff(retry_after(e))
+                with self._cond:
+                    self.retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Límites, saldo, cola y esperas (en ms) por prioridad."""
+        with self._cond:
+            now = time.monotonic()
+            waits = sorted(self._waits)
+            granted = sum(self.granted.values())
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "available_requests": int(self._requests.tokens) if self._requests is not None else None,
+                "available_tokens": int(self._tokens.tokens) if self._tokens is not None else None,
+                "paused_ms": round(max(0.0, self._paused_until - now) * 1000),
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "granted": granted,
+                "timeouts": self.timeouts,
+                "deadline_exceeded": self.deadline_exceeded,
+                "rate_limited": self.rate_limited,
+                "retries": self.retries,
+                "wait_avg_ms": round(sum(self.wait_totals.values()) / granted * 1000, 1) if granted else 0.0,
+                "wait_p95_ms": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else 0.0,
+                "wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+                "priorities": {
+                    name: {
+                        "granted": self.granted[priority],
+                        "waiting": sum(1 for ticket in self._queue if ticket.priority == priority),
+                        "wait_avg_ms": round(self.wait_totals[priority] / self.granted[priority] * 1000, 1)
+                        if self.granted[priority] else 0.0,
+                    }
+                    for priority, name in PRIORITY_NAMES.items()
+                },
+            }
+
+
+_schedulers: Dict[Tuple[str, Optional[str]], RequestScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_request_scheduler(api_provider: str, api_key: Optional[str]) -> RequestScheduler:
+    """Cola compartida por el proceso para (proveedor, API key), con los límites de la configuración."""
+    key = (api_provider, api_key)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            settings = get_settings()
+            rpm, tpm = settings.rate_limits_for(api_provider)
+            scheduler = _schedulers[key] = RequestScheduler(
+                rpm=rpm,
+                tpm=tpm,
+                max_wait=settings.rate_limit_max_wait_seconds
+            )
+        return scheduler
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    """Estadísticas de todas las colas, por proveedor y final de la API key."""
+    with _schedulers_lock:
+        items = list(_schedulers.items())
+    return {
+        f"{provider}:…{(api_key or '')[-4:]}": scheduler.stats()
+        for (provider, api_key), scheduler in items
+    }
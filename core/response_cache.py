@@ -0,0 +1,243 @@
+"""
+Caché de respuestas del modelo para los primeros turnos de una conversación.
+
+Buena parte de los primeros mensajes son casi idénticos ("hola", "info",
+"precio?") y cada uno pagaba una llamada completa al proveedor. La clave la
+arma quien usa la caché con todo lo que determina la respuesta: versión del
+prompt (su texto), fase, contexto de perfil y los turnos recientes
+normalizados (``normalize_text``); así dos visitantes con la misma
+conversación hasta ahora reciben la misma respuesta.
+
+- LRU con tope de entradas y expiración por antigüedad (TTL).
+- Single-flight: si varias sesiones piden la misma clave a la vez, solo una
+  llama al proveedor y las demás esperan su resultado.
+- Los turnos con datos de contacto no se cachean (``record_bypass``).
+- Solo se guardan respuestas exitosas: si el proveedor falla, el error se
+  propaga a quien espera (como ``CoalescedError``, con el original en
+  ``__cause__``) y no queda nada en caché.
+- Si la líder se cancela (su visitante se desconectó) o sale con otra
+  ``BaseException``, no se comparte: la clave se libera y quienes esperaban
+  la vuelven a pedir (una de ellas pasa a ser la líder).
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from config.settings import get_settings
+
+class CoalescedError(RuntimeError):
+    """Error de la petición líder entregado a quien esperaba su resultado (el original en ``__cause__``)."""
+
+
+# Resultado de una líder que no terminó (cancelada): quien espera vuelve a pedir la clave
+_RETRY = object()
+
+
+class _CachedResponse:
+    """Respuesta en caché con su vencimiento."""
+    __slots__ = ("value", "expires")
+
+    def __init__(self, value: str, expires: float):
+        self.value = value
+        self.expires = expires
+
+
+class ResponseCache:
+    """
+    LRU + TTL de respuestas con deduplicación de fallos concurrentes.
+
+    ``max_entries=0`` la desactiva: ``enabled`` es False y quien la usa no
+    arma claves.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _CachedResponse]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # Fallos resueltos esperando a otra petición en curso
+        self.bypassed = 0   # Turnos que no se cachean (datos de contacto)
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _lookup(self, key: Hashable) -> Optional[str]:
+        """Respuesta vigente para ``key`` (con el lock tomado)."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Respuesta en caché o None (cuenta acierto o fallo)."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        """Guarda una respuesta, desalojando las menos usadas si se pasa del tope."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = _CachedResponse(value, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _claim(self, key: Hashable):
+        """(respuesta en caché, future de la petición en curso, si esta petición es la líder)."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+            future = self._inflight[key] = Future()
+            # En curso: que cancele su espera alguien que aguarda no cancela el future compartido
+            future.set_running_or_notify_cancel()
+            self.misses += 1
+            return None, future, True
+
+    def _settle(self, key: Hashable, future: Future, value: Optional[str], error: Optional[BaseException]) -> None:
+        """
+        Publica el resultado de la líder: primero en caché, después a quienes esperan.
+
+        Solo se comparten respuestas y ``Exception``; una cancelación (u otra
+        ``BaseException``) es de la petición de la líder, no de la clave: se
+        libera la clave antes de avisar, así quienes esperan la vuelven a pedir.
+        """
+        if error is None:
+            if value is not None:
+                self.put(key, value)
+            future.set_result(value)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(_RETRY)
+            return
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], str]) -> str:
+        """Respuesta en caché, la de una petición igual en curso, o ``compute()``."""
+        while True:
+            value, future, leader = self._claim(key)
+            if value is not None:
+                return value
+            if leader:
+                break
+            try:
+                value = future.result()
+            except Exception as e:
+                raise CoalescedError(str(e)) from e
+            if value is not _RETRY:
+                return value
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self._settle(key, future, None, e)
+            raise
+        self._settle(key, future, value, None)
+        return value
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[str]]) -> str:
+        """Igual que ``get_or_compute`` para corrutinas (espera sin bloquear el loop)."""
+        while True:
+            value, future, leader = self._claim(key)
+            if value is not None:
+                return value
+            if leader:
+                break
+            try:
+                value = await asyncio.wrap_future(future)
+            except Exception as e:
+                raise CoalescedError(str(e)) from e
+            if value is not _RETRY:
+                return value
+
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._settle(key, future, None, e)
+            raise
+        self._settle(key, future, value, None)
+        return value
+
+    def record_bypass(self) -> None:
+        """Cuenta un turno que no pasa por la caché."""
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores; ``hit_rate`` cuenta como acierto a quien esperó una petición en curso."""
+        with self._lock:
+            lookups = self.hits + self.coalesced + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "in_flight": len(self._inflight),
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Caché de respuestas del proceso, creada con la configuración al primer uso."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = ResponseCache(
+                    max_entries=settings.response_cache_max_entries,
+                    ttl_seconds=settings.response_cache_ttl_seconds
+                )
+    return _cache
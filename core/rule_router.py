@@ -0,0 +1,158 @@
+"""
+Ruteo híbrido: respuestas del motor de reglas para intenciones rutinarias.
+
+El motor de reglas del modo demo (``SalesAgent._generate_demo_response``)
+tiene respuestas cuidadas para precio, tiempos de implementación, dudas y
+el sí/no del cierre. Con API cada turno pagaba una llamada al modelo aunque
+fuera un "¿cuánto cuesta?" en plena negociación. ``RuleRouter`` mira el
+análisis del turno (intención principal y su confianza) y la fase: si
+coinciden con una regla de ``ROUTABLE_RULES`` y el mensaje es corto, el
+agente responde con el motor de reglas (microsegundos); los turnos abiertos
+siguen yendo al modelo.
+
+Umbrales configurables: confianza mínima de la intención y largo máximo del
+mensaje en palabras (``RULE_ROUTER_MAX_WORDS=0`` desactiva el ruteo).
+
+``stats`` cuenta como locales los turnos del motor de reglas, de la caché de
+FAQ y de la caché de respuestas, y como turnos al modelo solo los que
+llamaron al proveedor (``record_escalation``).
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from config.settings import get_settings
+from .conversation import ConversationPhase
+from .message_interpreter import UserIntent
+from .turn_analysis import TurnAnalysis
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """Intención que el motor de reglas responde bien en las fases dadas."""
+    name: str
+    intent: UserIntent
+    phases: FrozenSet[ConversationPhase]
+
+
+# Intenciones con respuesta del motor de reglas por fase (ver los _demo_*_response del agente)
+ROUTABLE_RULES: Tuple[RouteRule, ...] = (
+    RouteRule("precio", UserIntent.PRICE_INQUIRY,
+              frozenset({ConversationPhase.QUALIFICATION, ConversationPhase.OBJECTION_HANDLING})),
+    RouteRule("tiempos", UserIntent.TIME_INQUIRY, frozenset({ConversationPhase.OBJECTION_HANDLING})),
+    RouteRule("dudas", UserIntent.DOUBT, frozenset({ConversationPhase.OBJECTION_HANDLING})),
+    RouteRule("cierre_si", UserIntent.AFFIRMATIVE, frozenset({ConversationPhase.CLOSING})),
+    RouteRule("cierre_no", UserIntent.NEGATIVE, frozenset({ConversationPhase.CLOSING})),
+)
+
+
+# Otras respuestas locales que cuentan como turnos sin modelo (caché de FAQ y de respuestas)
+SHORTCUTS = ("faq", "cache")
+
+
+class RuleRouter:
+    """Decide qué turnos responde el motor de reglas y cuenta lo ahorrado."""
+
+    def __init__(
+        self,
+        rules: Tuple[RouteRule, ...] = ROUTABLE_RULES,
+        min_confidence: float = 0.8,
+        max_words: int = 12
+    ):
+        self.rules = rules
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self._lock = threading.Lock()
+
+        self.local = 0
+        self.escalated = 0
+        self.by_source: Dict[str, int] = dict.fromkeys((*(rule.name for rule in rules), *SHORTCUTS), 0)
+        self.local_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_words > 0
+
+    def match(self, turn: TurnAnalysis, phase: ConversationPhase) -> Optional[RouteRule]:
+        """
+        Regla que responde este turno, o None si va al modelo.
+
+        El mensaje debe ser corto, con a lo sumo una pregunta, una sola señal
+        de intención y sin datos (correo, teléfono o cifras como un NIT: un
+        "por si..." junto a un correo no es un "sí"), y su intención principal
+        debe superar ``min_confidence`` en una fase de la regla.
+        """
+        if (
+            self.enabled
+            and turn.word_count <= self.max_words
+            and turn.question_count <= 1
+            and not turn.has_contact_data
+            and not any(char.isdigit() for char in turn.raw)
+            and len(turn.intents.intents) <= 1
+            and turn.intents.confidence >= self.min_confidence
+        ):
+            return next((r for r in self.rules if r.intent == turn.intent and phase in r.phases), None)
+        return None
+
+    def record_local(self, source: str, seconds: float) -> None:
+        """
+        Cuenta un turno respondido sin llamar al modelo y lo que tardó: una
+        regla (su nombre), ``"faq"`` o ``"cache"`` (ver ``SHORTCUTS``).
+        """
+        with self._lock:
+            self.local += 1
+            self.by_source[source] = self.by_source.get(source, 0) + 1
+            self.local_seconds += seconds
+
+    def record_escalation(self) -> None:
+        """Cuenta un turno que llamó al proveedor."""
+        with self._lock:
+            self.escalated += 1
+
+    def record_llm(self, seconds: float) -> None:
+        """Cuenta lo que tardó una llamada al modelo (para estimar la latencia ahorrada)."""
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Turnos locales vs al modelo y latencia ahorrada estimada con la media de las llamadas."""
+        with self._lock:
+            turns = self.local + self.escalated
+            local_avg = self.local_seconds / self.local if self.local else 0.0
+            llm_avg = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+            return {
+                "enabled": self.enabled,
+                "min_confidence": self.min_confidence,
+                "max_words": self.max_words,
+                "local": self.local,
+                "llm": self.escalated,
+                "local_ratio": round(self.local / turns, 4) if turns else 0.0,
+                "rules": {rule.name: self.by_source[rule.name] for rule in self.rules},
+                "faq": self.by_source["faq"],
+                "cache": self.by_source["cache"],
+                "local_avg_us": round(local_avg * 1e6, 1),
+                "llm_avg_ms": round(llm_avg * 1000, 1),
+                "latency_saved_s": round(self.local * max(0.0, llm_avg - local_avg), 3),
+            }
+
+
+_router: Optional[RuleRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_rule_router() -> RuleRouter:
+    """Router de reglas del proceso, creado con la configuración al primer uso."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                settings = get_settings()
+                _router = RuleRouter(
+                    min_confidence=settings.rule_router_min_confidence,
+                    max_words=settings.rule_router_max_words
+                )
+    return _router
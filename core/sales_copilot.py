@@ -1,11 +1,16 @@
 """Copiloto de ventas - Asistente personal para el vendedor."""
 
 import os
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from config.products import get_all_products, get_products_for_industry, PRODUCT_CATALOG, INDUSTRY_SOLUTIONS
+from config.lexicon import get_lexicon
+from config.prompts import register_prompt, render_prompt
+from .turn_analysis import TurnAnalysis, analyze_turn
+from .llm_clients import close_stream, get_client_pool, get_usage_stats, read_usage
+from .deadline import Deadline, DeadlineExceeded, get_deadline_policy
 
 
 class SalePhase(Enum):
@@ -33,6 +38,59 @@ class ClientInfo:
     notes: List[str] = field(default_factory=list)
 
 
+@register_prompt("copilot")
+def build_copilot_prompt() -> str:
+    """Prompt del sistema para el copiloto."""
+    return """Eres Marcos, el mejor vendedor de agentes de IA. Ayudas a otros vendedores dándoles el mensaje exacto para enviar a sus clientes.
+
+## TU ÚNICA TAREA
+
+El vendedor te cuenta qué dice el cliente. Tú respondes SOLO con:
+1. Un comentario corto tuyo (máximo 1-2 líneas, opcional)
+2. El mensaje listo para copiar y enviar al cliente
+
+EJEMPLO DE CÓMO RESPONDES:
+
+Vendedor: "El cliente es abogado y dice que recibe muchas consultas"
+
+Tú:
+Perfecto, enganchalo con esto:
+
+---
+Entiendo perfectamente. Manejar tantas consultas puede ser agotador, especialmente cuando cada una requiere atencion personalizada.
+
+Cuantas consultas dirias que recibes al dia aproximadamente? Te pregunto porque dependiendo del volumen, hay diferentes formas en que podriamos ayudarte.
+---
+
+## PRODUCTOS QORAX (precios en pesos colombianos)
+
+- Atención 24/7: $250,000/mes
+- Agente Ventas: $499,000/mes
+- Agente RRHH: $399,000/mes
+- Tutor IA: $349,000/mes
+- Asistente Legal: $599,000/mes
+- Asistente Médico: $699,000/mes
+- Setup único: $1,500,000
+- Prueba gratis: 14 días
+
+## OBJECIONES COMUNES
+
+"Caro" → Comparar con empleado ($1.5-2.5M/mes). Trabaja 24/7. Se paga solo en 3 meses.
+"Lo pienso" → No presionar. Ofrecer info por correo + fecha seguimiento.
+"No funciona" → 14 días gratis para probar. Garantía satisfacción.
+"No tengo tiempo" → Nosotros hacemos todo. 2 semanas implementación.
+
+## REGLAS
+
+1. NUNCA uses formato de [ANÁLISIS] o [ESTRATEGIA] a menos que te lo pidan
+2. Ve DIRECTO al mensaje para enviar
+3. El mensaje debe sonar natural, como WhatsApp
+4. Varía tus respuestas, no repitas lo mismo
+5. Tu comentario previo debe ser breve y útil
+6. Separa el mensaje con --- para que sea fácil de copiar
+7. Adapta el tono según la industria del cliente"""
+
+
 class SalesCopilot:
     """Copiloto de ventas - Te guía en tiempo real durante la venta."""
 
@@ -52,7 +110,7 @@ class SalesCopilot:
         self.conversation_history: List[Dict[str, str]] = []
         self.products = get_all_products()
 
-        # Cliente de API
+        # Cliente de API (compartido por el proceso, ver core/llm_clients.py)
         self.client_api = None
         self.demo_mode = not bool(self.api_key)
         if not self.demo_mode:
@@ -69,21 +127,9 @@ class SalesCopilot:
         return os.getenv(providers.get(self.api_provider, ""))
 
     def _initialize_client(self):
-        """Inicializa el cliente de API."""
+        """Toma el cliente de API del pool del proceso (compartido entre sesiones)."""
         try:
-            if self.api_provider == "openai":
-                from openai import OpenAI
-                self.client_api = OpenAI(api_key=self.api_key)
-            elif self.api_provider == "anthropic":
-                import anthropic
-                self.client_api = anthropic.Anthropic(api_key=self.api_key)
-            elif self.api_provider == "gemini":
-                import google.generativeai as genai
-                genai.configure(api_key=self.api_key)
-                self.client_api = genai.GenerativeModel('gemini-2.0-flash')
-            elif self.api_provider == "groq":
-                from groq import Groq
-                self.client_api = Groq(api_key=self.api_key)
+            self.client_api = get_client_pool().get(self.api_provider, self.api_key)
         except Exception as e:
             print(f"Error inicializando API: {e}")
             self.demo_mode = True
@@ -131,14 +177,51 @@ Que te dijo el cliente?
             "timestamp": datetime.now().isoformat()
         })
 
-        # Analizar y extraer información del cliente
-        self._analyze_client_info(user_input)
+        # Analizar el mensaje una sola vez y extraer información del cliente
+        turn = analyze_turn(user_input)
+        self._analyze_client_info(turn)
 
         # Generar respuesta del copiloto
         if self.demo_mode:
-            return self._generate_demo_response(user_input)
+            return self._generate_demo_response(turn)
         else:
-            return self._generate_ai_response(user_input)
+            return self._generate_ai_response(turn)
+
+    async def aprocess_input(self, user_input: str) -> str:
+        """
+        Versión asíncrona de ``process_input``: el análisis del cliente es
+        local y síncrono, solo la llamada a la IA usa el cliente async.
+        """
+        if user_input.startswith("/") or self.demo_mode:
+            return self.process_input(user_input)
+
+        # Guardar en historial
+        self.conversation_history.append({
+            "type": "seller_input",
+            "content": user_input,
+            "timestamp": datetime.now().isoformat()
+        })
+
+        turn = analyze_turn(user_input)
+        self._analyze_client_info(turn)
+        return await self._agenerate_ai_response(turn)
+
+    def process_input_stream(self, user_input: str) -> Iterator[str]:
+        """Igual que ``process_input`` pero entrega la respuesta de la IA en fragmentos."""
+        if user_input.startswith("/") or self.demo_mode:
+            yield self.process_input(user_input)
+            return
+
+        # Guardar en historial
+        self.conversation_history.append({
+            "type": "seller_input",
+            "content": user_input,
+            "timestamp": datetime.now().isoformat()
+        })
+
+        turn = analyze_turn(user_input)
+        self._analyze_client_info(turn)
+        yield from self._stream_ai_response(turn)
 
     def _handle_command(self, command: str) -> str:
         """Maneja comandos especiales."""
@@ -194,81 +277,37 @@ Fases de venta:
 
         return "Comando no reconocido. Escribe /ayuda para ver los comandos disponibles."
 
-    def _analyze_client_info(self, text: str) -> None:
-        """Extrae información del cliente del texto."""
-        text_lower = text.lower()
-
-        # Detectar industria
-        industry_keywords = {
-            "legal": ["abogado", "abogados", "despacho", "legal", "juridico", "notaria", "notario", "ley", "leyes"],
-            "salud": ["medico", "médico", "doctor", "doctora", "clinica", "clínica", "hospital", "paciente", "salud", "medicina", "consultorio"],
-            "educacion": ["escuela", "colegio", "universidad", "educacion", "educación", "maestro", "profesor", "academia", "curso", "capacitacion"],
-            "retail": ["tienda", "comercio", "venta", "ventas", "productos", "retail", "mayoreo", "menudeo", "ecommerce"],
-            "inmobiliaria": ["inmobiliaria", "bienes raices", "propiedades", "casas", "departamentos", "rentas", "inmuebles"],
-            "tecnologia": ["software", "tecnologia", "tecnología", "app", "aplicacion", "desarrollo", "programacion", "startup", "tech", "saas"],
-            "finanzas": ["banco", "finanzas", "credito", "crédito", "prestamo", "préstamo", "inversiones", "contabilidad", "contador"],
-            "gastronomia": ["restaurante", "cafeteria", "cafetería", "comida", "cocina", "chef", "bar", "antro", "cafe", "café"],
-            "recursos_humanos": ["rrhh", "recursos humanos", "personal", "nomina", "nómina", "empleados", "contratacion"]
-        }
+    def _analyze_client_info(self, turn: TurnAnalysis) -> None:
+        """Extrae información del cliente del turno analizado."""
+        text_lower = turn.lowered
+
+        # Una pasada por léxico (config/lexicon.json) para todas las categorías
+        words = get_lexicon("copilot")
+        phrases = get_lexicon("copilot_phrases")
+        word_hits = words.scan(text_lower)
+        phrase_hits = phrases.scan(text_lower)
 
         # Solo detectar industria si no hay una ya detectada
         if not self.client.industry:
-            for industry, keywords in industry_keywords.items():
-                if any(kw in text_lower for kw in keywords):
-                    self.client.industry = industry
-                    break
+            self.client.industry = words.first(word_hits, "industry")
 
         # Detectar tamaño del negocio
-        if any(word in text_lower for word in ["pequeño", "pequeña", "solo", "sola", "independiente", "freelance"]):
-            self.client.business_size = "pequeño"
-        elif any(word in text_lower for word in ["mediano", "mediana", "varios empleados", "equipo"]):
-            self.client.business_size = "mediano"
-        elif any(word in text_lower for word in ["grande", "corporativo", "empresa grande", "multinacional"]):
-            self.client.business_size = "grande"
+        business_size = words.first(word_hits, "business_size")
+        if business_size:
+            self.client.business_size = business_size
 
         # Detectar problemas/necesidades
-        problem_keywords = {
-            "atencion_cliente": ["atender", "responder", "consultas", "clientes", "cliente", "mensajes", "whatsapp", "24/7", "atencion", "atención", "soporte"],
-            "ventas": ["vender", "ventas", "leads", "prospectos", "cerrar", "cotizar", "cotizaciones"],
-            "automatizacion": ["automatizar", "repetitivo", "tiempo", "manual", "agilizar", "automatizacion", "automatización"],
-            "documentos": ["documentos", "contratos", "papeles", "archivos", "organizar", "documentacion", "documentación"],
-            "citas": ["citas", "agendar", "reservas", "calendario", "horarios", "agenda", "cita"]
-        }
-
-        for problem, keywords in problem_keywords.items():
-            if any(kw in text_lower for kw in keywords):
-                if problem not in self.client.interests:
-                    self.client.interests.append(problem)
-
-        # Detectar objeciones
-        if any(word in text_lower for word in ["caro", "costoso", "precio", "presupuesto", "muy caro", "no tengo", "no cuento"]):
-            if "precio" not in self.client.objections:
-                self.client.objections.append("precio")
+        for problem in phrases.all(phrase_hits, "problem"):
+            if problem not in self.client.interests:
+                self.client.interests.append(problem)
 
-        if any(word in text_lower for word in ["tiempo", "demora", "tarda", "rapido", "urgente", "cuanto tiempo"]):
-            if "tiempo" not in self.client.objections:
-                self.client.objections.append("tiempo")
-
-        if any(word in text_lower for word in ["funciona", "seguro", "confiable", "garantia", "duda", "dudas"]):
-            if "confianza" not in self.client.objections:
-                self.client.objections.append("confianza")
-
-        # "Lo voy a pensar" es una objeción de indecisión
-        if any(phrase in text_lower for phrase in ["lo voy a pensar", "lo va a pensar", "pensarlo", "dejame pensar", "tengo que pensarlo", "lo pienso", "voy a pensar"]):
-            if "indecision" not in self.client.objections:
-                self.client.objections.append("indecision")
+        # Detectar objeciones ("lo voy a pensar" es una objeción de indecisión)
+        for objection in phrases.all(phrase_hits, "objection"):
+            if objection not in self.client.objections:
+                self.client.objections.append(objection)
 
         # Detectar aceptación/cierre
-        cierre_phrases = [
-            "dice que si", "dijo que si", "acepta", "acepto",
-            "quiere contratar", "quiere agendar", "listo para",
-            "va a contratar", "quiere la demo", "quiere una demo",
-            "le interesa", "esta interesado", "está interesado",
-            "quiere empezar", "quiere comenzar", "quiere probar",
-            "me da sus datos", "me dio sus datos", "me paso su correo",
-            "me compartio", "me comparti"
-        ]
-        if any(phrase in text_lower for phrase in cierre_phrases):
+        if phrases.first(phrase_hits, "closing"):
             self.current_phase = SalePhase.CIERRE
             return  # No seguir procesando, ya está en cierre
 
@@ -289,9 +328,9 @@ Fases de venta:
         else:
             self.current_phase = SalePhase.INICIO
 
-    def _generate_demo_response(self, user_input: str) -> str:
+    def _generate_demo_response(self, turn: TurnAnalysis) -> str:
         """Genera respuesta en modo demo (sin API)."""
-        text_lower = user_input.lower()
+        text_lower = turn.lowered
 
         response_parts = []
 
@@ -343,6 +382,11 @@ Fases de venta:
             return "\n".join(parts)
         return ""
 
+    def _asks_recommendation(self, text: str) -> bool:
+        """Indica si el cliente pide una recomendación ("¿qué me recomiendas?")."""
+        phrases = get_lexicon("copilot_phrases")
+        return phrases.first(phrases.scan(text), "recommendation") is not None
+
     def _build_suggestions(self, text: str) -> str:
         """Construye sugerencias para el vendedor."""
         parts = ["", "[SUGERENCIA] TE SUGIERO:"]
@@ -396,23 +440,7 @@ Fases de venta:
             parts.append("   * Agradece y confirma cuando te dara seguimiento")
 
         # Detectar si el cliente pregunta qué le recomiendas
-        recomendacion_phrases = [
-            "que me recomiendas", "qué me recomiendas",
-            "que me sugieres", "qué me sugieres",
-            "que le recomiendas", "qué le recomiendas",
-            "que le sugieres", "qué le sugieres",
-            "que opinas", "qué opinas",
-            "tu que dices", "tú qué dices",
-            "me recomiendas", "le recomiendas",
-            "tu opinion", "tu opinión",
-            "que me aconsejas", "qué me aconsejas",
-            "cual me conviene", "cuál me conviene",
-            "cual le conviene", "cuál le conviene",
-            "que es mejor", "qué es mejor",
-            "cual es mejor", "cuál es mejor",
-            "que deberia", "qué debería"
-        ]
-        if any(phrase in text for phrase in recomendacion_phrases):
+        if self._asks_recommendation(text):
             parts.append("")
             parts.append("   >>> EL CLIENTE PIDE TU OPINION - Dale una recomendacion directa")
 
@@ -423,23 +451,7 @@ Fases de venta:
         parts = ["", "=" * 50, "[MENSAJE] COPIA Y ENVÍALE ESTO:", "=" * 50, ""]
 
         # Detectar si el cliente pregunta qué le recomiendas
-        recomendacion_phrases = [
-            "que me recomiendas", "qué me recomiendas",
-            "que me sugieres", "qué me sugieres",
-            "que le recomiendas", "qué le recomiendas",
-            "que le sugieres", "qué le sugieres",
-            "que opinas", "qué opinas",
-            "tu que dices", "tú qué dices",
-            "me recomiendas", "le recomiendas",
-            "tu opinion", "tu opinión",
-            "que me aconsejas", "qué me aconsejas",
-            "cual me conviene", "cuál me conviene",
-            "cual le conviene", "cuál le conviene",
-            "que es mejor", "qué es mejor",
-            "cual es mejor", "cuál es mejor",
-            "que deberia", "qué debería"
-        ]
-        if any(phrase in text for phrase in recomendacion_phrases):
+        if self._asks_recommendation(text):
             recommended = self._get_recommended_product()
             if recommended:
                 response = f"""Basándome en lo que me cuentas, te recomiendo el **{recommended['nombre']}**.
@@ -657,114 +669,198 @@ Beneficios:
 
         return f"No encontré un producto con '{query}'. Escribe /productos para ver el catálogo."
 
-    def _generate_ai_response(self, user_input: str) -> str:
-        """Genera respuesta usando la API de IA."""
-        try:
-            system_prompt = self._build_system_prompt()
-            context = self._build_context_for_ai()
-
-            # Construir historial reciente para contexto
-            recent_history = ""
-            if len(self.conversation_history) > 1:
-                last_messages = self.conversation_history[-5:]  # Últimos 5 mensajes
-                history_parts = []
-                for msg in last_messages[:-1]:  # Excluir el actual
-                    history_parts.append(f"- {msg['content'][:200]}")
-                if history_parts:
-                    recent_history = "\n\n## HISTORIAL RECIENTE\n" + "\n".join(history_parts)
-
-            full_context = f"{context}{recent_history}\n\nVendedor: \"{user_input}\"\n\nResponde con un comentario corto + el mensaje para enviar (separado con ---)."
-
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": full_context}
-            ]
-
-            if self.api_provider == "openai":
-                response = self.client_api.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=messages,
-                    max_tokens=1500,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content
-
-            elif self.api_provider == "anthropic":
-                response = self.client_api.messages.create(
-                    model="claude-3-haiku-20240307",
-                    max_tokens=1500,
-                    system=system_prompt,
-                    messages=[{"role": "user", "content": full_context}]
-                )
-                return response.content[0].text
-
-            elif self.api_provider == "gemini":
-                full_prompt = f"{system_prompt}\n\n{full_context}"
-                response = self.client_api.generate_content(full_prompt)
-                return response.text
-
-            elif self.api_provider == "groq":
-                response = self.client_api.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=messages,
-                    max_tokens=1500,
-                    temperature=0.85  # Más creativo y variado
-                )
-                return response.choices[0].message.content
-
-        except Exception as e:
-            return f"Error con la API: {e}\n\n" + self._generate_demo_response(user_input)
-
-    def _build_system_prompt(self) -> str:
-        """Construye el prompt del sistema para el copiloto."""
-        return """Eres Marcos, el mejor vendedor de agentes de IA. Ayudas a otros vendedores dándoles el mensaje exacto para enviar a sus clientes.
-
-## TU ÚNICA TAREA
-
-El vendedor te cuenta qué dice el cliente. Tú respondes SOLO con:
-1. Un comentario corto tuyo (máximo 1-2 líneas, opcional)
-2. El mensaje listo para copiar y enviar al cliente
-
-EJEMPLO DE CÓMO RESPONDES:
+    def _ai_prompt(self, turn: TurnAnalysis) -> Tuple[str, str]:
+        """Prompt del sistema y mensaje del turno (contexto + historial reciente)."""
+        user_input = turn.raw
+        system_prompt = self._build_system_prompt()
+        context = self._build_context_for_ai()
+
+        # Construir historial reciente para contexto
+        recent_history = ""
+        if len(self.conversation_history) > 1:
+            last_messages = self.conversation_history[-5:]  # Últimos 5 mensajes
+            history_parts = []
+            for msg in last_messages[:-1]:  # Excluir el actual
+                history_parts.append(f"- {msg['content'][:200]}")
+            if history_parts:
+                recent_history = "\n\n## HISTORIAL RECIENTE\n" + "\n".join(history_parts)
+
+        full_context = f"{context}{recent_history}\n\nVendedor: \"{user_input}\"\n\nResponde con un comentario corto + el mensaje para enviar (separado con ---)."
+        return system_prompt, full_context
+
+    def _chat_request(self, system_prompt: str, full_context: str) -> Dict[str, Any]:
+        """Parámetros para las APIs estilo chat.completions (OpenAI y Groq)."""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": full_context}
+        ]
+        if self.api_provider == "openai":
+            return {"model": "gpt-4o-mini", "messages": messages, "max_tokens": 1500, "temperature": 0.7}
+        return {
+            "model": "llama-3.3-70b-versatile",
+            "messages": messages,
+            "max_tokens": 1500,
+            "temperature": 0.85  # Más creativo y variado
+        }
 
-Vendedor: "El cliente es abogado y dice que recibe muchas consultas"
+    def _anthropic_request(self, system_prompt: str, full_context: str) -> Dict[str, Any]:
+        return {
+            "model": "claude-3-haiku-20240307",
+            "max_tokens": 1500,
+            # Sin marca cache_control: el prompt del copiloto no llega al mínimo cacheable de Anthropic
+            "system": system_prompt,
+            "messages": [{"role": "user", "content": full_context}]
+        }
 
-Tú:
-Perfecto, enganchalo con esto:
+    def _generate_ai_response(self, turn: TurnAnalysis) -> str:
+        """
+        Genera respuesta usando la API de IA, dentro del plazo de la petición
+        (ver core/deadline.py); si el modelo no alcanza, responde el motor de reglas.
+        """
+        policy = get_deadline_policy()
+        deadline = policy.start()
+        try:
+            system_prompt, full_context = self._ai_prompt(turn)
 
----
-Entiendo perfectamente. Manejar tantas consultas puede ser agotador, especialmente cuando cada una requiere atencion personalizada.
+            with policy.guard(deadline, "copilot"):
+                timeout = policy.request_kwargs(self.api_provider, deadline)
 
-Cuantas consultas dirias que recibes al dia aproximadamente? Te pregunto porque dependiendo del volumen, hay diferentes formas en que podriamos ayudarte.
----
+                if self.api_provider in ("openai", "groq"):
+                    request = self._chat_request(system_prompt, full_context)
+                    response = self.client_api.chat.completions.create(**request, **timeout)
+                    self._record_usage(response)
+                    return response.choices[0].message.content
 
-## PRODUCTOS QORAX (precios en pesos colombianos)
+                elif self.api_provider == "anthropic":
+                    request = self._anthropic_request(system_prompt, full_context)
+                    response = self.client_api.messages.create(**request, **timeout)
+                    self._record_usage(response)
+                    return response.content[0].text
 
-- Atención 24/7: $250,000/mes
-- Agente Ventas: $499,000/mes
-- Agente RRHH: $399,000/mes
-- Tutor IA: $349,000/mes
-- Asistente Legal: $599,000/mes
-- Asistente Médico: $699,000/mes
-- Setup único: $1,500,000
-- Prueba gratis: 14 días
+                elif self.api_provider == "gemini":
+                    full_prompt = f"{system_prompt}\n\n{full_context}"
+                    response = self.client_api.generate_content(full_prompt, **timeout)
+                    self._record_usage(response)
+                    return response.text
 
-## OBJECIONES COMUNES
+        except Exception as e:
+            if self._cut_short(e, deadline):
+                return self._deadline_fallback(turn)
+            return f"Error con la API: {e}\n\n" + self._generate_demo_response(turn)
+
+    async def _agenerate_ai_response(self, turn: TurnAnalysis) -> str:
+        """Igual que ``_generate_ai_response`` pero con el cliente async del proveedor."""
+        policy = get_deadline_policy()
+        deadline = policy.start()
+        try:
+            system_prompt, full_context = self._ai_prompt(turn)
+
+            with policy.guard(deadline, "copilot"):
+                timeout = policy.request_kwargs(self.api_provider, deadline)
+
+                if self.api_provider in ("openai", "groq"):
+                    client = self._get_async_client()
+                    request = self._chat_request(system_prompt, full_context)
+                    response = await client.chat.completions.create(**request, **timeout)
+                    self._record_usage(response)
+                    return response.choices[0].message.content
+
+                elif self.api_provider == "anthropic":
+                    client = self._get_async_client()
+                    request = self._anthropic_request(system_prompt, full_context)
+                    response = await client.messages.create(**request, **timeout)
+                    self._record_usage(response)
+                    return response.content[0].text
+
+                elif self.api_provider == "gemini":
+                    full_prompt = f"{system_prompt}\n\n{full_context}"
+                    response = await self.client_api.generate_content_async(full_prompt, **timeout)
+                    self._record_usage(response)
+                    return response.text
 
-"Caro" → Comparar con empleado ($1.5-2.5M/mes). Trabaja 24/7. Se paga solo en 3 meses.
-"Lo pienso" → No presionar. Ofrecer info por correo + fecha seguimiento.
-"No funciona" → 14 días gratis para probar. Garantía satisfacción.
-"No tengo tiempo" → Nosotros hacemos todo. 2 semanas implementación.
+        except Exception as e:
+            if self._cut_short(e, deadline):
+                return self._deadline_fallback(turn)
+            return f"Error con la API: {e}\n\n" + self._generate_demo_response(turn)
+
+    @staticmethod
+    def _cut_short(error: Exception, deadline: Deadline) -> bool:
+        """True si la llamada al modelo se cortó por el plazo (vencido, cancelado o casi vencido)."""
+        return isinstance(error, DeadlineExceeded) or deadline.expired
+
+    def _deadline_fallback(self, turn: TurnAnalysis) -> str:
+        """Respuesta del motor de reglas cuando el modelo no alcanza a responder dentro del plazo."""
+        get_deadline_policy().record_fallback("copilot")
+        return self._generate_demo_response(turn)
+
+    def _get_async_client(self) -> Any:
+        """Cliente async del proveedor para el event loop actual."""
+        return get_client_pool().get_async(self.api_provider, self.api_key)
+
+    def _record_usage(self, source: Any) -> None:
+        """Registra el uso de tokens que informa el proveedor (incluidos los de la caché de prompt)."""
+        usage = read_usage(self.api_provider, source)
+        if usage is not None:
+            get_usage_stats().record(self.api_provider, usage)
+
+    def _stream_ai_response(self, turn: TurnAnalysis) -> Iterator[str]:
+        """
+        Igual que ``_generate_ai_response`` pero en fragmentos.
+
+        El plazo cubre la apertura del stream; si quien consume abandona el
+        generador (desconexión), se cierra el stream del proveedor.
+        """
+        policy = get_deadline_policy()
+        deadline = policy.start()
+        started = False
+        try:
+            system_prompt, full_context = self._ai_prompt(turn)
+
+            with policy.guard(deadline, "copilot"):
+                timeout = policy.request_kwargs(self.api_provider, deadline)
+
+                if self.api_provider in ("openai", "groq"):
+                    request = self._chat_request(system_prompt, full_context)
+                    if self.api_provider == "openai":
+                        request["stream_options"] = {"include_usage": True}
+                    stream = self.client_api.chat.completions.create(stream=True, **request, **timeout)
+                    try:
+                        for chunk in stream:
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                started = True
+                                yield delta
+                            self._record_usage(chunk)
+                    finally:
+                        close_stream(stream)
+
+                elif self.api_provider == "anthropic":
+                    request = self._anthropic_request(system_prompt, full_context)
+                    with self.client_api.messages.stream(**request, **timeout) as stream:
+                        for delta in stream.text_stream:
+                            started = True
+                            yield delta
+                        self._record_usage(stream.get_final_message())
+
+                elif self.api_provider == "gemini":
+                    full_prompt = f"{system_prompt}\n\n{full_context}"
+                    chunk = None
+                    for chunk in self.client_api.generate_content(full_prompt, stream=True, **timeout):
+                        started = True
+                        yield chunk.text
+                    self._record_usage(chunk)
 
-## REGLAS
+        except Exception as e:
+            if started:
+                raise
+            if self._cut_short(e, deadline):
+                yield self._deadline_fallback(turn)
+                return
+            yield f"Error con la API: {e}\n\n" + self._generate_demo_response(turn)
 
-1. NUNCA uses formato de [ANÁLISIS] o [ESTRATEGIA] a menos que te lo pidan
-2. Ve DIRECTO al mensaje para enviar
-3. El mensaje debe sonar natural, como WhatsApp
-4. Varía tus respuestas, no repitas lo mismo
-5. Tu comentario previo debe ser breve y útil
-6. Separa el mensaje con --- para que sea fácil de copiar
-7. Adapta el tono según la industria del cliente"""
+    def _build_system_prompt(self) -> str:
+        """Prompt del sistema para el copiloto (renderizado una sola vez, ver config/prompts.py)."""
+        return render_prompt("copilot").text
 
     def _build_context_for_ai(self) -> str:
         """Construye contexto para la IA."""
@@ -0,0 +1,269 @@
+"""
+Snapshot binario del estado de una sesión de ``SalesAgent`` (y de ``SalesCopilot``).
+
+Permite sacar de memoria las sesiones inactivas y restaurarlas cuando
+vuelven, o moverlas entre procesos. El snapshot guarda solo datos:
+historial (sin el prompt del sistema, que sale del registro de prompts),
+fase, ``phase_history``, ``turn_count``, el perfil del cliente y
+``demo_mode``. Nunca guarda la API key.
+
+Formato: cabecera fija (``MAGIC``, versión, flags, huella del esquema) y un
+cuerpo ``marshal`` de tuplas con enums como índices, roles como bytes y
+fechas como ``array('d')``; opcionalmente comprimido con zlib. ``marshal``
+es rápido pero depende de la versión de Python: los snapshots son para
+procesos del mismo despliegue, no para almacenamiento de largo plazo.
+"""
+
+import binascii
+import marshal
+import struct
+import zlib
+from array import array
+from dataclasses import fields
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Type
+
+from config.settings import get_settings
+from .conversation import ConversationManager, ConversationPhase, Message, MessageRole
+from .customer_profile import CustomerProfile
+from .sales_copilot import ClientInfo, SalePhase, SalesCopilot
+
+if TYPE_CHECKING:
+    from .agent import SalesAgent
+
+
+MAGIC = b"QSA"
+FORMAT_VERSION = 1
+FLAG_ZLIB = 1
+
+# Los snapshots más grandes que esto se comprimen (los chicos no ganan nada)
+COMPRESS_THRESHOLD = 2048
+
+_HEADER = struct.Struct("<3sBBI")  # magic, versión, flags, huella del esquema
+
+_ROLES: Tuple[MessageRole, ...] = tuple(MessageRole)
+_ROLE_CODES = {role: code for code, role in enumerate(_ROLES)}
+_PHASES: Tuple[ConversationPhase, ...] = tuple(ConversationPhase)
+_PHASE_CODES = {phase: code for code, phase in enumerate(_PHASES)}
+
+# Campos del perfil en orden, con el enum de los que son enums
+_PROFILE_FIELDS: Tuple[Tuple[str, Optional[Type[Enum]]], ...] = tuple(
+    (f.name, f.type if isinstance(f.type, type) and issubclass(f.type, Enum) else None)
+    for f in fields(CustomerProfile)
+)
+_ENUM_MEMBERS: Dict[Type[Enum], Tuple[Enum, ...]] = {
+    enum: tuple(enum) for _, enum in _PROFILE_FIELDS if enum is not None
+}
+
+
+class SnapshotError(ValueError):
+    """El snapshot está dañado o fue generado con otro esquema."""
+
+
+def _schema_fingerprint() -> int:
+    """Huella de los campos y enums codificados: si cambian, los snapshots viejos se rechazan."""
+    parts = [role.value for role in _ROLES] + [phase.value for phase in _PHASES]
+    for name, enum in _PROFILE_FIELDS:
+        parts.append(name)
+        if enum is not None:
+            parts.extend(member.value for member in _ENUM_MEMBERS[enum])
+    return binascii.crc32("\x1f".join(parts).encode("utf-8"))
+
+
+SCHEMA_FINGERPRINT = _schema_fingerprint()
+
+# Copiloto: fases y campos de ClientInfo (dicts, listas y strings que marshal guarda tal cual)
+MAGIC_COPILOT = b"QSC"
+_SALE_PHASES: Tuple[SalePhase, ...] = tuple(SalePhase)
+_CLIENT_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(ClientInfo))
+COPILOT_FINGERPRINT = binascii.crc32(
+    "\x1f".join([phase.value for phase in _SALE_PHASES] + list(_CLIENT_FIELDS)).encode("utf-8")
+)
+
+
+def _encode_profile(profile: CustomerProfile) -> Tuple[Any, ...]:
+    values = []
+    for name, enum in _PROFILE_FIELDS:
+        value = getattr(profile, name)
+        if enum is not None:
+            value = _ENUM_MEMBERS[enum].index(value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        values.append(value)
+    return tuple(values)
+
+
+def _decode_profile(values: Tuple[Any, ...]) -> CustomerProfile:
+    kwargs = {}
+    for (name, enum), value in zip(_PROFILE_FIELDS, values):
+        if enum is not None:
+            value = _ENUM_MEMBERS[enum][value]
+        elif isinstance(value, tuple):
+            value = list(value)
+        kwargs[name] = value
+    return CustomerProfile(**kwargs)
+
+
+def _encode_messages(conversation: ConversationManager) -> Tuple[Any, ...]:
+    """Historial en columnas: roles, textos, fechas y metadatos (solo los que existen)."""
+    with conversation._lock:
+        messages = list(conversation.messages)
+
+    # Del prompt del sistema se guarda la fecha (inicio de la conversación) y,
+    # solo si no es el de la plantilla de la fase, el texto (la plantilla sale del registro)
+    system: Optional[Tuple[Optional[str], float]] = None
+    if messages and messages[0].role == MessageRole.SYSTEM and not messages[0]._metadata:
+        first = messages.pop(0)
+        prompt = None if first is conversation._phase_prompt else first.content
+        system = (prompt, first._created)
+
+    roles = bytes(_ROLE_CODES[msg.role] for msg in messages)
+    contents = tuple(msg.content for msg in messages)
+    created = array("d", (msg._created for msg in messages)).tobytes()
+    metadata = tuple((i, msg._metadata) for i, msg in enumerate(messages) if msg._metadata)
+    return system, roles, contents, created, metadata
+
+
+def _decode_messages(conversation: ConversationManager, encoded: Tuple[Any, ...]) -> None:
+    system, roles, contents, created, metadata = encoded
+    timestamps = array("d")
+    timestamps.frombytes(created)
+
+    messages = []
+    if system is not None:
+        prompt, started = system
+        if prompt is None:
+            # Prompt de la plantilla para la fase restaurada
+            first = conversation._phase_prompt = conversation.system_prompt_message()
+        else:
+            first = Message(role=MessageRole.SYSTEM, content=prompt)
+            conversation._phase_prompt = None
+        first._created = started
+        messages.append(first)
+    else:
+        conversation._phase_prompt = None
+    offset = len(messages)
+    for code, content, stamp in zip(roles, contents, timestamps):
+        message = Message(_ROLES[code], content)
+        message._created = stamp
+        messages.append(message)
+    for index, meta in metadata:
+        messages[index + offset]._metadata = meta
+    conversation.messages = messages
+
+
+def _pack(magic: bytes, fingerprint: int, state: Tuple[Any, ...], compress: Optional[bool]) -> bytes:
+    """Cabecera + cuerpo ``marshal`` (comprimido si corresponde)."""
+    body = marshal.dumps(state)
+    flags = 0
+    if compress or (compress is None and len(body) > COMPRESS_THRESHOLD):
+        body = zlib.compress(body, 1)
+        flags |= FLAG_ZLIB
+    return _HEADER.pack(magic, FORMAT_VERSION, flags, fingerprint) + body
+
+
+def _unpack(data: bytes, magic: bytes, fingerprint: int) -> Tuple[Any, ...]:
+    """Valida la cabecera y devuelve el estado; ``SnapshotError`` si no corresponde."""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Snapshot incompleto")
+    found, version, flags, found_fingerprint = _HEADER.unpack_from(data)
+    if found != magic or version != FORMAT_VERSION:
+        raise SnapshotError(f"Formato de snapshot no soportado ({found!r} v{version})")
+    if found_fingerprint != fingerprint:
+        raise SnapshotError("El snapshot fue generado con otro esquema de sesión")
+
+    body = data[_HEADER.size:]
+    try:
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        return marshal.loads(body)
+    except (ValueError, EOFError, TypeError, zlib.error) as e:
+        raise SnapshotError(f"Snapshot dañado: {e}")
+
+
+def _api_key(api_provider: str, api_key: Optional[str]) -> Optional[str]:
+    """API key explícita o la configurada para el proveedor."""
+    return api_key or get_settings().api_key_for(api_provider)
+
+
+def dump_agent(agent: "SalesAgent", compress: Optional[bool] = None) -> bytes:
+    """
+    Serializa el estado de la sesión.
+
+    ``compress=None`` comprime solo si el cuerpo supera ``COMPRESS_THRESHOLD``.
+    """
+    conversation = agent.conversation
+    return _pack(MAGIC, SCHEMA_FINGERPRINT, (
+        (agent.agent_name, agent.company_name, agent.api_provider,
+         agent.token_budget, agent.max_turns, agent.demo_mode, agent.is_active),
+        (_PHASE_CODES[conversation.current_phase],
+         bytes(_PHASE_CODES[phase] for phase in conversation.phase_history),
+         conversation.turn_count),
+        _encode_messages(conversation),
+        _encode_profile(agent.profiler.get_profile()),
+    ), compress)
+
+
+def load_agent(data: bytes, api_key: Optional[str] = None) -> "SalesAgent":
+    """
+    Reconstruye un ``SalesAgent`` desde ``dump_agent``.
+
+    La API key se toma de ``api_key`` o de la configuración del proveedor;
+    si el snapshot estaba en modo demo, sigue en modo demo.
+    """
+    from .agent import SalesAgent  # Import diferido: agent importa este módulo
+
+    agent_state, conversation_state, messages, profile = _unpack(data, MAGIC, SCHEMA_FINGERPRINT)
+
+    agent_name, company_name, api_provider, token_budget, max_turns, demo_mode, is_active = agent_state
+    agent = SalesAgent(
+        agent_name=agent_name,
+        company_name=company_name,
+        api_provider=api_provider,
+        api_key=None if demo_mode else _api_key(api_provider, api_key),
+        token_budget=token_budget,
+        max_turns=max_turns
+    )
+    if demo_mode:
+        agent.demo_mode = True
+        agent.client = None
+    agent.is_active = is_active
+
+    phase, phase_history, turn_count = conversation_state
+    conversation = agent.conversation
+    conversation.current_phase = _PHASES[phase]
+    conversation.phase_history = [_PHASES[code] for code in phase_history]
+    conversation.turn_count = turn_count
+    _decode_messages(conversation, messages)
+
+    agent.profiler.profile = _decode_profile(profile)
+    return agent
+
+
+def dump_copilot(copilot: SalesCopilot, compress: Optional[bool] = None) -> bytes:
+    """Serializa el estado de un ``SalesCopilot`` (fase, cliente e historial)."""
+    return _pack(MAGIC_COPILOT, COPILOT_FINGERPRINT, (
+        (copilot.seller_name, copilot.api_provider, copilot.demo_mode),
+        _SALE_PHASES.index(copilot.current_phase),
+        tuple(getattr(copilot.client, name) for name in _CLIENT_FIELDS),
+        tuple(copilot.conversation_history),
+    ), compress)
+
+
+def load_copilot(data: bytes, api_key: Optional[str] = None) -> SalesCopilot:
+    """Reconstruye un ``SalesCopilot`` desde ``dump_copilot``."""
+    copilot_state, phase, client, history = _unpack(data, MAGIC_COPILOT, COPILOT_FINGERPRINT)
+
+    seller_name, api_provider, demo_mode = copilot_state
+    copilot = SalesCopilot(
+        seller_name=seller_name,
+        api_provider=api_provider,
+        api_key=None if demo_mode else _api_key(api_provider, api_key)
+    )
+    if demo_mode:
+        copilot.demo_mode = True
+        copilot.client_api = None
+    copilot.current_phase = _SALE_PHASES[phase]
+    copilot.client = ClientInfo(**dict(zip(_CLIENT_FIELDS, client)))
+    copilot.conversation_history = list(history)
+    return copilot
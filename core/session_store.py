@@ -0,0 +1,487 @@
+"""
+Almacén de sesiones de las apps web, con backends intercambiables.
+
+- ``MemorySessionStore``: LRU en memoria con expiración por inactividad (TTL)
+  y techo de memoria estimada. Opcionalmente vuelca las sesiones que saca de
+  memoria a un ``SqliteSessionStore`` (spill) y las restaura cuando vuelven.
+- ``SqliteSessionStore``: snapshots en un archivo SQLite local. Sirve como
+  spill o como backend compartido entre varios procesos del mismo equipo:
+  cada petición lee el snapshot vigente y lo guarda al terminar.
+
+Las apps usan siempre el mismo patrón: ``get`` (o crear), usar, ``put``. En
+memoria ``put`` solo actualiza el LRU; en SQLite guarda el snapshot.
+"""
+
+import marshal
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from config.settings import Settings, get_settings
+from .provider_router import ProviderRouter
+from .session_codec import dump_agent, dump_copilot, load_agent, load_copilot, SnapshotError
+
+# Estimación de memoria por sesión (ver benchmarks/bench_memory.py)
+SESSION_BASE_BYTES = 2000
+MESSAGE_BYTES = 320
+
+
+class SessionCodec(ABC):
+    """Convierte un objeto de sesión a bytes y estima lo que ocupa en memoria."""
+
+    @abstractmethod
+    def dump(self, value: Any) -> bytes:
+        """Snapshot del objeto de sesión."""
+
+    @abstractmethod
+    def load(self, data: bytes) -> Any:
+        """Objeto de sesión desde ``dump`` (``SnapshotError`` si el snapshot no sirve)."""
+
+    def estimate_size(self, value: Any) -> int:
+        return SESSION_BASE_BYTES
+
+    def pending(self, value: Any) -> Optional[Future]:
+        """Trabajo en segundo plano que todavía cambia ``value`` después de guardarlo (None si no hay)."""
+        return None
+
+
+class AgentCodec(SessionCodec):
+    """Sesiones de ``SalesAgent``; el router de proveedores (del proceso) se vuelve a asignar al cargar."""
+
+    def __init__(self, router: Optional[ProviderRouter] = None):
+        self.router = router
+
+    def dump(self, value: Any) -> bytes:
+        return dump_agent(value)
+
+    def load(self, data: bytes) -> Any:
+        agent = load_agent(data)
+        agent.router = self.router
+        return agent
+
+    def estimate_size(self, value: Any) -> int:
+        return SESSION_BASE_BYTES + _text_size(msg.content for msg in value.conversation.messages[1:])
+
+    def pending(self, value: Any) -> Optional[Future]:
+        # El resumen en segundo plano compacta el objeto después de responder
+        return value.pending_summary()
+
+
+class CopilotCodec(SessionCodec):
+    """Sesiones de ``SalesCopilot``."""
+
+    def dump(self, value: Any) -> bytes:
+        return dump_copilot(value)
+
+    def load(self, data: bytes) -> Any:
+        return load_copilot(data)
+
+    def estimate_size(self, value: Any) -> int:
+        return SESSION_BASE_BYTES + _text_size(msg.get("content", "") for msg in value.conversation_history)
+
+
+class DataCodec(SessionCodec):
+    """Estado como datos simples (dicts, listas, strings), p. ej. en demo_agente."""
+
+    def dump(self, value: Any) -> bytes:
+        return marshal.dumps(value)
+
+    def load(self, data: bytes) -> Any:
+        try:
+            return marshal.loads(data)
+        except (ValueError, EOFError, TypeError) as e:
+            raise SnapshotError(f"Snapshot dañado: {e}")
+
+    def estimate_size(self, value: Any) -> int:
+        return SESSION_BASE_BYTES + len(repr(value))
+
+
+def _text_size(texts: Iterable[str]) -> int:
+    return sum(MESSAGE_BYTES + len(text) for text in texts)
+
+
+class SessionStore(ABC):
+    """Interfaz común de los backends."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Any]:
+        """Sesión guardada, o None si no existe o venció."""
+
+    @abstractmethod
+    def put(self, session_id: str, value: Any) -> None:
+        """Guarda la sesión (en memoria solo actualiza el LRU)."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Borra la sesión."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Contadores del backend."""
+
+    def get_or_create(self, session_id: str, factory: Callable[[], Any]) -> Any:
+        """Sesión guardada o una nueva creada con ``factory`` (y guardada)."""
+        value = self.get(session_id)
+        if value is None:
+            value = factory()
+            self.put(session_id, value)
+        return value
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Snapshots en SQLite (modo WAL), compartibles entre procesos.
+
+    Cada hilo abre su propia conexión. Las filas de varios almacenes conviven
+    en la misma tabla separadas por ``namespace``. Si dos procesos guardan la
+    misma sesión a la vez, gana la última escritura.
+    """
+
+    PURGE_EVERY = 500  # Escrituras entre limpiezas de sesiones vencidas
+
+    def __init__(self, path: str, codec: SessionCodec, namespace: str = "default", ttl: Optional[float] = None):
+        self.path = path
+        self.codec = codec
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.write_backs = 0  # Snapshots actualizados al terminar el trabajo en segundo plano
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "namespace TEXT NOT NULL, session_id TEXT NOT NULL, data BLOB NOT NULL, "
+                "updated_at REAL NOT NULL, PRIMARY KEY (namespace, session_id))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get_bytes(self, session_id: str) -> Optional[bytes]:
+        """Snapshot guardado (sin decodificar), o None si no existe o venció."""
+        row = self._connect().execute(
+            "SELECT data, updated_at FROM sessions WHERE namespace = ? AND session_id = ?",
+            (self.namespace, session_id)
+        ).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return row[0]
+
+    def put_bytes(self, session_id: str, data: bytes) -> None:
+        """Guarda un snapshot ya codificado."""
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (namespace, session_id, data, updated_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, session_id, data, time.time())
+            )
+        with self._lock:
+            self._writes += 1
+            purge = self.ttl and self._writes % self.PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def get(self, session_id: str) -> Optional[Any]:
+        data = self.get_bytes(session_id)
+        value = None
+        if data is not None:
+            try:
+                value = self.codec.load(data)
+            except SnapshotError as e:
+                # Snapshot de otra versión o dañado: se descarta y la sesión empieza de nuevo
+                print(f"[SESIONES] Snapshot descartado ({session_id}): {e}")
+                self.delete(session_id)
+        with self._lock:
+            if data is not None and value is None:
+                self.errors += 1
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def replace_bytes(self, session_id: str, old: bytes, new: bytes) -> bool:
+        """Reemplaza el snapshot solo si sigue siendo ``old`` (nadie guardó una versión más nueva)."""
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE sessions SET data = ?, updated_at = ? WHERE namespace = ? AND session_id = ? AND data = ?",
+                (new, time.time(), self.namespace, session_id, old)
+            )
+        return cursor.rowcount > 0
+
+    def put(self, session_id: str, value: Any) -> None:
+        """
+        Guarda el snapshot sin esperar el trabajo pendiente del objeto (el
+        resumen en segundo plano): cuando termina, el worker guarda de nuevo
+        el objeto si nadie escribió la sesión mientras tanto.
+        """
+        pending = self.codec.pending(value)
+        data = self.codec.dump(value)
+        self.put_bytes(session_id, data)
+        if pending is not None:
+            pending.add_done_callback(lambda _: self._write_back(session_id, value, data))
+
+    def _write_back(self, session_id: str, value: Any, data: bytes) -> None:
+        try:
+            updated = self.codec.dump(value)
+            if updated != data and self.replace_bytes(session_id, data, updated):
+                with self._lock:
+                    self.write_backs += 1
+        except (sqlite3.Error, ValueError) as e:
+            print(f"[SESIONES] No se pudo actualizar la sesión {session_id}: {e}")
+
+    def delete(self, session_id: str) -> None:
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM sessions WHERE namespace = ? AND session_id = ?",
+                (self.namespace, session_id)
+            )
+
+    def purge_expired(self) -> int:
+        """Borra las sesiones vencidas; devuelve cuántas."""
+        if not self.ttl:
+            return 0
+        with self._connect() as db:
+            cursor = db.execute(
+                "DELETE FROM sessions WHERE namespace = ? AND updated_at < ?",
+                (self.namespace, time.time() - self.ttl)
+            )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM sessions WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "sessions": len(self),
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "write_backs": self.write_backs,
+            }
+
+
+class _Entry:
+    """Sesión en memoria con su tamaño estimado y último acceso."""
+    __slots__ = ("value", "size", "touched")
+
+    def __init__(self, value: Any, size: int, touched: float):
+        self.value = value
+        self.size = size
+        self.touched = touched
+
+
+class MemorySessionStore(SessionStore):
+    """
+    LRU en memoria con TTL por inactividad y techo de memoria.
+
+    Al superar ``max_sessions`` o ``max_bytes`` (tamaño estimado por el codec)
+    se sacan las sesiones usadas hace más tiempo; también las inactivas por
+    más de ``ttl`` segundos. Con ``spill`` se guardan ahí en vez de perderse
+    y ``get`` las restaura de forma transparente.
+    """
+
+    SWEEP_EVERY = 100  # Escrituras entre barridos de sesiones vencidas
+
+    def __init__(
+        self,
+        codec: SessionCodec,
+        max_sessions: int = 1000,
+        ttl: Optional[float] = 1800.0,
+        max_bytes: Optional[int] = None,
+        spill: Optional[SqliteSessionStore] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.codec = codec
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return bool(self.ttl) and now - entry.touched > self.ttl
+
+    def get(self, session_id: str) -> Optional[Any]:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            # Vencida y sin spill se descarta; con spill se hubiera restaurado igual
+            if entry is not None and self.spill is None and self._expired(entry, now):
+                self._remove(session_id)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                entry.touched = now
+                self._entries.move_to_end(session_id)
+                self.hits += 1
+                return entry.value
+
+        if self.spill is not None:
+            value = self.spill.get(session_id)
+            if value is not None:
+                self.spill.delete(session_id)
+                with self._lock:
+                    self.spill_hits += 1
+                self.put(session_id, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, session_id: str, value: Any) -> None:
+        size = self.codec.estimate_size(value)
+        now = self.clock()
+        with self._lock:
+            old = self._entries.pop(session_id, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[session_id] = _Entry(value, size, now)
+            self._bytes += size
+            self._puts += 1
+            evicted = self._evict_over_limits(session_id)
+            if self._puts % self.SWEEP_EVERY == 0:
+                evicted += self._evict_expired(now)
+        self._spill(evicted)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+        if self.spill is not None:
+            self.spill.delete(session_id)
+
+    def sweep(self) -> int:
+        """Saca de memoria las sesiones vencidas; devuelve cuántas."""
+        with self._lock:
+            evicted = self._evict_expired(self.clock())
+        self._spill(evicted)
+        return len(evicted)
+
+    def _remove(self, session_id: str) -> _Entry:
+        entry = self._entries.pop(session_id)
+        self._bytes -= entry.size
+        return entry
+
+    def _evict_over_limits(self, keep: str) -> list:
+        """Saca las menos usadas mientras se superen los límites (nunca ``keep``)."""
+        evicted = []
+        while self._entries and (
+            len(self._entries) > self.max_sessions
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            session_id = next(iter(self._entries))
+            if session_id == keep:
+                break
+            evicted.append((session_id, self._remove(session_id).value))
+            self.evictions += 1
+        return evicted
+
+    def _evict_expired(self, now: float) -> list:
+        evicted = []
+        if not self.ttl:
+            return evicted
+        # El orden LRU coincide con el orden de último acceso: se corta en la primera vigente
+        for session_id, entry in list(self._entries.items()):
+            if not self._expired(entry, now):
+                break
+            evicted.append((session_id, self._remove(session_id).value))
+            self.expirations += 1
+        return evicted
+
+    def _spill(self, evicted: list) -> None:
+        """Guarda en el spill las sesiones sacadas de memoria (fuera del lock)."""
+        if self.spill is None:
+            return
+        for session_id, value in evicted:
+            try:
+                self.spill.put(session_id, value)
+            except (sqlite3.Error, ValueError) as e:
+                print(f"[SESIONES] No se pudo guardar la sesión {session_id}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.spill_hits + self.misses
+            stats = {
+                "backend": "memory+spill" if self.spill is not None else "memory",
+                "sessions": len(self._entries),
+                "estimated_bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "spill_hits": self.spill_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.spill_hits) / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+        if self.spill is not None:
+            stats["spilled_sessions"] = len(self.spill)
+        return stats
+
+
+def create_session_store(codec: SessionCodec, namespace: str, settings: Optional[Settings] = None) -> SessionStore:
+    """
+    Almacén configurado por ``SESSION_BACKEND``.
+
+    - ``memory``: LRU+TTL en memoria; lo que sale de memoria se pierde.
+    - ``spill``: igual, pero lo que sale de memoria se guarda en SQLite.
+    - ``shared``: solo SQLite, para varios procesos sirviendo las mismas sesiones.
+    """
+    settings = settings or get_settings()
+    backend = settings.session_backend
+
+    def sqlite_store() -> SqliteSessionStore:
+        return SqliteSessionStore(
+            settings.session_db_path,
+            codec,
+            namespace=namespace,
+            ttl=settings.session_db_ttl_seconds
+        )
+
+    if backend == "shared":
+        return sqlite_store()
+    if backend not in ("memory", "spill"):
+        raise ValueError(f"SESSION_BACKEND desconocido: {backend}")
+    return MemorySessionStore(
+        codec,
+        max_sessions=settings.session_max_sessions,
+        ttl=settings.session_ttl_seconds,
+        max_bytes=settings.session_max_mb * 1024 * 1024 if settings.session_max_mb else None,
+        spill=sqlite_store() if backend == "spill" else None
+    )
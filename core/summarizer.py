@@ -0,0 +1,132 @@
+"""Resumen incremental de los turnos antiguos de una conversación (fuera de la ruta de la petición)."""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, TYPE_CHECKING
+
+from utils.helpers import truncate_text
+
+if TYPE_CHECKING:
+    from .conversation import ConversationManager, Message
+
+
+SUMMARY_PROMPT = """Actualiza el resumen de una conversación de ventas.
+
+RESUMEN ANTERIOR:
+{previous}
+
+NUEVOS MENSAJES:
+{transcript}
+
+Escribe el resumen actualizado en español, en viñetas y en menos de {max_words} palabras.
+Conserva: negocio e industria del cliente, necesidades y problemas, productos y precios
+mencionados, objeciones, acuerdos y datos de contacto. Responde solo con el resumen."""
+
+
+class ExtractiveSummarizer:
+    """
+    Resumen sin API: una viñeta por mensaje, recortada.
+
+    Se usa en modo demo y como respaldo si el resumen con IA falla. Las
+    viñetas más antiguas se descartan para no superar ``max_chars``.
+    """
+
+    def __init__(self, agent_label: str = "Agente", max_line: int = 160, max_chars: int = 2000):
+        self.agent_label = agent_label
+        self.max_line = max_line
+        self.max_chars = max_chars
+
+    def summarize(self, previous: Optional[str], messages: List["Message"]) -> str:
+        """Agrega los mensajes nuevos al resumen anterior."""
+        lines = previous.splitlines() if previous else []
+        for msg in messages:
+            speaker = "Cliente" if msg.role.value == "user" else self.agent_label
+            text = " ".join(msg.content.split())
+            lines.append(f"- {speaker}: {truncate_text(text, self.max_line)}")
+
+        while len(lines) > 1 and sum(len(line) + 1 for line in lines) > self.max_chars:
+            lines.pop(0)
+        return "\n".join(lines)
+
+
+class LLMSummarizer:
+    """
+    Resumen con el modelo del agente.
+
+    ``complete`` recibe el prompt y devuelve el texto generado. Si falla se
+    usa el resumen extractivo, así la compactación nunca se pierde.
+    """
+
+    def __init__(
+        self,
+        complete: Callable[[str], str],
+        agent_label: str = "Agente",
+        max_words: int = 250,
+        fallback: Optional[ExtractiveSummarizer] = None
+    ):
+        self.complete = complete
+        self.agent_label = agent_label
+        self.max_words = max_words
+        self.fallback = fallback or ExtractiveSummarizer(agent_label)
+
+    def summarize(self, previous: Optional[str], messages: List["Message"]) -> str:
+        """Pide al modelo el resumen anterior actualizado con los mensajes nuevos."""
+        transcript = "\n".join(
+            f"{'Cliente' if msg.role.value == 'user' else self.agent_label}: {msg.content}"
+            for msg in messages
+        )
+        prompt = SUMMARY_PROMPT.format(
+            previous=previous or "(sin resumen todavía)",
+            transcript=transcript,
+            max_words=self.max_words
+        )
+        try:
+            summary = (self.complete(prompt) or "").strip()
+            if summary:
+                return summary
+        except Exception as e:
+            print(f"[RESUMEN] Error generando resumen con IA: {e}")
+        return self.fallback.summarize(previous, messages)
+
+
+class SummaryWorker:
+    """
+    Hilo de fondo que ejecuta las compactaciones de una en una.
+
+    ``schedule`` solo encola el trabajo (y lo omite si la conversación ya tiene
+    uno pendiente), así nunca agrega latencia a la respuesta.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+            return self._executor
+
+    def schedule(self, conversation: "ConversationManager", summarizer) -> Optional[Future]:
+        """Encola la compactación de la conversación si hace falta."""
+        if not conversation.begin_compaction():
+            return None
+        try:
+            return self._get_executor().submit(self._run, conversation, summarizer)
+        except RuntimeError:
+            conversation.end_compaction()
+            return None
+
+    @staticmethod
+    def _run(conversation: "ConversationManager", summarizer) -> bool:
+        try:
+            return conversation.compact(summarizer)
+        except Exception as e:
+            print(f"[RESUMEN] Error compactando la conversación: {e}")
+            return False
+        finally:
+            conversation.end_compaction()
+
+
+# Worker compartido por todos los agentes del proceso
+summary_worker = SummaryWorker()
@@ -0,0 +1,97 @@
+"""Análisis por turno: se calcula una sola vez por mensaje del usuario."""
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .message_interpreter import MessageInterpreter, IntentAnalysis, UserIntent, STOPWORDS, interpreter as default_interpreter
+from .customer_profile import CustomerProfiler, CustomerType, Urgency
+from utils.helpers import extract_email, extract_phone
+
+
+@dataclass(frozen=True)
+class TurnAnalysis:
+    """Todo lo que el pipeline necesita saber de un mensaje, calculado una vez."""
+    raw: str
+    lowered: str                       # Minúsculas conservando tildes (para listas con tildes)
+    normalized: str                    # Minúsculas, sin tildes ni puntuación
+    tokens: Tuple[str, ...]
+    keywords: Tuple[str, ...]
+    intents: IntentAnalysis
+
+    # Perfilamiento
+    customer_type: Optional[CustomerType] = None
+    industry: Optional[str] = None
+    urgency: Optional[Urgency] = None
+    objections: Tuple[str, ...] = ()
+
+    # Datos de contacto (solo marcan el turno: no entra a las cachés ni al motor de reglas)
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+    # Señales de engagement
+    word_count: int = 0
+    question_count: int = 0
+
+    @property
+    def intent(self) -> UserIntent:
+        """Intención principal del mensaje."""
+        return self.intents.intent
+
+    @property
+    def selected_option(self) -> Optional[int]:
+        """Opción (1, 2 o 3) elegida por el usuario, si la hay."""
+        return self.intents.selected_option
+
+    @property
+    def has_contact_data(self) -> bool:
+        """Indica si el mensaje trae email o teléfono."""
+        return bool(self.email or self.phone)
+
+    def has_intent(self, intent: UserIntent) -> bool:
+        """Indica si el mensaje activó la intención dada."""
+        return self.intents.has(intent)
+
+    def is_affirmative(self) -> bool:
+        """Respuesta afirmativa (misma regla que MessageInterpreter.is_affirmative)."""
+        return self.intents.intent == UserIntent.AFFIRMATIVE and self.intents.confidence > 0.5
+
+    def is_negative(self) -> bool:
+        """Respuesta negativa (misma regla que MessageInterpreter.is_negative)."""
+        return self.intents.intent == UserIntent.NEGATIVE and self.intents.confidence > 0.5
+
+    def contains(self, *terms: str) -> bool:
+        """Busca subcadenas en el texto normalizado."""
+        return any(term in self.normalized for term in terms)
+
+
+def analyze_turn(message: str, interpreter: Optional[MessageInterpreter] = None) -> TurnAnalysis:
+    """Analiza un mensaje del usuario una única vez para todo el pipeline."""
+    message = message or ""
+    intents = (interpreter or default_interpreter).analyze(message)
+    lowered = message.lower()
+    tokens = tuple(intents.normalized.split())
+
+    # Una sola pasada del autómata del perfilador para todas las categorías
+    hits = CustomerProfiler.match_keywords(lowered)
+
+    # Solo números de al menos 10 dígitos: un NIT o una cédula no son un teléfono
+    phone = extract_phone(message)
+    if phone and len(phone.lstrip("+")) < 10:
+        phone = None
+
+    return TurnAnalysis(
+        raw=message,
+        lowered=lowered,
+        normalized=intents.normalized,
+        tokens=tokens,
+        keywords=tuple(w for w in tokens if len(w) > 2 and w not in STOPWORDS),
+        intents=intents,
+        customer_type=CustomerProfiler.detect_customer_type(lowered, hits),
+        industry=CustomerProfiler.detect_industry(lowered, hits),
+        urgency=CustomerProfiler.detect_urgency(lowered, hits),
+        objections=tuple(CustomerProfiler.detect_objections(lowered, hits)),
+        email=extract_email(message),
+        phone=phone,
+        word_count=len(message.split()),
+        question_count=message.count("?")
+    )
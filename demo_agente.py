@@ -4,19 +4,29 @@
 DEMO DE AGENTE DE IA - Para mostrar a clientes
 """
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, render_template_string, request, jsonify, session
 from dotenv import load_dotenv
 from groq import Groq
 import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.prompts import register_prompt, render_prompt
+from core.deadline import DeadlineExceeded, get_deadline_policy
+from core.session_store import DataCodec, create_session_store
+from utils.helpers import admin_only
 
 load_dotenv()
 
 app = Flask(__name__)
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(24)
 
 # Cliente de Groq
 client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-# Configuracion del agente (se puede cambiar)
+# Configuracion por defecto del agente (cada visitante la cambia en /demo)
 AGENT_CONFIG = {
     "nombre_empresa": "Tu Empresa",
     "tipo_negocio": "servicios profesionales",
@@ -25,11 +35,15 @@ AGENT_CONFIG = {
     "contacto": "contacto@tuempresa.com"
 }
 
-# Modo actual: "asistente" o "vendedor"
-current_mode = "asistente"
+# Estado de cada visitante: config, modo ("asistente" o "vendedor") e historial
+demo_sessions = create_session_store(DataCodec(), "demo_agente")
+
+# Contexto que se agrega al prompt del vendedor cuando recibe la transferencia
+TRANSFER_CONTEXT = "\n\n[SISTEMA: El cliente ha sido transferido a ti. Revisa la conversacion anterior y continua desde donde quedo el asistente. Presentate brevemente como Carlos del equipo de ventas.]"
 
-def get_sales_expert_prompt(config):
-    return f"""Eres Carlos, el experto en ventas de {config['nombre_empresa']}. Acabas de entrar a la conversacion porque el asistente virtual te transfirio un cliente interesado.
+@register_prompt("demo_vendedor")
+def build_sales_expert_prompt(nombre_empresa, productos_servicios, horario, transferido=False):
+    prompt = f"""Eres Carlos, el experto en ventas de {nombre_empresa}. Acabas de entrar a la conversacion porque el asistente virtual te transfirio un cliente interesado.
 
 TU PERSONALIDAD:
 - Eres un vendedor experto, persuasivo pero no agresivo
@@ -45,9 +59,9 @@ TU OBJETIVO:
 - Conseguir datos de contacto del cliente
 
 INFORMACION DE LA EMPRESA:
-- Nombre: {config['nombre_empresa']}
-- Servicios: {config['productos_servicios']}
-- Horario: {config['horario']}
+- Nombre: {nombre_empresa}
+- Servicios: {productos_servicios}
+- Horario: {horario}
 
 TECNICAS QUE USAS:
 1. Haces preguntas para entender la necesidad real
@@ -66,9 +80,23 @@ REGLAS:
 3. Siempre busca el siguiente paso concreto
 4. Se honesto, no prometas lo que no puedes cumplir
 5. Si el cliente tiene dudas, ofrece una llamada o reunion"""
-
-def get_agent_prompt(config):
-    return f"""Eres un asistente virtual de IA para {config['nombre_empresa']}, una empresa de {config['tipo_negocio']}.
+    if transferido:
+        prompt += TRANSFER_CONTEXT
+    return prompt
+
+def get_sales_expert_prompt(config, transferido=False):
+    """Prompt del vendedor; se renderiza una vez por configuracion (ver config/prompts.py)"""
+    return render_prompt(
+        "demo_vendedor",
+        nombre_empresa=config['nombre_empresa'],
+        productos_servicios=config['productos_servicios'],
+        horario=config['horario'],
+        transferido=transferido
+    ).text
+
+@register_prompt("demo_asistente")
+def build_agent_prompt(nombre_empresa, tipo_negocio, productos_servicios, horario, contacto):
+    return f"""Eres un asistente virtual de IA para {nombre_empresa}, una empresa de {tipo_negocio}.
 
 TU PERSONALIDAD:
 - Eres amable, profesional y eficiente
@@ -83,10 +111,10 @@ LO QUE HACES:
 - Recopilas informacion de contacto cuando es apropiado
 
 INFORMACION DE LA EMPRESA:
-- Nombre: {config['nombre_empresa']}
-- Servicios: {config['productos_servicios']}
-- Horario: {config['horario']}
-- Contacto: {config['contacto']}
+- Nombre: {nombre_empresa}
+- Servicios: {productos_servicios}
+- Horario: {horario}
+- Contacto: {contacto}
 
 REGLAS:
 1. Si no sabes algo especifico, ofrece conectar con un humano
@@ -95,7 +123,28 @@ REGLAS:
 4. No inventes informacion que no tengas
 5. Si el cliente quiere comprar o agendar, pide sus datos de contacto"""
 
-conversation_history = []
+def get_agent_prompt(config):
+    """Prompt del asistente; se renderiza una vez por configuracion (ver config/prompts.py)"""
+    return render_prompt(
+        "demo_asistente",
+        nombre_empresa=config['nombre_empresa'],
+        tipo_negocio=config['tipo_negocio'],
+        productos_servicios=config['productos_servicios'],
+        horario=config['horario'],
+        contacto=config['contacto']
+    ).text
+
+def new_demo_state(config=None):
+    return {"config": dict(config or AGENT_CONFIG), "mode": "asistente", "history": []}
+
+def get_demo_state():
+    """Estado del visitante actual (se crea con la configuracion por defecto)."""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return demo_sessions.get_or_create(session['session_id'], new_demo_state)
+
+def save_demo_state(state):
+    demo_sessions.put(session['session_id'], state)
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -834,14 +883,12 @@ def config():
 
 @app.route('/demo')
 def demo():
-    global AGENT_CONFIG, current_mode, conversation_history
-
     empresa = request.args.get('empresa', 'Mi Empresa')
     tipo = request.args.get('tipo', 'servicios')
     servicios = request.args.get('servicios', 'diversos servicios')
     horario = request.args.get('horario', 'Lunes a Viernes')
 
-    AGENT_CONFIG = {
+    config = {
         "nombre_empresa": empresa,
         "tipo_negocio": tipo,
         "productos_servicios": servicios,
@@ -849,19 +896,27 @@ def demo():
         "contacto": "contacto@ejemplo.com"
     }
 
-    # Limpiar historial y resetear modo
-    conversation_history = []
-    current_mode = "asistente"
+    # Historial limpio y modo asistente con la configuracion nueva
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    save_demo_state(new_demo_state(config))
 
     return render_template_string(HTML_TEMPLATE, empresa=empresa)
 
 @app.route('/chat', methods=['POST'])
 def chat():
-    global conversation_history, current_mode
-
     data = request.get_json()
     user_message = data.get('message', '')
 
+    state = get_demo_state()
+    config = state["config"]
+    current_mode = state["mode"]
+    conversation_history = state["history"]
+
+    # Plazo para la respuesta de Groq (ver core/deadline.py)
+    policy = get_deadline_policy()
+    deadline = policy.start()
+
     # Agregar mensaje del usuario al historial
     conversation_history.append({
         "role": "user",
@@ -883,25 +938,26 @@ def chat():
         # Si detectamos intencion de compra o pide experto, cambiar a modo vendedor
         if should_transfer and current_mode == "asistente":
             current_mode = "vendedor"
-            # Agregar contexto de transferencia
-            transfer_context = "\n\n[SISTEMA: El cliente ha sido transferido a ti. Revisa la conversacion anterior y continua desde donde quedo el asistente. Presentate brevemente como Carlos del equipo de ventas.]"
-            system_prompt = get_sales_expert_prompt(AGENT_CONFIG) + transfer_context
+            # Prompt con el contexto de transferencia
+            system_prompt = get_sales_expert_prompt(config, transferido=True)
         elif current_mode == "vendedor":
-            system_prompt = get_sales_expert_prompt(AGENT_CONFIG)
+            system_prompt = get_sales_expert_prompt(config)
         else:
-            system_prompt = get_agent_prompt(AGENT_CONFIG)
+            system_prompt = get_agent_prompt(config)
 
         # Llamar a Groq
         messages = [
             {"role": "system", "content": system_prompt}
         ] + conversation_history
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            max_tokens=500,
-            temperature=0.75
-        )
+        with policy.guard(deadline, "demo"):
+            response = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                max_tokens=500,
+                temperature=0.75,
+                **policy.request_kwargs("groq", deadline)
+            )
 
         assistant_message = response.choices[0].message.content
 
@@ -914,8 +970,25 @@ def chat():
         return jsonify({"response": assistant_message, "mode": current_mode})
 
     except Exception as e:
+        if isinstance(e, DeadlineExceeded) or deadline.expired:
+            policy.record_fallback("demo")
         return jsonify({"response": f"Disculpa, tuve un problema tecnico. Por favor intenta de nuevo."})
 
+    finally:
+        # El modo y el historial se guardan aunque falle la API (igual que antes con los globales)
+        state["mode"] = current_mode
+        state["history"] = conversation_history
+        save_demo_state(state)
+
+@app.route('/admin/stats')
+@admin_only
+def admin_stats():
+    """Sesiones y plazos de la demo (requiere ``ADMIN_TOKEN``)"""
+    return jsonify({
+        'sessions': demo_sessions.stats(),
+        'deadlines': get_deadline_policy().stats(),
+    })
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("  DEMO DE AGENTE DE IA - QORAX")
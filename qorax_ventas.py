@@ -4,7 +4,7 @@
 QORAX VENTAS - Agente de Ventas con Panel de Control
 """
 
-from flask import Flask, render_template_string, request, jsonify, redirect, send_from_directory
+from flask import Flask, Response, render_template_string, request, jsonify, redirect, send_from_directory, stream_with_context
 from dotenv import load_dotenv
 from groq import Groq
 from datetime import datetime
@@ -16,6 +16,16 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import threading
 
+from config.lexicon import get_lexicon, get_lexicon_registry
+from config.prompts import get_prompt_registry, register_prompt, render_prompt
+from config.settings import get_settings
+from core.deadline import DeadlineExceeded, get_deadline_policy
+from core.llm_clients import close_stream
+from core.message_interpreter import normalize_text
+from core.response_cache import CoalescedError, get_response_cache
+from core.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, get_request_scheduler, request_tokens, scheduler_stats
+from utils.helpers import admin_only, sse_event
+
 load_dotenv()
 
 # Configuracion de correo
@@ -60,6 +70,10 @@ def send_lead_notification(lead_data):
                 <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Telefono:</td>
                 <td style="padding: 10px; border: 1px solid #ddd;">{lead_data.get('telefono', 'No proporcionado')}</td>
             </tr>
+            <tr>
+                <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Negocio:</td>
+                <td style="padding: 10px; border: 1px solid #ddd;">{lead_data.get('business_type') or 'Sin identificar'}</td>
+            </tr>
             <tr>
                 <td style="padding: 10px; border: 1px solid #ddd; font-weight: bold;">Fecha:</td>
                 <td style="padding: 10px; border: 1px solid #ddd;">{datetime.now().strftime('%Y-%m-%d %H:%M')}</td>
@@ -73,89 +87,103 @@ def send_lead_notification(lead_data):
     """
     send_email_async(GMAIL_USER, subject, body)
 
-def detect_business_type(conversation):
-    """Detecta el tipo de negocio del cliente basado SOLO en mensajes del usuario"""
-    # Solo analizar mensajes del usuario, no del bot
-    user_messages = [msg.get("content", "") for msg in conversation if msg.get("role") == "user"]
-    text = " ".join(user_messages).lower()
-
-    business_types = {
-        "abogado": {
-            "keywords": ["abogado", "legal", "juridico", "demanda", "caso", "bufete", "derecho", "despacho", "firma legal", "leyes"],
-            "title": "Soluciones IA para Firmas Legales",
-            "intro": "Optimiza la gestion de tu firma mientras te enfocas en lo que mejor haces: defender a tus clientes.",
-            "benefits": [
-                ("Atencion a Clientes 24/7", "Captura consultas legales y agenda citas aunque no estes disponible"),
-                ("Seguimiento de Casos", "Mantiene a tus clientes informados sobre el estado de sus casos"),
-                ("Filtro de Consultas", "Califica prospectos y filtra casos que no son de tu especialidad")
-            ]
-        },
-        "doctor": {
-            "keywords": ["doctor", "medico", "clinica", "hospital", "paciente", "consultorio", "salud", "medicina", "cita medica"],
-            "title": "Soluciones IA para Profesionales de la Salud",
-            "intro": "Entendemos que tu tiempo debe estar enfocado en tus pacientes, no en tareas administrativas.",
-            "benefits": [
-                ("Agendamiento Inteligente", "Tus pacientes reservan citas 24/7 sin saturar tu recepcion"),
-                ("Recordatorios de Citas", "Reduce las inasistencias con confirmaciones automaticas"),
-                ("Triaje Preliminar", "El agente recopila sintomas antes de la consulta para optimizar tu tiempo")
-            ]
-        },
-        "mecanico": {
-            "keywords": ["mecanico", "taller", "vehiculo", "motor", "frenos", "aceite", "llantas", "repuestos", "taller mecanico", "carros", "autos"],
-            "title": "Soluciones IA para Talleres Mecanicos",
-            "intro": "Sabemos lo importante que es optimizar cada minuto en tu taller.",
-            "benefits": [
-                ("Agente de Citas 24/7", "Tus clientes agendan servicios, cambios de aceite y revisiones sin que tengas que contestar llamadas"),
-                ("Recordatorios Automaticos", "Notifica a tus clientes sobre mantenimientos pendientes y aumenta la retencion"),
-                ("Cotizador Inteligente", "Responde consultas sobre precios de servicios comunes al instante")
-            ]
-        },
-        "restaurante": {
-            "keywords": ["restaurante", "comida", "menu", "reservacion", "cocina", "chef", "pedido", "delivery"],
-            "title": "Soluciones IA para Restaurantes",
-            "intro": "Lleva tu restaurante al siguiente nivel con atencion automatizada.",
-            "benefits": [
-                ("Reservaciones 24/7", "Acepta reservaciones por WhatsApp o web sin perder clientes"),
-                ("Menu Digital Inteligente", "Responde preguntas sobre ingredientes, alergenos y recomendaciones"),
-                ("Pedidos Automatizados", "Gestiona pedidos para delivery o pickup sin errores")
-            ]
-        },
-        "inmobiliaria": {
-            "keywords": ["inmobiliaria", "propiedad", "casa", "apartamento", "arriendo", "venta", "bienes raices", "inmueble"],
-            "title": "Soluciones IA para Inmobiliarias",
-            "intro": "Captura mas leads y cierra mas negocios con atencion inmediata.",
-            "benefits": [
-                ("Atencion Inmediata a Leads", "Responde consultas sobre propiedades 24/7 cuando el cliente esta interesado"),
-                ("Calificacion de Prospectos", "Filtra compradores serios de curiosos automaticamente"),
-                ("Agendamiento de Visitas", "Coordina visitas a propiedades sin ir y venir de mensajes")
-            ]
-        },
-        "default": {
-            "keywords": [],
-            "title": "Soluciones IA para tu Negocio",
-            "intro": "Estamos listos para ayudarte a transformar tu negocio con inteligencia artificial.",
-            "benefits": [
-                ("Atencion 24/7", "Tus clientes reciben respuestas inmediatas a cualquier hora"),
-                ("Automatizacion de Ventas", "Captura leads y agenda reuniones mientras duermes"),
-                ("Asistentes Especializados", "Soluciones adaptadas a tu industria especifica")
-            ]
-        }
+# Textos del correo por tipo de negocio (las palabras clave estan en config/lexicon.json, lexico "ventas")
+BUSINESS_TYPES = {
+    "abogado": {
+        "title": "Soluciones IA para Firmas Legales",
+        "intro": "Optimiza la gestion de tu firma mientras te enfocas en lo que mejor haces: defender a tus clientes.",
+        "benefits": [
+            ("Atencion a Clientes 24/7", "Captura consultas legales y agenda citas aunque no estes disponible"),
+            ("Seguimiento de Casos", "Mantiene a tus clientes informados sobre el estado de sus casos"),
+            ("Filtro de Consultas", "Califica prospectos y filtra casos que no son de tu especialidad")
+        ]
+    },
+    "doctor": {
+        "title": "Soluciones IA para Profesionales de la Salud",
+        "intro": "Entendemos que tu tiempo debe estar enfocado en tus pacientes, no en tareas administrativas.",
+        "benefits": [
+            ("Agendamiento Inteligente", "Tus pacientes reservan citas 24/7 sin saturar tu recepcion"),
+            ("Recordatorios de Citas", "Reduce las inasistencias con confirmaciones automaticas"),
+            ("Triaje Preliminar", "El agente recopila sintomas antes de la consulta para optimizar tu tiempo")
+        ]
+    },
+    "mecanico": {
+        "title": "Soluciones IA para Talleres Mecanicos",
+        "intro": "Sabemos lo importante que es optimizar cada minuto en tu taller.",
+        "benefits": [
+            ("Agente de Citas 24/7", "Tus clientes agendan servicios, cambios de aceite y revisiones sin que tengas que contestar llamadas"),
+            ("Recordatorios Automaticos", "Notifica a tus clientes sobre mantenimientos pendientes y aumenta la retencion"),
+            ("Cotizador Inteligente", "Responde consultas sobre precios de servicios comunes al instante")
+        ]
+    },
+    "restaurante": {
+        "title": "Soluciones IA para Restaurantes",
+        "intro": "Lleva tu restaurante al siguiente nivel con atencion automatizada.",
+        "benefits": [
+            ("Reservaciones 24/7", "Acepta reservaciones por WhatsApp o web sin perder clientes"),
+            ("Menu Digital Inteligente", "Responde preguntas sobre ingredientes, alergenos y recomendaciones"),
+            ("Pedidos Automatizados", "Gestiona pedidos para delivery o pickup sin errores")
+        ]
+    },
+    "inmobiliaria": {
+        "title": "Soluciones IA para Inmobiliarias",
+        "intro": "Captura mas leads y cierra mas negocios con atencion inmediata.",
+        "benefits": [
+            ("Atencion Inmediata a Leads", "Responde consultas sobre propiedades 24/7 cuando el cliente esta interesado"),
+            ("Calificacion de Prospectos", "Filtra compradores serios de curiosos automaticamente"),
+            ("Agendamiento de Visitas", "Coordina visitas a propiedades sin ir y venir de mensajes")
+        ]
+    },
+    "default": {
+        "title": "Soluciones IA para tu Negocio",
+        "intro": "Estamos listos para ayudarte a transformar tu negocio con inteligencia artificial.",
+        "benefits": [
+            ("Atencion 24/7", "Tus clientes reciben respuestas inmediatas a cualquier hora"),
+            ("Automatizacion de Ventas", "Captura leads y agenda reuniones mientras duermes"),
+            ("Asistentes Especializados", "Soluciones adaptadas a tu industria especifica")
+        ]
     }
+}
+
+
+def count_business_hits(text, tally=None):
+    """Suma 1 al conteo {tipo: mensajes} por cada tipo de negocio mencionado en el texto"""
+    tally = {} if tally is None else tally
+    lexicon = get_lexicon("ventas")
+    for biz_type in lexicon.all(lexicon.scan(text), "business_type"):
+        tally[biz_type] = tally.get(biz_type, 0) + 1
+    return tally
+
+def classify_business_type(tally):
+    """Tipo de negocio segun el conteo (respeta el orden de prioridad del lexico)"""
+    for biz_type in get_lexicon("ventas").groups("business_type"):
+        if tally.get(biz_type):
+            return biz_type
+    return None
 
-    for biz_type, data in business_types.items():
-        if biz_type == "default":
-            continue
-        for keyword in data["keywords"]:
-            if keyword in text:
-                return data
+def update_business_type(lead, message):
+    """Actualiza el conteo del lead con un mensaje nuevo del usuario (sin releer el historial)"""
+    tally = count_business_hits(message, lead.setdefault("business_hits", {}))
+    lead["business_type"] = classify_business_type(tally)
+    return lead["business_type"]
 
-    return business_types["default"]
+def get_business_info(biz_type):
+    """Textos del correo para un tipo de negocio ya clasificado"""
+    return BUSINESS_TYPES.get(biz_type or "default", BUSINESS_TYPES["default"])
 
-def send_welcome_email(to_email, nombre_empresa, conversation=None):
+def detect_business_type(conversation):
+    """Detecta el tipo de negocio del cliente basado SOLO en mensajes del usuario (recorre todo el historial)"""
+    tally = {}
+    for msg in conversation:
+        if msg.get("role") == "user":
+            count_business_hits(msg.get("content", ""), tally)
+    return get_business_info(classify_business_type(tally))
+
+def send_welcome_email(to_email, nombre_empresa, business_type=None):
     """Envia correo de bienvenida personalizado al cliente"""
 
-    # Detectar tipo de negocio
-    biz_info = detect_business_type(conversation or [])
+    # Tipo de negocio ya clasificado en el lead
+    biz_info = get_business_info(business_type)
 
     subject = f"{biz_info['title']} - {nombre_empresa}"
 
@@ -272,6 +300,9 @@ DATABASE = {
 # Archivo para persistir datos
 DATA_FILE = "qorax_leads.json"
 
+# Indice conversation_id -> lead (se reconstruye al cargar los datos)
+LEADS_BY_CONVERSATION = {}
+
 def load_data():
     global DATABASE
     try:
@@ -280,6 +311,23 @@ def load_data():
                 DATABASE = json.load(f)
     except:
         pass
+    index_leads()
+
+def index_leads():
+    """Indexa los leads por conversacion y completa el conteo de negocio de leads antiguos"""
+    LEADS_BY_CONVERSATION.clear()
+    for lead in DATABASE.get("leads", []):
+        LEADS_BY_CONVERSATION[lead["conversation_id"]] = lead
+        if "business_hits" not in lead:
+            lead["business_hits"] = {}
+            for msg in DATABASE.get("conversations", {}).get(lead["conversation_id"], []):
+                if msg.get("role") == "user":
+                    count_business_hits(msg.get("content", ""), lead["business_hits"])
+            lead["business_type"] = classify_business_type(lead["business_hits"])
+
+def get_lead(conversation_id):
+    """Lead de una conversacion (O(1))"""
+    return LEADS_BY_CONVERSATION.get(conversation_id)
 
 def save_data():
     try:
@@ -290,8 +338,8 @@ def save_data():
 
 load_data()
 
-def extract_contact_info(text, conversation_id):
-    """Extrae email y telefono del texto"""
+def find_contact_info(text):
+    """Emails y telefonos que aparecen en el texto"""
     # Buscar email
     email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
     emails = re.findall(email_pattern, text)
@@ -299,42 +347,45 @@ def extract_contact_info(text, conversation_id):
     # Buscar telefono (varios formatos)
     phone_pattern = r'(?:\+?57)?[\s.-]?(?:\d{3}[\s.-]?\d{3}[\s.-]?\d{4}|\d{10}|\d{7})'
     phones = re.findall(phone_pattern, text.replace(' ', ''))
+    return emails, phones
+
+def extract_contact_info(text, conversation_id):
+    """Extrae email y telefono del texto"""
+    emails, phones = find_contact_info(text)
 
     # Si encontramos datos, actualizar el lead
-    if emails or phones:
-        for lead in DATABASE["leads"]:
-            if lead["conversation_id"] == conversation_id:
-                email_is_new = emails and not lead.get("email")
-                phone_is_new = phones and not lead.get("telefono")
-
-                if email_is_new:
-                    lead["email"] = emails[0]
-                    # Enviar correo de bienvenida personalizado al cliente
-                    conv = DATABASE.get("conversations", {}).get(conversation_id, [])
-                    send_welcome_email(emails[0], DATABASE["config"]["nombre_empresa"], conv)
-                    # Notificar al vendedor
-                    send_lead_notification(lead)
-                    print(f"[LEAD] Nuevo email capturado: {emails[0]}")
-
-                if phone_is_new:
-                    lead["telefono"] = phones[0]
-                    # Si solo hay telefono (sin email previo), notificar
-                    if not lead.get("email"):
-                        send_lead_notification(lead)
-                    print(f"[LEAD] Nuevo telefono capturado: {phones[0]}")
-
-                lead["updated_at"] = datetime.now().isoformat()
-                save_data()
-                break
+    lead = get_lead(conversation_id)
+    if (emails or phones) and lead:
+        email_is_new = emails and not lead.get("email")
+        phone_is_new = phones and not lead.get("telefono")
+
+        if email_is_new:
+            lead["email"] = emails[0]
+            # Enviar correo de bienvenida personalizado al cliente
+            send_welcome_email(emails[0], DATABASE["config"]["nombre_empresa"], lead.get("business_type"))
+            # Notificar al vendedor
+            send_lead_notification(lead)
+            print(f"[LEAD] Nuevo email capturado: {emails[0]}")
+
+        if phone_is_new:
+            lead["telefono"] = phones[0]
+            # Si solo hay telefono (sin email previo), notificar
+            if not lead.get("email"):
+                send_lead_notification(lead)
+            print(f"[LEAD] Nuevo telefono capturado: {phones[0]}")
+
+        lead["updated_at"] = datetime.now().isoformat()
+        save_data()
 
-def get_agent_prompt(config, mode="asistente"):
-    return f"""Eres el asistente virtual de {config['nombre_empresa']}.
+@register_prompt("qorax_asistente")
+def build_agent_prompt(nombre_empresa, servicios, horario):
+    return f"""Eres el asistente virtual de {nombre_empresa}.
 
 PERSONALIDAD: Amable, profesional, eficiente y servicial. Respuestas claras y naturales.
 
-EMPRESA: {config['nombre_empresa']}
-SERVICIOS: {config['servicios']}
-HORARIO: {config['horario']}
+EMPRESA: {nombre_empresa}
+SERVICIOS: {servicios}
+HORARIO: {horario}
 
 NUESTROS AGENTES DE IA:
 - Agente de Atencion 24/7: Atencion automatizada para clientes
@@ -356,6 +407,15 @@ IMPORTANTE:
 - Para contactarlos, pide su correo: "Para enviarte mas informacion, me compartes tu correo?"
 - Responde en espanol, maximo 2-3 oraciones"""
 
+def get_agent_prompt(config, mode="asistente"):
+    """Prompt del asistente; se renderiza una vez por configuracion (ver config/prompts.py)"""
+    return render_prompt(
+        "qorax_asistente",
+        nombre_empresa=config['nombre_empresa'],
+        servicios=config['servicios'],
+        horario=config['horario']
+    ).text
+
 
 # ==================== PAGINAS HTML ====================
 
@@ -700,6 +760,44 @@ CLIENTE_PAGE = """
             div.textContent = text;
             document.getElementById('messages').appendChild(div);
             document.getElementById('messages').scrollTop = 99999;
+            return div;
+        }
+
+        // Lee una respuesta Server-Sent Events (POST): llama a onDelta con cada fragmento y devuelve el evento final
+        async function streamChat(url, payload, onDelta) {
+            const res = await fetch(url, {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify(payload)
+            });
+            if (!res.ok || !res.body) throw new Error('HTTP ' + res.status);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let result = {};
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\\n\\n')) >= 0) {
+                    const raw = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    raw.split('\\n').forEach(line => {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (!data) continue;
+                    const parsed = JSON.parse(data);
+                    if (event === 'error') throw new Error(parsed.error);
+                    if (event === 'done') result = parsed;
+                    else onDelta(parsed.delta);
+                }
+            }
+            return result;
         }
 
         function showTyping() {
@@ -721,27 +819,28 @@ CLIENTE_PAGE = """
             document.getElementById('sendBtn').disabled = true;
             showTyping();
 
+            let div = null;
             try {
-                const res = await fetch('/api/chat', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify({message: text, conversation_id: convId})
+                const data = await streamChat('/api/chat/stream', {message: text, conversation_id: convId}, delta => {
+                    if (!div) {
+                        document.getElementById('typing')?.remove();
+                        div = addMessage('', 'bot');
+                    }
+                    div.textContent += delta;
+                    document.getElementById('messages').scrollTop = 99999;
                 });
-                const data = await res.json();
                 document.getElementById('typing')?.remove();
 
-                if (data.mode !== mode) {
+                if (data.mode && data.mode !== mode) {
                     mode = data.mode;
                     if (mode === 'vendedor') {
                         document.getElementById('agentStatus').innerHTML =
                             '<span class="status-dot" style="background:#f59e0b"></span>Carlos - Ventas';
                     }
                 }
-
-                addMessage(data.response, 'bot');
             } catch(e) {
                 document.getElementById('typing')?.remove();
-                addMessage('Error de conexion. Intenta de nuevo.', 'bot');
+                if (!div) addMessage('Error de conexion. Intenta de nuevo.', 'bot');
             }
             document.getElementById('sendBtn').disabled = false;
         }
@@ -1227,6 +1326,7 @@ PANEL_PAGE = """
                         <th>Nombre</th>
                         <th>Email</th>
                         <th>Telefono</th>
+                        <th>Negocio</th>
                         <th>Ultimo mensaje</th>
                         <th>Acciones</th>
                     </tr>
@@ -1238,6 +1338,7 @@ PANEL_PAGE = """
                         <td>{{ lead.nombre or 'Sin nombre' }}</td>
                         <td>{{ lead.email or '-' }}</td>
                         <td>{{ lead.telefono or '-' }}</td>
+                        <td>{{ lead.negocio or '-' }}</td>
                         <td class="conversation-preview">{{ lead.ultimo_mensaje or '-' }}</td>
                         <td>
                             <button class="btn btn-secondary" onclick="verConversacion('{{ lead.conversation_id }}')">Ver chat</button>
@@ -1297,6 +1398,7 @@ CONVERSACION_PAGE = """
     <div class="info">
         <p><strong>Email:</strong> {{ lead.email or 'No proporcionado' }}</p>
         <p><strong>Telefono:</strong> {{ lead.telefono or 'No proporcionado' }}</p>
+        <p><strong>Negocio:</strong> {{ lead.business_type or 'Sin identificar' }}</p>
         <p><strong>Fecha:</strong> {{ lead.fecha }}</p>
     </div>
     <h2>Conversacion</h2>
@@ -1331,6 +1433,7 @@ def panel():
             "nombre": lead.get("nombre"),
             "email": lead.get("email"),
             "telefono": lead.get("telefono"),
+            "negocio": lead.get("business_type"),
             "ultimo_mensaje": ultimo_msg
         })
 
@@ -1348,13 +1451,17 @@ def chat_cliente():
     conv_id = str(uuid.uuid4())[:8]
 
     # Crear nuevo lead
-    DATABASE["leads"].append({
+    lead = {
         "conversation_id": conv_id,
         "created_at": datetime.now().isoformat(),
         "email": None,
         "telefono": None,
-        "nombre": None
-    })
+        "nombre": None,
+        "business_type": None,
+        "business_hits": {}
+    }
+    DATABASE["leads"].append(lead)
+    LEADS_BY_CONVERSATION[conv_id] = lead
     DATABASE["conversations"][conv_id] = []
     save_data()
 
@@ -1366,60 +1473,227 @@ def chat_cliente():
 @app.route('/conversacion/<conv_id>')
 def ver_conversacion(conv_id):
     messages = DATABASE.get("conversations", {}).get(conv_id, [])
-    lead = next((l for l in DATABASE["leads"] if l["conversation_id"] == conv_id), {})
+    lead = get_lead(conv_id) or {}
     return render_template_string(CONVERSACION_PAGE, conv_id=conv_id, messages=messages, lead=lead)
 
-@app.route('/api/chat', methods=['POST'])
-def api_chat():
-    data = request.get_json()
-    message = data.get('message', '')
-    conv_id = data.get('conversation_id', '')
+# Respuesta cuando la API falla antes de generar texto
+FALLBACK_RESPONSE = "Gracias por tu mensaje. En este momento estoy procesando muchas consultas. Por favor, dejame tu correo y te contactamos pronto."
 
+def add_user_message(conv_id, message):
+    """Registra el mensaje del usuario y actualiza el lead con lo que aporte"""
     if conv_id not in DATABASE["conversations"]:
         DATABASE["conversations"][conv_id] = []
 
     # Agregar mensaje del usuario
     DATABASE["conversations"][conv_id].append({"role": "user", "content": message})
 
+    # Actualizar el tipo de negocio solo con el mensaje nuevo
+    lead = get_lead(conv_id)
+    if lead:
+        update_business_type(lead, message)
+
     # Extraer datos de contacto si los hay
     extract_contact_info(message, conv_id)
 
-    # Siempre usar el mismo asistente
+def build_chat_request(conv_id, mode):
+    """Parametros de la llamada a Groq: prompt del sistema y ultimos 10 mensajes"""
+    messages = [{"role": "system", "content": get_agent_prompt(DATABASE["config"], mode)}]
+    messages += DATABASE["conversations"][conv_id][-10:]  # Ultimos 10 mensajes
+    return dict(
+        model="llama-3.3-70b-versatile",
+        messages=messages,
+        max_tokens=400,
+        temperature=0.75
+    )
+
+# Turnos del cliente cuyas respuestas se pueden cachear (ver core/response_cache.py)
+RESPONSE_CACHE_TURNS = get_settings().response_cache_max_turns
+
+def chat_cache_key(conv_id, chat_request):
+    """Clave de la cache de respuestas para este turno, o None si no se cachea"""
+    cache = get_response_cache()
+    if not cache.enabled:
+        return None
+
+    # Nunca con datos de contacto (en el mensaje o ya capturados en el lead)
     conv = DATABASE["conversations"][conv_id]
+    emails, phones = find_contact_info(conv[-1]["content"])
+    lead = get_lead(conv_id) or {}
+    if emails or phones or lead.get("email") or lead.get("telefono"):
+        cache.record_bypass()
+        return None
+
+    # Solo los primeros turnos, que son casi iguales entre visitantes
+    if sum(1 for msg in conv if msg["role"] == "user") > RESPONSE_CACHE_TURNS:
+        return None
+
+    # El prompt (con la configuracion) tal cual; los mensajes normalizados
+    return ("qorax", chat_request["model"], tuple(
+        (msg["role"], msg["content"] if msg["role"] == "system" else normalize_text(msg["content"]))
+        for msg in chat_request["messages"]
+    ))
+
+# Turnos del cliente que cuentan como descubrimiento (ultimos en la cola de Groq)
+DISCOVERY_TURNS = 2
+
+def chat_priority(conv_id):
+    """Prioridad en la cola de Groq: leads con contacto primero, primeros turnos al final"""
+    lead = get_lead(conv_id) or {}
+    if lead.get("email") or lead.get("telefono"):
+        return PRIORITY_HIGH
+    if sum(1 for msg in DATABASE["conversations"][conv_id] if msg["role"] == "user") <= DISCOVERY_TURNS:
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+# Cola de peticiones de la key de Groq (limites RPM/TPM, ver core/rate_limiter.py)
+groq_scheduler = get_request_scheduler("groq", os.getenv("GROQ_API_KEY"))
+
+def request_reply(chat_request, priority=PRIORITY_NORMAL, deadline=None):
+    """Pide la respuesta a Groq esperando turno en la cola si la key esta al limite, dentro del plazo de la peticion"""
+    policy = get_deadline_policy()
+    deadline = deadline or policy.start()
+    with policy.guard(deadline, "qorax"):
+        # El timeout se calcula al enviar, con lo que quedo del plazo despues de la cola
+        response = groq_scheduler.run(
+            lambda: client.chat.completions.create(**chat_request, **policy.request_kwargs("groq", deadline)),
+            request_tokens(chat_request), priority, deadline
+        )
+    return response.choices[0].message.content
+
+def cut_short(error, deadline):
+    """True si la llamada a Groq se corto por el plazo (propio o de la peticion igual que se esperaba); cuenta el respaldo"""
+    if isinstance(error, (DeadlineExceeded, CoalescedError)) or deadline.expired:
+        get_deadline_policy().record_fallback("qorax")
+        return True
+    return False
+
+def add_assistant_message(conv_id, content):
+    """Agrega la respuesta completa del asistente y guarda"""
+    DATABASE["conversations"][conv_id].append({"role": "assistant", "content": content})
+    save_data()
+
+@app.route('/api/chat', methods=['POST'])
+def api_chat():
+    data = request.get_json()
+    message = data.get('message', '')
+    conv_id = data.get('conversation_id', '')
+
+    add_user_message(conv_id, message)
+
+    # Siempre usar el mismo asistente
     mode = "asistente"
+    deadline = get_deadline_policy().start()
 
     try:
-        messages = [{"role": "system", "content": get_agent_prompt(DATABASE["config"], mode)}]
-        messages += conv[-10:]  # Ultimos 10 mensajes
-
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            max_tokens=400,
-            temperature=0.75
-        )
-
-        assistant_msg = response.choices[0].message.content
-        DATABASE["conversations"][conv_id].append({"role": "assistant", "content": assistant_msg})
-        save_data()
+        chat_request = build_chat_request(conv_id, mode)
+        cache_key = chat_cache_key(conv_id, chat_request)
+        priority = chat_priority(conv_id)
+        if cache_key is None:
+            assistant_msg = request_reply(chat_request, priority, deadline)
+        else:
+            assistant_msg = get_response_cache().get_or_compute(
+                cache_key, lambda: request_reply(chat_request, priority, deadline)
+            )
+        add_assistant_message(conv_id, assistant_msg)
 
         return jsonify({"response": assistant_msg, "mode": mode})
 
     except Exception as e:
         print(f"[ERROR API] {e}")
+        cut_short(e, deadline)
         # Mensaje de fallback mas amigable
-        fallback = "Gracias por tu mensaje. En este momento estoy procesando muchas consultas. Por favor, dejame tu correo y te contactamos pronto."
-        DATABASE["conversations"][conv_id].append({"role": "assistant", "content": fallback})
-        save_data()
-        return jsonify({"response": fallback, "mode": mode})
+        add_assistant_message(conv_id, FALLBACK_RESPONSE)
+        return jsonify({"response": FALLBACK_RESPONSE, "mode": mode})
+
+@app.route('/api/chat/stream', methods=['POST'])
+def api_chat_stream():
+    """Igual que /api/chat, pero envia la respuesta por Server-Sent Events a medida que se genera"""
+    data = request.get_json()
+    message = data.get('message', '')
+    conv_id = data.get('conversation_id', '')
+
+    add_user_message(conv_id, message)
+    mode = "asistente"
+    policy = get_deadline_policy()
+    deadline = policy.start()
+
+    def generate():
+        parts = []
+        try:
+            chat_request = build_chat_request(conv_id, mode)
+            cache_key = chat_cache_key(conv_id, chat_request)
+            cached = get_response_cache().get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                add_assistant_message(conv_id, cached)
+                yield sse_event({"delta": cached})
+                yield sse_event({"mode": mode}, "done")
+                return
+
+            # Si el navegador se desconecta se cierra el stream de Groq y cuenta como desconexion
+            with policy.guard(deadline, "qorax"):
+                groq_scheduler.acquire(request_tokens(chat_request), chat_priority(conv_id), deadline)
+                stream = client.chat.completions.create(stream=True, **chat_request, **policy.request_kwargs("groq", deadline))
+                try:
+                    for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield sse_event({"delta": delta})
+                finally:
+                    close_stream(stream)
+        except Exception as e:
+            print(f"[ERROR API] {e}")
+            if parts:
+                # Ya se envio texto: la respuesta quedo incompleta y no se guarda
+                yield sse_event({"error": str(e)}, "error")
+                return
+            cut_short(e, deadline)
+            add_assistant_message(conv_id, FALLBACK_RESPONSE)
+            yield sse_event({"delta": FALLBACK_RESPONSE})
+            yield sse_event({"mode": mode}, "done")
+            return
+
+        # Solo se guarda en el historial (y en la cache) cuando el stream termino
+        assistant_msg = "".join(parts)
+        if cache_key is not None:
+            get_response_cache().put(cache_key, assistant_msg)
+        add_assistant_message(conv_id, assistant_msg)
+        yield sse_event({"mode": mode}, "done")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/admin/stats')
+@admin_only
+def admin_stats():
+    """Cache de respuestas, cola de Groq (esperas y 429) y plazos de las llamadas (requiere ADMIN_TOKEN)"""
+    return jsonify({
+        'cache': get_response_cache().stats(),
+        'queue': scheduler_stats(),
+        'deadlines': get_deadline_policy().stats(),
+    })
 
 @app.route('/api/config', methods=['POST'])
 def update_config():
     data = request.get_json()
     DATABASE["config"].update(data)
     save_data()
+    # El prompt se renderiza de nuevo con la configuracion nueva en el proximo mensaje
+    get_prompt_registry().invalidate("qorax_asistente")
     return jsonify({"status": "ok"})
 
+@app.route('/api/lexicon/reload', methods=['POST'])
+@admin_only
+def reload_lexicon():
+    """Recarga config/lexicon.json sin reiniciar (si es invalido se conserva la version anterior)"""
+    registry = get_lexicon_registry()
+    if not registry.reload():
+        return jsonify({"status": "error", "error": registry.last_error, "version": registry.version}), 400
+    return jsonify({"status": "ok", "version": registry.version})
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("  QORAX VENTAS - Sistema Completo")
@@ -0,0 +1,12 @@
+"""Configuración común de las pruebas: raíz del proyecto en el path y sin límites ni claves reales."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin colas de RPM/TPM ni plazos que dependan del reloj de la máquina de pruebas
+os.environ.setdefault("RATE_LIMIT_RPM", "0")
+os.environ.setdefault("RATE_LIMIT_TPM", "0")
+for name in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY", "GROQ_API_KEY"):
+    os.environ.pop(name, None)
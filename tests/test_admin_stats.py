@@ -0,0 +1,38 @@
+"""Estadísticas internas: solo con ADMIN_TOKEN configurado y la cabecera X-Admin-Token correcta."""
+
+import pytest
+from flask import Flask, jsonify
+
+from utils.helpers import admin_only
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/admin/stats")
+    @admin_only
+    def admin_stats():
+        return jsonify({"sessions": {"hits": 1}})
+
+    return app.test_client()
+
+
+def test_sin_token_configurado_no_se_expone(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/admin/stats").status_code == 404
+    assert client.get("/admin/stats", headers={"X-Admin-Token": ""}).status_code == 404
+
+
+def test_cabecera_incorrecta_o_ausente(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secreto")
+    assert client.get("/admin/stats").status_code == 403
+    assert client.get("/admin/stats", headers={"X-Admin-Token": "otro"}).status_code == 403
+    assert client.get("/admin/stats", headers={"X-Admin-Token": "señal"}).status_code == 403
+
+
+def test_token_correcto(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secreto")
+    response = client.get("/admin/stats", headers={"X-Admin-Token": "secreto"})
+    assert response.status_code == 200
+    assert response.get_json() == {"sessions": {"hits": 1}}
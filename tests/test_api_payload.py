@@ -0,0 +1,61 @@
+"""Caché append-only de los payloads por proveedor."""
+
+from core.conversation import PAYLOAD_FORMATS, ConversationManager
+from core.summarizer import ExtractiveSummarizer
+
+
+def _conversation(turns=6, **kwargs):
+    conversation = ConversationManager("Ana", "Acme", **kwargs)
+    for index in range(turns):
+        conversation.add_user_message(f"Pregunta {index}")
+        conversation.add_assistant_message(f"Respuesta {index}")
+    return conversation
+
+
+def _fresh(conversation, payload_format, first=1):
+    convert = PAYLOAD_FORMATS[payload_format]
+    return [convert(msg, conversation.agent_name) for msg in conversation.messages[first:]]
+
+
+def test_messages_are_converted_once_and_new_turns_only_append():
+    conversation = _conversation()
+    _, before = conversation.get_api_payload("chat")
+    conversation.add_user_message("Pregunta nueva")
+    _, after = conversation.get_api_payload("chat")
+
+    assert after == _fresh(conversation, "chat")
+    assert all(a is b for a, b in zip(before, after))  # Mismas entradas, sin convertir de nuevo
+    assert len(after) == len(before) + 1
+
+
+def test_each_format_has_its_own_entries():
+    conversation = _conversation()
+    _, transcript = conversation.get_api_payload("transcript")
+    assert transcript == _fresh(conversation, "transcript")
+    assert transcript[0] == "Cliente: Pregunta 0" and transcript[1] == "Ana: Respuesta 0"
+
+
+def test_window_is_a_slice_of_the_cached_entries():
+    conversation = _conversation(turns=10)
+    _, full = conversation.get_api_payload("chat")
+    system, window = conversation.get_api_payload("chat", token_budget=700)
+    assert 0 < len(window) < len(full)
+    assert all(a is b for a, b in zip(window, full[-len(window):]))
+    assert system[-1].content.startswith("[Se omitieron")
+
+
+def test_cache_is_rebuilt_after_compaction_and_rollback():
+    conversation = _conversation(turns=8, summary_trigger_turns=4, summary_keep_turns=2)
+    conversation.get_api_payload("chat")
+    conversation.compact(ExtractiveSummarizer("Ana"))
+    system, history = conversation.get_api_payload("chat")
+    assert system[-1].metadata.get("summary")
+    assert history == _fresh(conversation, "chat", first=2)
+
+    phase, phase_history = conversation.current_phase, list(conversation.phase_history)
+    message = conversation.add_user_message("Mensaje que se deshace")
+    conversation.get_api_payload("chat")
+    conversation.rollback_turn(message, phase, phase_history)
+    _, history = conversation.get_api_payload("chat")
+    assert history == _fresh(conversation, "chat", first=2)
+    assert history[-1]["content"] != "Mensaje que se deshace"
@@ -0,0 +1,57 @@
+"""Turnos asíncronos: varias conversaciones esperan al proveedor a la vez."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from core import response_cache
+from core.agent import SalesAgent
+from core.conversation import MessageRole
+from core.response_cache import ResponseCache
+
+
+def _async_client(delay, requests):
+    async def create(**request):
+        requests.append(request)
+        user = [msg["content"] for msg in request["messages"] if msg["role"] == "user"][-1]
+        await asyncio.sleep(delay)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Eco: " + user))],
+            usage=None,
+        )
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def _agent(monkeypatch, client):
+    agent = SalesAgent(api_provider="groq", api_key="test")
+    monkeypatch.setattr(agent, "_get_async_client", lambda provider=None: client)
+    # El cliente síncrono no debe usarse en el camino async
+    agent.client = None
+    agent.conversation.summary_trigger_turns = None
+    return agent
+
+
+def test_async_turns_overlap_while_waiting_for_the_provider(monkeypatch):
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(max_entries=0))
+    monkeypatch.setattr(SalesAgent, "_local_response", lambda self, turn: None)
+    requests = []
+    client = _async_client(0.3, requests)
+    agents = [_agent(monkeypatch, client) for _ in range(5)]
+
+    async def main():
+        return await asyncio.gather(*(
+            agent.aprocess_message(f"Tengo una tienda número {index}")
+            for index, agent in enumerate(agents)
+        ))
+
+    start = time.perf_counter()
+    responses = asyncio.run(main())
+    # En serie serían 1,5 s
+    assert time.perf_counter() - start < 1.0
+    assert len(requests) == 5
+    assert responses == [f"Eco: Tengo una tienda número {index}" for index in range(5)]
+    for agent, response in zip(agents, responses):
+        history = [msg for msg in agent.conversation.messages if msg.role != MessageRole.SYSTEM]
+        assert [msg.role for msg in history] == [MessageRole.USER, MessageRole.ASSISTANT]
+        assert history[-1].content == response
+        assert agent.conversation.turn_count == 1
@@ -0,0 +1,55 @@
+"""Tipo de negocio de Qorax clasificado por lead, mensaje a mensaje."""
+
+import importlib
+import os
+
+import pytest
+
+CONVERSATION = [
+    {"role": "user", "content": "Hola, quiero informacion"},
+    {"role": "assistant", "content": "Claro, ¿tienes un restaurante o un taller?"},
+    {"role": "user", "content": "Tengo un taller mecanico"},
+    {"role": "user", "content": "Tambien un restaurante pequeño con delivery"},
+]
+
+
+@pytest.fixture(scope="module")
+def qorax():
+    # qorax_ventas crea su cliente de Groq al importarse
+    had_key = "GROQ_API_KEY" in os.environ
+    os.environ.setdefault("GROQ_API_KEY", "test")
+    try:
+        yield importlib.import_module("qorax_ventas")
+    finally:
+        if not had_key:
+            os.environ.pop("GROQ_API_KEY", None)
+
+
+def test_incremental_count_matches_full_scan(qorax):
+    lead = {"business_hits": {}}
+    for message in CONVERSATION:
+        if message["role"] == "user":
+            qorax.update_business_type(lead, message["content"])
+
+    # El mensaje del bot no cuenta ("restaurante o un taller")
+    assert lead["business_hits"] == {"mecanico": 1, "restaurante": 1}
+    assert qorax.get_business_info(lead["business_type"]) == qorax.detect_business_type(CONVERSATION)
+
+
+def test_unknown_business_uses_default_texts(qorax):
+    lead = {}
+    assert qorax.update_business_type(lead, "Hola, buenas tardes") is None
+    assert qorax.get_business_info(lead["business_type"]) == qorax.BUSINESS_TYPES["default"]
+
+
+def test_old_leads_are_backfilled_when_indexed(qorax, monkeypatch):
+    monkeypatch.setattr(qorax, "DATABASE", {
+        "leads": [{"conversation_id": "c1"}],
+        "conversations": {"c1": CONVERSATION},
+    })
+    monkeypatch.setattr(qorax, "LEADS_BY_CONVERSATION", {})
+    qorax.index_leads()
+
+    lead = qorax.get_lead("c1")
+    assert lead["business_hits"] == {"mecanico": 1, "restaurante": 1}
+    assert lead["business_type"] == qorax.classify_business_type(lead["business_hits"])
@@ -0,0 +1,67 @@
+"""Pool de clientes de los SDK: un cliente por (proveedor, API key) para todo el proceso."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core import llm_clients
+from core.agent import SalesAgent
+from core.llm_clients import ClientPool
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """Reemplaza los SDK por clientes falsos y anota cada cliente creado."""
+    created = []
+
+    def create(api_provider, api_key, model=None):
+        created.append((api_provider, api_key))
+        return SimpleNamespace(provider=api_provider, key=api_key)
+
+    def create_async(api_provider, api_key):
+        created.append((f"{api_provider}_async", api_key))
+        return SimpleNamespace(provider=api_provider, key=api_key)
+
+    monkeypatch.setattr(llm_clients, "create_client", create)
+    monkeypatch.setattr(llm_clients, "create_async_client", create_async)
+    monkeypatch.setattr(llm_clients, "_pool", ClientPool())
+    return created
+
+
+def test_agents_share_one_client_per_provider_and_key(created):
+    agents = [SalesAgent(api_provider="groq", api_key="key-a") for _ in range(3)]
+    other = SalesAgent(api_provider="groq", api_key="key-b")
+
+    assert agents[0].client is agents[1].client is agents[2].client
+    assert other.client is not agents[0].client
+    assert created == [("groq", "key-a"), ("groq", "key-b")]
+    stats = llm_clients.get_client_pool().stats()
+    assert (stats["clients"], stats["hits"], stats["misses"]) == (2, 2, 2)
+    assert "key-a" not in repr(stats)
+
+
+def test_async_clients_are_shared_per_event_loop(created):
+    pool = llm_clients.get_client_pool()
+
+    async def fetch():
+        return pool.get_async("openai", "key"), pool.get_async("openai", "key")
+
+    first, again = asyncio.run(fetch())
+    second, _ = asyncio.run(fetch())
+    assert first is again
+    # Cada loop tiene su propio pool HTTP
+    assert second is not first
+    assert created == [("openai_async", "key")] * 2
+
+
+def test_failed_creation_is_not_cached(monkeypatch):
+    pool = ClientPool()
+
+    def broken(api_provider, api_key, model=None):
+        raise ImportError("SDK no instalado")
+
+    monkeypatch.setattr(llm_clients, "create_client", broken)
+    with pytest.raises(ImportError):
+        pool.get("anthropic", "key")
+    assert pool.stats()["clients"] == 0
@@ -0,0 +1,84 @@
+"""Ventana de contexto por presupuesto de tokens y resumen de turnos antiguos."""
+
+import pytest
+
+from core.conversation import OMITTED_TURNS_NOTE, ConversationManager, MessageRole
+from core.summarizer import ExtractiveSummarizer
+from utils.helpers import MESSAGE_TOKEN_OVERHEAD, estimate_tokens
+
+
+def _conversation(turns=12, **kwargs):
+    conversation = ConversationManager("Ana", "Acme", **kwargs)
+    for index in range(turns):
+        conversation.add_user_message(f"Pregunta {index} " + "sobre el agente " * (index % 4))
+        conversation.add_assistant_message(f"Respuesta {index} " + "con detalles " * (index % 5 + 1))
+    return conversation
+
+
+def _expected_first(conversation, budget, reserve):
+    """Misma ventana que _window, recorriendo los turnos uno por uno."""
+    messages = conversation.messages
+    offset = conversation._history_start(messages)
+    starts = [i for i in range(offset, len(messages)) if messages[i].role == MessageRole.USER or i == offset]
+    available = budget - reserve - sum(msg.token_count for msg in messages[:offset])
+    available -= estimate_tokens(OMITTED_TURNS_NOTE) + MESSAGE_TOKEN_OVERHEAD
+    for start in starts:
+        if sum(msg.token_count for msg in messages[start:]) <= available:
+            return start
+    return starts[-1]
+
+
+@pytest.mark.parametrize("budget", [0, 700, 800, 900, 1000, 1200, 5000])
+def test_window_keeps_most_recent_turns_that_fit(budget):
+    conversation = _conversation()
+    window = conversation.get_window(token_budget=budget, reserve_tokens=50)
+    first = _expected_first(conversation, budget, 50)
+
+    history = [msg for msg in window if msg.role != MessageRole.SYSTEM]
+    assert history == conversation.messages[first:]
+    assert history[0].role == MessageRole.USER  # Nunca se corta un turno por la mitad
+    notes = [msg for msg in window if msg.content.startswith("[Se omitieron")]
+    omitted = first - 1
+    assert [msg.content for msg in notes] == ([OMITTED_TURNS_NOTE.format(count=omitted)] if omitted else [])
+
+
+def test_window_follows_new_turns_incrementally():
+    conversation = _conversation(turns=4)
+    conversation.get_window(token_budget=900)
+    for index in range(4, 10):
+        conversation.add_user_message(f"Pregunta {index} " * 3)
+        conversation.add_assistant_message(f"Respuesta {index} " * 6)
+        window = conversation.get_window(token_budget=900)
+        assert [msg for msg in window if msg.role != MessageRole.SYSTEM] == \
+            conversation.messages[_expected_first(conversation, 900, 0):]
+
+
+def test_without_budget_full_history_and_max_turns_limit():
+    conversation = _conversation()
+    assert conversation.get_window() == conversation.messages
+
+    conversation.max_turns = 3
+    window = conversation.get_window()
+    assert window[-6:] == conversation.messages[-6:]
+    assert window[1].content == OMITTED_TURNS_NOTE.format(count=18)
+
+
+def test_current_turn_is_kept_even_over_budget():
+    conversation = _conversation(turns=3)
+    conversation.add_user_message("mensaje muy largo " * 500)
+    window = conversation.get_window(token_budget=100)
+    assert window[-1] is conversation.messages[-1]
+
+
+def test_compaction_replaces_old_turns_with_summary():
+    conversation = _conversation(turns=10, summary_trigger_turns=6, summary_keep_turns=3)
+    recent = conversation.messages[-6:]
+    assert conversation.needs_compaction()
+    assert conversation.compact(ExtractiveSummarizer("Ana"))
+
+    summary = conversation.summary_message
+    assert summary is not None and summary.metadata["user_messages"] == 7
+    assert conversation.messages[-6:] == recent
+    assert not conversation.needs_compaction()
+    # La ventana sigue funcionando sobre el historial compactado
+    assert conversation.get_window(token_budget=5000)[-6:] == recent
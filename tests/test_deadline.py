@@ -0,0 +1,46 @@
+"""Respaldo del motor de reglas cuando el plazo corta la llamada al modelo."""
+
+import threading
+from types import SimpleNamespace
+
+from core import deadline, response_cache
+from core.agent import SalesAgent
+from core.deadline import DeadlinePolicy
+from core.response_cache import ResponseCache
+
+MESSAGE = "Hola, tengo una tienda de ropa online"
+
+
+def _agent(create):
+    agent = SalesAgent(api_provider="groq", api_key="test")
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return agent
+
+
+def test_waiter_inheriting_leader_timeout_gets_rule_engine_reply(monkeypatch):
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache())
+    monkeypatch.setattr(deadline, "_policy", DeadlinePolicy(seconds=30))
+    monkeypatch.setattr(SalesAgent, "_local_response", lambda self, turn: None)
+    cache = response_cache.get_response_cache()
+
+    def leader_create(**request):
+        # Espera a que la otra sesión se sume a esta llamada y vence
+        while cache.stats()["coalesced"] == 0:
+            pass
+        raise TimeoutError("sin respuesta del proveedor")
+
+    def waiter_create(**request):
+        raise AssertionError("quien espera no llama al proveedor")
+
+    leader, waiter = _agent(leader_create), _agent(waiter_create)
+    replies = {}
+    thread = threading.Thread(target=lambda: replies.setdefault("leader", leader.process_message(MESSAGE)))
+    thread.start()
+    while cache.stats()["in_flight"] == 0:
+        pass
+    replies["waiter"] = waiter.process_message(MESSAGE)
+    thread.join()
+
+    assert "problema técnico" in replies["leader"]
+    assert "problema técnico" not in replies["waiter"]
+    assert deadline.get_deadline_policy().stats()["sources"]["agent"]["local_fallbacks"] == 1
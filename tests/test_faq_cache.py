@@ -0,0 +1,51 @@
+"""Caché semántica de preguntas frecuentes: paráfrasis sí, afirmaciones y negaciones no."""
+
+import pytest
+
+from config.faq import build_faq_entries
+from core import faq_cache, rule_router
+from core.agent import SalesAgent
+from core.faq_cache import SemanticFAQCache
+from core.rule_router import RuleRouter
+from core.turn_analysis import analyze_turn
+
+
+@pytest.fixture(scope="module")
+def cache():
+    return SemanticFAQCache(build_faq_entries(), threshold=0.65)
+
+
+@pytest.mark.parametrize("message, name", [
+    ("¿cuánto cobran?", "precio"),
+    ("cuanto me sale", "precio"),
+    ("precios", "precio"),
+    ("se puede usar con whatsapp", "whatsapp"),
+    ("en cuánto tiempo lo tienen listo", "tiempo_implementacion"),
+])
+def test_paraphrase_gets_verified_answer(cache, message, name):
+    match = cache.lookup(message)
+    assert match is not None and match.name == name
+
+
+@pytest.mark.parametrize("message", [
+    "no funciona con whatsapp",
+    "no me interesa el precio",
+    "cuanto cuesta un empleado",
+    "ya tengo whatsapp business",
+])
+def test_statement_or_new_topic_is_not_an_faq(cache, message):
+    assert cache.lookup(message) is None
+
+
+def test_negation_changes_the_vector(cache):
+    assert cache.search("no funciona con whatsapp").score < cache.search("funciona con whatsapp").score
+
+
+def test_agent_skips_faq_on_negative_turn(monkeypatch):
+    monkeypatch.setattr(rule_router, "_router", RuleRouter(max_words=0))
+    # Umbral bajo: solo el filtro de intención negativa evita la respuesta verificada
+    monkeypatch.setattr(faq_cache, "_cache", SemanticFAQCache(build_faq_entries(), threshold=0.01))
+    agent = SalesAgent(api_provider="groq", api_key="test")
+
+    assert agent._local_response(analyze_turn("¿no funciona con whatsapp?")) is None
+    assert agent._local_response(analyze_turn("¿funciona con whatsapp?")).startswith("¡Sí!")
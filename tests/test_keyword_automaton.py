@@ -0,0 +1,46 @@
+"""Autómata Aho-Corasick de palabras clave del perfilador."""
+
+import random
+
+from core.customer_profile import CustomerProfiler, CustomerType, Urgency
+from utils.keyword_automaton import KeywordAutomaton
+
+GROUPS = {
+    ("industry", "tecnologia"): ["app", "software"],
+    ("industry", "legal"): ["abogado"],
+    ("industry", "recursos_humanos"): ["personal"],
+    ("objection", "precio"): ["caro", "muy caro"],
+}
+
+
+def test_keywords_respect_word_boundaries_and_suffixes():
+    automaton = KeywordAutomaton.from_groups(GROUPS)
+    assert automaton.labels("me escribieron por whatsapp") == set()
+    assert automaton.labels("un agente personalizado") == set()
+    assert automaton.labels("somos abogados") == {("industry", "legal")}
+    assert automaton.labels("tenemos una app y es muy caro") == {("industry", "tecnologia"), ("objection", "precio")}
+
+
+def test_overlapping_keywords_are_all_reported():
+    automaton = KeywordAutomaton.from_groups(GROUPS)
+    matches = [(start, end) for start, end, _ in automaton.iter_matches("es muy caro")]
+    assert sorted(matches) == [(3, 11), (7, 11)]
+
+
+def test_substring_mode_matches_like_in_operator():
+    phrases = ["lo voy a pensar", "pensar", "no se", "caro", "a pensar"]
+    automaton = KeywordAutomaton({phrase: [phrase] for phrase in phrases}, word_boundaries=False)
+    rng = random.Random(7)
+    words = ["lo", "voy", "a", "pensar", "no", "se", "caro", "ya", "lo", "pensare"]
+    for _ in range(200):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        assert automaton.labels(text) == {phrase for phrase in phrases if phrase in text}
+
+
+def test_profiler_detects_every_category_in_one_scan():
+    message = "tenemos un negocio familiar, un restaurante; es urgente pero es muy caro"
+    hits = CustomerProfiler.match_keywords(message)
+    assert CustomerProfiler.detect_customer_type(message, hits) == CustomerType.PYME
+    assert CustomerProfiler.detect_industry(message, hits) == "gastronomia"
+    assert CustomerProfiler.detect_urgency(message, hits) == Urgency.HIGH
+    assert CustomerProfiler.detect_objections(message, hits) == ["precio"]
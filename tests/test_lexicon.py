@@ -0,0 +1,63 @@
+"""Registro de léxicos con versión y recarga en caliente."""
+
+import json
+
+import pytest
+
+from config.lexicon import LexiconError, LexiconRegistry, build_snapshot
+
+
+def _write(path, version, words):
+    path.write_text(json.dumps({
+        "version": version,
+        "lexicons": {"profiler": {"categories": {"industry": {"legal": words}}}},
+    }), encoding="utf-8")
+
+
+def test_reload_publishes_new_snapshot_and_keeps_the_old_one_intact(tmp_path):
+    path = tmp_path / "lexicon.json"
+    _write(path, 1, ["abogado"])
+    registry = LexiconRegistry(str(path))
+    before = registry.get("profiler")
+
+    _write(path, 2, ["abogado", "notaría"])
+    assert registry.reload()
+
+    after = registry.get("profiler")
+    assert registry.version == 2
+    assert after.first(after.scan("trabajo en una notaria"), "industry") == "legal"
+    # Quien tomó el léxico anterior sigue con su versión
+    assert before.scan("trabajo en una notaria") == set()
+
+
+def test_invalid_file_keeps_previous_version(tmp_path):
+    path = tmp_path / "lexicon.json"
+    _write(path, 1, ["abogado"])
+    registry = LexiconRegistry(str(path))
+
+    path.write_text('{"version": 2, "lexicons": {"profiler": {}}}', encoding="utf-8")
+    assert not registry.reload()
+    assert registry.version == 1 and "categories" in registry.last_error
+
+    path.write_text("{no es json", encoding="utf-8")
+    assert not registry.reload()
+    assert registry.get("profiler").scan("un abogado") == {("industry", "legal")}
+
+
+def test_reload_if_changed_skips_unchanged_file(tmp_path):
+    path = tmp_path / "lexicon.json"
+    _write(path, 1, ["abogado"])
+    registry = LexiconRegistry(str(path))
+    snapshot = registry.snapshot
+    assert not registry.reload_if_changed()
+    assert registry.snapshot is snapshot
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"version": "uno", "lexicons": {}},
+    {"version": 1, "lexicons": {"x": {"categories": {}, "match": "regex"}}},
+])
+def test_malformed_data_is_rejected(data):
+    with pytest.raises(LexiconError):
+        build_snapshot(data)
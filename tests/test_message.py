@@ -0,0 +1,39 @@
+"""Mensajes como registros compactos (``__slots__``) con la misma interfaz que el dataclass."""
+
+from datetime import datetime
+
+import pytest
+
+from core.conversation import Message, MessageRole
+from utils.helpers import MESSAGE_TOKEN_OVERHEAD, estimate_tokens
+
+
+def test_message_has_no_instance_dict_and_lazy_metadata():
+    message = Message(MessageRole.USER, "Hola")
+    assert not hasattr(message, "__dict__")
+    with pytest.raises(AttributeError):
+        message.extra = 1
+    assert message._metadata is None
+    assert message.to_dict() == {"role": "user", "content": "Hola"}
+
+    message.metadata["usage"] = {"input": 3}
+    assert message.metadata == {"usage": {"input": 3}}
+
+
+def test_timestamp_round_trip_and_equality():
+    moment = datetime(2026, 1, 15, 10, 30, 5)
+    a = Message(MessageRole.ASSISTANT, "Claro", timestamp=moment)
+    b = Message(MessageRole.ASSISTANT, "Claro", timestamp=moment, metadata={})
+    assert a.timestamp == moment
+    assert a == b
+    b.metadata["summary"] = True
+    assert a != b
+    with pytest.raises(TypeError):
+        hash(a)
+
+
+def test_token_count_follows_content_changes():
+    message = Message(MessageRole.USER, "precio")
+    assert message.token_count == estimate_tokens("precio") + MESSAGE_TOKEN_OVERHEAD
+    message.content = "cuanto cuesta el agente de whatsapp"
+    assert message.token_count == estimate_tokens(message.content) + MESSAGE_TOKEN_OVERHEAD
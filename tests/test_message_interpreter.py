@@ -0,0 +1,35 @@
+"""Motor de intenciones y corrección de errores de tipeo."""
+
+import pytest
+
+from core.message_interpreter import INTENT_ENGINE, INTENT_FAMILIES, IntentEngine, UserIntent
+
+EXACT_ENGINE = IntentEngine(INTENT_FAMILIES)
+
+
+@pytest.mark.parametrize("message", [
+    "necesito algo con funciones especificas",
+    "una necesidad muy especifica del negocio",
+    "los costos me preocupan",
+    "Puedo explicarte como funciona",
+])
+def test_valid_word_forms_are_not_corrected(message):
+    analysis = INTENT_ENGINE.analyze(message)
+    exact = EXACT_ENGINE.analyze(message)
+    assert analysis.corrected is None
+    assert (analysis.intents, analysis.selected_option) == (exact.intents, exact.selected_option)
+
+
+def test_especificas_does_not_select_custom_agent():
+    assert INTENT_ENGINE.analyze("funciones especificas").selected_option != 3
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("cuanto es el presio", UserIntent.PRICE_INQUIRY),
+    ("cuanto cueta", UserIntent.PRICE_INQUIRY),
+    ("cuanto tarda la implementasion", UserIntent.TIME_INQUIRY),
+])
+def test_typos_are_still_corrected(message, intent):
+    analysis = INTENT_ENGINE.analyze(message)
+    assert analysis.corrected is not None
+    assert analysis.has(intent)
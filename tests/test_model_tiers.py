@@ -0,0 +1,69 @@
+"""Nivel de modelo por turno: los turnos cortos de las primeras fases van al modelo chico."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from config.settings import PROVIDER_MODEL_TIERS, Settings
+from core import model_tiers, response_cache
+from core.agent import SalesAgent
+from core.conversation import ConversationPhase
+from core.model_tiers import TierPolicy
+from core.response_cache import ResponseCache
+
+SMALL_MODEL, SMALL_TOKENS = PROVIDER_MODEL_TIERS["groq"]["small"]
+LARGE_MODEL, LARGE_TOKENS = PROVIDER_MODEL_TIERS["groq"]["large"]
+
+LONG_MESSAGE = (
+    "Tengo una cadena de cinco tiendas de ropa en tres ciudades y atendemos por WhatsApp, "
+    "Instagram y teléfono; los vendedores no dan abasto en temporada alta y perdemos pedidos "
+    "porque nadie contesta a tiempo por las noches"
+)
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    monkeypatch.setattr(model_tiers, "_policy", TierPolicy(Settings()))
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(max_entries=0))
+    monkeypatch.setattr(SalesAgent, "_local_response", lambda self, turn: None)
+    return []
+
+
+def _agent(requests):
+    def create(**request):
+        requests.append(request)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Cuéntame más"))], usage=None)
+
+    agent = SalesAgent(api_provider="groq", api_key="test")
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    agent.conversation.summary_trigger_turns = None
+    return agent
+
+
+def test_short_early_turn_uses_the_small_model(requests):
+    _agent(requests).process_message("Hola, tengo una tienda de ropa")
+    assert (requests[-1]["model"], requests[-1]["max_tokens"]) == (SMALL_MODEL, SMALL_TOKENS)
+
+
+def test_long_turn_uses_the_large_model(requests):
+    assert len(LONG_MESSAGE.split()) > 25
+    _agent(requests).process_message(LONG_MESSAGE)
+    assert (requests[-1]["model"], requests[-1]["max_tokens"]) == (LARGE_MODEL, LARGE_TOKENS)
+
+
+def test_late_phase_uses_the_large_model(requests):
+    agent = _agent(requests)
+    agent.conversation.transition_phase(ConversationPhase.OBJECTION_HANDLING)
+    agent.conversation.turn_count = 6
+    agent.process_message("Me parece caro")
+    assert requests[-1]["model"] == LARGE_MODEL
+
+
+def test_requests_are_measured_per_tier(requests):
+    agent = _agent(requests)
+    agent.process_message("Hola")
+    agent.process_message(LONG_MESSAGE)
+    tiers = model_tiers.get_tier_policy().stats()["tiers"]
+    assert tiers["groq/small"]["requests"] == 1
+    assert tiers["groq/large"]["requests"] == 1
+    assert tiers["groq/small"]["model"] == SMALL_MODEL
@@ -0,0 +1,28 @@
+"""Orden de las peticiones para la caché de prefijos de los proveedores."""
+
+from core.agent import SalesAgent
+
+
+def _agent():
+    agent = SalesAgent()
+    agent.process_message("Hola, tengo un restaurante")
+    agent.conversation.add_user_message("Quiero automatizar las reservas")  # Turno en curso
+    return agent
+
+
+def test_context_goes_after_history():
+    agent = _agent()
+    context = agent._build_context()
+
+    messages = agent._groq_request()["messages"]
+    assert messages[-1] == {"role": "system", "content": context}
+    assert context not in messages[0]["content"]
+
+    prompt = agent._gemini_prompt()
+    assert prompt.index("Quiero automatizar las reservas") < prompt.index(context)
+
+
+def test_anthropic_breakpoint_only_on_history():
+    request = _agent()._anthropic_request()
+    assert all("cache_control" not in block for block in request["system"])
+    assert request["messages"][-1]["content"][0]["cache_control"] == {"type": "ephemeral"}
@@ -0,0 +1,53 @@
+"""Prompt del sistema por fase: solo las secciones que aplican a la fase actual."""
+
+from core.conversation import (
+    ConversationManager, ConversationPhase, Message, MessageRole, phase_prompt_stats,
+)
+
+
+def _conversation():
+    return ConversationManager("Sofía", "Acme")
+
+
+def test_each_phase_prompt_is_smaller_than_the_full_one():
+    stats = phase_prompt_stats("Sofía", "Acme")
+    assert set(stats["phase_tokens"]) == {phase.value for phase in ConversationPhase}
+    assert all(tokens < stats["full_tokens"] for tokens in stats["phase_tokens"].values())
+    assert stats["saved_ratio"]["descubrimiento"] > 0
+    assert stats["sections"]["identidad"] == "todas"
+
+
+def test_phase_prompt_keeps_only_its_sections():
+    conversation = _conversation()
+    discovery = conversation.system_prompt_message(ConversationPhase.DISCOVERY).content
+    objections = conversation.system_prompt_message(ConversationPhase.OBJECTION_HANDLING).content
+
+    for prompt in (discovery, objections):
+        assert prompt.startswith("Eres Sofía") and "REGLAS DE CONVERSACIÓN" in prompt
+    assert "MANEJO DE OBJECIONES" not in discovery
+    assert "MANEJO DE OBJECIONES" in objections
+
+
+def test_phase_change_swaps_the_system_message():
+    conversation = _conversation()
+    greeting = conversation.messages[0]
+    taken = list(conversation.messages)  # Ventana de una petición ya en curso
+
+    conversation.transition_phase(ConversationPhase.OBJECTION_HANDLING)
+    current = conversation.messages[0]
+    assert current is not greeting and "MANEJO DE OBJECIONES" in current.content
+    assert taken[0] is greeting and "MANEJO DE OBJECIONES" not in greeting.content
+
+    # Volver atrás (turno deshecho) vuelve al prompt de esa fase
+    message = conversation.add_user_message("Es muy caro")
+    conversation.rollback_turn(message, ConversationPhase.GREETING, [])
+    assert conversation.messages[0].content == greeting.content
+
+
+def test_custom_system_prompt_is_left_alone():
+    conversation = _conversation()
+    custom = Message(role=MessageRole.SYSTEM, content="Prompt propio")
+    conversation.messages[0] = custom
+
+    conversation.transition_phase(ConversationPhase.CLOSING)
+    assert conversation.messages[0] is custom
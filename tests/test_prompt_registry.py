@@ -0,0 +1,53 @@
+"""Registro de plantillas de prompts: se renderiza una vez por configuración."""
+
+from core.agent import SalesAgent
+from config.prompts import PromptRegistry
+
+
+def _registry(calls, **kwargs):
+    registry = PromptRegistry(**kwargs)
+
+    def builder(company, products=()):
+        calls.append(company)
+        return f"Eres el asistente de {company}: {', '.join(products)}"
+
+    registry.register("asistente", builder)
+    return registry
+
+
+def test_same_parameters_share_one_rendering():
+    calls = []
+    registry = _registry(calls)
+    config = {"company": "Acme", "products": ["web", "app"]}
+    first = registry.render("asistente", **config)
+    # Un dict igual (otro objeto, otro orden) es la misma configuración
+    second = registry.render("asistente", products=["web", "app"], company="Acme")
+
+    assert first is second and calls == ["Acme"]
+    assert registry.stats()["hits"] == 1
+    assert first.tokens > 0
+
+
+def test_config_change_and_invalidate_render_again():
+    calls = []
+    registry = _registry(calls)
+    registry.render("asistente", company="Acme")
+    registry.render("asistente", company="Otra")
+    registry.invalidate("asistente")
+    registry.render("asistente", company="Acme")
+    assert calls == ["Acme", "Otra", "Acme"]
+
+
+def test_cache_is_bounded_lru():
+    calls = []
+    registry = _registry(calls, max_entries=2)
+    for company in ("A", "B", "A", "C", "A", "B"):
+        registry.render("asistente", company=company)
+    # "B" salió al entrar "C" (era la menos usada); "A" nunca salió
+    assert calls == ["A", "B", "C", "B"]
+    assert registry.stats()["cached"] == 2
+
+
+def test_agents_share_the_system_prompt_string():
+    first, second = SalesAgent(), SalesAgent()
+    assert first.conversation.messages[0].content is second.conversation.messages[0].content
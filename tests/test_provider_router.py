@@ -0,0 +1,72 @@
+"""Router de proveedores: circuit breaker, hedge y failover."""
+
+import asyncio
+import threading
+from collections import Counter
+
+from core.provider_router import ProviderRouter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _half_open_router():
+    clock = Clock()
+    router = ProviderRouter(["a", "b"], failure_threshold=1, open_seconds=10, default_hedge_delay=None, clock=clock)
+    router.record("a", 0.1, ok=False)
+    clock.now = 11
+    assert router.stats()["providers"]["a"]["circuit"] == "half_open"
+    return router
+
+
+def test_half_open_admits_a_single_probe():
+    router = _half_open_router()
+    calls = Counter()
+    probe_started, release = threading.Event(), threading.Event()
+
+    def send(provider):
+        calls[provider] += 1
+        if provider == "a":
+            probe_started.set()
+            release.wait(5)
+        return provider
+
+    results = []
+    probe = threading.Thread(target=lambda: results.append(router.call(send)))
+    probe.start()
+    probe_started.wait(5)
+    others = [threading.Thread(target=lambda: results.append(router.call(send))) for _ in range(8)]
+    for thread in others:
+        thread.start()
+    for thread in others:
+        thread.join()
+    release.set()
+    probe.join()
+
+    assert calls == {"a": 1, "b": 8}
+    assert router.stats()["providers"]["a"]["circuit"] == "closed"
+
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    router = _half_open_router()
+
+    async def send(provider):
+        await asyncio.sleep(5 if provider == "a" else 0)
+        return provider
+
+    async def main():
+        probe = asyncio.ensure_future(router.acall(send))
+        await asyncio.sleep(0.01)
+        assert router.stats()["providers"]["a"]["probing"]
+        assert await router.acall(send) == ("b", "b")
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+    asyncio.run(main())
+    assert not router.stats()["providers"]["a"]["probing"]
+    assert "a" in router.ranked()
@@ -0,0 +1,92 @@
+"""Cola de peticiones con límites de RPM/TPM."""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.llm_clients import TokenUsage
+from core.rate_limiter import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, RateLimitTimeout, RequestScheduler
+
+
+def test_async_waiters_do_not_take_threads_and_leave_queue_on_cancel():
+    scheduler = RequestScheduler(rpm=1, max_wait=60)
+
+    async def main():
+        await scheduler.aacquire(10)  # Se lleva el único saldo del minuto
+        threads = threading.active_count()
+        waiters = [asyncio.ensure_future(scheduler.aacquire(10)) for _ in range(20)]
+        await asyncio.sleep(0.05)
+        assert threading.active_count() == threads
+        assert scheduler.stats()["queue_depth"] == 20
+
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(main())
+    stats = scheduler.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["granted"] == 1
+
+
+def test_async_waiter_is_woken_when_thread_ahead_is_granted():
+    scheduler = RequestScheduler(rpm=2, max_wait=60)
+    scheduler.acquire(10)
+    scheduler.acquire(10)
+    ahead = threading.Thread(target=scheduler.acquire, args=(10, PRIORITY_HIGH))
+    ahead.start()
+    while scheduler.stats()["queue_depth"] == 0:
+        pass
+
+    async def main():
+        behind = asyncio.ensure_future(scheduler.aacquire(10))
+        await asyncio.sleep(0.02)
+        assert not behind.done()
+        with scheduler._cond:
+            scheduler._requests.tokens = 2  # Vuelve el saldo para las dos
+            scheduler._notify()
+        return await asyncio.wait_for(behind, 1)
+
+    assert asyncio.run(main()) < 1
+    ahead.join()
+    assert scheduler.stats()["granted"] == 4
+
+
+def test_higher_priority_is_granted_first():
+    scheduler = RequestScheduler(rpm=3, max_wait=60)
+    granted = []
+
+    async def request(name, priority):
+        await scheduler.aacquire(10, priority)
+        granted.append(name)
+
+    async def main():
+        for _ in range(3):
+            await scheduler.aacquire(10)  # Se acaba el saldo del minuto
+        waiters = []
+        # Llegan en orden inverso a su prioridad
+        for name, priority in (("saludo", PRIORITY_LOW), ("normal", PRIORITY_NORMAL), ("cierre", PRIORITY_HIGH)):
+            waiters.append(asyncio.ensure_future(request(name, priority)))
+            await asyncio.sleep(0.01)
+        with scheduler._cond:
+            scheduler._requests.tokens = 3
+            scheduler._notify()
+        await asyncio.wait_for(asyncio.gather(*waiters), 1)
+
+    asyncio.run(main())
+    assert granted == ["cierre", "normal", "saludo"]
+    assert scheduler.stats()["priorities"]["high"]["granted"] == 1
+
+
+def test_token_budget_waits_and_is_settled_with_real_usage():
+    scheduler = RequestScheduler(tpm=600, max_wait=0.05)
+    scheduler.acquire(500)  # Reserva prompt + max_tokens
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire(300)
+
+    # El proveedor informa que la petición usó bastante menos de lo reservado
+    scheduler.settle(500, TokenUsage(prompt_tokens=80, completion_tokens=20))
+    assert scheduler.acquire(300) < 0.05
+    stats = scheduler.stats()
+    assert (stats["granted"], stats["timeouts"]) == (2, 1)
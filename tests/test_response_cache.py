@@ -0,0 +1,87 @@
+"""Single-flight de la caché de respuestas ante errores y cancelaciones de la líder."""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.response_cache import ResponseCache
+
+
+async def _leader_and_waiter(cache, leader_compute, waiter_compute):
+    leader = asyncio.ensure_future(cache.aget_or_compute("k", leader_compute))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.ensure_future(cache.aget_or_compute("k", waiter_compute))
+    await asyncio.sleep(0.01)
+    return leader, waiter
+
+
+def test_leader_cancelled_does_not_cancel_waiters():
+    cache = ResponseCache()
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "líder"
+
+    async def own():
+        return "propia"
+
+    async def main():
+        leader, waiter = await _leader_and_waiter(cache, slow, own)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == "propia"
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get("k") == "propia"
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    cache = ResponseCache()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "líder"
+
+    async def main():
+        leader, waiter = await _leader_and_waiter(cache, slow, slow)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == "líder"
+    assert cache.get("k") == "líder"
+
+
+def test_leader_error_is_shared_and_not_cached():
+    cache = ResponseCache()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(1)
+        raise RuntimeError("proveedor caído")
+
+    def request(compute):
+        try:
+            cache.get_or_compute("k", compute)
+        except Exception as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=request, args=(failing,))
+    leader.start()
+    started.wait(1)
+    waiter = threading.Thread(target=request, args=(lambda: "propia",))
+    waiter.start()
+    while cache.stats()["coalesced"] == 0:
+        pass
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert [str(e) for e in errors] == ["proveedor caído"] * 2
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get("k") is None
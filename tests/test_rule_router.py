@@ -0,0 +1,70 @@
+"""Turnos que el motor de reglas responde sin llamar al modelo."""
+
+from types import SimpleNamespace
+
+from core import response_cache, rule_router
+from core.agent import SalesAgent
+from core.conversation import ConversationPhase
+from core.response_cache import ResponseCache
+from core.rule_router import RuleRouter
+from core.turn_analysis import analyze_turn
+
+CONTACT_MESSAGE = "alejodandi4@gmail.com y por si necesitas mi numero de telefono aca esta, 3228349585"
+
+
+def test_short_affirmative_in_closing_is_routed():
+    rule = RuleRouter().match(analyze_turn("Sí, me interesa"), ConversationPhase.CLOSING)
+    assert rule is not None and rule.name == "cierre_si"
+
+
+def test_turn_with_contact_data_goes_to_model():
+    router = RuleRouter(max_words=20)
+    assert router.match(analyze_turn(CONTACT_MESSAGE), ConversationPhase.CLOSING) is None
+    assert router.match(analyze_turn("si, mi nit es 900123456"), ConversationPhase.CLOSING) is None
+
+
+def test_turn_with_several_intents_goes_to_model():
+    turn = analyze_turn("No estoy seguro de que funcione")
+    assert len(turn.intents.intents) > 1
+    assert RuleRouter().match(turn, ConversationPhase.CLOSING) is None
+
+
+def test_first_message_with_contact_data_gets_model_reply(monkeypatch):
+    monkeypatch.setattr(rule_router, "_router", RuleRouter(max_words=20))
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(max_entries=0))
+
+    def create(**request):
+        message = SimpleNamespace(content="Respuesta simulada")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    agent = SalesAgent(api_provider="groq", api_key="test")
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    agent.conversation.summary_trigger_turns = None
+    assert agent.process_message(CONTACT_MESSAGE) == "Respuesta simulada"
+
+
+def test_only_provider_calls_count_as_model_turns(monkeypatch):
+    router = RuleRouter(max_words=20)
+    monkeypatch.setattr(rule_router, "_router", router)
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(max_entries=16))
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        message = SimpleNamespace(content="Respuesta simulada")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    def new_agent():
+        agent = SalesAgent(api_provider="groq", api_key="test")
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        agent.conversation.summary_trigger_turns = None
+        return agent
+
+    new_agent().process_message("¿cuánto cobran?")                    # Caché de FAQ
+    new_agent().process_message("Tengo una tienda de ropa en Medellín")  # Modelo
+    new_agent().process_message("Tengo una tienda de ropa en Medellín")  # Caché de respuestas
+
+    stats = router.stats()
+    assert len(calls) == 1
+    assert (stats["llm"], stats["local"], stats["faq"], stats["cache"]) == (1, 2, 1, 1)
+    assert stats["local_ratio"] == round(2 / 3, 4)
@@ -0,0 +1,67 @@
+"""Snapshot binario de sesiones: ida y vuelta sin perder estado."""
+
+import pytest
+
+from core.agent import SalesAgent
+from core.sales_copilot import ClientInfo, SalePhase, SalesCopilot
+from core.session_codec import (
+    SnapshotError, dump_agent, dump_copilot, load_agent, load_copilot,
+)
+
+
+def _demo_agent() -> SalesAgent:
+    agent = SalesAgent(agent_name="Sofía", company_name="Acme")
+    assert agent.demo_mode
+    for text in ("Hola, tengo una tienda de ropa con 12 empleados",
+                 "Quiero vender por internet, ¿cuánto cuesta una web?"):
+        agent.process_message(text)
+    return agent
+
+
+def _state(agent: SalesAgent):
+    conversation = agent.conversation
+    return (
+        [(m.role, m.content) for m in conversation.messages],
+        conversation.current_phase, conversation.phase_history, conversation.turn_count,
+        agent.profiler.get_profile(), agent.demo_mode, agent.agent_name, agent.company_name,
+    )
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_agent_round_trip(compress):
+    agent = _demo_agent()
+    restored = load_agent(dump_agent(agent, compress=compress))
+    assert _state(restored) == _state(agent)
+    assert restored.client is None
+
+
+def test_restored_agent_keeps_talking():
+    restored = load_agent(dump_agent(_demo_agent()))
+    turns = restored.conversation.turn_count
+    assert restored.process_message("Me interesa, ¿cómo seguimos?")
+    assert restored.conversation.turn_count == turns + 1
+
+
+def test_copilot_round_trip():
+    copilot = SalesCopilot(seller_name="Ana", api_provider="groq")
+    copilot.current_phase = SalePhase.OBJECIONES
+    copilot.client = ClientInfo(industry="retail", budget_mentioned=True,
+                                objections=["precio"], contact_info={"email": "a@b.c"})
+    copilot.conversation_history = [{"role": "user", "content": "Es caro"}]
+
+    restored = load_copilot(dump_copilot(copilot))
+    assert restored.seller_name == "Ana"
+    assert restored.current_phase is SalePhase.OBJECIONES
+    assert restored.client == copilot.client
+    assert restored.conversation_history == copilot.conversation_history
+
+
+def test_damaged_snapshot_is_rejected():
+    data = dump_agent(_demo_agent(), compress=True)
+    with pytest.raises(SnapshotError):
+        load_agent(data[:len(data) // 2])
+    with pytest.raises(SnapshotError):
+        load_agent(b"XXX" + data[3:])
+    # Un snapshot de copiloto no se carga como agente
+    with pytest.raises(SnapshotError):
+        load_agent(dump_copilot(SalesCopilot()))
@@ -0,0 +1,152 @@
+"""Almacenes de sesiones: LRU en memoria y snapshots en SQLite (backend compartido y spill)."""
+
+import threading
+import time
+
+import pytest
+
+from core.agent import SalesAgent
+from core.session_store import (
+    AgentCodec, DataCodec, MemorySessionStore, SessionStore, SqliteSessionStore,
+)
+from core.summarizer import summary_worker
+
+
+def _load(store, session_id):
+    agent = store.get(session_id) or SalesAgent()
+    agent.conversation.summary_trigger_turns = 4
+    agent.conversation.summary_keep_turns = 2
+    return agent
+
+
+def _drain_summary_worker():
+    """Espera a que el worker (un solo hilo, en orden) termine lo encolado hasta ahora."""
+    summary_worker._get_executor().submit(lambda: None).result(timeout=5)
+
+
+def test_shared_backend_persists_background_summary(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), AgentCodec())
+    # El worker de resúmenes está ocupado con otra conversación
+    busy = threading.Event()
+    summary_worker._get_executor().submit(busy.wait, 5)
+    try:
+        for index in range(6):
+            agent = _load(store, "visitante")
+            start = time.perf_counter()
+            agent.process_message(f"Mensaje número {index} sobre mi tienda de ropa")
+            store.put("visitante", agent)
+            # Guardar no espera al resumen
+            assert time.perf_counter() - start < 1
+        assert _load(store, "visitante").conversation.summary_message is None
+    finally:
+        busy.set()
+    _drain_summary_worker()
+
+    conversation = _load(store, "visitante").conversation
+    assert conversation.summary_message is not None
+    assert not conversation.needs_compaction()
+    assert store.stats()["write_backs"] >= 1
+
+
+def test_write_back_does_not_overwrite_newer_snapshot(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), AgentCodec())
+    agent = _load(store, "visitante")
+    busy = threading.Event()
+    summary_worker._get_executor().submit(busy.wait, 5)
+    try:
+        for index in range(6):
+            agent.process_message(f"Mensaje número {index} sobre mi tienda de ropa")
+        assert agent.pending_summary() is not None
+        store.put("visitante", agent)
+        # Otro proceso guarda la sesión antes de que termine el resumen
+        newer = SalesAgent()
+        newer.process_message("Hola, empiezo de nuevo")
+        store.put("visitante", newer)
+    finally:
+        busy.set()
+    _drain_summary_worker()
+
+    assert agent.conversation.summary_message is not None
+    stored = store.get("visitante").conversation
+    assert [msg.content for msg in stored.messages[1:]] == [msg.content for msg in newer.conversation.messages[1:]]
+    assert store.stats()["write_backs"] == 0
+
+
+def test_damaged_snapshot_is_discarded_and_counted(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.db"), AgentCodec())
+    store.put_bytes("visitante", b"no es un snapshot")
+
+    assert store.get("visitante") is None
+    assert store.get_bytes("visitante") is None
+    stats = store.stats()
+    assert (stats["errors"], stats["misses"]) == (1, 1)
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(SessionStore):
+        def get(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemorySessionStore(DataCodec(), max_sessions=2, ttl=None)
+    store.put("a", {"turnos": 1})
+    store.put("b", {"turnos": 2})
+    assert store.get("a") == {"turnos": 1}  # "a" pasa a ser la más reciente
+    store.put("c", {"turnos": 3})
+
+    assert store.get("b") is None
+    assert store.get("a") and store.get("c")
+    assert store.stats()["evictions"] == 1
+
+
+def test_memory_store_respects_byte_ceiling():
+    codec = DataCodec()
+    value = {"historial": "x" * 100}
+    store = MemorySessionStore(codec, ttl=None, max_bytes=codec.estimate_size(value) * 2)
+    for session_id in ("a", "b", "c"):
+        store.put(session_id, value)
+
+    assert len(store) == 2 and store.get("a") is None
+    assert store.stats()["estimated_bytes"] <= store.max_bytes
+
+
+def test_memory_store_expires_idle_sessions():
+    clock = _Clock()
+    store = MemorySessionStore(DataCodec(), ttl=60, clock=clock)
+    store.put("a", {"turnos": 1})
+    store.put("b", {"turnos": 1})
+    clock.now = 50
+    assert store.get("b")  # Usarla renueva su TTL
+    clock.now = 100
+
+    assert store.get("a") is None
+    assert store.sweep() == 0 and store.get("b")
+    assert store.stats()["expirations"] == 1
+
+
+def test_spill_restores_evicted_sessions(tmp_path):
+    clock = _Clock()
+    spill = SqliteSessionStore(str(tmp_path / "spill.db"), DataCodec())
+    store = MemorySessionStore(DataCodec(), max_sessions=1, ttl=60, spill=spill, clock=clock)
+    store.put("a", {"turnos": 1})
+    store.put("b", {"turnos": 2})
+    assert len(store) == 1 and len(spill) == 1
+
+    assert store.get("a") == {"turnos": 1}
+    clock.now = 100
+    assert store.sweep() == 1  # "a" vuelve a SQLite por inactividad
+    assert store.get("a") == {"turnos": 1}
+    stats = store.stats()
+    assert (stats["spill_hits"], stats["misses"]) == (2, 0)
@@ -0,0 +1,72 @@
+"""Respuestas en streaming: un turno sin respuesta completa no queda en el historial."""
+
+import asyncio
+from contextlib import closing
+from types import SimpleNamespace
+
+import pytest
+
+from core import response_cache
+from core.agent import SalesAgent
+from core.conversation import MessageRole
+from core.response_cache import ResponseCache
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def _agent(monkeypatch, create):
+    monkeypatch.setattr(response_cache, "_cache", ResponseCache(max_entries=0))
+    monkeypatch.setattr(SalesAgent, "_local_response", lambda self, turn: None)
+    agent = SalesAgent(api_provider="groq", api_key="test")
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    agent.conversation.summary_trigger_turns = None
+    return agent
+
+
+def _roles(agent):
+    return [msg.role for msg in agent.conversation.messages if msg.role != MessageRole.SYSTEM]
+
+
+def test_disconnect_mid_stream_rolls_back_the_turn(monkeypatch):
+    agent = _agent(monkeypatch, lambda **request: iter([_chunk("Hola, "), _chunk("¿en qué te ayudo?")]))
+    with closing(agent.process_message_stream("Hola, tengo una tienda")) as stream:
+        assert next(stream) == "Hola, "
+
+    assert _roles(agent) == []
+    assert agent.conversation.turn_count == 0
+
+    assert "".join(agent.process_message_stream("Hola, tengo una tienda")) == "Hola, ¿en qué te ayudo?"
+    assert _roles(agent) == [MessageRole.USER, MessageRole.ASSISTANT]
+
+
+def test_error_mid_stream_rolls_back_the_turn(monkeypatch):
+    def create(**request):
+        yield _chunk("Hola, ")
+        raise ConnectionError("se cortó la conexión")
+
+    agent = _agent(monkeypatch, create)
+    with pytest.raises(ConnectionError):
+        list(agent.process_message_stream("Hola, tengo una tienda"))
+
+    assert _roles(agent) == []
+    assert agent.conversation.turn_count == 0
+
+
+def test_cancelled_async_turn_is_rolled_back(monkeypatch):
+    agent = _agent(monkeypatch, None)
+
+    async def hang(turn):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(agent, "_agenerate_ai_response", hang)
+
+    async def main():
+        task = asyncio.ensure_future(agent.aprocess_message("Hola, tengo una tienda"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert _roles(agent) == []
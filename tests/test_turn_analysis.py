@@ -0,0 +1,38 @@
+"""Análisis único por turno."""
+
+import pytest
+
+from core.agent import SalesAgent
+from core.conversation import ConversationPhase
+from core.turn_analysis import analyze_turn
+
+
+def test_tax_id_is_not_a_phone():
+    assert analyze_turn("si, mi nit es 900123456").phone is None
+    assert analyze_turn("mi celular es 3228349585").phone == "3228349585"
+
+
+def test_contact_data_does_not_change_phase_or_profile():
+    agent = SalesAgent()
+    agent.process_message("alejodandi4@gmail.com y por si necesitas mi numero de telefono aca esta, 3228349585")
+    assert agent.conversation.current_phase == ConversationPhase.DISCOVERY
+    profile = agent.get_profile()
+    assert profile.email is None and profile.phone is None
+
+
+@pytest.mark.parametrize("message", [
+    "somos 20 personas en la empresa",
+    "queremos desarrollar nuestra marca",
+    "tenemos una consultoria contable",
+])
+def test_inflected_words_do_not_trigger_an_industry(message):
+    assert analyze_turn(message).industry is None
+
+
+@pytest.mark.parametrize("message, industry", [
+    ("necesito un abogao", "legal"),
+    ("tengo un restaurnte", "gastronomia"),
+    ("necesitamos contratar personal", "recursos_humanos"),
+])
+def test_profiler_keywords_and_typos_still_detected(message, industry):
+    assert analyze_turn(message).industry == industry
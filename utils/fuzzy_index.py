@@ -0,0 +1,168 @@
+"""Índice de borrados (estilo SymSpell) para corregir errores de tipeo contra un vocabulario."""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Terminaciones de género, número, plural verbal, infinitivo, adjetivos en -al y pronombres
+# enclíticos: "especificas", "costos", "personas", "desarrollar" o "explicarte" son palabras
+# válidas, no errores de tipeo de "especifico", "costoso", "personal", "desarrollo" o "explicar"
+# (ver FuzzyIndex.is_inflection). Lo usan todos los índices: intenciones y léxicos.
+FUZZY_INFLECTIONS = frozenset({
+    'a', 'o', 'e', 'as', 'os', 'es', 's', 'n', 'ar', 'er', 'ir', 'al',
+    'me', 'te', 'se', 'le', 'les', 'lo', 'los', 'la', 'las', 'nos'
+})
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Distancia Damerau-Levenshtein (transposiciones adyacentes) acotada.
+
+    Devuelve ``max_distance + 1`` en cuanto se sabe que la distancia la supera.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        char_a = a[i - 1]
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            value = previous[j - 1] if char_a == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1] and previous_previous[j - 2] + 1 < value:
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """
+    Corrige palabras mal escritas ("presio" -> "precio") sin recorrer el vocabulario.
+
+    Al construirse guarda todas las variantes de cada término con hasta
+    ``max_distance`` letras borradas. Para buscar una palabra se generan sus
+    propios borrados y se consultan en el diccionario, así el costo depende del
+    largo de la palabra y no del tamaño del vocabulario. Los candidatos se
+    verifican con la distancia real antes de aceptarse.
+
+    Las palabras cortas son demasiado ambiguas ("caso" / "caro", "ahorra" /
+    "ahora"), por eso solo se corrigen tokens de al menos ``min_length`` letras
+    hacia términos de al menos ``min_term_length``, y la distancia 2 solo se
+    permite desde ``long_length`` letras. Las palabras de ``known`` se
+    consideran bien escritas pero nunca son destino de una corrección.
+
+    Con ``inflections`` (terminaciones, ver ``FUZZY_INFLECTIONS``) una palabra que
+    solo difiere de un término en esas terminaciones es otra forma de una
+    palabra válida, no un error de tipeo ("especifica" no es "especifico",
+    "costos" no es "costoso"), y no se corrige hacia él.
+    """
+
+    def __init__(
+        self,
+        terms: Iterable[str],
+        known: Iterable[str] = (),
+        max_distance: int = 2,
+        min_length: int = 5,
+        min_term_length: int = 6,
+        long_length: int = 9,
+        inflections: Iterable[str] = ()
+    ):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.long_length = long_length
+        self.inflections: FrozenSet[str] = frozenset(inflections) | {""}
+        self.vocabulary: Dict[str, int] = {}       # término -> prioridad (orden de inserción)
+        self.known: Set[str] = set(known)
+        self._deletes: Dict[str, List[str]] = {}
+
+        for term in terms:
+            if term in self.vocabulary:
+                continue
+            self.vocabulary[term] = len(self.vocabulary)
+            if len(term) < min_term_length:
+                continue
+            for variant in self._variants(term, self.max_distance):
+                self._deletes.setdefault(variant, []).append(term)
+        self.known.update(self.vocabulary)
+
+    @staticmethod
+    def _variants(word: str, distance: int) -> Set[str]:
+        """La palabra y todas sus variantes con hasta ``distance`` letras borradas."""
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def is_inflection(self, word: str, term: str) -> bool:
+        """
+        True si ``word`` y ``term`` comparten raíz y solo cambian en terminaciones
+        de ``inflections`` ("person-as" / "person-al"; la raíz puede ser más
+        corta que el prefijo común).
+        """
+        if len(self.inflections) == 1:
+            return False
+        common = 0
+        for char_word, char_term in zip(word, term):
+            if char_word != char_term:
+                break
+            common += 1
+        return any(
+            word[stem:] in self.inflections and term[stem:] in self.inflections
+            for stem in range(common, max(common - 2, 0) - 1, -1)
+        )
+
+    def allowed_distance(self, word: str) -> int:
+        """Distancia máxima tolerada según el largo de la palabra."""
+        if len(word) < self.min_length:
+            return 0
+        if len(word) < self.long_length:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def lookup(self, word: str) -> Optional[str]:
+        """Término del vocabulario más cercano a ``word`` o None si no hay uno tolerable."""
+        if word in self.known:
+            return word
+        distance = self.allowed_distance(word)
+        if not distance:
+            return None
+
+        # Un mismo término aparece bajo varios borrados: se verifica una sola vez
+        candidates = set()
+        for variant in self._variants(word, distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best: Optional[str] = None
+        best_key = None
+        for term in candidates:
+            term_distance = edit_distance(word, term, distance)
+            if term_distance > distance or self.is_inflection(word, term):
+                continue
+            key = (term_distance, self.vocabulary[term])
+            if best_key is None or key < best_key:
+                best, best_key = term, key
+        return best
+
+    def correct(self, text: str) -> str:
+        """Reemplaza cada palabra desconocida por su término más cercano (si lo hay)."""
+        def replace(match):
+            word = match.group(0)
+            return self.lookup(word) or word
+        return _TOKEN_RE.sub(replace, text)
+
+    def __len__(self) -> int:
+        """Número de variantes indexadas."""
+        return len(self._deletes)
@@ -1,7 +1,24 @@
 """Funciones de utilidad."""
 
+import hmac
+import json
 import re
-from typing import Optional
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+
+# Letras con tilde/diéresis y su letra base
+ACCENT_MAP = {
+    'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
+    'ü': 'u', 'ñ': 'n'
+}
+
+_ACCENT_TABLE = str.maketrans(ACCENT_MAP)
+
+
+def fold_accents(text: str) -> str:
+    """Pasa a minúsculas y quita tildes (conserva la longitud del texto)."""
+    return text.lower().translate(_ACCENT_TABLE)
 
 
 def clean_text(text: str) -> str:
@@ -93,3 +110,41 @@ def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     if len(text) <= max_length:
         return text
     return text[:max_length - len(suffix)] + suffix
+
+
+# Tokens extra por mensaje (rol y separadores en el formato de chat)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima los tokens de un texto (~4 caracteres por token, sin depender del tokenizador)."""
+    if not text:
+        return 0
+    return (len(text) + 3) // 4
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Formatea un evento Server-Sent Events con ``data`` en JSON (una sola línea)."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def admin_only(view: Callable) -> Callable:
+    """
+    Restringe una vista de Flask a quien mande ``ADMIN_TOKEN`` en la cabecera ``X-Admin-Token``.
+
+    Sin token configurado la vista no existe para nadie (404); con un token
+    equivocado o ausente responde 403.
+    """
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        from flask import abort, request  # Import diferido: solo las apps web usan Flask
+        from config.settings import get_settings
+
+        token = get_settings().admin_token
+        if not token:
+            abort(404)
+        if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), token.encode()):
+            abort(403)
+        return view(*args, **kwargs)
+    return guarded
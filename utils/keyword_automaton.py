@@ -0,0 +1,120 @@
+"""Autómata Aho-Corasick para buscar muchas palabras clave en una sola pasada."""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+# Sufijos tolerados al final de una palabra clave ("abogado" -> "abogados", "consultor" -> "consultora")
+DEFAULT_SUFFIXES = ("", "s", "es", "a", "as")
+
+
+class KeywordAutomaton:
+    """
+    Busca todas las palabras clave de un diccionario recorriendo el texto una vez.
+
+    Cada palabra clave se asocia a una o más etiquetas (p. ej. ``("industry", "legal")``).
+    La búsqueda respeta límites de palabra: la coincidencia debe empezar al inicio de
+    una palabra y terminar al final de una, admitiendo los sufijos de ``suffixes``
+    (plurales y género). Así "app" ya no coincide dentro de "whatsapp" ni "personal"
+    dentro de "personalizado", pero "abogados" sigue activando "abogado".
+
+    Con ``word_boundaries=False`` se comporta como ``kw in text`` (frases sueltas
+    como "lo voy a pensar" que pueden aparecer pegadas a otras palabras).
+    """
+
+    def __init__(
+        self,
+        keywords: Dict[str, Iterable[Hashable]],
+        suffixes: Tuple[str, ...] = DEFAULT_SUFFIXES,
+        word_boundaries: bool = True
+    ):
+        self.suffixes = suffixes
+        self.word_boundaries = word_boundaries
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, frozenset]]] = [[]]  # (longitud, etiquetas)
+
+        for keyword, labels in keywords.items():
+            self._add(keyword, frozenset(labels))
+        self._build_failure_links()
+
+    @classmethod
+    def from_groups(cls, groups: Dict[Hashable, Iterable[str]], **kwargs) -> "KeywordAutomaton":
+        """Construye el autómata a partir de ``{etiqueta: [palabras clave]}``."""
+        keywords: Dict[str, Set[Hashable]] = {}
+        for label, words in groups.items():
+            for word in words:
+                keywords.setdefault(word, set()).add(label)
+        return cls(keywords, **kwargs)
+
+    def _add(self, keyword: str, labels: frozenset):
+        """Inserta una palabra clave en el trie."""
+        if not keyword:
+            return
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._output[node].append((len(keyword), labels))
+
+    def _build_failure_links(self):
+        """Calcula los enlaces de fallo (BFS) y propaga las salidas."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def _ends_word(self, text: str, end: int) -> bool:
+        """Comprueba que tras la coincidencia haya fin de palabra (con sufijos tolerados)."""
+        for suffix in self.suffixes:
+            if suffix and not text.startswith(suffix, end):
+                continue
+            stop = end + len(suffix)
+            if stop >= len(text) or not text[stop].isalnum():
+                return True
+        return False
+
+    def iter_matches(self, text: str):
+        """Genera ``(inicio, fin, etiquetas)`` para cada palabra clave encontrada."""
+        goto, fail, output = self._goto, self._fail, self._output
+        check_boundaries = self.word_boundaries
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+            end = index + 1
+            for length, labels in output[node]:
+                start = end - length
+                if not check_boundaries:
+                    yield start, end, labels
+                    continue
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if not self._ends_word(text, end):
+                    continue
+                yield start, end, labels
+
+    def labels(self, text: str) -> Set[Hashable]:
+        """Devuelve todas las etiquetas activadas por el texto en una sola pasada."""
+        found: Set[Hashable] = set()
+        for _, _, labels in self.iter_matches(text):
+            found |= labels
+        return found
+
+    def __len__(self) -> int:
+        """Número de estados del autómata."""
+        return len(self._goto)
@@ -7,18 +7,33 @@ Incluye una interfaz de chat moderna.
 import sys
 import os
 import uuid
-from flask import Flask, render_template_string, request, jsonify, session
+from contextlib import closing
+from flask import Flask, Response, render_template_string, request, jsonify, session, stream_with_context
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from core.agent import SalesAgent
+from core.conversation import phase_prompt_stats
+from core.session_store import AgentCodec, create_session_store
+from core.llm_clients import get_client_pool, get_usage_stats
+from core.response_cache import get_response_cache
+from core.provider_router import create_provider_router
+from core.rate_limiter import scheduler_stats
+from core.faq_cache import get_faq_cache
+from core.deadline import get_deadline_policy
+from core.model_tiers import get_tier_policy
+from core.rule_router import get_rule_router
 from config.settings import get_settings
+from utils.helpers import admin_only, sse_event
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# Con varios procesos (SESSION_BACKEND=shared) todos deben firmar la cookie con la misma clave
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(24)
 
-# Almacén de agentes por sesión
-agents = {}
+# Almacén de agentes por sesión (acotado, ver core/session_store.py)
+# Router entre los proveedores con API key: latencia, circuit breaker y hedge (None sin keys)
+router = create_provider_router()
+sessions = create_session_store(AgentCodec(router), "web_app")
 
 # Template HTML
 HTML_TEMPLATE = '''
@@ -280,9 +295,47 @@ HTML_TEMPLATE = '''
 
             chatMessages.appendChild(messageDiv);
             chatMessages.scrollTop = chatMessages.scrollHeight;
+            return messageDiv.querySelector('.message-content');
         }
 
-        function sendMessage() {
+        // Lee una respuesta Server-Sent Events (POST) y llama a onDelta con cada fragmento
+        async function streamChat(url, payload, onDelta) {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload),
+            });
+            if (!response.ok || !response.body) throw new Error('HTTP ' + response.status);
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let result = null;
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\\n\\n')) >= 0) {
+                    const raw = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    raw.split('\\n').forEach(line => {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (!data) continue;
+                    const parsed = JSON.parse(data);
+                    if (event === 'error') throw new Error(parsed.error);
+                    if (event === 'done') result = parsed;
+                    else onDelta(parsed.delta);
+                }
+            }
+            return result;
+        }
+
+        async function sendMessage() {
             const message = messageInput.value.trim();
             if (!message) return;
 
@@ -291,24 +344,23 @@ HTML_TEMPLATE = '''
             sendButton.disabled = true;
             typingIndicator.classList.add('active');
 
-            fetch('/api/chat', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ message: message }),
-            })
-            .then(response => response.json())
-            .then(data => {
-                typingIndicator.classList.remove('active');
-                addMessage(data.response, 'agent');
-                sendButton.disabled = false;
-            })
-            .catch(error => {
-                typingIndicator.classList.remove('active');
-                addMessage('Lo siento, hubo un error. Por favor intenta de nuevo.', 'agent');
-                sendButton.disabled = false;
-            });
+            let content = null;
+            let text = '';
+            try {
+                await streamChat('/api/chat/stream', { message: message }, delta => {
+                    if (!content) {
+                        typingIndicator.classList.remove('active');
+                        content = addMessage('', 'agent');
+                    }
+                    text += delta;
+                    content.innerHTML = text.replace(/\\n/g, '<br>');
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                });
+            } catch (error) {
+                if (!content) addMessage('Lo siento, hubo un error. Por favor intenta de nuevo.', 'agent');
+            }
+            typingIndicator.classList.remove('active');
+            sendButton.disabled = false;
         }
 
         sendButton.addEventListener('click', sendMessage);
@@ -332,51 +384,42 @@ HTML_TEMPLATE = '''
 '''
 
 
+def create_agent():
+    """
+    Crea un agente nuevo con el primer proveedor configurado.
+
+    El proveedor del agente es el de prioridad más alta (por defecto Groq,
+    sino Gemini, Anthropic, OpenAI); con el router cada turno puede ir a otro
+    si ese está lento o fallando.
+    """
+    settings = get_settings()
+    for provider in settings.provider_priority:
+        api_key = settings.api_key_for(provider)
+        if api_key:
+            return SalesAgent(
+                agent_name=settings.agent_name,
+                company_name=settings.company_name,
+                api_provider=provider,
+                api_key=api_key,
+                router=router
+            )
+    return SalesAgent(
+        agent_name=settings.agent_name,
+        company_name=settings.company_name
+    )
+
+
 def get_agent():
     """Obtiene o crea un agente para la sesión actual."""
     if 'session_id' not in session:
         session['session_id'] = str(uuid.uuid4())
 
-    session_id = session['session_id']
+    return sessions.get_or_create(session['session_id'], create_agent)
 
-    if session_id not in agents:
-        settings = get_settings()
-        # Usar Groq como prioridad (gratis y rápido), sino Gemini, sino Anthropic, sino OpenAI
-        if settings.groq_api_key:
-            agents[session_id] = SalesAgent(
-                agent_name=settings.agent_name,
-                company_name=settings.company_name,
-                api_provider="groq",
-                api_key=settings.groq_api_key
-            )
-        elif settings.gemini_api_key:
-            agents[session_id] = SalesAgent(
-                agent_name=settings.agent_name,
-                company_name=settings.company_name,
-                api_provider="gemini",
-                api_key=settings.gemini_api_key
-            )
-        elif settings.anthropic_api_key:
-            agents[session_id] = SalesAgent(
-                agent_name=settings.agent_name,
-                company_name=settings.company_name,
-                api_provider="anthropic",
-                api_key=settings.anthropic_api_key
-            )
-        elif settings.openai_api_key:
-            agents[session_id] = SalesAgent(
-                agent_name=settings.agent_name,
-                company_name=settings.company_name,
-                api_provider="openai",
-                api_key=settings.openai_api_key
-            )
-        else:
-            agents[session_id] = SalesAgent(
-                agent_name=settings.agent_name,
-                company_name=settings.company_name
-            )
 
-    return agents[session_id]
+def save_agent(agent):
+    """Guarda el agente de la sesión actual (necesario con el backend compartido)."""
+    sessions.put(session['session_id'], agent)
 
 
 @app.route('/')
@@ -395,6 +438,7 @@ def greeting():
     """Obtiene el saludo inicial."""
     agent = get_agent()
     message = agent.get_greeting()
+    save_agent(agent)
     return jsonify({'message': message})
 
 
@@ -409,6 +453,7 @@ def chat():
 
     agent = get_agent()
     response = agent.process_message(message)
+    save_agent(agent)
 
     return jsonify({
         'response': response,
@@ -416,11 +461,43 @@ def chat():
     })
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Procesa un mensaje y envía la respuesta por Server-Sent Events a medida que se genera."""
+    data = request.json
+    message = data.get('message', '')
+
+    if not message:
+        return jsonify({'error': 'Mensaje vacío'}), 400
+
+    agent = get_agent()
+
+    def generate():
+        # Si el navegador se desconecta, Flask cierra este generador: se cierra también el del
+        # agente, que corta el stream del proveedor (ver core/deadline.py)
+        try:
+            with closing(agent.process_message_stream(message)) as stream:
+                for delta in stream:
+                    yield sse_event({'delta': delta})
+        except Exception as e:
+            yield sse_event({'error': str(e)}, 'error')
+            return
+        save_agent(agent)
+        yield sse_event({'profile': agent.get_profile().to_dict()}, 'done')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/reset', methods=['POST'])
 def reset():
     """Reinicia la conversación."""
     agent = get_agent()
     agent.reset()
+    save_agent(agent)
     return jsonify({'status': 'ok', 'message': 'Conversación reiniciada'})
 
 
@@ -431,6 +508,38 @@ def profile():
     return jsonify(agent.get_profile().to_dict())
 
 
+@app.route('/api/admin/stats')
+@admin_only
+def admin_stats():
+    """
+    Estadísticas internas del proceso (requiere ``ADMIN_TOKEN``, ver utils/helpers.py):
+
+    - ``sessions``: aciertos, fallos y ocupación del almacén de sesiones;
+    - ``providers``: clientes compartidos y tokens usados (incluidos los de caché);
+    - ``router``: latencia, errores, circuito y pedidos de cobertura por proveedor;
+    - ``queue``: colas por proveedor y API key (profundidad, esperas y 429);
+    - ``rules``: turnos del motor de reglas vs el modelo y latencia ahorrada;
+    - ``faq``: preguntas frecuentes respondidas con la caché semántica;
+    - ``tiers``: peticiones, latencia y tokens por proveedor y nivel de modelo;
+    - ``deadlines``: llamadas a tiempo, cortadas por plazo o por desconexión;
+    - ``prompts``: tokens del prompt de cada fase frente al completo;
+    - ``cache``: aciertos, fallos y desalojos de la caché de respuestas.
+    """
+    settings = get_settings()
+    return jsonify({
+        'sessions': sessions.stats(),
+        'providers': dict(get_client_pool().stats(), usage=get_usage_stats().stats()),
+        'router': dict(router.stats(), enabled=True) if router is not None else {'enabled': False},
+        'queue': scheduler_stats(),
+        'rules': get_rule_router().stats(),
+        'faq': get_faq_cache().stats(),
+        'tiers': get_tier_policy().stats(),
+        'deadlines': get_deadline_policy().stats(),
+        'prompts': phase_prompt_stats(settings.agent_name, settings.company_name),
+        'cache': get_response_cache().stats(),
+    })
+
+
 if __name__ == '__main__':
     print("\n" + "=" * 50)
     print("  Agente Vendedor de IA - Versión Web")
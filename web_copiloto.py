@@ -4,18 +4,35 @@
 COPILOTO DE VENTAS - Interfaz Web
 """
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, Response, render_template_string, request, jsonify, session, stream_with_context
 from dotenv import load_dotenv
 import os
+import uuid
+from contextlib import closing
 
 load_dotenv()
 
 from core.sales_copilot import SalesCopilot
+from core.session_store import CopilotCodec, create_session_store
+from core.llm_clients import get_client_pool, get_usage_stats
+from core.deadline import get_deadline_policy
+from utils.helpers import admin_only, sse_event
 
 app = Flask(__name__)
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(24)
 
-# Inicializar copiloto
-copilot = SalesCopilot(api_provider='groq')
+# Un copiloto por vendedor (sesión del navegador), ver core/session_store.py
+copilots = create_session_store(CopilotCodec(), "web_copiloto")
+
+def get_copilot():
+    """Obtiene o crea el copiloto de la sesión actual."""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return copilots.get_or_create(session['session_id'], lambda: SalesCopilot(api_provider='groq'))
+
+def save_copilot(copilot):
+    """Guarda el copiloto de la sesión actual (necesario con el backend compartido)."""
+    copilots.put(session['session_id'], copilot)
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -249,6 +266,41 @@ Que te dijo el cliente?</div>
             div.textContent = text;
             chat.appendChild(div);
             chat.scrollTop = chat.scrollHeight;
+            return div;
+        }
+
+        // Lee una respuesta Server-Sent Events (POST) y llama a onDelta con cada fragmento
+        async function streamChat(url, payload, onDelta) {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            });
+            if (!response.ok || !response.body) throw new Error('HTTP ' + response.status);
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\\n\\n')) >= 0) {
+                    const raw = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    raw.split('\\n').forEach(line => {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (!data) continue;
+                    const parsed = JSON.parse(data);
+                    if (event === 'error') throw new Error(parsed.error);
+                    if (event !== 'done') onDelta(parsed.delta);
+                }
+            }
         }
 
         function showLoading() {
@@ -274,19 +326,20 @@ Que te dijo el cliente?</div>
             sendBtn.disabled = true;
             showLoading();
 
+            let div = null;
             try {
-                const response = await fetch('/chat', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ message: text })
+                await streamChat('/chat/stream', { message: text }, delta => {
+                    if (!div) {
+                        removeLoading();
+                        div = addMessage('', false);
+                    }
+                    div.textContent += delta;
+                    chat.scrollTop = chat.scrollHeight;
                 });
-
-                const data = await response.json();
                 removeLoading();
-                addMessage(data.response, false);
             } catch (error) {
                 removeLoading();
-                addMessage('Error de conexion. Intenta de nuevo.', false);
+                if (!div) addMessage('Error de conexion. Intenta de nuevo.', false);
             }
 
             sendBtn.disabled = false;
@@ -318,18 +371,60 @@ def home():
 def chat():
     data = request.get_json()
     message = data.get('message', '')
+    copilot = get_copilot()
 
     if message.lower() == '/nuevo':
         copilot.reset()
 
     response = copilot.process_input(message)
+    save_copilot(copilot)
     return jsonify({'response': response})
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Igual que /chat, pero envía la respuesta por Server-Sent Events a medida que se genera."""
+    data = request.get_json()
+    message = data.get('message', '')
+    copilot = get_copilot()
+
+    if message.lower() == '/nuevo':
+        copilot.reset()
+
+    def generate():
+        # Si el navegador se desconecta se cierra también el stream del proveedor
+        try:
+            with closing(copilot.process_input_stream(message)) as stream:
+                for delta in stream:
+                    yield sse_event({'delta': delta})
+        except Exception as e:
+            yield sse_event({'error': str(e)}, 'error')
+            return
+        save_copilot(copilot)
+        yield sse_event({}, 'done')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/reset', methods=['POST'])
 def reset():
+    copilot = get_copilot()
     copilot.reset()
+    save_copilot(copilot)
     return jsonify({'status': 'ok'})
 
+@app.route('/admin/stats')
+@admin_only
+def admin_stats():
+    """Sesiones, clientes y tokens por proveedor y plazos (requiere ``ADMIN_TOKEN``)"""
+    return jsonify({
+        'sessions': copilots.stats(),
+        'providers': dict(get_client_pool().stats(), usage=get_usage_stats().stats()),
+        'deadlines': get_deadline_policy().stats(),
+    })
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("  COPILOTO DE VENTAS - Interfaz Web")